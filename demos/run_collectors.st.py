@@ -2,6 +2,7 @@ import streamlit as st
 import datetime as dt
 import os
 from netmanage.run_collectors import collect
+from netmanage.run_collectors import collect_batch
 from netmanage.setup import create_collectors_df
 from netmanage.setup import select_collectors
 from netmanage.setup import select_hostgroups
@@ -67,6 +68,21 @@ else:
 if selected_cols:
     df_collectors = create_collectors_df(collector_select, hostgroup_select)
 
+    # Run the collectors that can be batched in one play per hostgroup. The
+    # batched collectors have no dependencies, so they can be run first.
+    batched = dict()
+    for (ansible_os, hostgroup), group in df_collectors.groupby(
+        ["ansible_os", "hostgroup"], sort=False
+    ):
+        with st.spinner(f"Running batched collectors for {hostgroup}..."):
+            ts = dt.datetime.now()
+            ts = ts.strftime("%Y-%m-%d_%H%M")
+            results = collect_batch(
+                ansible_os, group["collector"].to_list(), hostgroup, ts
+            )
+        for collector, result in results.items():
+            batched[(ansible_os, hostgroup, collector)] = result
+
     for idx, row in df_collectors.iterrows():
         with st.spinner(f'Running Collector {row["collector"].upper()}...'):
             ansible_os = row["ansible_os"]
@@ -74,7 +90,9 @@ if selected_cols:
             collector = row["collector"]
             ts = dt.datetime.now()
             ts = ts.strftime("%Y-%m-%d_%H%M")
-            result = collect(ansible_os, collector, hostgroup, ts)
+            result = batched.get((ansible_os, hostgroup, collector))
+            if result is None:
+                result = collect(ansible_os, collector, hostgroup, ts)
 
             st.write(
                 f"\nRESULT: {ansible_os.upper()} "
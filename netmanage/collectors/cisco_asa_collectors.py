@@ -3,6 +3,8 @@
 import ansible_runner
 import pandas as pd
 
+from netmanage.helpers import command_batching as cbt
+from netmanage.helpers import execution_profiles as ep
 from netmanage.parsers import cisco_asa_parsers as parser
 
 
@@ -102,8 +104,8 @@ def gather_facts(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     return parser.parse_facts(runner)
@@ -167,7 +169,7 @@ def get_interface_ips(
         A DataFrame containing the interfaces and IPs, subnet and network
         addresses related to each IP.
     """
-    cmd = "show interface summary | include Interface|IP address"
+    cmd = cbt.get_command("cisco.asa.asa", "interface_ip_addresses")
     extravars = {
         "username": username,
         "password": password,
@@ -180,8 +182,8 @@ def get_interface_ips(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -212,7 +214,7 @@ def inventory(
     df : pd.DataFrame
         A DataFrame containing the interfaces and IP addresses.
     """
-    cmd = "show inventory"
+    cmd = cbt.get_command("cisco.asa.asa", "hardware_inventory")
     extravars = {
         "username": username,
         "password": password,
@@ -225,8 +227,8 @@ def inventory(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -3,6 +3,9 @@
 import ansible_runner
 import pandas as pd
 
+from netmanage.helpers import command_batching as cbt
+from netmanage.helpers import execution_profiles as ep
+from netmanage.helpers import result_cache as rch
 from netmanage.parsers import cisco_ios_parsers as parser
 
 
@@ -102,8 +105,8 @@ def gather_facts(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     return parser.parse_facts(runner)
@@ -165,15 +168,7 @@ def bgp_neighbors(
     pandas.DataFrame
         A DataFrame containing the BGP neighbor summary.
     """
-    cmd = [
-        "show ip bgp all neighbors ",
-        " include BGP neighbor is",
-        "Member of",
-        "BGP version",
-        "BGP state",
-        "Local host",
-    ]
-    cmd = "|".join(cmd)
+    cmd = cbt.get_command("cisco.ios.ios", "bgp_neighbors")
 
     extravars = {
         "username": username,
@@ -187,8 +182,8 @@ def bgp_neighbors(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -218,20 +213,7 @@ def cdp_neighbors(
     df : pandas.DataFrame
         A DataFrame containing the CDP neighbors.
     """
-    params = [
-        "-------------------------",
-        "Device ID",
-        "Entry address",
-        "IP address",
-        "IPv6 address",
-        "Platform",
-        "Interface",
-        "Duplex",
-        "Management",
-    ]
-    params = "|".join(params)
-
-    cmd = f"show cdp nei detail | include {params}"
+    cmd = cbt.get_command("cisco.ios.ios", "cdp_neighbors")
 
     extravars = {
         "username": username,
@@ -245,8 +227,8 @@ def cdp_neighbors(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -277,7 +259,7 @@ def inventory(
     df : pd.DataFrame
         A DataFrame containing the interfaces and IP addresses.
     """
-    cmd = "show inventory"
+    cmd = cbt.get_command("cisco.ios.ios", "hardware_inventory")
     extravars = {
         "username": username,
         "password": password,
@@ -290,8 +272,8 @@ def inventory(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -354,7 +336,7 @@ def get_vrfs(
         A DataFrame containing VRF information, with columns ["device", "name",
         "vrf_id", "default_rd", "default_vpn_id"].
     """
-    cmd = "show vrf"
+    cmd = cbt.get_command("cisco.ios.ios", "vrfs")
     extravars = {
         "username": username,
         "password": password,
@@ -367,8 +349,8 @@ def get_vrfs(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -398,11 +380,7 @@ def ospf_neighbors(
     pandas.DataFrame
         A DataFrame containing the OSPF neighbors.
     """
-    cmd = [
-        "show ip ospf neighbor detail",
-        "include interface address|area|priority|for|Dead timer",
-    ]
-    cmd = " | ".join(cmd)
+    cmd = cbt.get_command("cisco.ios.ios", "ospf_neighbors")
     extravars = {
         "username": username,
         "password": password,
@@ -415,8 +393,8 @@ def ospf_neighbors(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -430,6 +408,8 @@ def ios_find_uplink_by_ip(
     play_path: str,
     private_data_dir: str,
     subnets: list = [],
+    db_path: str = None,
+    cache_ttl: float = 0,
 ) -> pd.DataFrame:
     """
     Search the hostgroup for a list of subnets (use /32 to search for a
@@ -455,6 +435,13 @@ def ios_find_uplink_by_ip(
         A list of one or more subnets to search for. Use CIDR notation. Use /32
         to search for individual IPs. If no list is provided, the function will
         try to find the uplinks for all IP addresses on the devices.
+    db_path : str, optional
+        The path to the database. If it is provided with 'cache_ttl', the
+        interface IPs and CDP neighbors are read from the collector cache
+        (see helpers/result_cache.py) if they were collected within the TTL.
+    cache_ttl : float, optional
+        The maximum age of cached results, in seconds. Defaults to 0, which
+        disables the cache.
 
     Returns
     -------
@@ -480,13 +467,33 @@ def ios_find_uplink_by_ip(
     - Add an option to specify the VRF (low priority).
     """
     # Get the IP addresses on the devices in the host group
-    df_ip = ios_get_interface_ips(
-        username, password, host_group, play_path, private_data_dir
+    df_ip = rch.cached_call(
+        db_path,
+        cache_ttl,
+        "cisco.ios.ios",
+        host_group,
+        "interface_ip_addresses",
+        ios_get_interface_ips,
+        username,
+        password,
+        host_group,
+        play_path,
+        private_data_dir,
     )
 
     # Get the CDP neighbors for the device
-    df_cdp = ios_get_cdp_neighbors(
-        username, password, host_group, play_path, private_data_dir
+    df_cdp = rch.cached_call(
+        db_path,
+        cache_ttl,
+        "cisco.ios.ios",
+        host_group,
+        "cdp_neighbors",
+        ios_get_cdp_neighbors,
+        username,
+        password,
+        host_group,
+        play_path,
+        private_data_dir,
     )
 
     # Parse results into df
@@ -524,7 +531,7 @@ def ios_get_arp_table(
     df_arp : pd.DataFrame
         The ARP table and vendor OUI as a pandas DataFrame.
     """
-    cmd = "show ip arp"
+    cmd = cbt.get_command("cisco.ios.ios", "arp_table")
     extravars = {
         "username": username,
         "password": password,
@@ -537,8 +544,8 @@ def ios_get_arp_table(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -582,7 +589,7 @@ def ios_get_cam_table(
     if interface:
         cmd = f"show mac address-table interface {interface}"
     else:
-        cmd = "show mac address-table | begin Vlan"
+        cmd = cbt.get_command("cisco.ios.ios", "cam_table")
     extravars = {
         "username": username,
         "password": password,
@@ -595,8 +602,8 @@ def ios_get_cam_table(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -648,8 +655,8 @@ def ios_get_cdp_neighbors(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -688,7 +695,7 @@ def ios_get_interface_descriptions(
         A DataFrame containing the interface descriptions.
     """
     # Get the interface descriptions and add them to df_cam
-    cmd = "show interface description"
+    cmd = cbt.get_command("cisco.ios.ios", "interface_description")
     extravars = {
         "username": username,
         "password": password,
@@ -701,8 +708,8 @@ def ios_get_interface_descriptions(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -733,7 +740,7 @@ def ios_get_interface_ips(
     df : pd.DataFrame
         A DataFrame containing the interfaces and IP addresses.
     """
-    cmd = 'show run | include interface|description|ip address|vrf|encapsulation'
+    cmd = cbt.get_command("cisco.ios.ios", "interface_ip_addresses")
 
     extravars = {
         "username": username,
@@ -747,8 +754,8 @@ def ios_get_interface_ips(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -779,7 +786,7 @@ def ios_get_interface_ipv6_ips(
     df : pd.DataFrame
         A DataFrame containing the interfaces and IP addresses.
     """
-    cmd = "show ipv6 interface | include line protocol|subnet is|VPN Routing"
+    cmd = cbt.get_command("cisco.ios.ios", "interface_ipv6_addresses")
     extravars = {
         "username": username,
         "password": password,
@@ -792,8 +799,8 @@ def ios_get_interface_ipv6_ips(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -825,7 +832,7 @@ def ios_get_vlan_db(
         A DataFrame containing the VLAN database.
     """
     # Get the interface descriptions and add them to df_cam
-    cmd = "show vlan brief | exclude ----"
+    cmd = cbt.get_command("cisco.ios.ios", "vlans")
     extravars = {
         "username": username,
         "password": password,
@@ -838,8 +845,8 @@ def ios_get_vlan_db(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -4,6 +4,9 @@ import ansible_runner
 import pandas as pd
 import sqlite3 as sl
 
+from netmanage.helpers import command_batching as cbt
+from netmanage.helpers import execution_profiles as ep
+from netmanage.helpers import helpers as hp
 from netmanage.parsers import cisco_nxos_parsers as parser
 
 
@@ -54,8 +57,8 @@ def nxos_diff_running_config(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -158,8 +161,8 @@ def gather_facts(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     return parser.nxos_parse_facts(runner)
@@ -235,23 +238,24 @@ def nxos_get_arp_table(
     df_arp : pd.DataFrame
         The ARP table as a pandas DataFrame.
     """
-    cmd = 'show ip arp vrf all | begin "Address         Age"'
-    extravars = {
-        "username": username,
-        "password": password,
-        "host_group": host_group,
-        "commands": cmd,
-    }
-
-    # Execute the pre-checks
-    playbook = f"{play_path}/cisco_nxos_run_commands.yml"
-    runner = ansible_runner.run(
-        private_data_dir=private_data_dir,
-        playbook=playbook,
-        extravars=extravars,
-        suppress_env_files=True,
+    cmd = cbt.get_command("cisco.nxos.nxos", "arp_table")
+    fallback_cmd = cbt.get_command(
+        "cisco.nxos.nxos", "arp_table", fallback=True
     )
 
+    # Execute the command. Devices that do not support JSON output for it run
+    # 'fallback_cmd' instead.
+    runner = cbt.run_commands(
+        "cisco.nxos.nxos",
+        [cmd],
+        username,
+        password,
+        host_group,
+        play_path,
+        private_data_dir,
+        fallback_commands=[fallback_cmd],
+    )[0]
+
     # Parse results into df
     return parser.nxos_parse_arp_table(runner, nm_path)
 
@@ -280,7 +284,7 @@ def nxos_get_cdp_neighbors(
     df : pd.DataFrame
         The CDP neighbors as a pandas DataFrame.
     """
-    cmd = "show cdp nei | json"
+    cmd = cbt.get_command("cisco.nxos.nxos", "cdp_neighbors")
     extravars = {
         "username": username,
         "password": password,
@@ -293,8 +297,8 @@ def nxos_get_cdp_neighbors(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -336,7 +340,7 @@ def nxos_get_fexes_table(
         will be returned.
     """
     # Get selected FEX details
-    cmd = "show fex detail"
+    cmd = cbt.get_command("cisco.nxos.nxos", "fexes_table")
     extravars = {
         "username": username,
         "password": password,
@@ -349,8 +353,8 @@ def nxos_get_fexes_table(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -381,7 +385,7 @@ def nxos_get_bgp_neighbors(
     df_bgp : pd.DataFrame
         The BGP neighbors as a pandas DataFrame.
     """
-    cmd = "show ip bgp summary vrf all"
+    cmd = cbt.get_command("cisco.nxos.nxos", "bgp_neighbors")
     extravars = {
         "username": username,
         "password": password,
@@ -394,8 +398,8 @@ def nxos_get_bgp_neighbors(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -436,25 +440,26 @@ def nxos_get_cam_table(
     df_cam : pd.DataFrame
         The CAM table and vendor OUI as a pandas DataFrame.
     """
-    if interface:
-        cmd = f"show mac address-table interface {interface}"
-    else:
-        cmd = "show mac address-table"
-    extravars = {
-        "username": username,
-        "password": password,
-        "host_group": host_group,
-        "commands": cmd,
-    }
-
-    # Execute the pre-checks
-    playbook = f"{play_path}/cisco_nxos_run_commands.yml"
-    runner = ansible_runner.run(
-        private_data_dir=private_data_dir,
-        playbook=playbook,
-        extravars=extravars,
-        suppress_env_files=True,
+    cmd = cbt.get_command("cisco.nxos.nxos", "cam_table")
+    fallback_cmd = cbt.get_command(
+        "cisco.nxos.nxos", "cam_table", fallback=True
     )
+    if interface:
+        fallback_cmd = f"{fallback_cmd} interface {interface}"
+        cmd = f"{fallback_cmd} | json"
+
+    # Execute the command. Devices that do not support JSON output for it run
+    # 'fallback_cmd' instead.
+    runner = cbt.run_commands(
+        "cisco.nxos.nxos",
+        [cmd],
+        username,
+        password,
+        host_group,
+        play_path,
+        private_data_dir,
+        fallback_commands=[fallback_cmd],
+    )[0]
 
     # Parse results into df
     return parser.nxos_parse_cam_table(runner, nm_path)
@@ -507,8 +512,8 @@ def nxos_get_hostname(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -547,22 +552,23 @@ def nxos_get_interface_descriptions(
         The interface descriptions as a pandas DataFrame.
     """
     # Get the interface descriptions and add them to df_cam
-    cmd = 'show interface description | grep -v "\\-\\-\\-\\-"'
-    extravars = {
-        "username": username,
-        "password": password,
-        "host_group": host_group,
-        "commands": cmd,
-    }
-
-    # Execute 'show interface description' and parse the results
-    playbook = f"{play_path}/cisco_nxos_run_commands.yml"
-    runner = ansible_runner.run(
-        private_data_dir=private_data_dir,
-        playbook=playbook,
-        extravars=extravars,
-        suppress_env_files=True,
+    cmd = cbt.get_command("cisco.nxos.nxos", "interface_description")
+    fallback_cmd = cbt.get_command(
+        "cisco.nxos.nxos", "interface_description", fallback=True
     )
+
+    # Execute the command. Devices that do not support JSON output for it run
+    # 'fallback_cmd' instead.
+    runner = cbt.run_commands(
+        "cisco.nxos.nxos",
+        [cmd],
+        username,
+        password,
+        host_group,
+        play_path,
+        private_data_dir,
+        fallback_commands=[fallback_cmd],
+    )[0]
     # Parse results into df
     return parser.nxos_parse_interface_descriptions(runner)
 
@@ -592,8 +598,7 @@ def nxos_get_interface_ips(
         A DataFrame containing the interfaces and their corresponding IP
         addresses.
     """
-    grep = "Interface status:\\|IP address:\\|IP Interface Status for VRF"
-    cmd = f'show ip interface vrf all | grep "{grep}"'
+    cmd = cbt.get_command("cisco.nxos.nxos", "interface_ip_addresses")
     extravars = {
         "username": username,
         "password": password,
@@ -606,8 +611,8 @@ def nxos_get_interface_ips(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -638,23 +643,24 @@ def nxos_get_interface_status(
     df_inf_status : pd.DataFrame
         The interface statuses as a pandas DataFrame.
     """
-    cmd = 'show interface status | grep -v "\\-\\-\\-"'
-    extravars = {
-        "username": username,
-        "password": password,
-        "host_group": host_group,
-        "commands": cmd,
-    }
-
-    # Execute the pre-checks
-    playbook = f"{play_path}/cisco_nxos_run_commands.yml"
-    runner = ansible_runner.run(
-        private_data_dir=private_data_dir,
-        playbook=playbook,
-        extravars=extravars,
-        suppress_env_files=True,
+    cmd = cbt.get_command("cisco.nxos.nxos", "interface_status")
+    fallback_cmd = cbt.get_command(
+        "cisco.nxos.nxos", "interface_status", fallback=True
     )
 
+    # Execute the command. Devices that do not support JSON output for it run
+    # 'fallback_cmd' instead.
+    runner = cbt.run_commands(
+        "cisco.nxos.nxos",
+        [cmd],
+        username,
+        password,
+        host_group,
+        play_path,
+        private_data_dir,
+        fallback_commands=[fallback_cmd],
+    )[0]
+
     # Parse results into df
     return parser.nxos_parse_interface_status(runner)
 
@@ -677,8 +683,7 @@ def nxos_get_interface_summary(db_path: str) -> pd.DataFrame:
     # Get the interface statuses, descriptions and cam table
     con = sl.connect(db_path)
     table = "nxos_interface_status"
-    df_ts = pd.read_sql(f"select distinct timestamp from {table}", con)
-    ts = df_ts["timestamp"].to_list()[-1]
+    ts = hp.get_latest_timestamp(db_path, table)
     df_inf = pd.read_sql(f'select * from {table} where timestamp = "{ts}"', con)
 
     # Parse results into df
@@ -718,8 +723,8 @@ def nxos_get_inventory(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -750,7 +755,7 @@ def nxos_get_lldp_neighbors(
     df : pd.DataFrame
         The LLDP neighbors as a pandas DataFrame.
     """
-    cmd = "show lldp nei | json"
+    cmd = cbt.get_command("cisco.nxos.nxos", "lldp_neighbors")
     extravars = {
         "username": username,
         "password": password,
@@ -763,8 +768,8 @@ def nxos_get_lldp_neighbors(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -808,8 +813,8 @@ def nxos_get_logs(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -841,23 +846,24 @@ def nxos_get_port_channel_data(
     df_po_data : pd.DataFrame
         The port-channel data as a pandas DataFrame.
     """
-    cmd = "show port-channel database"
-    extravars = {
-        "username": username,
-        "password": password,
-        "host_group": host_group,
-        "commands": cmd,
-    }
-
-    # Execute the pre-checks
-    playbook = f"{play_path}/cisco_nxos_run_commands.yml"
-    runner = ansible_runner.run(
-        private_data_dir=private_data_dir,
-        playbook=playbook,
-        extravars=extravars,
-        suppress_env_files=True,
+    cmd = cbt.get_command("cisco.nxos.nxos", "port_channel_data")
+    fallback_cmd = cbt.get_command(
+        "cisco.nxos.nxos", "port_channel_data", fallback=True
     )
 
+    # Execute the command. Devices that do not support JSON output for it run
+    # 'fallback_cmd' instead.
+    runner = cbt.run_commands(
+        "cisco.nxos.nxos",
+        [cmd],
+        username,
+        password,
+        host_group,
+        play_path,
+        private_data_dir,
+        fallback_commands=[fallback_cmd],
+    )[0]
+
     # Parse results into df
     return parser.nxos_parse_port_channel_data(runner)
 
@@ -886,24 +892,25 @@ def nxos_get_vlan_db(
     df_vlans : pd.DataFrame
         The VLAN database as a pandas DataFrame.
     """
-    cmd = 'show vlan brief | grep "Status    Ports\\|active\\|suspend\\|shut"'
-    extravars = {
-        "username": username,
-        "password": password,
-        "host_group": host_group,
-        "ansible_command_timeout": "240",
-        "commands": cmd,
-    }
-
-    # Execute the pre-checks
-    playbook = f"{play_path}/cisco_nxos_run_commands.yml"
-    runner = ansible_runner.run(
-        private_data_dir=private_data_dir,
-        playbook=playbook,
-        extravars=extravars,
-        suppress_env_files=True,
+    cmd = cbt.get_command("cisco.nxos.nxos", "vlans")
+    fallback_cmd = cbt.get_command(
+        "cisco.nxos.nxos", "vlans", fallback=True
     )
 
+    # Execute the command. Devices that do not support JSON output for it run
+    # 'fallback_cmd' instead.
+    runner = cbt.run_commands(
+        "cisco.nxos.nxos",
+        [cmd],
+        username,
+        password,
+        host_group,
+        play_path,
+        private_data_dir,
+        fallback_commands=[fallback_cmd],
+        timeout=240,
+    )[0]
+
     # Parse results into df
     return parser.nxos_parse_vlan_db(runner)
 
@@ -932,23 +939,24 @@ def nxos_get_vpc_state(
     df_vpc_state : pd.DataFrame
         The VPC state information as a pandas DataFrame.
     """
-    cmd = 'show vpc brief | begin "vPC domain id" | end "vPC Peer-link status"'
-    extravars = {
-        "username": username,
-        "password": password,
-        "host_group": host_group,
-        "commands": cmd,
-    }
-
-    # Execute the pre-checks
-    playbook = f"{play_path}/cisco_nxos_run_commands.yml"
-    runner = ansible_runner.run(
-        private_data_dir=private_data_dir,
-        playbook=playbook,
-        extravars=extravars,
-        suppress_env_files=True,
+    cmd = cbt.get_command("cisco.nxos.nxos", "vpc_state")
+    fallback_cmd = cbt.get_command(
+        "cisco.nxos.nxos", "vpc_state", fallback=True
     )
 
+    # Execute the command. Devices that do not support JSON output for it run
+    # 'fallback_cmd' instead.
+    runner = cbt.run_commands(
+        "cisco.nxos.nxos",
+        [cmd],
+        username,
+        password,
+        host_group,
+        play_path,
+        private_data_dir,
+        fallback_commands=[fallback_cmd],
+    )[0]
+
     # Parse results into df
     return parser.nxos_parse_vpc_state(runner)
 
@@ -977,7 +985,7 @@ def nxos_get_vrfs(
     df_vrfs : pd.DataFrame
         A DataFrame containing the VRFs.
     """
-    cmd = "show vrf detail"
+    cmd = cbt.get_command("cisco.nxos.nxos", "vrfs")
     extravars = {
         "username": username,
         "password": password,
@@ -990,8 +998,8 @@ def nxos_get_vrfs(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
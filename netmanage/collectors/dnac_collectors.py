@@ -3,6 +3,7 @@
 import dnacentersdk
 import pandas as pd
 import sys
+from netmanage.helpers import columnar as cb
 
 
 def create_api_object(base_url: str,
@@ -86,20 +87,13 @@ def devices_inventory(base_url: str,
     else:
         devices = dnac.devices.get_device_list()
 
-    # Create a dictionary called 'df_data', and add all of the keys from
-    # 'devices' to it. The value of each key will be a list.
-    df_data = dict()
-    for item in devices['response']:
-        for key in item:
-            df_data[key] = list()
-
-    # Populate 'df_data' with the values from 'devices'.
-    for item in devices['response']:
-        for key, value in item.items():
-            df_data[key].append(value)
+    # Add the devices to the columns of the DataFrame. Devices that do not
+    # have all of the keys have None for the missing columns.
+    builder = cb.ColumnBuilder()
+    builder.add_many(devices['response'])
 
     # Create the DataFrame and return it.
-    df = pd.DataFrame.from_dict(df_data)
+    df = builder.to_frame()
     return df
 
 
@@ -153,13 +147,11 @@ def devices_modules(base_url: str,
         df_devices = df_devices[df_devices['platformId'].
                                 str.contains('|'.join(platform_ids))]
 
-    # Create two lists. 'data' holds the modules for each device. 'df_data'
-    # will contain the formatted data that is used to create the DataFrame.
-    # It is not ideal to iterate over the responses twice, but it is necessary
-    # since the DNAC API does not always return the same keys for each module
-    # in its response.
-    data = list()
-    df_data = dict()
+    # The DNAC API does not always return the same keys for each module, so
+    # the modules are added to a ColumnBuilder, which creates the columns as
+    # they are found. The 'platformId', 'hostname' and 'deviceId' columns
+    # are created first, so they are at the beginning of the DataFrame.
+    builder = cb.ColumnBuilder(['platformId', 'hostname', 'deviceId'])
 
     # Iterate over the devices, getting the module details for each one.
     dnac = create_api_object(base_url, username, password, verify=verify)
@@ -168,34 +160,13 @@ def devices_modules(base_url: str,
         platform_id = row['platformId']
         _id = row['id']
         response = dnac.devices.get_modules(_id)['response']
-        for module in response:
-            # Store the module along with the associated hostname and deviceId
-            # in 'data'.
-            module['platformId'] = platform_id
-            module['hostname'] = hostname
-            module['deviceId'] = _id
-            data.append(module)
-
-            # Iterate over the keys in 'module'. If the key does not exist in
-            # 'df_data' then add it.
-            for key in module:
-                if not df_data.get(key):
-                    df_data[key] = list()
-
-    # Iterate over the list of modules inside 'data', adding them to 'df_data'.
-    for module in data:
-        for key in df_data:
-            df_data[key].append(module.get(key))
-
-    # Create the DataFrame, then move the 'hostname' and 'deviceId' columns to
-    # the beginning of the DataFrame.
-    df = pd.DataFrame.from_dict(df_data)
-    if len(df) > 0:
-        to_move = ['platformId', 'hostname', 'deviceId']
-        columns = df.columns.to_list()
-        for column in to_move:
-            columns.remove(column)
-        new_column_order = to_move + columns
-        df = df[new_column_order]
+        # Add the modules along with the associated hostname and deviceId.
+        builder.add_many(response,
+                         platformId=platform_id,
+                         hostname=hostname,
+                         deviceId=_id)
+
+    # Create the DataFrame.
+    df = builder.to_frame()
 
     return df
@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 
 import ansible_runner
-import ast
 import pandas as pd
 import requests
 from netmanage import run_collectors as rc
+from netmanage.helpers import columnar as cb
+from netmanage.helpers import command_records as cr
+from netmanage.helpers import execution_profiles as ep
 from netmanage.helpers import f5_helpers as f5h
+from netmanage.helpers import f5_rest as f5r
 from netmanage.helpers import helpers as hp
+from netmanage.helpers import result_cache as rch
+from netmanage.helpers import text_templates as tt
 from netmanage.parsers import f5_parsers as f5p
 
 
@@ -17,7 +22,9 @@ def build_pool_table(username: str,
                      private_data_dir: str,
                      db_path: str,
                      timestamp: str,
-                     validate_certs: bool = True) -> pd.DataFrame:
+                     validate_certs: bool = True,
+                     cache_ttl: float = 0,
+                     engine: str = 'ansible') -> pd.DataFrame:
     '''
     Creates a custom table that contains the F5 pools, associated VIPs (if
     applicable), and pool members (if applicable).
@@ -40,6 +47,15 @@ def build_pool_table(username: str,
         The timestamp for the table.
     validate_certs : bool, optional
         Whether to validate SSL certificates. Defaults to True.
+    cache_ttl : float, optional
+        The maximum age, in seconds, of the pools and members in the collector
+        cache (see helpers/result_cache.py). If they were collected within the
+        TTL, the devices are not polled again. Defaults to 0, which disables
+        the cache.
+    engine : str, optional
+        The engine that collects the pools and members. 'ansible' (the
+        default) runs the playbook with ansible-runner. 'rest' queries the
+        iControl REST API (see helpers/f5_rest.py).
 
     Returns
     -------
@@ -49,11 +65,18 @@ def build_pool_table(username: str,
     # TODO: Optimize this so the table is only built for any device in the
     #       hostgroup that does not exist in the table (or if the table is not
     #       yet present)
-    df_pools = get_pools_and_members(username,
-                                     password,
-                                     host_group,
-                                     play_path,
-                                     private_data_dir)
+    df_pools = rch.cached_call(db_path,
+                               cache_ttl,
+                               'bigip',
+                               host_group,
+                               'pools_and_members',
+                               get_pools_and_members,
+                               username,
+                               password,
+                               host_group,
+                               play_path,
+                               private_data_dir,
+                               engine=engine)
 
     rc.add_to_db('f5_pool_summary',
                  df_pools,
@@ -93,40 +116,10 @@ def convert_tmsh_output_to_dict(in_data: str):
 
     Notes
     -----
-    F5 'tmsh list' output is close enough to a Python dictionary or JSON to be
-    confusing, but in reality it is neither. However, it does follow certain
-    rules.
-
-    Rule 1: After the first line, the maximum number of elements is 2.
-
-    Rule 2: If more than two words are in a line, then the second element will
-            be wrapped in quotes. (e.g., 'vendor "F5 NETWORKS INC.")
-
-    Rule 3: If a line contains a single word, then it is a member of an array.
-
-    Rule 4: If a line contains a single word followed by '{ }', then '{ }'
-            indicates an empty array.
-
-    By combining these rules, we can create a relatively simple parser that
-    will convert the output to a Python dictionary. It works like this:
-
-    1. The rules listed above are used to format each line of the output into
-       a form that is a valid part of a Python dictionary. For example, the
-       line 'net vlan VLAN1 {' becomes, '"net vlan VLAN1": {'.
-
-    2. Each line is added to a list.
-
-    3. Any additional formatting is completed.
-
-    4. The list is joined to create a string.
-
-    5. A simple string.replace() inserts any commas that are missing between a
-       '}' and a '"'. (It was easier to do it this way than to embed the logic
-       inside the parser.)
-
-    6. Formatting is finalized.
-
-    7. ast.literal_eval is used to convert 'out' into a dictionary.
+    The output is parsed in a single pass by
+    'f5_parsers.iter_tmsh_objects', which describes the rules of the
+    format. Collectors that parse large outputs should iterate over the
+    objects instead of converting the whole output.
 
     Examples
     ----------
@@ -147,84 +140,7 @@ def convert_tmsh_output_to_dict(in_data: str):
 >>> assert type(output) == dict()
 
     '''
-    # Convert the data to a list and strip all spaces.
-    in_data = [_.strip() for _ in in_data.split('\n')]
-
-    # Create a list to store each line of the formatted data. Begin the list
-    # with a '{'.
-    out = ['{']
-
-    for line in in_data:
-        # Format lines that look like the following:
-        # 'net interface mgmt {'
-        # 'net self BIGIQ {'
-        # 'net vlan SERVERS {'
-        if len(line.split('{')) > 1 and '}' not in line:
-            line = line.replace(' {', '": {')
-            line = f'"{line}'
-
-        # Format lines that look like the following:
-        # 'fwd-mode l3'
-        # 'vendor "F5 NETWORKS INC."'
-        # 'module-description "F5 Qualified Optic"'
-        # 'tcp:ssh'
-        # 'default'
-        if '{' not in line and '}' not in line:
-            if len(line.split()) > 1:
-                if '"' in line:
-                    line = line.split('"')
-                    line = list(filter(None, line))
-                    line = [_.strip() for _ in line]
-                else:
-                    line = line.split()
-                line = [f'"{_}"' for _ in line]
-                line = ': '.join(line)
-                line = f'{line},'
-            else:
-                line = f'"{line}",'
-
-        # Format lines that look like the following:
-        # '2.0 { }'
-        elif '{' in line and '}' in line:
-            line = f'"{line.split()[0]}": [],'
-
-        out.append(line)
-
-    # Additional formatting needs to be done, so create a dictionary to store
-    # the line numbers that require updates. Each key will be the line number
-    # and the value will be the formatted line.
-    replacements = dict()
-
-    counter = 0
-    for line in out:
-        # Check each line to find out if it is a member of an array. If it is,
-        # then do the following:
-        # 1. Convert the leading or trailing '{' or '}' to a '[' or ']'.
-        # 2. Insert a comma so ast.literal_eval can convert it to a list item.
-        if '{' in line:
-            if len(out[counter+1].split()) == 1:
-                replacements[counter] = line.replace('{', '[')
-        if '}' in line:
-            if len(out[counter-1].split()) == 1:
-                if '}' not in out[counter-1]:
-                    replacements[counter] = line.replace('}', '],')
-        counter += 1
-
-    # Update 'out' with the data from 'replacements'.
-    for key, value in replacements.items():
-        out[key] = value
-
-    # Add a trailing '}' to 'out'.
-    out.append('}')
-
-    # Convert 'out' to a string.
-    out = ''.join(out)
-
-    # Add a comma between '}' and '".
-    out = out.replace('}"', '},"')
-
-    # Convert 'out' to a dictionary
-    out = ast.literal_eval(out)
+    out = f5p.parse_tmsh_list(in_data)
 
     return out
 
@@ -235,7 +151,8 @@ def get_arp_table(username: str,
                   nm_path: str,
                   play_path: str,
                   private_data_dir: str,
-                  validate_certs: bool = True) -> pd.DataFrame:
+                  validate_certs: bool = True,
+                  engine: str = 'ansible') -> pd.DataFrame:
     '''
     Get the ARP table on F5 LTMs.
 
@@ -255,47 +172,62 @@ def get_arp_table(username: str,
         The path to the Ansible private data directory.
     validate_certs : bool, optional
         Whether to validate SSL certificates. Defaults to True.
+    engine : str, optional
+        The engine that collects the data. 'ansible' (the default) runs the
+        playbook with ansible-runner. 'rest' queries the iControl REST API
+        (see helpers/f5_rest.py).
 
     Returns
     -------
     df : pd.DataFrame
         A Pandas DataFrame containing the ARP table.
     '''
-    extravars = {'username': username,
-                 'password': password,
-                 'host_group': host_group,
-                 'command': r'show net arp | grep -v "\\-\\-\\-\\-\|Net::Arp"'}
+    if engine == 'rest':
+        records = f5r.get_records(host_group,
+                                  ['/mgmt/tm/net/arp/stats'],
+                                  username,
+                                  password,
+                                  private_data_dir,
+                                  verify=validate_certs)
+        df = tt.parse_output(records, f5p.REST_ARP_TABLE).astype(str)
+    else:
+        extravars = {
+            'username': username,
+            'password': password,
+            'host_group': host_group,
+            'command': r'show net arp | grep -v "\\-\\-\\-\\-\|Net::Arp"'}
 
-    if not validate_certs:
-        extravars['validate_certs'] = 'no'
+        if not validate_certs:
+            extravars['validate_certs'] = 'no'
 
-    playbook = f'{play_path}/f5_run_adhoc_command.yml'
+        playbook = f'{play_path}/f5_run_adhoc_command.yml'
 
-    runner = ansible_runner.run(private_data_dir=private_data_dir,
-                                playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
+        runner = ansible_runner.run(
+            private_data_dir=private_data_dir,
+            playbook=playbook,
+            suppress_env_files=True,
+            **ep.get_runner_kwargs(host_group, extravars))
 
-    # Create a list to store the ARP data for `df`.
-    df_data = list()
+        # Create a list to store the ARP data for `df`.
+        df_data = list()
 
-    for event in runner.events:
-        if event['event'] == 'runner_on_ok':
-            event_data = event['event_data']
-            device = event_data['remote_addr']
+        for event in runner.events:
+            if event['event'] == 'runner_on_ok':
+                event_data = event['event_data']
+                device = event_data['remote_addr']
 
-            output = event_data['res']['stdout_lines'][0]
+                output = event_data['res']['stdout_lines'][0]
 
-            # Create the dataframe columns.
-            columns = ['device'] + output[0].split()
+                # Create the dataframe columns.
+                columns = ['device'] + output[0].split()
 
-            # Parse the output and add it to `df_data`
-            for line in output[1:]:
-                line = [device] + line.split()
-                df_data.append(line)
+                # Parse the output and add it to `df_data`
+                for line in output[1:]:
+                    line = [device] + line.split()
+                    df_data.append(line)
 
-    # Create `df`.
-    df = pd.DataFrame(df_data, columns=columns).astype(str)
+        # Create `df`.
+        df = pd.DataFrame(df_data, columns=columns).astype(str)
 
     # Get the MAC OUIs and add them to `df`
     df_macs = hp.find_mac_vendors(df['HWaddress'], nm_path)
@@ -370,21 +302,15 @@ def get_f5_logs(username: str,
         logs = "Failed to decode JSON: " + response.text
         success = False
 
-    # Tokenize the logs, add them to 'df_data', and create a DataFrame.
+    # Tokenize the logs, add them to 'builder', and create a DataFrame.
+    builder = cb.ColumnBuilder()
     if success:
-        df_data = dict()
         logs = logs.split('\n')
         logs = list(filter(None, logs))
         for msg in logs[1:]:
-            msg = f5p.tokenize_f5_log(msg)
-            for key, value in msg.items():
-                try:
-                    df_data[key].append(value)
-                except KeyError:
-                    df_data[key] = list()
-                    df_data[key].append(value)
+            builder.add(f5p.tokenize_f5_log(msg))
 
-    df = pd.DataFrame(df_data)
+    df = builder.to_frame()
 
     return df
 
@@ -394,7 +320,8 @@ def get_self_ips(username: str,
                  host_group: str,
                  play_path: str,
                  private_data_dir: str,
-                 validate_certs: bool = True) -> pd.DataFrame:
+                 validate_certs: bool = True,
+                 engine: str = 'ansible') -> pd.DataFrame:
     '''
     Get the self IPs on F5 LTMs.
 
@@ -412,84 +339,64 @@ def get_self_ips(username: str,
         The path to the Ansible private data directory.
     validate_certs : bool, optional
         Whether to validate SSL certificates. Defaults to True.
+    engine : str, optional
+        The engine that collects the data. 'ansible' (the default) runs the
+        playbook with ansible-runner. 'rest' queries the iControl REST API
+        (see helpers/f5_rest.py).
 
     Returns
     -------
     df : pd.DataFrame
         A Pandas DataFrame containing the self IPs.
     '''
-    extravars = {'username': username,
-                 'password': password,
-                 'host_group': host_group,
-                 'command': 'list net self recursive /*/*'}
-
-    if not validate_certs:
-        extravars['validate_certs'] = 'no'
-
-    playbook = f'{play_path}/f5_run_adhoc_command.yml'
-
-    runner = ansible_runner.run(private_data_dir=private_data_dir,
-                                playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
-
-    # Create a dictionary to store each self IP.
-    data = dict()
-
-    # Create a dictionary to store the data for `df`
-    df_data = dict()
-
-    for event in runner.events:
-        if event['event'] == 'runner_on_ok':
-            event_data = event['event_data']
-            device = event_data['remote_addr']
-            data[device] = list()
-            output = event_data['res']['stdout_lines'][0]
-
-            # Parse the output and add it to `data``
-            counter = 0
-            for line in output:
-                if line[:8] == 'net self':
-                    block = list()
-                    pos = counter
-                    while output[pos][0] != '}':
-                        block.append(output[pos])
-                        pos += 1
-                    block.append('}')
-
-                    # Convert the block to a dictionary then flatten it.
-                    # pprint(block)
-                    block = '\n'.join(block)
-                    block = convert_tmsh_output_to_dict(block)
-
-                    for key, value in block.items():
-                        self_name = key.split()[-1]
-                        value['name'] = self_name
-
-                    # Add the device name to `value`, then add `block` to
-                    # `data`.
-                    value['device'] = device
-                    data[device].append(value)
-
-                    # Add each key in `block` to `df_data`.
-                    for key in value:
-                        if not df_data.get(key):
-                            df_data[key] = list()
-
-                counter += 1
-
-    # Iterate over `data`, adding the values to `df_data`.
-    for key, value in data.items():
-        for item in value:
-            for k in df_data:
-                df_data[k].append(item.get(k))
+    # Create the columns for `df`. `device` is the first column.
+    builder = cb.ColumnBuilder(['device'])
+
+    if engine == 'rest':
+        records = f5r.get_records(host_group,
+                                  ['/mgmt/tm/net/self'],
+                                  username,
+                                  password,
+                                  private_data_dir,
+                                  verify=validate_certs)
+        # The properties are converted to their tmsh names, so the columns
+        # are the same as the Ansible engine's.
+        for device, data in cr.iter_command_output(records):
+            for path, value in f5p.iter_rest_objects(data):
+                value['name'] = path
+                builder.add(value, device=device)
+    else:
+        extravars = {'username': username,
+                     'password': password,
+                     'host_group': host_group,
+                     'command': 'list net self recursive /*/*'}
+
+        if not validate_certs:
+            extravars['validate_certs'] = 'no'
+
+        playbook = f'{play_path}/f5_run_adhoc_command.yml'
+
+        runner = ansible_runner.run(
+            private_data_dir=private_data_dir,
+            playbook=playbook,
+            suppress_env_files=True,
+            **ep.get_runner_kwargs(host_group, extravars))
+
+        for event in runner.events:
+            if event['event'] == 'runner_on_ok':
+                event_data = event['event_data']
+                device = event_data['remote_addr']
+                output = event_data['res']['stdout_lines'][0]
+
+                # Parse the output and add each self IP to `builder`, with
+                # the device name.
+                for key, value in f5p.iter_tmsh_objects(output):
+                    if key[:8] == 'net self':
+                        value['name'] = key.split()[-1]
+                        builder.add(value, device=device)
 
     # Create `df`.
-    df = pd.DataFrame.from_dict(df_data).astype(str)
-
-    # Make `device` the first column, then return `df`.
-    col_1 = df.pop('device')
-    df.insert(0, 'device', col_1)
+    df = builder.to_frame().astype(str)
 
     # Add the subnets, network IPs, and broadcast IPs.
     addresses = df['address'].to_list()
@@ -558,8 +465,8 @@ def get_interface_descriptions(username: str,
     playbook = f'{play_path}/f5_get_interface_description.yml'
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
+                                suppress_env_files=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
     # Create a list to store the rows for the dataframe
     df_data = list()
@@ -626,8 +533,8 @@ def get_interface_status(username: str,
     playbook = f'{play_path}/f5_get_interface_status.yml'
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
+                                suppress_env_files=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
     # Parse the output and add it to 'data'
     df_data = list()
@@ -737,13 +644,13 @@ def get_node_availability(username: str,
     playbook = f'{play_path}/f5_get_node_availability.yml'
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
+                                suppress_env_files=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
-    df_data = dict()
-    df_data['device'] = list()
-    df_data['partition'] = list()
-    df_data['node'] = list()
+    # Create the columns for the dataframe. The columns for the node details
+    # are created as they are found, since nodes do not always have the same
+    # keys.
+    builder = cb.ColumnBuilder(['device', 'partition', 'node'])
 
     for event in runner.events:
         if event['event'] == 'runner_on_ok':
@@ -753,24 +660,9 @@ def get_node_availability(username: str,
 
             output = event_data['res']['stdout_lines'][0]
 
-            # Create remaining dictionary structure for 'df_data'
-            for line in output:
+            for pos, line in enumerate(output):
                 if 'ltm node' in line and '{' in line:
-                    pos = output.index(line)
-                    while '}' not in output[pos+1]:
-                        key = output[pos+1].split()[0]
-                        if not df_data.get(key):
-                            df_data[key] = list()
-                        pos += 1
-                break
-
-            # Populate 'df_data'
-            for line in output:
-                if 'ltm node' in line and '{' in line:
-                    # Add the device to 'df_data'
-                    df_data['device'].append(device)
-
-                    # Set the partition and node and add them to 'df_data'
+                    # Set the partition and node
                     if '/' not in line:
                         partition = 'Common'
                         node = line.split()[2]
@@ -778,20 +670,22 @@ def get_node_availability(username: str,
                         partition = line.split()[2].split('/')[1]
                         node = line.split()[2].split('/')[-1]
 
-                    # Add the node to 'df_data'
-                    df_data['partition'].append(partition)
-                    df_data['node'].append(node)
-
-                    # Add the node details to 'df_data'
-                    pos = output.index(line)
+                    # Get the node details
+                    details = dict()
                     while '}' not in output[pos+1]:
                         key = output[pos+1].split()[0]
                         value = ' '.join(output[pos+1].split()[1:])
-                        df_data[key].append(value)
+                        details[key] = value
                         pos += 1
 
+                    # Add the node to 'builder'
+                    builder.add(details,
+                                device=device,
+                                partition=partition,
+                                node=node)
+
     # Create the dataframe
-    df_nodes = pd.DataFrame.from_dict(df_data)
+    df_nodes = builder.to_frame()
 
     return df_nodes
 
@@ -801,7 +695,8 @@ def get_pool_availability(username: str,
                           host_group: str,
                           play_path: str,
                           private_data_dir: str,
-                          validate_certs: bool = True) -> pd.DataFrame:
+                          validate_certs: bool = True,
+                          engine: str = 'ansible') -> pd.DataFrame:
     '''
     Gets pool availability from F5 LTMs.
 
@@ -819,12 +714,25 @@ def get_pool_availability(username: str,
         Path to the Ansible private data directory.
     validate_certs : bool, optional
         Whether to validate SSL certificates. Defaults to True.
+    engine : str, optional
+        The engine that collects the data. 'ansible' (the default) runs the
+        playbook with ansible-runner. 'rest' queries the iControl REST API
+        (see helpers/f5_rest.py).
 
     Returns
     -------
     df_pools : pd.DataFrame
         The pool availability and associated data.
     '''
+    if engine == 'rest':
+        records = f5r.get_records(host_group,
+                                  ['/mgmt/tm/ltm/pool/stats'],
+                                  username,
+                                  password,
+                                  private_data_dir,
+                                  verify=validate_certs)
+        return tt.parse_output(records, f5p.REST_POOL_AVAILABILITY)
+
     extravars = {'username': username,
                  'password': password,
                  'host_group': host_group}
@@ -836,101 +744,11 @@ def get_pool_availability(username: str,
     playbook = f'{play_path}/f5_get_pool_availability.yml'
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
-
-    # Parse the pool data and add it to two dictionaries--'pools' and
-    # 'pool_members'. The data from those dictionaries will be used to
-    # create the two dataframes
-    pools = dict()
-
-    for event in runner.events:
-        if event['event'] == 'runner_on_ok':
-            event_data = event['event_data']
-
-            device = event_data['remote_addr']
-            pools[device] = dict()
-
-            # The playbook runs two commands--show net interface and show net
-            # trunk. The output of both commands is in the same event.
-            output = event_data['res']['stdout_lines'][0]
-
-            pos = 0
-            for line in output:
-                if 'Ltm::Pool:' in line:
-                    if '/' in line:
-                        pool = line.split('/')[-1].strip()
-                        partition = line.split('/')[1].split('/')[-1]
-                    else:
-                        pool = line.split()[-1].strip()
-                        partition = 'Common'
-                    pools[device][pool] = dict()
-                    pools[device][pool]['device'] = device
-                    pools[device][pool]['partition'] = partition
-                    counter = pos+1
-                    while 'Ltm::Pool:' not in output[counter]:
-                        _ = output[counter]
-                        if _.split()[0] != '|':
-                            if 'Availability' in _:
-                                pools[device][pool]['availability'] = \
-                                    _.split()[-1]
-                            if 'State' in _:
-                                pools[device][pool]['state'] = _.split()[-1]
-                            if 'Reason' in _:
-                                pools[device][pool]['reason'] = \
-                                    _.split(':')[-1].strip()
-                            if 'Minimum Active Members' in _:
-                                pools[device][pool]['minimum_active'] = \
-                                    _.split()[-1]
-                            if 'Current Active Members' in _:
-                                pools[device][pool]['current_active'] = \
-                                    _.split()[-1]
-                            if 'Available Members' in _:
-                                pools[device][pool]['available'] = \
-                                    _.split()[-1]
-                            if 'Total Members' in _:
-                                pools[device][pool]['total'] = _.split()[-1]
-                        counter += 1
-                        if counter == len(output):
-                            break
-                pos += 1
-
-    df_pools_data = list()
-    for key, value in pools.items():
-        for k, v in value.items():
-            pool = k
-            device = v['device']
-            available = v['available']
-            availability = v['availability']
-            current_active = v['current_active']
-            minimum_active = v['minimum_active']
-            partition = v['partition']
-            reason = v['reason']
-            state = v['state']
-            total = v['total']
-            df_pools_data.append([device,
-                                  partition,
-                                  pool,
-                                  availability,
-                                  state,
-                                  total,
-                                  available,
-                                  current_active,
-                                  minimum_active,
-                                  reason])
-
-    cols = ['device',
-            'partition',
-            'pool',
-            'availability',
-            'state',
-            'total',
-            'avail',
-            'cur',
-            'min',
-            'reason']
+                                suppress_env_files=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
-    df_pools = pd.DataFrame(data=df_pools_data, columns=cols)
+    # Parse the output. There is one row for each pool.
+    df_pools = tt.parse_output(runner, f5p.LTM_POOL_AVAILABILITY)
 
     return df_pools
 
@@ -940,7 +758,8 @@ def get_pool_data(username: str,
                   host_group: str,
                   play_path: str,
                   private_data_dir: str,
-                  validate_certs: bool = False) -> pd.DataFrame:
+                  validate_certs: bool = False,
+                  engine: str = 'ansible') -> pd.DataFrame:
     '''
     Gets F5 pool and pool members.
 
@@ -958,12 +777,31 @@ def get_pool_data(username: str,
         Path to the Ansible private data directory.
     validate_certs : bool, optional
         Whether to validate SSL certificates. Defaults to False.
+    engine : str, optional
+        The engine that collects the data. 'ansible' (the default) runs the
+        playbook with ansible-runner. 'rest' queries the iControl REST API
+        (see helpers/f5_rest.py).
 
     Returns
     -------
     df_pools : pd.DataFrame
         The F5 pools and members.
     '''
+    if engine == 'rest':
+        df_pools = get_pools_and_members(username,
+                                         password,
+                                         host_group,
+                                         play_path,
+                                         private_data_dir,
+                                         validate_certs=validate_certs,
+                                         engine=engine)
+        # Add the port of each member, like the Ansible engine.
+        members = df_pools['member'].to_list()
+        df_pools.insert(4,
+                        'member_port',
+                        [_.split(':')[-1] if _ else str() for _ in members])
+        return df_pools
+
     extravars = {'username': username,
                  'password': password,
                  'host_group': host_group}
@@ -975,9 +813,9 @@ def get_pool_data(username: str,
     playbook = f'{play_path}/f5_get_pool_data.yml'
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
                                 suppress_env_files=True,
-                                quiet=True)
+                                quiet=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
     df_data = list()
 
@@ -1047,7 +885,8 @@ def get_pool_member_availability(username: str,
                                  host_group: str,
                                  play_path: str,
                                  private_data_dir: str,
-                                 validate_certs: bool = True) -> pd.DataFrame:
+                                 validate_certs: bool = True,
+                                 engine: str = 'ansible') -> pd.DataFrame:
     '''
     Gets F5 pool member availability from F5 LTMs.
 
@@ -1065,12 +904,26 @@ def get_pool_member_availability(username: str,
         Path to the Ansible private data directory.
     validate_certs : bool, optional
         Whether to validate SSL certificates. Defaults to True.
+    engine : str, optional
+        The engine that collects the data. 'ansible' (the default) runs the
+        playbook with ansible-runner. 'rest' queries the iControl REST API
+        (see helpers/f5_rest.py).
 
     Returns
     -------
     df_members : pd.DataFrame
         The pool availability and associated data.
     '''
+    if engine == 'rest':
+        records = f5r.get_records(
+            host_group,
+            ['/mgmt/tm/ltm/pool/members/stats'],
+            username,
+            password,
+            private_data_dir,
+            verify=validate_certs)
+        return tt.parse_output(records, f5p.REST_POOL_MEMBER_AVAILABILITY)
+
     # Get the interface statuses
     extravars = {'username': username,
                  'password': password,
@@ -1083,59 +936,11 @@ def get_pool_member_availability(username: str,
     playbook = f'{play_path}/f5_get_pool_member_availability.yml'
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
-
-    df_data = list()
-    # df_dict = dict()
-
-    for event in runner.events:
-        if event['event'] == 'runner_on_ok':
-            event_data = event['event_data']
-
-            device = event_data['remote_addr']
-            # df_dict[device] = dict()
-
-            output = event_data['res']['stdout_lines'][0]
-            pos = 0
-            for line in output:
-                if 'Ltm::Pool:' in line:
-                    # TODO: Separate partition from pool name.
-                    if '/' in line:
-                        name = line.split('/')
-                        partition = name[1].strip()
-                        pool = name[-1].strip()
-                    else:
-                        pool = line.split()[-1].strip()
-                        partition = 'Common'
-
-                    # df_dict[device][pool] = dict()
-                    counter = pos+1
-                    while 'Ltm::Pool:' not in output[counter]:
-                        _ = output[counter]
-                        if _.split()[0] == '|':
-                            if 'Ltm::Pool Member:' in _:
-                                member = _.split()[-1]
-                            if 'Availability' in _:
-                                availability = _.split()[-1]
-                                df_data.append([device,
-                                                partition,
-                                                pool,
-                                                member,
-                                                availability])
-                        counter += 1
-                        if counter == len(output):
-                            break
-
-                pos += 1
-
-    cols = ['device',
-            'partition',
-            'pool_name',
-            'pool_member',
-            'pool_member_state']
+                                suppress_env_files=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
-    df_members = pd.DataFrame(data=df_data, columns=cols)
+    # Parse the output. There is one row for each pool member.
+    df_members = tt.parse_output(runner, f5p.LTM_POOL_MEMBER_AVAILABILITY)
 
     return df_members
 
@@ -1145,7 +950,8 @@ def get_pools_and_members(username: str,
                           host_group: str,
                           play_path: str,
                           private_data_dir: str,
-                          validate_certs: bool = False) -> pd.DataFrame:
+                          validate_certs: bool = False,
+                          engine: str = 'ansible') -> pd.DataFrame:
     '''
     Gets F5 pools and members.
 
@@ -1163,12 +969,26 @@ def get_pools_and_members(username: str,
         Path to the Ansible private data directory.
     validate_certs : bool, optional
         Whether to validate SSL certificates. Defaults to False.
+    engine : str, optional
+        The engine that collects the data. 'ansible' (the default) runs the
+        playbook with ansible-runner. 'rest' queries the iControl REST API
+        (see helpers/f5_rest.py).
 
     Returns
     -------
     df_pools : pd.DataFrame
         The F5 pools and members.
     '''
+    if engine == 'rest':
+        records = f5r.get_records(
+            host_group,
+            ['/mgmt/tm/ltm/pool?expandSubcollections=true'],
+            username,
+            password,
+            private_data_dir,
+            verify=validate_certs)
+        return tt.parse_output(records, f5p.REST_POOL_MEMBERS)
+
     extravars = {'username': username,
                  'password': password,
                  'host_group': host_group}
@@ -1180,60 +1000,13 @@ def get_pools_and_members(username: str,
     playbook = f'{play_path}/f5_get_pools_and_members.yml'
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
                                 suppress_env_files=True,
-                                quiet=True)
-
-    df_data = dict()
-    df_data['device'] = list()
-    df_data['partition'] = list()
-    df_data['pool'] = list()
-    df_data['member'] = list()
-    df_data['address'] = list()
-
-    for event in runner.events:
-        if event['event'] == 'runner_on_ok':
-            event_data = event['event_data']
-
-            device = event_data['remote_addr']
-
-            output = event_data['res']['stdout_lines'][0]
-
-            for line in output:
-                if 'ltm pool ' in line:
-                    pos = output.index(line)+1
-                    if '/' in line:
-                        name = line.split()[-1]
-                        partition = name.split('/')[1]
-                        pool = name.split('/')[-1]
-                    else:
-                        partition = 'Common'
-                        pool = line.split()[-1]
+                                quiet=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
-                    addresses = False
-
-                    if pos < len(output):
-                        while 'ltm pool ' not in output[pos]:
-                            if 'address' in output[pos]:
-                                addresses = True
-                                df_data['device'].append(device)
-                                df_data['partition'].append(partition)
-                                df_data['pool'].append(pool)
-                                member = output[pos-1].split()[0]
-                                address = output[pos].split()[-1]
-                                df_data['member'].append(member)
-                                df_data['address'].append(address)
-                            pos += 1
-                            if pos == len(output):
-                                break
-                    if not addresses:
-                        df_data['device'].append(device)
-                        df_data['partition'].append(partition)
-                        df_data['pool'].append(pool)
-                        df_data['member'].append(str())
-                        df_data['address'].append(str())
-
-    df_pools = pd.DataFrame.from_dict(df_data)
+    # Parse the output. There is one row for each pool member. Pools without
+    # members have an empty member and address.
+    df_pools = tt.parse_output(runner, f5p.LTM_POOL_MEMBERS)
     return df_pools
 
 
@@ -1279,8 +1052,8 @@ def get_timezone(username: str,
 
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
+                                suppress_env_files=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
     df_data = dict()
     df_data['device'] = list()
@@ -1310,7 +1083,8 @@ def get_vip_availability(username: str,
                          host_group: str,
                          play_path: str,
                          private_data_dir: str,
-                         validate_certs: bool = True) -> pd.DataFrame:
+                         validate_certs: bool = True,
+                         engine: str = 'ansible') -> pd.DataFrame:
     '''
     Gets VIP availability from F5 LTMs.
 
@@ -1328,82 +1102,54 @@ def get_vip_availability(username: str,
         Path to the Ansible private data directory.
     validate_certs : bool, optional
         Whether to validate SSL certificates. Defaults to True.
+    engine : str, optional
+        The engine that collects the data. 'ansible' (the default) runs the
+        playbook with ansible-runner. 'rest' queries the iControl REST API
+        (see helpers/f5_rest.py).
 
     Returns
     -------
     df_vips : pd.DataFrame
         The VIP availability and associated data.
     '''
-    # Get the interface statuses
-    extravars = {'username': username,
-                 'password': password,
-                 'host_group': host_group}
-
-    if not validate_certs:
-        extravars['validate_certs'] = "no"
-
-    # Execute the pre-checks
-    playbook = f'{play_path}/f5_get_vip_availability_and_destination.yml'
-    runner = ansible_runner.run(private_data_dir=private_data_dir,
-                                playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True,
-                                quiet=True)
-
-    df_data = list()
-
-    for event in runner.events:
-        if event['event'] == 'runner_on_ok':
-            event_data = event['event_data']
-
-            device = event_data['remote_addr']
-            # pools[device] = dict()
-
-            output = event_data['res']['stdout_lines'][0]
-            pos = 0
-            for line in output:
-                if 'Ltm::Virtual Server:' in line:
-                    if '/' in line:
-                        vip = line.split('/')[-1]
-                        partition = line.split('/')[1].split('/')[-1]
-                    else:
-                        vip = line.split()[-1]
-                        partition = 'Common'
-                    counter = pos+1
-                    while 'Ltm::Virtual Server:' not in output[counter]:
-                        _ = output[counter]
-                        if 'Availability' in _:
-                            availability = _.split()[-1]
-                        if 'State' in _:
-                            state = _.split()[-1]
-                        if 'Reason' in _:
-                            reason = _.split(':')[-1].strip()
-                        if 'Destination' in _:
-                            destination = _.split()[-1].split(':')[0]
-                            port = _.split()[-1].split(':')[-1]
-                        counter += 1
-                        if counter == len(output):
-                            break
-                    df_data.append([device,
-                                    partition,
-                                    vip,
-                                    destination,
-                                    port,
-                                    availability,
-                                    state,
-                                    reason])
-                pos += 1
-
-    cols = ['device',
-            'partition',
-            'vip',
-            'destination',
-            'port',
-            'availability',
-            'state',
-            'reason']
-
-    df_vips = pd.DataFrame(data=df_data, columns=cols)
+    if engine == 'rest':
+        records = f5r.get_records(host_group,
+                                  ['/mgmt/tm/ltm/virtual/stats'],
+                                  username,
+                                  password,
+                                  private_data_dir,
+                                  verify=validate_certs)
+        df_vips = tt.parse_output(records, f5p.REST_VIRTUAL_AVAILABILITY)
+        # Remove the partition from the destinations (E.g.,
+        # '/Common/10.0.0.1:443'), since tmsh does not show it.
+        df_vips['destination'] = [
+            _.split('/')[-1] if isinstance(_, str) else _
+            for _ in df_vips['destination'].to_list()]
+    else:
+        # Get the interface statuses
+        extravars = {'username': username,
+                     'password': password,
+                     'host_group': host_group}
+
+        if not validate_certs:
+            extravars['validate_certs'] = "no"
+
+        # Execute the pre-checks
+        playbook = f'{play_path}/f5_get_vip_availability_and_destination.yml'
+        runner = ansible_runner.run(
+            private_data_dir=private_data_dir,
+            playbook=playbook,
+            suppress_env_files=True,
+            quiet=True,
+            **ep.get_runner_kwargs(host_group, extravars))
+
+        # Parse the output. There is one row for each VIP.
+        df_vips = tt.parse_output(runner, f5p.LTM_VIRTUAL_AVAILABILITY)
+
+    # Split the destinations into the address and port.
+    destinations = [str(_) for _ in df_vips['destination'].to_list()]
+    df_vips['destination'] = [_.split(':')[0] for _ in destinations]
+    df_vips.insert(4, 'port', [_.split(':')[-1] for _ in destinations])
 
     return df_vips
 
@@ -1484,9 +1230,9 @@ def get_vip_summary(username: str,
     playbook = f'{play_path}/f5_get_vip_summary.yml'
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
                                 suppress_env_files=True,
-                                quiet=True)
+                                quiet=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
     df_data = dict()
     df_data['device'] = list()
@@ -1599,8 +1345,8 @@ def get_vlan_db(username: str,
     playbook = f'{play_path}/f5_get_vlan_database.yml'
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
+                                suppress_env_files=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
     df_data = list()
 
@@ -1646,7 +1392,8 @@ def get_vlans(username: str,
               host_group: str,
               play_path: str,
               private_data_dir: str,
-              validate_certs: bool = True) -> pd.DataFrame:
+              validate_certs: bool = True,
+              engine: str = 'ansible') -> pd.DataFrame:
     '''
     Gets the VLANs on F5 LTMs.
 
@@ -1664,81 +1411,70 @@ def get_vlans(username: str,
         The path to the Ansible private data directory.
     validate_certs : bool, optional:
         Whether to validate SSL certificates. Defaults to True.
+    engine : str, optional
+        The engine that collects the data. 'ansible' (the default) runs the
+        playbook with ansible-runner. 'rest' queries the iControl REST API
+        (see helpers/f5_rest.py).
 
     Returns
     -------
     df : pd.DataFrame
         A Pandas DataFrame containing the VLANs.
     '''
-    commands = [
-        'list net vlan /*/*',
-        'show net vlan /*/*'
-    ]
-
-    extravars = {'username': username,
-                 'password': password,
-                 'host_group': host_group,
-                 'commands': commands}
-
-    if not validate_certs:
-        extravars['validate_certs'] = 'no'
-
-    playbook = f'{play_path}/f5_run_adhoc_commands.yml'
-
-    runner = ansible_runner.run(private_data_dir=private_data_dir,
-                                playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
-
-    # Create a dictionary to store each self IP.
-    data = dict()
-
-    # Create a dictionary to store the data for `df`
-    df_data = dict()
-
-    for event in runner.events:
-        if event['event'] == 'runner_on_ok':
-            event_data = event['event_data']
-            device = event_data['remote_addr']
-            data[device] = list()
-            outputs = event_data['res']['stdout_lines']
-
-            # Parse the output of 'list net vlan /*/*' and add it to df_data.
-            output = outputs[0]
-
-            counter = 0
-            for line in output:
-                if line[:8] == 'net vlan':
-                    block = list()
-                    pos = counter
-                    while output[pos][0] != '}':
-                        block.append(output[pos])
-                        pos += 1
-                    block.append('}')
-
-                    # Convert the block to a dictionary then flatten it.
-                    block = '\n'.join(block)
-                    block = convert_tmsh_output_to_dict(block)
-
-                    for key, value in block.items():
-                        self_name = key.split()[-1]
-                        value['name'] = self_name
-
-                    # Add the device name to `value`, then add the contents of
-                    # 'block' to 'df_data'.
-                    value['device'] = device
-                    data[self_name] = value
-                    break
-
-                counter += 1
+    # Create the columns for `df`. `device` is the first column.
+    builder = cb.ColumnBuilder(['device'])
+
+    if engine == 'rest':
+        records = f5r.get_records(
+            host_group,
+            ['/mgmt/tm/net/vlan?expandSubcollections=true'],
+            username,
+            password,
+            private_data_dir,
+            verify=validate_certs)
+        # The interfaces are expanded, so the 'interfaces' column is the
+        # same as the Ansible engine's (E.g., {'1.1': ['tagged']}).
+        for device, data in cr.iter_command_output(records):
+            for path, value in f5p.iter_rest_objects(data):
+                value['name'] = path
+                builder.add(value, device=device)
+    else:
+        commands = [
+            'list net vlan /*/*',
+            'show net vlan /*/*'
+        ]
+
+        extravars = {'username': username,
+                     'password': password,
+                     'host_group': host_group,
+                     'commands': commands}
+
+        if not validate_certs:
+            extravars['validate_certs'] = 'no'
+
+        playbook = f'{play_path}/f5_run_adhoc_commands.yml'
+
+        runner = ansible_runner.run(
+            private_data_dir=private_data_dir,
+            playbook=playbook,
+            suppress_env_files=True,
+            **ep.get_runner_kwargs(host_group, extravars))
+
+        for event in runner.events:
+            if event['event'] == 'runner_on_ok':
+                event_data = event['event_data']
+                device = event_data['remote_addr']
+                outputs = event_data['res']['stdout_lines']
+
+                # Parse the output of 'list net vlan /*/*' and add each VLAN
+                # to `builder`, with the device name.
+                for key, value in f5p.iter_tmsh_objects(outputs[0]):
+                    if key[:8] == 'net vlan':
+                        value['name'] = key.split()[-1]
+                        builder.add(value, device=device)
 
     # Create `df`.
-    df = pd.DataFrame.from_dict(df_data).astype(str)
-    print(df)
-
-    # Make `device` the first column, then return `df`.
-    col_1 = df.pop('device')
-    df.insert(0, 'device', col_1)
+    df = builder.to_frame().astype(str)
 
     return df
 
@@ -1786,8 +1522,8 @@ def inventory(username: str,
 
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
+                                suppress_env_files=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
     # Create a dictionary to store the data.
     df_data = dict()
@@ -2,6 +2,7 @@
 
 import ipaddress as ip
 import pandas as pd
+from netmanage.helpers import columnar as cb
 from netmanage.helpers import helpers as hp
 from infoblox_client import connector
 
@@ -97,19 +98,12 @@ def get_network_containers(host: str,
     # Get the network containers
     response = conn.get_object('networkcontainer', paging=paging)
 
-    # Create the dictionary to store the data needed to create the DataFrame,
-    # then interate over 'response' to create the keys
-    df_data = dict()
-    for item in response:
-        for key, value in item.items():
-            df_data[key] = list()
+    # Add the objects to the columns of the DataFrame. Objects that do not
+    # have all of the keys have None for the missing columns.
+    builder = cb.ColumnBuilder()
+    builder.add_many(response)
 
-    # Populate 'df_data'
-    for item in response:
-        for key in df_data:
-            df_data[key].append(item.get(key))
-
-    df = pd.DataFrame.from_dict(df_data)
+    df = builder.to_frame()
 
     return df
 
@@ -147,8 +141,7 @@ def get_networks_parent_containers(db_path: str) -> pd.DataFrame:
     # 'get_network_containers' collectors, so we only need the timestamp for
     # one of the tables.)
     table = 'INFOBLOX_GET_NETWORKS'
-    query = f'SELECT DISTINCT timestamp FROM {table}'
-    last_ts = pd.read_sql(query, con)['timestamp'].to_list()[-1]
+    last_ts = hp.get_latest_timestamp(db_path, table)
 
     # Get all the networks
     query = ['SELECT network, network_view',
@@ -249,19 +242,12 @@ def get_networks(host: str,
     # Get the network containers
     response = conn.get_object('network', paging=paging)
 
-    # Create the dictionary to store the data needed to create the DataFrame,
-    # then interate over 'response' to create the keys
-    df_data = dict()
-    for item in response:
-        for key, value in item.items():
-            df_data[key] = list()
-
-    # Populate 'df_data'
-    for item in response:
-        for key in df_data:
-            df_data[key].append(item.get(key))
+    # Add the objects to the columns of the DataFrame. Objects that do not
+    # have all of the keys have None for the missing columns.
+    builder = cb.ColumnBuilder()
+    builder.add_many(response)
 
-    df = pd.DataFrame.from_dict(df_data)
+    df = builder.to_frame()
 
     return df
 
@@ -310,19 +296,12 @@ def get_vlan_ranges(host: str,
     # Get the network containers
     response = conn.get_object('vlanrange', paging=paging)
 
-    # Create the dictionary to store the data needed to create the DataFrame,
-    # then interate over 'response' to create the keys
-    df_data = dict()
-    for item in response:
-        for key in item:
-            df_data[key] = list()
+    # Add the objects to the columns of the DataFrame. Objects that do not
+    # have all of the keys have None for the missing columns.
+    builder = cb.ColumnBuilder()
+    builder.add_many(response)
 
-    # Populate 'df_data'
-    for item in response:
-        for key in df_data:
-            df_data[key].append(item.get(key))
-
-    df = pd.DataFrame.from_dict(df_data).astype('str')
+    df = builder.to_frame().astype('str')
 
     return df
 
@@ -371,18 +350,11 @@ def get_vlans(host: str,
     # Get the network containers
     response = conn.get_object('vlan', paging=paging)
 
-    # Create the dictionary to store the data needed to create the DataFrame,
-    # then interate over 'response' to create the keys
-    df_data = dict()
-    for item in response:
-        for key in item:
-            df_data[key] = list()
-
-    # Populate 'df_data'
-    for item in response:
-        for key in df_data:
-            df_data[key].append(item.get(key))
+    # Add the objects to the columns of the DataFrame. Objects that do not
+    # have all of the keys have None for the missing columns.
+    builder = cb.ColumnBuilder()
+    builder.add_many(response)
 
-    df = pd.DataFrame.from_dict(df_data).astype('str')
+    df = builder.to_frame().astype('str')
 
     return df
@@ -7,6 +7,7 @@ import pandas as pd
 from netmanage import run_collectors as rc
 import sqlite3 as sl
 from asyncio import Semaphore
+from netmanage.helpers import columnar as cb
 from netmanage.helpers import helpers as hp
 from netmanage.helpers import meraki_helpers as mhp
 from meraki.aio import AsyncDashboardAPI
@@ -197,15 +198,9 @@ def get_network_appliance_vlans(ansible_os: str,
     # the orgs.
     if not networks:
         # Get the last timestamp in the MERAKI_ORG_NETWORKS table.
-        query = '''SELECT distinct timestamp
-        FROM meraki_org_networks
-        ORDER BY timestamp desc
-        LIMIT 1
-        '''
+        ts = hp.get_latest_timestamp(db_path, 'meraki_org_networks')
 
         con = sl.connect(db_path)
-        result = pd.read_sql(query, con)
-        ts = result['timestamp'].to_list().pop()
 
         if orgs:
             joined_orgs = [f'"{_}"' for _ in orgs]
@@ -374,9 +369,6 @@ async def meraki_get_network_clients(api_key: str,
                                   total_pages=total_pages)
             return clients
 
-    # Create a list to store the individual clients for each network.
-    data = list()
-
     # If the user did not pass a list of networks to the function, then get all
     # of the networks from the list of orgs. If the user did not pass a list
     # of orgs either, then get all of the networks from all of the
@@ -396,36 +388,23 @@ async def meraki_get_network_clients(api_key: str,
             dashboard, network_id, per_page, timespan, total_pages)
                                          for network_id in networks))
 
-    # Flatten the list of clients into a single list, which will ultimately be
-    # used to create a DataFrame.
-    data = [client for clients in results for client in clients]
-
-    # Create a dictionary to store the client data. It will be used to create
-    # 'df_clients'
-    df_data = dict()
-
-    # Each client is returned as a dictionary. Iterate over the keys in the
-    # dictionary and add them to 'df_data'. This requires iterating over all
-    # the clients twice, but it ensures that all keys are added to 'df_data'.
-    for client in data:
-        for key in client:
-            df_data[key] = list()
+    # Each client is returned as a dictionary. Add them to the columns of the
+    # DataFrame. Clients that do not have all of the keys have None for the
+    # missing columns.
+    builder = cb.ColumnBuilder()
+    for clients in results:
+        builder.add_many(clients)
 
-    # Iterate over the clients, adding the data to 'df_data'
-    for client in data:
-        for key in df_data:
-            df_data[key].append(client.get(key))
-
-    # Create the dataframe and convert all datatypes to strings
-    df = pd.DataFrame.from_dict(df_data)
-    df = df.astype('str')
+    # Create the dataframe. The columns are converted to their declared types
+    # when they are added to the database (see helpers/column_schemas.py).
+    df = builder.to_frame()
 
     # Create 'df_clients'. If the user has provided a list of MACs, then only
     # add those clients to 'df_clients'. Otherwise, add all clients.
     if macs:
         df_clients = pd.DataFrame()
         for mac in macs:
-            mask = df['mac'].str.contains(mac)
+            mask = df['mac'].str.contains(mac, na=False)
             df_clients = pd.concat([df_clients, df[mask]])
         # Drop duplicate rows. They can be created if a user esarches for
         # partial MAC addresses that overlap (e.g., 'ec:f0', 'ec:f0:b6')
@@ -497,10 +476,10 @@ def meraki_get_network_devices(api_key: str,
     dashboard = meraki.DashboardAPI(api_key=api_key, suppress_logging=True)
     app = dashboard.networks
 
-    # This list will contain all of the devices for each network. It will be
-    # used to create the dataframe. This method accounts for networks that have
+    # The devices for each network are added to 'builder', which is used to
+    # create the dataframe. This method accounts for networks that have
     # different device types, since not all device types contain the same keys.
-    data = list()
+    builder = cb.ColumnBuilder()
 
     if not networks:
         df_networks = meraki_get_org_networks(api_key, db_path)  # , orgs=orgs)
@@ -514,33 +493,15 @@ def meraki_get_network_devices(api_key: str,
         # each network, so this is wrapped in a try/except block.
         try:
             devices = app.getNetworkDevices(net)
-            for item in devices:
-                data.append(item)
+            builder.add_many(devices)
         except Exception as e:
             print(str(e))
 
-    df_data = dict()
-
-    # Get all of the keys from devices in 'data', and add them as a key to
-    # 'df_data'. The value of the key in 'df_data' will be a list.
-    for item in data:
-        for key in item:
-            if not df_data.get(key):
-                df_data[key] = list()
-
-    # Iterate over the devices, adding the data for each device to
-    # 'df_data'
-    for item in data:
-        for key in df_data:
-            df_data[key].append(item.get(key))
-
-    # Create and return the dataframe
-    df_devices = pd.DataFrame.from_dict(df_data)
-
-    # Convert all data to a string. This is because Pandas incorrectly detects
-    # the data type for latitude / longitude, which causes the table insertion
-    # to fail.
-    df_devices = df_devices.astype(str)
+    # Create and return the dataframe. (Pandas incorrectly detects the data
+    # type for latitude / longitude, so they are declared in
+    # helpers/column_schemas.py and converted when they are added to the
+    # database.)
+    df_devices = builder.to_frame()
 
     return df_devices
 
@@ -668,9 +629,8 @@ def meraki_get_org_appliance_uplink_statuses(api_key: str,
     dashboard = meraki.DashboardAPI(api_key=api_key, suppress_logging=True)
     app = dashboard.appliance
 
-    # This list will contain all of the uplinks for each org. It will then be
-    # used to create the dataframe. This method accounts for uplinks that might
-    # not have the same keys.
+    # This list will contain all of the uplinks for each org. This method
+    # accounts for uplinks that might not have the same keys.
     results = list()
     for org in organizations:
         # Check if API access is enabled for the org
@@ -685,7 +645,7 @@ def meraki_get_org_appliance_uplink_statuses(api_key: str,
     # Combine the uplinks from the orgs into a single list.
     data = [_ for uplink in results for _ in uplink]
 
-    df_data = list()
+    builder = cb.ColumnBuilder()
 
     for item in data:
         row = {}
@@ -707,10 +667,10 @@ def meraki_get_org_appliance_uplink_statuses(api_key: str,
             row[f'{prefix}_secondaryDns'] = uplink.get('secondaryDns', None)
             row[f'{prefix}_ipAssignedBy'] = uplink.get('ipAssignedBy')
 
-        df_data.append(row)
+        builder.add(row)
 
-    # Convert the list of dictionaries to a DataFrame and return it.
-    df = pd.DataFrame(df_data)
+    # Create the DataFrame and return it.
+    df = builder.to_frame()
 
     return df
 
@@ -754,41 +714,23 @@ def meraki_get_org_devices(api_key: str,
     dashboard = meraki.DashboardAPI(api_key=api_key, suppress_logging=True)
     app = dashboard.organizations
 
-    # This list will contain all of the devices for each org. It will then be
-    # used to create the dataframe. This method accounts for orgs that have
-    # different device types, since not all device types contain the same keys.
-    data = list()
+    # The devices for each org are added to 'builder', which is used to create
+    # the dataframe. This method accounts for orgs that have different device
+    # types, since not all device types contain the same keys. The 'orgId'
+    # column is the first column.
+    builder = cb.ColumnBuilder(['orgId'])
     for org in organizations:
         # Check if API access is enabled for the org
         enabled = mhp.meraki_check_api_enablement(db_path, org)
         if enabled:
             devices = app.getOrganizationDevices(org, total_pages="all")
-            for item in devices:
-                item['orgId'] = org
-                data.append(item)
+            builder.add_many(devices, orgId=org)
 
-    df_data = dict()
-    df_data['orgId'] = list()
-
-    # Get all of the keys from devices in 'data', and add them as a key to
-    # 'df_data'. The value of the key in 'df_data' will be a list.
-    for item in data:
-        for key in item:
-            if not df_data.get(key) and key != 'orgId':
-                df_data[key] = list()
-
-    # Iterate over the devices, adding the data for each device to 'df_data'
-    for item in data:
-        for key in df_data:
-            df_data[key].append(item.get(key))
-
-    # Create and return the dataframe
-    df_devices = pd.DataFrame.from_dict(df_data)
-
-    # Convert all data to a string. This is because Pandas incorrectly detects
-    # the data type for latitude / longitude, which causes the table insertion
-    # to fail.
-    df_devices = df_devices.astype(str)
+    # Create and return the dataframe. (Pandas incorrectly detects the data
+    # type for latitude / longitude, so they are declared in
+    # helpers/column_schemas.py and converted when they are added to the
+    # database.)
+    df_devices = builder.to_frame()
 
     return df_devices
 
@@ -846,42 +788,25 @@ def meraki_get_org_device_statuses(api_key: str,
         table = 'meraki_organizations'
         orgs = hp.meraki_parse_organizations(db_path, orgs, table)
 
-    # Create a list to store raw results from the API (the results are
-    # returned as a list of dictionaries--one dictionary per device)
-    data = list()
+    # The results are returned as a list of dictionaries--one dictionary per
+    # device. They are added to 'builder', which is used to create the
+    # dataframe. If a device status does not contain a particular key then it
+    # will be added as None.
+    builder = cb.ColumnBuilder()
 
-    # Query the API for the device statuses and add them to 'data')
+    # Query the API for the device statuses and add them to 'builder'
     tp = total_pages
     for org in orgs:
         # Check if API access is enabled for the org
         enabled = mhp.meraki_check_api_enablement(db_path, org)
         if enabled:
             statuses = app.getOrganizationDevicesStatuses(org, total_pages=tp)
-            for item in statuses:
-                item['orgId'] = org  # Add the orgId to each device status
-                data.append(item)
-
-    # Create the dictionary 'df_data' from the device statuses in 'data'.
-    # This method adds all possible keys from the devices to 'df_data' before
-    # adding the device statuses to 'df_data'. If a device status does not
-    # contain a particular key then it will be added as None
-    df_data = dict()
-    for item in data:
-        for key in item:
-            if not df_data.get(key):
-                df_data[key] = list()
-
-    # Populate 'df_data'
-    for item in data:
-        for key in df_data:
-            df_data[key].append(item.get(key))
+            # Add the orgId to each device status
+            builder.add_many(statuses, orgId=org)
 
-    # Create the dataframe and return it
-    df_statuses = pd.DataFrame.from_dict(df_data)
-
-    # Set all datatypes to string. Otherwise it will fail when adding the
-    # dataframe to the database
-    df_statuses = df_statuses.astype(str)
+    # Create the dataframe and return it. The nested fields are converted to
+    # JSON when it is added to the database (see helpers/column_schemas.py).
+    df_statuses = builder.to_frame()
 
     # Set the columns to use for the SQL database table index
     idx_cols = ['timestamp', 'mac']
@@ -939,12 +864,10 @@ def meraki_get_org_networks(api_key: str,
     dashboard = meraki.DashboardAPI(api_key=api_key, suppress_logging=True)
     app = dashboard.organizations
 
-    # Create a list to store the results for all orgs. This is necessary to
-    # ensure that the DataFrame contains columns for all networks (not all
-    # networks return the same keys)
-    data = list()
+    # Add the results for all orgs to 'builder'. It creates the columns for all
+    # networks (not all networks return the same keys)
+    builder = cb.ColumnBuilder()
 
-    df_data = dict()
     for org in organizations:
         if use_db:
             # Check if API access is enabled for the org
@@ -957,21 +880,9 @@ def meraki_get_org_networks(api_key: str,
             except Exception as e:
                 print(f"Network lookup for org {org} failed.\nerror: {e}")
                 networks = []
-            for item in networks:
-                data.append(item)
+            builder.add_many(networks)
 
-    # Iterate over 'data', creating the keys for the DataFrame
-    for item in data:
-        for key in item:
-            if not df_data.get(key):
-                df_data[key] = list()
-
-    # Iterate over 'data', adding the networks to 'df_data'
-    for item in data:
-        for key in df_data:
-            df_data[key].append(item.get(key))
-
-    df_networks = pd.DataFrame.from_dict(df_data).astype(str)
+    df_networks = builder.to_frame().astype(str)
 
     return df_networks
 
@@ -1013,40 +924,17 @@ def meraki_get_switch_lldp_neighbors(db_path: str) -> pd.DataFrame:
     result.rename(columns={'portId as local': 'local_port'}, inplace=True)
     headers = result.columns.to_list()
 
-    # Add result['lldp'] to a list and convert each item into a dictionary. The
-    # dictionaries will be used to create the column headers.
-    lldp_col = result['lldp'].to_list()
-    lldp_col = [json.loads(_.replace("'", '"')) for _ in lldp_col]
-
-    # keys = headers
-    keys = list()
-    for item in lldp_col:
-        for key in item:
-            if key not in keys:
-                keys.append(key)
-
-    # Create a list to store the data that will be used to create the
-    # dataframe. This method ensures that keys that the Meraki API did not
-    # return (because they were empty) are added to 'df_lldp'
-    df_data = list()
-
-    for idx, row in result.iterrows():
-        _row = [
-            row['orgId'], row['networkId'], row['name'], row['serial'],
-            row['local_port']
-        ]
-        lldp = json.loads(row['lldp'].replace("'", '"'))
-        for key in keys:
-            _row.append(lldp.get(key))
-        df_data.append(_row)
-
-    headers.reverse()
-    for item in headers:
-        if item != 'lldp':
-            keys.insert(0, item)
+    # Convert each item in result['lldp'] into a dictionary, and add it to the
+    # columns of the dataframe. This method ensures that keys that the Meraki
+    # API did not return (because they were empty) are added to 'df_lldp'
+    headers = [_ for _ in headers if _ != 'lldp']
+    builder = cb.ColumnBuilder(headers)
+    for row in result.to_dict('records'):
+        lldp = json.loads(row.pop('lldp').replace("'", '"'))
+        builder.add(lldp, **row)
 
     # Create the dataframe
-    df_lldp = pd.DataFrame(data=df_data, columns=keys)
+    df_lldp = builder.to_frame()
 
     df_lldp.rename(columns={'portId': 'remote_port'}, inplace=True)
 
@@ -1120,48 +1008,26 @@ def meraki_get_switch_port_statuses(api_key: str,
     dashboard = meraki.DashboardAPI(api_key=api_key, suppress_logging=True)
     app = dashboard.switch
 
-    # Get the port statuses for the switches in df_ports
-    data = dict()
+    # A switch can be in the query results more than once (E.g., if it was
+    # renamed). Only the last row for each switch is used.
+    df_ports = df_ports.drop_duplicates(subset=['serial'], keep='last')
+
+    # Get the port statuses for the switches in df_ports. The builder ensures
+    # that all columns are of equal length when we create the dataframe.
+    builder = cb.ColumnBuilder(['orgId', 'networkId', 'name', 'serial'])
     for idx, row in df_ports.iterrows():
-        orgId = row['orgId']
-        networkId = row['networkId']
-        name = row['name']
         serial = row['serial']
-
-        data[serial] = dict()
+        device = {'orgId': row['orgId'],
+                  'networkId': row['networkId'],
+                  'name': row['name'],
+                  'serial': serial}
 
         ports = app.getDeviceSwitchPortsStatuses(serial)
         for port in ports:
-            port_id = port['portId']
-            data[serial][port_id] = dict()
-            data[serial][port_id]['orgId'] = orgId
-            data[serial][port_id]['networkId'] = networkId
-            data[serial][port_id]['name'] = name
-            data[serial][port_id]['serial'] = serial
-            for key, value in port.items():
-                data[serial][port_id][key] = value
-
-    # Create a dictionary based on the contents of 'data'. This method ensures
-    # that all arrays are of equal length when we create the dataframe.
-    df_data = dict()
-    df_data['orgId'] = list()
-    df_data['networkId'] = list()
-    df_data['name'] = list()
-    df_data['serial'] = list()
-    for item in data:
-        device = data[item]
-        for port in device:
-            for key in device[port]:
-                if not df_data.get(key):
-                    df_data[key] = list()
-
-    for item in data:
-        device = data[item]
-        for port in device:
-            for key in df_data:
-                df_data[key].append(device[port].get(key))
+            # The port's keys take precedence over the device's keys
+            builder.add(device, **port)
 
-    df_ports = pd.DataFrame.from_dict(df_data)
+    df_ports = builder.to_frame()
     df_ports = df_ports.astype(str)
 
     return df_ports
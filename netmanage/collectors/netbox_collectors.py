@@ -5,6 +5,7 @@ import os
 import pandas as pd
 import pynetbox
 import requests
+from netmanage.helpers import columnar as cb
 from typing import Optional
 
 
@@ -860,30 +861,26 @@ def netbox_get_vrf_details(
     # Create the netbox handler
     nb = create_netbox_handler(nb_url, token)
 
-    # Query the Netbox API for the VRF details and add them to 'df_data'.
-    df_data = dict()
+    # Query the Netbox API for the VRF details and add them to 'builder'.
     if vrf:
         result = nb.ipam.vrfs.get(name=vrf)
-        for attribute_name in dir(result):
-            attribute_value = getattr(result, attribute_name)
-            if attribute_name[:1] != "_":
-                if not df_data.get(attribute_name):
-                    df_data[attribute_name] = list()
-                df_data[attribute_name].append(attribute_value)
+        result = [result] if result else list()
     else:
         result = nb.ipam.vrfs.all()
-        for item in result:
-            # result = nb.ipam.vrfs.get(name=vrf)
-            for attribute_name in dir(item):
-                attribute_value = getattr(item, attribute_name)
-                if attribute_name[:1] != "_":
-                    if not df_data.get(attribute_name):
-                        df_data[attribute_name] = list()
-                    df_data[attribute_name].append(attribute_value)
+
+    builder = cb.ColumnBuilder()
+    for item in result:
+        builder.add(
+            {
+                attribute_name: getattr(item, attribute_name)
+                for attribute_name in dir(item)
+                if attribute_name[:1] != "_"
+            }
+        )
 
     # Create the DataFrame and re-order the columns so that 'id', 'name',
     # 'description', and 'tenant' are first.
-    df = pd.DataFrame.from_dict(df_data)
+    df = builder.to_frame()
 
     to_move = ["id", "name", "description", "tenant"]
     to_move.reverse()
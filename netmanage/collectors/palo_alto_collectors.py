@@ -3,6 +3,7 @@
 import ansible_runner
 import pandas as pd
 from typing import Dict
+from netmanage.helpers import execution_profiles as ep
 from netmanage.helpers import palo_alto_helpers as pah
 from netmanage.parsers import palo_alto_parsers as parser
 
@@ -99,8 +100,8 @@ def run_adhoc_command(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     result = dict()
@@ -325,8 +326,8 @@ def gather_facts(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
     facts.append(parser.parse_facts(runner))
 
@@ -336,8 +337,8 @@ def gather_facts(
             runner = ansible_runner.run(
                 private_data_dir=private_data_dir,
                 playbook=playbook,
-                extravars=extravars,
                 suppress_env_files=True,
+                **ep.get_runner_kwargs(host_group, extravars),
             )
             facts.append(parser.parse_facts(runner))
 
@@ -807,8 +808,8 @@ def get_security_rules(
     runner = ansible_runner.run(
         private_data_dir=private_data_dir,
         playbook=playbook,
-        extravars=extravars,
         suppress_env_files=True,
+        **ep.get_runner_kwargs(host_group, extravars),
     )
 
     # Parse results into df
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+
+"""
+Declared column types for collector tables.
+
+Collectors used to convert all of their output to strings before it was
+written to the database, because SQLite cannot store lists or dictionaries,
+and because Pandas sometimes detects the wrong type for a column. That
+stores numbers, booleans and nested fields as text, so they cannot be
+compared or aggregated without casting them in every query.
+
+Tables in 'define_column_schemas' declare a type for their columns, and
+'add_to_db' converts the columns to those types before the data is written.
+New tables are created with the matching SQLite types, so the columns have
+the correct affinity. The types are:
+
+- 'int': Stored as INTEGER.
+- 'float': Stored as REAL.
+- 'bool': Stored as INTEGER (0 or 1).
+- 'timestamp': Stored as TEXT in ISO 8601 format (YYYY-MM-DDThh:mm:ssZ), in
+  UTC. Epoch seconds and milliseconds are converted.
+- 'json': Lists and dictionaries are stored as JSON TEXT.
+- 'text': Stored as TEXT.
+
+Values that cannot be converted to the declared type are stored as NULL.
+Columns that are not declared are written as they are, except that lists and
+dictionaries are converted to JSON (like 'hp.convert_lists_to_json_in_df').
+
+Examples
+--------
+>>> from netmanage.helpers import column_schemas as cs
+>>> df = cs.apply_column_schema(df, 'MERAKI_ORG_DEVICES')
+>>> cs.get_sqlite_type('MERAKI_ORG_DEVICES', 'lat')
+'REAL'
+"""
+
+import json
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+
+SQLITE_TYPES = {
+    "bool": "INTEGER",
+    "float": "REAL",
+    "int": "INTEGER",
+    "json": "TEXT",
+    "text": "TEXT",
+    "timestamp": "TEXT",
+}
+
+
+def define_column_schemas() -> Dict[str, Dict[str, str]]:
+    """
+    Return the declared column types for collector tables.
+
+    Returns
+    -------
+    schemas : dict
+        A dictionary where each key is a table name, and each value is a
+        dictionary of column names and types. See the module docstring for
+        the supported types.
+    """
+    return {
+        "DNAC_DEVICES_INVENTORY": {
+            "interfaceCount": "int",
+            "lastUpdateTime": "timestamp",
+            "lineCardCount": "int",
+            "uptimeSeconds": "int",
+        },
+        "DNAC_DEVICES_MODULES": {
+            "attributeInfo": "json",
+            "isFieldReplaceable": "bool",
+            "isReportingAlarmsAllowed": "bool",
+        },
+        "MERAKI_NETWORK_CLIENTS": {
+            "firstSeen": "timestamp",
+            "lastSeen": "timestamp",
+            "smInstalled": "bool",
+            "usage": "json",
+        },
+        "MERAKI_NETWORK_DEVICES": {
+            "details": "json",
+            "lat": "float",
+            "lng": "float",
+            "tags": "json",
+        },
+        "MERAKI_ORG_DEVICE_STATUSES": {
+            "components": "json",
+            "lastReportedAt": "timestamp",
+            "tags": "json",
+            "usingCellularFailover": "bool",
+        },
+        "MERAKI_ORG_DEVICES": {
+            "configurationUpdatedAt": "timestamp",
+            "details": "json",
+            "lat": "float",
+            "lng": "float",
+            "tags": "json",
+        },
+        "PANOS_ALL_INTERFACES": {
+            "addr": "json",
+            "addr6": "json",
+            "dyn-addr": "json",
+            "id": "int",
+            "tag": "int",
+            "vsys": "int",
+        },
+    }
+
+
+def get_column_schema(table: str) -> Dict[str, str]:
+    """
+    Return the declared column types for a table.
+
+    Parameters
+    ----------
+    table : str
+        The table name.
+
+    Returns
+    -------
+    schema : dict
+        A dictionary of column names and types. It is empty if the table does
+        not have a declared schema.
+    """
+    return define_column_schemas().get(table.upper(), dict())
+
+
+def get_sqlite_type(table: str, column: str) -> str:
+    """
+    Return the SQLite type for a column.
+
+    Parameters
+    ----------
+    table : str
+        The table name.
+    column : str
+        The column name.
+
+    Returns
+    -------
+    sqlite_type : str
+        The SQLite type, such as 'INTEGER'. It is an empty string if the
+        column does not have a declared type, so the column has no affinity.
+    """
+    return SQLITE_TYPES.get(get_column_schema(table).get(column), "")
+
+
+def is_null(value) -> bool:
+    """
+    Return whether a value is null. Collectors that converted their output to
+    strings stored nulls as 'None' or 'nan', so those are null too.
+
+    Parameters
+    ----------
+    value : any
+        The value to check.
+
+    Returns
+    -------
+    null : bool
+        True if the value is null.
+    """
+    if isinstance(value, (list, dict)):
+        return False
+    if isinstance(value, str):
+        return value in ["", "None", "nan", "NaN", "<NA>"]
+    return bool(pd.isna(value))
+
+
+def to_json(value):
+    """
+    Convert lists and dictionaries to JSON strings. Other values are returned
+    unchanged.
+
+    Parameters
+    ----------
+    value : any
+        The value to convert.
+
+    Returns
+    -------
+    value : any
+        The converted value.
+    """
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def to_bool(value):
+    """
+    Convert a value to a boolean.
+
+    Parameters
+    ----------
+    value : any
+        The value to convert, such as True, 'true', 'TRUE', 'yes' or 1.
+
+    Returns
+    -------
+    value : bool or None
+        The boolean, or None if the value cannot be converted.
+    """
+    if is_null(value):
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    value = str(value).strip().lower()
+    if value in ["true", "yes", "1", "1.0"]:
+        return True
+    if value in ["false", "no", "0", "0.0"]:
+        return False
+    return None
+
+
+def convert_column(series: pd.Series, col_type: str) -> pd.Series:
+    """
+    Convert a column to a declared type.
+
+    Parameters
+    ----------
+    series : pd.Series
+        The column to convert.
+    col_type : str
+        The declared type. See the module docstring for the supported types.
+
+    Returns
+    -------
+    series : pd.Series
+        The converted column.
+    """
+    if col_type not in SQLITE_TYPES:
+        raise ValueError(f"Invalid column type: '{col_type}'")
+
+    nulls = series.map(is_null).astype(bool)
+
+    if col_type in ["int", "float"]:
+        values = pd.to_numeric(series.where(~nulls), errors="coerce")
+        if col_type == "float":
+            return values.astype("Float64")
+        # Values that are not whole numbers cannot be stored as integers.
+        values = values.where(values == np.floor(values))
+        return values.astype("Int64")
+
+    if col_type == "bool":
+        return series.map(to_bool).astype("boolean")
+
+    if col_type == "timestamp":
+        numbers = pd.to_numeric(series.where(~nulls), errors="coerce")
+        # Epoch timestamps in milliseconds are much larger than any epoch
+        # timestamp in seconds.
+        millis = numbers.abs() > 1e11
+        seconds = numbers.where(~millis, numbers / 1000)
+        from_epoch = pd.to_datetime(seconds, unit="s", utc=True, errors="coerce")
+        strings = series.where(~nulls & numbers.isna()).astype(object)
+        from_str = pd.to_datetime(strings, utc=True, errors="coerce", format="ISO8601")
+        values = from_epoch.where(numbers.notna(), from_str)
+        values = values.dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+        return values.astype(object).where(values.notna(), None)
+
+    if col_type == "json":
+        return series.map(to_json).astype(object).where(~nulls, None)
+
+    values = series.map(lambda x: x if isinstance(x, str) else str(x))
+    return values.astype(object).where(~nulls, None)
+
+
+def apply_column_schema(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    """
+    Convert the columns of a collector result to the declared types for its
+    table. Lists and dictionaries in undeclared columns are converted to JSON.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The output of a collector.
+    table : str
+        The table name.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        A copy of the DataFrame with the converted columns.
+    """
+    schema = get_column_schema(table)
+    df = df.copy()
+    for col in df.columns:
+        if col in schema:
+            df[col] = convert_column(df[col], schema[col])
+        elif df[col].dtype == object:
+            df[col] = df[col].map(to_json)
+    return df
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+"""
+A columnar builder for creating DataFrames from records.
+
+Collectors and parsers often receive a list of dictionaries whose keys vary
+from one record to the next (for example, Meraki devices of different
+types, or DNAC modules). They used to iterate over the records twice: once
+to find every key, and again to append each record's value (or None) to a
+list for each key. Others built a list for each row and passed the rows to
+'pd.DataFrame'.
+
+'ColumnBuilder' does the same thing in one pass. Each column is a list that
+grows as records are added. When a record has a new key, the column is
+created and filled with None for the earlier records. Columns that a record
+does not have are filled when the next value is added (or when the
+DataFrame is created), so adding a record only touches the keys it has.
+
+The columns are in the order that their keys were first seen, which is the
+same order the two-pass loops produced. Columns passed to the constructor
+come first, even if there are no records.
+
+The values are stored as they are. The columns are converted to their
+declared types when they are added to the database (see
+helpers/column_schemas.py).
+
+Examples
+--------
+>>> from netmanage.helpers import columnar as cb
+>>> builder = cb.ColumnBuilder(['device'])
+>>> builder.add({'name': 'eth0', 'mtu': 1500}, device='fw1')
+>>> builder.add({'name': 'eth1', 'speed': '10G'}, device='fw1')
+>>> df = builder.to_frame()
+>>> df.columns.to_list()
+['device', 'name', 'mtu', 'speed']
+"""
+
+import pandas as pd
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+
+class ColumnBuilder:
+    """
+    Build the columns of a DataFrame one record at a time.
+
+    Parameters
+    ----------
+    columns : list, optional
+        Columns to create before any records are added. They are the first
+        columns of the DataFrame.
+    fill : any, optional
+        The value for columns that a record does not have. Defaults to None.
+    exclude : list, optional
+        Keys to ignore.
+    """
+
+    def __init__(
+        self,
+        columns: Optional[List[str]] = None,
+        fill: Any = None,
+        exclude: Optional[List[str]] = None,
+    ):
+        self.columns: Dict[str, list] = {c: list() for c in columns or list()}
+        self.fill = fill
+        self.exclude = set(exclude or list())
+        self.rows = 0
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _add_items(self, items: Iterable, row: int) -> None:
+        """
+        Add the values for one row.
+
+        Parameters
+        ----------
+        items : iterable
+            The (key, value) pairs for the row.
+        row : int
+            The index of the row.
+
+        Returns
+        -------
+        None
+        """
+        columns = self.columns
+        exclude = self.exclude
+        for key, value in items:
+            column = columns.get(key)
+            # Most values are for columns that every earlier row has
+            if column is not None and len(column) == row:
+                column.append(value)
+                continue
+            if exclude and key in exclude:
+                continue
+            if column is None:
+                columns[key] = column = [self.fill] * row
+            elif len(column) > row:
+                # The key was already added for this row. The last value wins,
+                # like updating a dictionary.
+                column[row] = value
+                continue
+            else:
+                column.extend([self.fill] * (row - len(column)))
+            column.append(value)
+
+    def add(self, record: Optional[Mapping] = None, **fields) -> None:
+        """
+        Add a record as a row.
+
+        Parameters
+        ----------
+        record : dict, optional
+            The record. Its keys are the columns.
+        **fields
+            Additional columns for the row (E.g., 'device'). They override
+            the record's keys with the same name.
+
+        Returns
+        -------
+        None
+        """
+        row = self.rows
+        if record:
+            self._add_items(record.items(), row)
+        if fields:
+            self._add_items(fields.items(), row)
+        self.rows = row + 1
+
+    def add_many(self, records: Iterable[Mapping], **fields) -> None:
+        """
+        Add several records, with the same additional columns.
+
+        Parameters
+        ----------
+        records : iterable
+            The records.
+        **fields
+            Additional columns for each row. See 'add'.
+
+        Returns
+        -------
+        None
+        """
+        for record in records:
+            self.add(record, **fields)
+
+    def to_dict(self) -> Dict[str, list]:
+        """
+        Return the columns, filling in the values that are missing.
+
+        Returns
+        -------
+        columns : dict
+            A dictionary where each key is a column, and each value is the
+            list of values in that column.
+        """
+        rows = self.rows
+        for column in self.columns.values():
+            if len(column) < rows:
+                column.extend([self.fill] * (rows - len(column)))
+        return self.columns
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Create a DataFrame from the columns.
+
+        Returns
+        -------
+        df : pd.DataFrame
+            The DataFrame. It has one row for each record that was added.
+        """
+        columns = self.to_dict()
+        return pd.DataFrame(columns, columns=list(columns))
@@ -0,0 +1,728 @@
+#!/usr/bin/env python3
+
+"""
+Runs the show commands for several collectors in a single Ansible play.
+
+Most of the Cisco NXOS, IOS and ASA collectors run one command with the
+'cisco_<os>_run_commands.yml' playbook, so running ten collectors against a
+hostgroup means ten plays and ten logins to each device. In batched mode,
+the commands for all of the selected collectors are sent in one play, and
+the '<os>_command' module runs them over a single connection to each device.
+
+The output of the play contains the output of every command for each device.
+It is split into one runner per command, which has the same events as the
+runner that the collector would have created. Those runners are passed to
+the existing parsers, so a batched collector returns the same result as the
+collector function.
+
+'define_batch_commands' is the only copy of the commands. The collector
+functions read theirs with 'get_command', so a collector sends the same
+command whether it is batched or not.
+
+Examples
+--------
+>>> from netmanage.helpers import command_batching as cbt
+>>> results = cbt.run_batch('cisco.nxos.nxos',
+...                         ['arp_table', 'cam_table', 'vlans'],
+...                         username, password, hostgroup, nm_path,
+...                         play_path, private_data_dir)
+>>> df_arp = results['arp_table']
+"""
+
+import ansible_runner
+import pandas as pd
+from netmanage.helpers import execution_profiles as ep
+from netmanage.helpers import nxos_json as nxj
+from netmanage.helpers import ssh_engine as se
+from netmanage.parsers import cisco_asa_parsers as cap
+from netmanage.parsers import cisco_ios_parsers as cip
+from netmanage.parsers import cisco_nxos_parsers as cnp
+from typing import Dict, List, Optional
+
+
+class CommandRunner:
+    """
+    The output of one command from a batched play.
+
+    It has the 'events' attribute of an 'ansible_runner.Runner', which is
+    all that the parsers use.
+
+    Parameters
+    ----------
+    events : list
+        The runner events.
+    """
+
+    def __init__(self, events: List[dict]):
+        self.events = events
+
+
+def define_batch_commands() -> Dict[str, Dict]:
+    """
+    Return the collectors that can be batched for each Ansible OS.
+
+    Returns
+    -------
+    batch_commands : dict
+        A dictionary where each key is an Ansible OS. Each value contains the
+        playbook to run ('playbook') and the collectors ('collectors'). Each
+        collector has the command to run ('command'), the parser function
+        ('parser'), whether the parser takes the 'nm_path' argument
+        ('nm_path'), an optional command timeout ('timeout'), and an optional
+        text command for devices that do not support the '| json' command
+        ('fallback_command', see 'run_commands').
+    """
+    ios_bgp_neighbors = "|".join(
+        [
+            "show ip bgp all neighbors ",
+            " include BGP neighbor is",
+            "Member of",
+            "BGP version",
+            "BGP state",
+            "Local host",
+        ]
+    )
+    ios_cdp_params = "|".join(
+        [
+            "-------------------------",
+            "Device ID",
+            "Entry address",
+            "IP address",
+            "IPv6 address",
+            "Platform",
+            "Interface",
+            "Duplex",
+            "Management",
+        ]
+    )
+    nxos_ip_grep = "Interface status:\\|IP address:\\|IP Interface Status for VRF"
+
+    return {
+        "cisco.asa.asa": {
+            "playbook": "cisco_asa_run_commands.yml",
+            "collectors": {
+                "hardware_inventory": {
+                    "command": "show inventory",
+                    "parser": cap.asa_parse_inventory,
+                },
+                "interface_ip_addresses": {
+                    "command": "show interface summary | include Interface|IP address",
+                    "parser": cap.asa_parse_interface_ips,
+                },
+            },
+        },
+        "cisco.ios.ios": {
+            "playbook": "cisco_ios_run_commands.yml",
+            "collectors": {
+                "arp_table": {
+                    "command": "show ip arp",
+                    "parser": cip.ios_parse_arp_table,
+                    "nm_path": True,
+                },
+                "bgp_neighbors": {
+                    "command": ios_bgp_neighbors,
+                    "parser": cip.parse_bgp_neighbors,
+                },
+                "cam_table": {
+                    "command": "show mac address-table | begin Vlan",
+                    "parser": cip.ios_parse_cam_table,
+                    "nm_path": True,
+                },
+                "cdp_neighbors": {
+                    "command": f"show cdp nei detail | include {ios_cdp_params}",
+                    "parser": cip.parse_cdp_neighbors,
+                },
+                "hardware_inventory": {
+                    "command": "show inventory",
+                    "parser": cip.ios_parse_inventory,
+                },
+                "interface_description": {
+                    "command": "show interface description",
+                    "parser": cip.ios_parse_interface_descriptions,
+                },
+                "interface_ip_addresses": {
+                    "command": "show run | include "
+                    "interface|description|ip address|vrf|encapsulation",
+                    "parser": cip.ios_parse_interface_ips,
+                },
+                "interface_ipv6_addresses": {
+                    "command": "show ipv6 interface | include "
+                    "line protocol|subnet is|VPN Routing",
+                    "parser": cip.ios_parse_interface_ipv6_ips,
+                },
+                "ospf_neighbors": {
+                    "command": "show ip ospf neighbor detail | include "
+                    "interface address|area|priority|for|Dead timer",
+                    "parser": cip.parse_ospf_neighbors,
+                },
+                "vlans": {
+                    "command": "show vlan brief | exclude ----",
+                    "parser": cip.ios_parse_vlan_db,
+                },
+                "vrfs": {
+                    "command": "show vrf",
+                    "parser": cip.parse_vrfs,
+                },
+            },
+        },
+        "cisco.nxos.nxos": {
+            "playbook": "cisco_nxos_run_commands.yml",
+            "collectors": {
+                "arp_table": {
+                    "command": "show ip arp vrf all | json",
+                    "fallback_command": "show ip arp vrf all | begin "
+                    '"Address         Age"',
+                    "parser": cnp.nxos_parse_arp_table,
+                    "nm_path": True,
+                },
+                "bgp_neighbors": {
+                    "command": "show ip bgp summary vrf all",
+                    "parser": cnp.nxos_parse_bgp_neighbors,
+                },
+                "cam_table": {
+                    "command": "show mac address-table | json",
+                    "fallback_command": "show mac address-table",
+                    "parser": cnp.nxos_parse_cam_table,
+                    "nm_path": True,
+                },
+                "cdp_neighbors": {
+                    "command": "show cdp nei | json",
+                    "parser": cnp.nxos_parse_cdp_neighbors,
+                },
+                "fexes_table": {
+                    "command": "show fex detail",
+                    "parser": cnp.nxos_parse_fexes_table,
+                    "nm_path": True,
+                },
+                "interface_description": {
+                    "command": "show interface description | json",
+                    "fallback_command": "show interface description | "
+                    'grep -v "\\-\\-\\-\\-"',
+                    "parser": cnp.nxos_parse_interface_descriptions,
+                },
+                "interface_ip_addresses": {
+                    "command": f'show ip interface vrf all | grep "{nxos_ip_grep}"',
+                    "parser": cnp.nxos_parse_interface_ips,
+                },
+                "interface_status": {
+                    "command": "show interface status | json",
+                    "fallback_command": 'show interface status | grep -v "\\-\\-\\-"',
+                    "parser": cnp.nxos_parse_interface_status,
+                },
+                "lldp_neighbors": {
+                    "command": "show lldp nei | json",
+                    "parser": cnp.nxos_parse_lldp_neighbors,
+                },
+                "port_channel_data": {
+                    "command": "show port-channel database | json",
+                    "fallback_command": "show port-channel database",
+                    "parser": cnp.nxos_parse_port_channel_data,
+                },
+                "vlans": {
+                    "command": "show vlan brief | json",
+                    "fallback_command": "show vlan brief | grep "
+                    '"Status    Ports\\|active\\|suspend\\|shut"',
+                    "parser": cnp.nxos_parse_vlan_db,
+                    "timeout": 240,
+                },
+                "vpc_state": {
+                    "command": "show vpc brief | json",
+                    "fallback_command": 'show vpc brief | begin "vPC domain id" | '
+                    'end "vPC Peer-link status"',
+                    "parser": cnp.nxos_parse_vpc_state,
+                },
+                "vrfs": {
+                    "command": "show vrf detail",
+                    "parser": cnp.nxos_parse_vrfs,
+                },
+            },
+        },
+    }
+
+
+def get_command(
+    ansible_os: str, collector: str, fallback: bool = False
+) -> str:
+    """
+    Return the command that a collector runs (see 'define_batch_commands').
+
+    Parameters
+    ----------
+    ansible_os : str
+        The Ansible OS of the hostgroup.
+    collector : str
+        The name of the collector.
+    fallback : bool, optional
+        Whether to return the text command for devices that do not support
+        the '| json' command, instead of the command. Defaults to False.
+
+    Returns
+    -------
+    command : str
+        The command.
+    """
+    commands = define_batch_commands()[ansible_os]["collectors"][collector]
+    if fallback:
+        return commands["fallback_command"]
+    return commands["command"]
+
+
+def get_batch_collectors(ansible_os: str, collectors: List[str]) -> List[str]:
+    """
+    Return the collectors in a list that can be batched.
+
+    Parameters
+    ----------
+    ansible_os : str
+        The Ansible OS of the hostgroup.
+    collectors : list
+        The names of the collectors.
+
+    Returns
+    -------
+    batched : list
+        The collectors that can be batched, in the same order.
+    """
+    available = define_batch_commands().get(ansible_os, dict()).get("collectors", {})
+    return [c for c in collectors if c in available]
+
+
+def split_runner(runner, num_commands: int) -> List[CommandRunner]:
+    """
+    Split the events of a batched play into one runner per command.
+
+    Parameters
+    ----------
+    runner : ansible_runner.Runner
+        The runner for the batched play.
+    num_commands : int
+        The number of commands that were run.
+
+    Returns
+    -------
+    runners : list
+        A list of CommandRunner objects, in the same order as the commands.
+        Each 'runner_on_ok' event only contains the output of that command.
+        Other events are included in every runner.
+    """
+    events = [list() for _ in range(num_commands)]
+    for event in runner.events:
+        res = event.get("event_data", dict()).get("res", dict())
+        stdout = res.get("stdout") if isinstance(res, dict) else None
+        if event["event"] != "runner_on_ok" or not isinstance(stdout, list):
+            for item in events:
+                item.append(event)
+            continue
+
+        stdout_lines = res.get("stdout_lines", list())
+        for i in range(num_commands):
+            _res = dict(res)
+            _res["stdout"] = stdout[i: i + 1]
+            _res["stdout_lines"] = stdout_lines[i: i + 1]
+            _event = dict(event)
+            _event["event_data"] = dict(event["event_data"], res=_res)
+            events[i].append(_event)
+
+    return [CommandRunner(item) for item in events]
+
+
+def execute_commands(
+    ansible_os: str,
+    commands: List[str],
+    username: str,
+    password: str,
+    host_group: str,
+    play_path: str,
+    private_data_dir: str,
+    timeout: int = 0,
+    engine: str = "ansible",
+    devices: Optional[List[str]] = None,
+    known_hosts: Optional[str] = None,
+    host_key_checking: bool = True,
+):
+    """
+    Run a list of commands on the devices in a hostgroup, in a single play.
+
+    Parameters
+    ----------
+    ansible_os : str
+        The Ansible OS of the hostgroup.
+    commands : list
+        The commands to run.
+    username : str
+        The username to login to devices.
+    password : str
+        The password to login to devices.
+    host_group : str
+        The inventory host group.
+    play_path : str
+        The path to the playbooks directory.
+    private_data_dir : str
+        The path to the Ansible private data directory.
+    timeout : int, optional
+        The command timeout, in seconds. It is only used if it is longer than
+        the timeout in the hostgroup's execution profile. Defaults to 0.
+    engine : str, optional
+        The engine that runs the commands. See 'run_batch'.
+    devices : list, optional
+        Only run the commands on these devices in the hostgroup. Defaults to
+        all of the devices.
+    known_hosts : str, optional
+        The path to the known_hosts file for the 'asyncssh' engine (see
+        'ssh_engine.run_device_commands').
+    host_key_checking : bool, optional
+        Whether the 'asyncssh' engine verifies host keys. Defaults to True.
+
+    Returns
+    -------
+    runner : ansible_runner.Runner or ssh_engine.SSHRunner
+        The runner for the play. With the 'asyncssh' engine, devices that
+        could not be connected to, or where a command failed, are run again
+        with ansible-runner, and their events are replaced.
+    """
+    if engine == "asyncssh" and ansible_os in se.SUPPORTED_OS:
+        profile = ep.get_profile(host_group)
+        runner = se.run_commands(
+            host_group,
+            commands,
+            username,
+            password,
+            private_data_dir,
+            max_sessions=profile.get("forks", 500),
+            connect_timeout=profile.get("connect_timeout", 30),
+            command_timeout=max(timeout, profile.get("command_timeout", 30)),
+            devices=devices,
+            known_hosts=known_hosts,
+            host_key_checking=host_key_checking,
+        )
+
+        # Retry the devices that failed with ansible-runner, which uses the
+        # connection settings in the inventory (E.g., jump hosts and SSH keys)
+        failed = get_failed_devices(runner)
+        if not failed:
+            return runner
+        print(
+            f"Retrying {len(failed)} devices with ansible-runner: "
+            f"{', '.join(failed)}"
+        )
+        retry = execute_commands(
+            ansible_os,
+            commands,
+            username,
+            password,
+            host_group,
+            play_path,
+            private_data_dir,
+            timeout=timeout,
+            devices=failed,
+        )
+        return replace_events(runner, retry, failed)
+
+    extravars = {
+        "username": username,
+        "password": password,
+        "host_group": host_group,
+        "commands": commands,
+    }
+    if timeout > 0:
+        extravars["ansible_command_timeout"] = str(timeout)
+    kwargs = ep.get_runner_kwargs(host_group, extravars)
+    if devices is not None:
+        kwargs["limit"] = ",".join(devices)
+
+    playbook = f"{play_path}/{define_batch_commands()[ansible_os]['playbook']}"
+    return ansible_runner.run(
+        private_data_dir=private_data_dir,
+        playbook=playbook,
+        suppress_env_files=True,
+        **kwargs,
+    )
+
+
+def get_failed_devices(runner) -> List[str]:
+    """
+    Find the devices where the play failed, or that could not be connected to.
+
+    Parameters
+    ----------
+    runner : ansible_runner.Runner or ssh_engine.SSHRunner
+        The runner for the play.
+
+    Returns
+    -------
+    devices : list
+        The inventory hostnames of the devices.
+    """
+    devices = list()
+    for event in runner.events:
+        if event["event"] in ["runner_on_failed", "runner_on_unreachable"]:
+            devices.append(event.get("event_data", dict()).get("host"))
+    return devices
+
+
+def replace_events(runner, other, devices: List[str]) -> CommandRunner:
+    """
+    Replace the events for some devices with the events from another play.
+
+    Parameters
+    ----------
+    runner : ansible_runner.Runner or ssh_engine.SSHRunner
+        The runner for the first play.
+    other : ansible_runner.Runner or ssh_engine.SSHRunner
+        The runner for the play that was run on the devices.
+    devices : list
+        The inventory hostnames of the devices.
+
+    Returns
+    -------
+    runner : CommandRunner
+        The events from the first play for the other devices, followed by the
+        events from the second play.
+    """
+    events = [
+        e
+        for e in runner.events
+        if e.get("event_data", dict()).get("host") not in devices
+    ]
+    return CommandRunner(events + other.events)
+
+
+def get_fallback_devices(
+    runner, commands: List[str], fallback_commands: List[str]
+) -> List[str]:
+    """
+    Find the devices that need to run the fallback commands. Those are the
+    devices where the play failed, or where the output of a '| json' command
+    was text (see 'nxos_json.needs_fallback').
+
+    Parameters
+    ----------
+    runner : ansible_runner.Runner or ssh_engine.SSHRunner
+        The runner for the play.
+    commands : list
+        The commands that were run.
+    fallback_commands : list
+        The fallback command for each command. Commands that do not have a
+        fallback are the same as the command.
+
+    Returns
+    -------
+    devices : list
+        The inventory hostnames of the devices.
+    """
+    json_commands = [
+        i for i, (cmd, fallback) in enumerate(zip(commands, fallback_commands))
+        if cmd != fallback
+    ]
+    devices = list()
+    for event in runner.events:
+        event_data = event.get("event_data", dict())
+        if event["event"] == "runner_on_failed":
+            devices.append(event_data.get("host"))
+        elif event["event"] == "runner_on_ok":
+            stdout = event_data["res"].get("stdout", list())
+            if any(
+                nxj.needs_fallback(stdout[i]) for i in json_commands if i < len(stdout)
+            ):
+                devices.append(event_data.get("host"))
+    return devices
+
+
+def run_commands(
+    ansible_os: str,
+    commands: List[str],
+    username: str,
+    password: str,
+    host_group: str,
+    play_path: str,
+    private_data_dir: str,
+    fallback_commands: Optional[List[str]] = None,
+    timeout: int = 0,
+    engine: str = "ansible",
+    known_hosts: Optional[str] = None,
+    host_key_checking: bool = True,
+) -> List[CommandRunner]:
+    """
+    Run a list of commands in a single play, and split the output into one
+    runner per command.
+
+    The NXOS collectors run their '| json' commands with fallback commands
+    that return text. Devices that do not support JSON output for one of the
+    commands (such as older NXOS versions), or where the play failed, run the
+    fallback commands in a second play. Their output from the first play is
+    replaced with the output of the second one, so the parsers only see one
+    result for each device.
+
+    Parameters
+    ----------
+    ansible_os : str
+        The Ansible OS of the hostgroup.
+    commands : list
+        The commands to run.
+    username : str
+        The username to login to devices.
+    password : str
+        The password to login to devices.
+    host_group : str
+        The inventory host group.
+    play_path : str
+        The path to the playbooks directory.
+    private_data_dir : str
+        The path to the Ansible private data directory.
+    fallback_commands : list, optional
+        The fallback command for each command. Commands that do not have a
+        fallback should be the same as the command. Defaults to None, which
+        does not run any fallback commands.
+    timeout : int, optional
+        The command timeout, in seconds. See 'execute_commands'.
+    engine : str, optional
+        The engine that runs the commands. See 'run_batch'.
+    known_hosts : str, optional
+        The path to the known_hosts file. See 'execute_commands'.
+    host_key_checking : bool, optional
+        Whether to verify host keys. See 'execute_commands'.
+
+    Returns
+    -------
+    runners : list
+        A list of CommandRunner objects, in the same order as the commands
+        (see 'split_runner').
+    """
+    args = [username, password, host_group, play_path, private_data_dir]
+    runner = execute_commands(
+        ansible_os,
+        commands,
+        *args,
+        timeout=timeout,
+        engine=engine,
+        known_hosts=known_hosts,
+        host_key_checking=host_key_checking,
+    )
+
+    if fallback_commands and fallback_commands != commands:
+        devices = get_fallback_devices(runner, commands, fallback_commands)
+        if devices:
+            print(
+                f"Running the fallback commands on {len(devices)} devices that"
+                " did not return JSON output."
+            )
+            fallback = execute_commands(
+                ansible_os,
+                fallback_commands,
+                *args,
+                timeout=timeout,
+                engine=engine,
+                devices=devices,
+                known_hosts=known_hosts,
+                host_key_checking=host_key_checking,
+            )
+            runner = replace_events(runner, fallback, devices)
+
+    # Report the devices that are left out of the results
+    failed = get_failed_devices(runner)
+    if failed:
+        print(
+            f"Failed to run the commands on {len(failed)} devices: "
+            f"{', '.join(failed)}"
+        )
+
+    return split_runner(runner, len(commands))
+
+
+def run_batch(
+    ansible_os: str,
+    collectors: List[str],
+    username: str,
+    password: str,
+    host_group: str,
+    nm_path: str,
+    play_path: str,
+    private_data_dir: str,
+    engine: str = "ansible",
+    known_hosts: Optional[str] = None,
+    host_key_checking: bool = True,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Run the commands for several collectors in a single play, then parse the
+    output of each one.
+
+    Parameters
+    ----------
+    ansible_os : str
+        The Ansible OS of the hostgroup.
+    collectors : list
+        The names of the collectors. Collectors that cannot be batched are
+        ignored.
+    username : str
+        The username to login to devices.
+    password : str
+        The password to login to devices.
+    host_group : str
+        The inventory host group.
+    nm_path : str
+        The path to the Net-Manage repository.
+    play_path : str
+        The path to the playbooks directory.
+    private_data_dir : str
+        The path to the Ansible private data directory.
+    engine : str, optional
+        The engine that runs the commands. 'ansible' (the default) runs the
+        playbook with ansible-runner. 'asyncssh' runs the commands with
+        'ssh_engine', for the Ansible OSes that it supports. The 'forks' and
+        timeouts in the hostgroup's execution profile set its concurrency
+        and timeouts. Devices that fail with it are retried with
+        ansible-runner.
+    known_hosts : str, optional
+        The path to the known_hosts file for the 'asyncssh' engine. Defaults
+        to None, which uses asyncssh's default (~/.ssh/known_hosts).
+    host_key_checking : bool, optional
+        Whether the 'asyncssh' engine verifies host keys. Defaults to True.
+
+    Returns
+    -------
+    results : dict
+        A dictionary where each key is a collector, and each value is the
+        parsed result. Collectors whose output could not be parsed are left
+        out, so they can be run separately.
+    """
+    definition = define_batch_commands().get(ansible_os)
+    collectors = get_batch_collectors(ansible_os, collectors)
+    if not definition or not collectors:
+        return dict()
+
+    commands = [definition["collectors"][c]["command"] for c in collectors]
+    fallback_commands = [
+        definition["collectors"][c].get("fallback_command", cmd)
+        for c, cmd in zip(collectors, commands)
+    ]
+    timeouts = [definition["collectors"][c].get("timeout", 0) for c in collectors]
+
+    # Execute the commands
+    runners = run_commands(
+        ansible_os,
+        commands,
+        username,
+        password,
+        host_group,
+        play_path,
+        private_data_dir,
+        fallback_commands=fallback_commands,
+        timeout=max(timeouts),
+        engine=engine,
+        known_hosts=known_hosts,
+        host_key_checking=host_key_checking,
+    )
+
+    # Parse the output of each command
+    results = dict()
+    for collector, cmd_runner in zip(collectors, runners):
+        collector_def = definition["collectors"][collector]
+        try:
+            if collector_def.get("nm_path"):
+                results[collector] = collector_def["parser"](cmd_runner, nm_path)
+            else:
+                results[collector] = collector_def["parser"](cmd_runner)
+        except Exception as e:
+            print(f"Caught Exception parsing {collector}: {str(e)}")
+
+    return results
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+"""
+A transport-neutral input format for the command output parsers.
+
+The Cisco NXOS, IOS and ASA parsers used to read the output of each device
+from the events of an 'ansible_runner.Runner'. That meant their output could
+only come from Ansible. The parsers now read their input with
+'iter_command_output', which accepts either:
+
+- An Ansible runner (or any object with runner-style 'events', such as
+  'ssh_engine.SSHRunner').
+- An iterable of (device, command, text) records, such as a list of
+  'CommandRecord' tuples. The records can come from another transport, from
+  a cache, or from a file that was saved with 'write_records'.
+
+A parser reads every record as the output of its own command, so the records
+must all be for the same command. The output filter ('| json', '| begin',
+etc.) can differ, so devices that do not support '| json' can use a text
+command. 'iter_command_output' raises a ValueError for records of more than
+one command, unless the command to use is passed to it (or to
+'read_records').
+
+Examples
+--------
+>>> from netmanage.helpers import command_records as cr
+>>> records = [cr.CommandRecord('switch1', 'show vrf', text)]
+>>> df = cip.parse_vrfs(records)
+
+Save the output of a play, then parse it again without connecting to the
+devices:
+
+>>> cr.write_records(cr.runner_to_records(runner, ['show vrf', 'show arp']),
+...                  path)
+>>> df = cip.parse_vrfs(cr.read_records(path, 'show vrf'))
+"""
+
+import json
+import orjson
+from typing import Any, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class CommandRecord(NamedTuple):
+    """
+    The output of a command on a device.
+
+    Attributes
+    ----------
+    device : str
+        The device's inventory hostname.
+    command : str
+        The command that was run.
+    text : str or dict
+        The output of the command. The output of NXOS '| json' commands may
+        be a dictionary, like the output of the 'nxos_command' module.
+    """
+
+    device: str
+    command: str
+    text: Any
+
+
+def get_base_command(command: str) -> str:
+    """
+    Remove the output filter from a command.
+
+    Parameters
+    ----------
+    command : str
+        The command.
+
+    Returns
+    -------
+    base : str
+        The command without the output filter.
+
+    Examples
+    --------
+    >>> get_base_command('show vpc brief | begin "vPC domain id"')
+    'show vpc brief'
+    """
+    return command.split("|", 1)[0].strip()
+
+
+def iter_command_output(source, command: Optional[str] = None) -> Iterator[Tuple]:
+    """
+    Iterate over the output of each device in a parser's input.
+
+    Parameters
+    ----------
+    source : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
+        For a runner, the output of the first command in each 'runner_on_ok'
+        event is used. Other events are skipped.
+    command : str, optional
+        Only use the records for this command. The output filter is ignored
+        (see 'get_base_command'), so the records for a '| json' command and
+        its text fallback are both used. It is ignored for runners.
+
+    Yields
+    ------
+    device : str
+        The device's inventory hostname.
+    text : str or dict
+        The output of the command.
+
+    Raises
+    ------
+    ValueError
+        If the input is None, or if 'command' is not passed and the records
+        are for more than one command.
+    """
+    if source is None or getattr(source, "events", list()) is None:
+        raise ValueError("The input is None or empty")
+
+    if hasattr(source, "events"):
+        for event in source.events:
+            if event["event"] == "runner_on_ok":
+                event_data = event["event_data"]
+                yield event_data["remote_addr"], event_data["res"]["stdout"][0]
+        return
+
+    records = list(source)
+    commands = set(get_base_command(cmd) for _, cmd, _ in records)
+    if command is not None:
+        commands = {get_base_command(command)}
+    elif len(commands) > 1:
+        raise ValueError(
+            f"The records are for more than one command ({sorted(commands)}). "
+            "Pass the command to use."
+        )
+
+    for device, cmd, text in records:
+        if get_base_command(cmd) in commands:
+            yield device, text
+
+
+def is_json(text) -> bool:
+    """
+    Check whether the output of a command is JSON (E.g., the output of an NXOS
+    '| json' command). It only checks the first character, so it does not
+    decode the output.
+
+    Parameters
+    ----------
+    text : str or dict
+        The output of the command.
+
+    Returns
+    -------
+    bool
+        True if the output is a dictionary or list, or text that starts with
+        '{' or '['.
+    """
+    if isinstance(text, (dict, list)):
+        return True
+    return isinstance(text, str) and text.lstrip()[:1] in ("{", "[")
+
+
+def load_json(text) -> Any:
+    """
+    Decode the output of a '| json' command. Ansible decodes the output of
+    those commands, but other transports return it as text. Text is decoded
+    with orjson, which is several times faster than the json module for large
+    outputs (like the ARP and MAC address tables).
+
+    Parameters
+    ----------
+    text : str or dict
+        The output of the command.
+
+    Returns
+    -------
+    data : dict
+        The decoded output.
+    """
+    if isinstance(text, (str, bytes)):
+        return orjson.loads(text)
+    return text
+
+
+def runner_to_records(runner, commands: List[str]) -> List[CommandRecord]:
+    """
+    Convert the output of a play to records.
+
+    Parameters
+    ----------
+    runner : ansible_runner.Runner
+        The runner for the play.
+    commands : list
+        The commands that the play ran, in order.
+
+    Returns
+    -------
+    records : list
+        A CommandRecord for each command on each device that returned output.
+    """
+    records = list()
+    for event in runner.events:
+        if event["event"] == "runner_on_ok":
+            event_data = event["event_data"]
+            stdout = event_data["res"]["stdout"]
+            for cmd, text in zip(commands, stdout):
+                records.append(CommandRecord(event_data["remote_addr"], cmd, text))
+    return records
+
+
+def write_records(records: Iterable[Tuple], path: str) -> None:
+    """
+    Write records to a file, with one JSON object per line.
+
+    Parameters
+    ----------
+    records : iterable
+        The (device, command, text) records.
+    path : str
+        The path to the file.
+
+    Returns
+    -------
+    None
+    """
+    with open(path, "w") as f:
+        for device, command, text in records:
+            f.write(json.dumps({"device": device, "command": command, "text": text}))
+            f.write("\n")
+
+
+def read_records(path: str, command: Optional[str] = None) -> List[CommandRecord]:
+    """
+    Read records from a file that was written with 'write_records'.
+
+    Parameters
+    ----------
+    path : str
+        The path to the file.
+    command : str, optional
+        Only read the records for this command. The output filter is ignored
+        (see 'get_base_command'). Defaults to None, which reads every record.
+
+    Returns
+    -------
+    records : list
+        The records.
+    """
+    records = list()
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                if command is not None and get_base_command(
+                    item["command"]
+                ) != get_base_command(command):
+                    continue
+                records.append(
+                    CommandRecord(item["device"], item["command"], item["text"])
+                )
+    return records
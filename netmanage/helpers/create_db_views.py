@@ -5,6 +5,7 @@ Contains the schema and creates the views for sqlite3 databases.
 """
 
 from netmanage.helpers import helpers as hp
+from netmanage.helpers import normalized_tables as nt
 
 
 def create_db_view(db_path: str, view_name: str):
@@ -112,135 +113,108 @@ def create_db_view(db_path: str, view_name: str):
         )
         con.commit()
     if view_name == "combined_bgp_neighbors":
-        # Create required tables and views.
-        cur.execute(
-            """
-            -- Table for IOS_BGP_NEIGHBORS
-            CREATE TABLE IF NOT EXISTS IOS_BGP_NEIGHBORS (
-                timestamp TEXT,
-                device TEXT,
-                local_host TEXT,
-                bgp_neighbor TEXT,
-                vrf TEXT,
-                neighbor_id TEXT,
-                remote_as TEXT,
-                bgp_state TEXT,
-                table_id INTEGER PRIMARY KEY AUTOINCREMENT
-            );
-            """
-        )
+        # The views read the normalized tables (see
+        # helpers/normalized_tables.py), which 'add_to_db' refreshes after
+        # each collector write. Create them, so the views can be created
+        # before the collectors have run. Existing views are replaced, so
+        # databases with the views that read the vendor tables are upgraded.
+        for name in ["NORMALIZED_BGP_NEIGHBORS", "NORMALIZED_INTERFACE_IPS"]:
+            nt.create_normalized_table(con, name)
+        cur.execute("DROP VIEW IF EXISTS combined_bgp_neighbors")
+        cur.execute("DROP VIEW IF EXISTS interface_ips")
         con.commit()
-        con.close()
-        con = hp.connect_to_db(db_path)
-        cur = con.cursor()
 
         cur.execute(
             """
-            CREATE TABLE IF NOT EXISTS PANOS_BGP_NEIGHBORS (
-                timestamp TEXT,
-                device TEXT,
-                "local-address" TEXT,
-                "peer-address" TEXT,
-                "@vr" TEXT,
-                "peer-router-id" TEXT,
-                "remote-as" TEXT,
-                status TEXT,
-                table_id INTEGER PRIMARY KEY AUTOINCREMENT
-            );
+            CREATE VIEW interface_ips AS
+            SELECT DISTINCT
+                device,
+                ip_address AS ip,
+                interface_name,
+                CASE WHEN vrf = 'None' THEN '' ELSE vrf END AS vrf
+            FROM NORMALIZED_INTERFACE_IPS;
             """
         )
         con.commit()
-        con.close()
-        con = hp.connect_to_db(db_path)
-        cur = con.cursor()
 
+        # The normalized tables split 'address:port' into two columns. An
+        # IPv6 address without a port is split at its last colon, so it is
+        # joined again.
+        local_host = """CASE
+                WHEN INSTR(local_address, ':') > 0
+                     AND local_address_port IS NOT NULL THEN
+                    local_address || ':' || local_address_port
+                ELSE
+                    local_address
+            END"""
+        remote_address = """CASE
+                WHEN INSTR(remote_address, ':') > 0
+                     AND remote_address_port IS NOT NULL THEN
+                    remote_address || ':' || remote_address_port
+                ELSE
+                    remote_address
+            END"""
+
+        # Create view.
         cur.execute(
-            """
-            CREATE VIEW IF NOT EXISTS interface_ips AS
-            -- Query for IOS_INTERFACE_IP_ADDRESSES
+            f"""CREATE VIEW combined_bgp_neighbors AS
+        SELECT
+            REPLACE(BGP.device, '.mmi.local', '') AS device,
+            BGP.local_host,
+            REPLACE((SELECT DISTINCT device FROM interface_ips WHERE ip =
+                  BGP.neighbor_ip), '.mmi.local', '') AS bgp_neighbor,
+            BGP.vrf,
+            BGP.neighbor_id,
+            BGP.remote_as,
+            BGP.bgp_state,
+            (SELECT DISTINCT interface_name FROM interface_ips WHERE device =
+                  BGP.device AND ip = BGP.local_host) AS local_interface,
+            (SELECT DISTINCT interface_name FROM interface_ips WHERE ip =
+              BGP.neighbor_ip) AS remote_interface,
+            REPLACE((SELECT DISTINCT vrf FROM interface_ips WHERE ip =
+              BGP.neighbor_ip), 'vr:', '') AS remote_vrf
+        FROM (
+            -- Rows from IOS_BGP_NEIGHBORS
             SELECT
                 device,
-                ip,
-                interface AS interface_name,
-                CASE WHEN vrf = 'None' THEN '' ELSE vrf END AS vrf
-            FROM IOS_INTERFACE_IP_ADDRESSES
+                {local_host} AS local_host,
+                bgp_neighbor AS neighbor_ip,
+                vrf,
+                neighbor_id,
+                remote_as,
+                bgp_state
+            FROM NORMALIZED_BGP_NEIGHBORS
+            WHERE source = 'IOS_BGP_NEIGHBORS'
 
             UNION
 
-            -- Query for IOS_INTERFACE_IPV6_ADDRESSES
+            -- Rows from PANOS_BGP_NEIGHBORS
             SELECT
                 device,
-                ip,
-                interface AS interface_name,
-                CASE WHEN vrf = 'None' THEN '' ELSE vrf END AS vrf
-            FROM IOS_INTERFACE_IPV6_ADDRESSES;
-            """
+                {local_host} AS local_host,
+                {remote_address} AS neighbor_ip,
+                vrf,
+                neighbor_id,
+                remote_as,
+                status AS bgp_state
+            FROM NORMALIZED_BGP_NEIGHBORS
+            WHERE source = 'PANOS_BGP_NEIGHBORS'
+        ) AS BGP;"""
         )
         con.commit()
-        con.close()
-        con = hp.connect_to_db(db_path)
-        cur = con.cursor()
 
-        # Create view.
+    if view_name == "combined_prefixes":
+        nt.create_normalized_table(con, "NORMALIZED_PREFIXES")
         cur.execute(
-            """CREATE VIEW combined_bgp_neighbors AS
-        -- Query for IOS_BGP_NEIGHBORS
-        SELECT
-            REPLACE(IOS.device, '.mmi.local', '') AS device,
-            CASE
-                WHEN (LENGTH(IOS.local_host) - LENGTH(REPLACE(
-                        IOS.local_host, ':', ''))) > 1 THEN
-                    IOS.local_host
-                WHEN INSTR(IOS.local_host, ':') > 0 THEN
-                    SUBSTR(IOS.local_host, 1, INSTR(IOS.local_host, ':') - 1)
-                ELSE
-                    IOS.local_host
-            END AS local_host,
-            REPLACE((SELECT DISTINCT device FROM interface_ips WHERE ip =
-                  IOS.bgp_neighbor), '.mmi.local', '') AS bgp_neighbor,
-            IOS.vrf,
-            IOS.neighbor_id,
-            IOS.remote_as,
-            IOS.bgp_state,
-            (SELECT DISTINCT interface_name FROM interface_ips WHERE device =
-                  IOS.device AND ip = IOS.local_host) AS local_interface,
-            (SELECT DISTINCT interface_name FROM interface_ips WHERE ip =
-              IOS.bgp_neighbor) AS remote_interface,
-            REPLACE((SELECT DISTINCT vrf FROM interface_ips WHERE ip =
-              IOS.bgp_neighbor), 'vr:', '') AS remote_vrf
-        FROM IOS_BGP_NEIGHBORS AS IOS
-
-        UNION
-
-        -- Query for PANOS_BGP_NEIGHBORS
-        SELECT
-            REPLACE(PANOS.device, '.mmi.local', '') AS device,
-            CASE
-                WHEN (LENGTH(PANOS."local-address") - LENGTH(
-                        REPLACE(PANOS."local-address", ':', ''))) > 1 THEN
-                    PANOS."local-address"
-                WHEN INSTR(PANOS."local-address", ':') > 0 THEN
-                    SUBSTR(PANOS."local-address", 1, INSTR(
-                        PANOS."local-address", ':') - 1)
-                ELSE
-                    PANOS."local-address"
-            END AS local_host,
-            REPLACE((SELECT DISTINCT device FROM interface_ips WHERE ip =
-              SUBSTR(PANOS."peer-address", 1, INSTR(PANOS."peer-address", ':')
-                - 1)), '.mmi.local', '') AS bgp_neighbor,
-            PANOS."@vr" AS vrf,
-            PANOS."peer-router-id" AS neighbor_id,
-            PANOS."remote-as" AS remote_as,
-            PANOS.status AS bgp_state,
-            (SELECT DISTINCT interface_name FROM interface_ips WHERE device =
-              PANOS.device AND ip = PANOS."local-address") AS local_interface,
-            (SELECT DISTINCT interface_name FROM interface_ips WHERE ip =
-              SUBSTR(PANOS."peer-address", 1, INSTR(PANOS."peer-address", ':')
-                - 1)) AS remote_interface,
-            REPLACE((SELECT DISTINCT vrf FROM interface_ips WHERE ip =
-              SUBSTR(PANOS."peer-address", 1, INSTR(PANOS."peer-address", ':')
-                - 1)), 'vr:', '') AS remote_vrf
-        FROM PANOS_BGP_NEIGHBORS AS PANOS;"""
+            """CREATE VIEW IF NOT EXISTS combined_prefixes AS
+        SELECT DISTINCT
+            device,
+            CASE WHEN vrf = 'None' THEN '' ELSE vrf END AS vrf,
+            prefix,
+            network_ip,
+            cidr,
+            subnet
+        FROM NORMALIZED_PREFIXES;"""
         )
         con.commit()
     con.close()
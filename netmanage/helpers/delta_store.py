@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+
+"""
+Change-only (delta) storage for collector snapshots.
+
+Most collector output is nearly identical between runs. In delta mode
+(database_method='delta'), 'add_to_db' also records each snapshot as a list
+of changes. Each row is identified by a hash of its natural key (for
+example, 'device' and 'interface') and a hash of its contents, and only
+inserts, changes and deletions are stored in '<TABLE>_DELTA':
+
+- A new row is inserted with 'valid_from' set to the snapshot timestamp.
+- When a row changes, the old version is closed by setting 'valid_to', and
+  the new version is inserted.
+- When a row disappears, it is closed.
+
+A row is part of the snapshot at timestamp T if valid_from <= T and
+valid_to is NULL or greater than T. 'read_snapshot' reconstructs any
+snapshot, and 'get_changes' returns the changes between two timestamps with
+a range scan. The timestamp and hostgroup of each snapshot are stored in
+'_delta_snapshots'.
+
+Each collector run covers one hostgroup, so the rows are stored with the
+hostgroup they were collected from. A snapshot only closes the rows of its
+own hostgroup, and writing one hostgroup does not affect the rows of the
+others.
+
+Tables that are not in 'define_natural_keys' use all of their columns as the
+key, so a change is stored as a deletion and an insert.
+
+In delta mode, the collector table only holds the latest snapshot of each
+hostgroup ('prune_table' deletes the earlier ones after each write), so the
+collectors and normalized tables that read the latest data see the same rows
+in either mode. The earlier snapshots are rebuilt from the delta table by
+'helpers.sql_snapshot_source', which 'helpers.snapshot_at',
+'helpers.snapshots_between', 'helpers.get_first_last_timestamp' and the
+validators read from.
+
+Examples
+--------
+>>> from netmanage.helpers import delta_store as ds
+>>> ds.write_delta(db_path, 'NXOS_VLANS', df, '2024-01-01_1000',
+...                hostgroup='nxos_switches')
+>>> df = ds.read_snapshot(db_path, 'NXOS_VLANS', '2024-01-01_1000')
+>>> df_changes = ds.get_changes(db_path, 'NXOS_VLANS',
+...                             '2024-01-01_1000', '2024-01-02_1000')
+"""
+
+import pandas as pd
+import sqlite3 as sl
+from netmanage.helpers import column_schemas as cs
+from netmanage.helpers import helpers as hp
+from typing import Dict, List, Optional
+
+
+def define_natural_keys() -> Dict[str, List[str]]:
+    """
+    Return the natural key columns for collector tables.
+
+    Returns
+    -------
+    keys : dict
+        A dictionary where each key is a table name, and each value is the
+        list of columns that identify a row in that table.
+    """
+    return {
+        "ASA_HARDWARE_INVENTORY": ["device", "name"],
+        "IOS_HARDWARE_INVENTORY": ["device", "name"],
+        "IOS_INTERFACE_DESCRIPTION": ["device", "interface"],
+        "IOS_VLANS": ["device", "vlan"],
+        "IOS_VRFS": ["device", "Name"],
+        "NXOS_HARDWARE_INVENTORY": ["device", "name"],
+        "NXOS_INTERFACE_DESCRIPTION": ["device", "interface"],
+        "NXOS_INTERFACE_IP_ADDRESSES": ["device", "interface", "ip"],
+        "NXOS_VLANS": ["device", "id"],
+        "NXOS_VRFS": ["device", "name"],
+    }
+
+
+def get_delta_table(table: str) -> str:
+    """
+    Return the name of the delta table for a collector table.
+
+    Parameters
+    ----------
+    table : str
+        The name of the collector table.
+
+    Returns
+    -------
+    name : str
+        The name of the delta table.
+    """
+    return f"{table.upper()}_DELTA"
+
+
+def hash_rows(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    """
+    Hash the values in the specified columns of each row.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The DataFrame to hash.
+    columns : list
+        The columns to include in the hash.
+
+    Returns
+    -------
+    hashes : pd.Series
+        The hashes, as signed 64-bit integers so they can be stored in SQLite.
+    """
+    hashes = pd.util.hash_pandas_object(df[columns].astype(str), index=False)
+    return hashes.astype("uint64").astype("int64")
+
+
+def create_delta_table(
+    con: sl.Connection, table: str, columns: List[str]
+) -> None:
+    """
+    Create the delta table for a collector table, or add any columns that it
+    is missing.
+
+    Parameters
+    ----------
+    con : sl.Connection
+        The connection to the database.
+    table : str
+        The name of the collector table.
+    columns : list
+        The data columns.
+
+    Returns
+    -------
+    None
+    """
+    name = get_delta_table(table)
+    cur = con.cursor()
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS _delta_snapshots (
+                table_name TEXT,
+                timestamp TEXT,
+                hostgroup TEXT,
+                PRIMARY KEY (table_name, timestamp, hostgroup)
+                )"""
+    )
+
+    existing = [r[1] for r in cur.execute(f"PRAGMA table_info({name})").fetchall()]
+    if not existing:
+        fields = ",\n".join(
+            [f'"{c}" {cs.get_sqlite_type(table, c)}'.rstrip() for c in columns]
+        )
+        cur.execute(
+            f"""CREATE TABLE {name} (
+                    table_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    valid_from TEXT,
+                    valid_to TEXT,
+                    _hostgroup TEXT,
+                    _key_hash INTEGER,
+                    _row_hash INTEGER,
+                    {fields}
+                    )"""
+        )
+        cur.execute(
+            f"""CREATE INDEX idx_{name.lower()}_open
+                ON {name} (_hostgroup, valid_to)"""
+        )
+        cur.execute(
+            f"""CREATE INDEX idx_{name.lower()}_valid_from
+                ON {name} (valid_from)"""
+        )
+    else:
+        for col in columns:
+            if col not in existing:
+                col_type = cs.get_sqlite_type(table, col)
+                cur.execute(f'ALTER TABLE {name} ADD COLUMN "{col}" {col_type}')
+
+
+def write_delta(
+    db_path: str,
+    table: str,
+    result: pd.DataFrame,
+    timestamp: str,
+    key_cols: Optional[List[str]] = None,
+    hostgroup: str = "",
+) -> Dict[str, int]:
+    """
+    Store the changes between a collector snapshot and the current rows.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the database.
+    table : str
+        The name of the collector table.
+    result : pd.DataFrame
+        The output of a collector.
+    timestamp : str
+        The timestamp for the data in YYYY-MM-DD_hhmm format. Snapshots must
+        be written in chronological order.
+    key_cols : list, optional
+        The natural key columns. Defaults to the key in
+        'define_natural_keys', or all of the columns if the table is not
+        defined there.
+    hostgroup : str, optional
+        The hostgroup that the snapshot was collected from. Only the rows of
+        this hostgroup are compared with the snapshot, closed or replaced.
+        Defaults to ''.
+
+    Returns
+    -------
+    counts : dict
+        The number of rows that were 'inserted', 'changed' and 'deleted'.
+    """
+    table = table.upper()
+    name = get_delta_table(table)
+    df = result.drop(columns=["timestamp", "table_id"], errors="ignore")
+    df = df.reset_index(drop=True)
+    columns = df.columns.to_list()
+
+    if key_cols is None:
+        key_cols = define_natural_keys().get(table, columns)
+    key_cols = [c for c in key_cols if c in columns] or columns
+
+    # Rows with duplicate keys are numbered, so each one has a unique key.
+    df["_n"] = df.groupby(key_cols, dropna=False).cumcount()
+    df["_key_hash"] = hash_rows(df, key_cols + ["_n"])
+    df["_row_hash"] = hash_rows(df, columns)
+    df = df.drop(columns=["_n"])
+
+    con = hp.connect_to_db(db_path)
+    cur = con.cursor()
+    create_delta_table(con, table, columns)
+
+    df_open = pd.read_sql(
+        f"""SELECT table_id, _key_hash, _row_hash FROM {name}
+            WHERE _hostgroup = ? AND valid_to IS NULL""",
+        con,
+        params=(hostgroup,),
+    )
+    df_merge = df.merge(
+        df_open, on="_key_hash", how="outer", suffixes=("", "_old"), indicator=True
+    )
+
+    inserted = df_merge["_merge"] == "left_only"
+    deleted = df_merge["_merge"] == "right_only"
+    changed = (df_merge["_merge"] == "both") & (
+        df_merge["_row_hash"] != df_merge["_row_hash_old"]
+    )
+
+    # Close the rows that changed or were deleted.
+    closed = df_merge.loc[deleted | changed, "table_id"].astype(int).to_list()
+    cur.executemany(
+        f"UPDATE {name} SET valid_to = ? WHERE table_id = ?",
+        [(timestamp, i) for i in closed],
+    )
+
+    # Insert the new and changed rows.
+    df_new = df_merge.loc[inserted | changed, ["_key_hash", "_row_hash"] + columns]
+    df_new = df_new.astype(object).where(df_new.notna(), None)
+    df_new.insert(0, "valid_from", timestamp)
+    df_new.insert(1, "_hostgroup", hostgroup)
+    fields = ", ".join([f'"{c}"' for c in df_new.columns])
+    placeholders = ", ".join(["?"] * len(df_new.columns))
+    cur.executemany(
+        f"INSERT INTO {name} ({fields}) VALUES ({placeholders})",
+        df_new.itertuples(index=False, name=None),
+    )
+
+    cur.execute(
+        "INSERT OR IGNORE INTO _delta_snapshots VALUES (?, ?, ?)",
+        (table, timestamp, hostgroup),
+    )
+    con.commit()
+    con.close()
+
+    return {
+        "inserted": int(inserted.sum()),
+        "changed": int(changed.sum()),
+        "deleted": int(deleted.sum()),
+    }
+
+
+def get_delta_timestamps(db_path: str, table: str) -> List[str]:
+    """
+    Get the timestamps of the snapshots that were written to a delta table.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the database.
+    table : str
+        The name of the collector table.
+
+    Returns
+    -------
+    timestamps : list
+        The timestamps, from oldest to newest.
+    """
+    con = hp.connect_to_db(db_path)
+    try:
+        rows = con.execute(
+            """SELECT DISTINCT timestamp FROM _delta_snapshots
+               WHERE table_name = ? ORDER BY timestamp""",
+            (table.upper(),),
+        ).fetchall()
+    except sl.OperationalError:
+        rows = list()
+    con.close()
+    return [r[0] for r in rows]
+
+
+def prune_table(db_path: str, table: str, timestamp: str, hostgroup: str = "") -> int:
+    """
+    Delete the earlier snapshots of a hostgroup from a collector table, once
+    they are stored in the delta table.
+
+    Snapshots that are not in the delta table (for example, snapshots that
+    were written before the table was switched to delta mode), and
+    timestamps that another hostgroup also wrote to, are kept.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the database.
+    table : str
+        The name of the collector table.
+    timestamp : str
+        The timestamp of the hostgroup's latest snapshot, which is kept.
+    hostgroup : str, optional
+        The hostgroup. Defaults to ''.
+
+    Returns
+    -------
+    deleted : int
+        The number of rows that were deleted.
+    """
+    table = table.upper()
+    if table not in hp.get_database_tables(db_path):
+        return 0
+
+    con = hp.connect_to_db(db_path)
+    cur = con.cursor()
+    cur.execute(
+        f"""DELETE FROM {table}
+            WHERE timestamp IN (SELECT timestamp FROM _delta_snapshots
+                                WHERE table_name = ?
+                                  AND hostgroup = ?
+                                  AND timestamp < ?)
+              AND timestamp NOT IN (SELECT timestamp FROM _delta_snapshots
+                                    WHERE table_name = ? AND hostgroup != ?)""",
+        (table, hostgroup, timestamp, table, hostgroup),
+    )
+    deleted = cur.rowcount
+    con.commit()
+    con.close()
+    return deleted
+
+
+def read_snapshot(
+    db_path: str, table: str, timestamp: str, hostgroup: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Reconstruct the snapshot of a table at a timestamp.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the database.
+    table : str
+        The name of the collector table.
+    timestamp : str
+        The timestamp in YYYY-MM-DD_hhmm format.
+    hostgroup : str, optional
+        Only return the rows of this hostgroup. Defaults to None, which
+        returns the rows of every hostgroup.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        The rows of the snapshot, with a 'timestamp' column.
+    """
+    name = get_delta_table(table)
+    query = f"""SELECT * FROM {name}
+                WHERE valid_from <= ?
+                  AND (valid_to IS NULL OR valid_to > ?)"""
+    params = [timestamp, timestamp]
+    if hostgroup is not None:
+        query += " AND _hostgroup = ?"
+        params.append(hostgroup)
+
+    con = hp.connect_to_db(db_path)
+    df = pd.read_sql(f"{query} ORDER BY table_id", con, params=params)
+    con.close()
+
+    df = df.drop(
+        columns=[
+            "table_id",
+            "valid_from",
+            "valid_to",
+            "_hostgroup",
+            "_key_hash",
+            "_row_hash",
+        ]
+    )
+    df.insert(0, "timestamp", timestamp)
+    return df
+
+
+def get_changes(
+    db_path: str, table: str, start: str, end: str, hostgroup: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Get the rows that were inserted, changed or deleted after 'start', up to
+    and including 'end'.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the database.
+    table : str
+        The name of the collector table.
+    start : str
+        The starting timestamp in YYYY-MM-DD_hhmm format.
+    end : str
+        The ending timestamp in YYYY-MM-DD_hhmm format.
+    hostgroup : str, optional
+        Only return the changes to the rows of this hostgroup. Defaults to
+        None, which returns the changes for every hostgroup.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        The row versions that started or ended in the range. The 'change'
+        column is 'added' for versions that started in the range and
+        'removed' for versions that ended in it. A changed row appears as
+        both. The 'hostgroup' column is the hostgroup that the row was
+        collected from.
+    """
+    name = get_delta_table(table)
+    scope = "" if hostgroup is None else " AND _hostgroup = ?"
+    params = [start, end] + ([hostgroup] if hostgroup is not None else list())
+
+    con = hp.connect_to_db(db_path)
+    df = pd.read_sql(
+        f"""SELECT 'added' AS change, * FROM {name}
+            WHERE valid_from > ? AND valid_from <= ?{scope}
+            UNION ALL
+            SELECT 'removed' AS change, * FROM {name}
+            WHERE valid_to > ? AND valid_to <= ?{scope}""",
+        con,
+        params=params * 2,
+    )
+    con.close()
+    df = df.rename(columns={"_hostgroup": "hostgroup"})
+    return df.drop(columns=["table_id", "_key_hash", "_row_hash"])
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+"""
+Ansible execution settings for each hostgroup.
+
+By default, 'ansible_runner.run' uses Ansible's defaults of 5 forks and the
+'linear' strategy, so each task runs on 5 devices at a time, and the next
+task does not start until every device has finished the current one. That
+limits the throughput of collectors against large hostgroups.
+
+An execution profile sets these options for the plays that collectors run:
+
+- 'forks': The number of devices to run the play on in parallel.
+- 'strategy': The Ansible strategy, such as 'linear' or 'free'.
+- 'command_timeout': The command timeout, in seconds. It is passed to the
+  playbooks as 'ansible_timeout'. If a collector sets a longer
+  'ansible_command_timeout' for a slow command, the longer one is used.
+- 'connect_timeout': The persistent connection timeout, in seconds.
+- 'connect_retry_timeout': The persistent connection retry timeout, in
+  seconds.
+
+The default profile is read from the 'execution_*' variables in the .env
+file. Profiles for individual hostgroups are read from
+'execution_profiles', which is a dictionary where each key is a hostgroup
+and each value is a dictionary of the options to override. For example:
+
+execution_profiles={'nxos_core': {'forks': 50, 'strategy': 'free'}}
+
+Options that are not set use the Ansible defaults.
+
+Examples
+--------
+>>> from netmanage.helpers import execution_profiles as ep
+>>> runner = ansible_runner.run(
+...     private_data_dir=private_data_dir,
+...     playbook=playbook,
+...     suppress_env_files=True,
+...     **ep.get_runner_kwargs(host_group, extravars),
+... )
+"""
+
+import ast
+import os
+from typing import Any, Dict, Optional
+
+PROFILE_OPTIONS = [
+    "forks",
+    "strategy",
+    "command_timeout",
+    "connect_timeout",
+    "connect_retry_timeout",
+]
+
+STRATEGIES = ["debug", "free", "host_pinned", "linear"]
+
+
+def get_default_profile() -> Dict[str, Any]:
+    """
+    Return the default execution profile from the environment variables.
+
+    Returns
+    -------
+    profile : dict
+        The options that are set. Options that are not set are left out.
+    """
+    profile = dict()
+    for option in PROFILE_OPTIONS:
+        value = os.environ.get(f"execution_{option}", "").strip()
+        if value:
+            profile[option] = value
+    return validate_profile(profile)
+
+
+def get_hostgroup_profiles() -> Dict[str, Dict[str, Any]]:
+    """
+    Return the execution profiles for individual hostgroups from the
+    'execution_profiles' environment variable.
+
+    Returns
+    -------
+    profiles : dict
+        A dictionary where each key is a hostgroup, and each value is the
+        options to override for it.
+    """
+    profiles = os.environ.get("execution_profiles", "").strip()
+    if not profiles:
+        return dict()
+    profiles = ast.literal_eval(profiles)
+    if not isinstance(profiles, dict):
+        raise ValueError("'execution_profiles' must be a dictionary.")
+    return {hg: validate_profile(p) for hg, p in profiles.items()}
+
+
+def validate_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate an execution profile and convert its values to the correct types.
+
+    Parameters
+    ----------
+    profile : dict
+        The execution profile.
+
+    Returns
+    -------
+    profile : dict
+        The validated profile.
+    """
+    validated = dict()
+    for option, value in profile.items():
+        if option not in PROFILE_OPTIONS:
+            raise ValueError(f"Invalid execution profile option: '{option}'")
+        if option == "strategy":
+            if value not in STRATEGIES:
+                raise ValueError(f"Invalid Ansible strategy: '{value}'")
+            validated[option] = value
+        else:
+            validated[option] = int(value)
+            if validated[option] <= 0:
+                raise ValueError(f"'{option}' must be greater than 0.")
+    return validated
+
+
+def get_profile(host_group: str) -> Dict[str, Any]:
+    """
+    Return the execution profile for a hostgroup.
+
+    Parameters
+    ----------
+    host_group : str
+        The inventory host group.
+
+    Returns
+    -------
+    profile : dict
+        The default profile, updated with the options for the hostgroup.
+    """
+    profile = get_default_profile()
+    profile.update(get_hostgroup_profiles().get(host_group, dict()))
+    return profile
+
+
+def set_default_profile(
+    forks: Optional[int] = None,
+    strategy: Optional[str] = None,
+    command_timeout: Optional[int] = None,
+) -> None:
+    """
+    Override the default execution profile for the current process. This is
+    used by the command line arguments.
+
+    Parameters
+    ----------
+    forks : int, optional
+        The number of forks.
+    strategy : str, optional
+        The Ansible strategy.
+    command_timeout : int, optional
+        The command timeout, in seconds.
+
+    Returns
+    -------
+    None
+    """
+    options = {
+        "forks": forks,
+        "strategy": strategy,
+        "command_timeout": command_timeout,
+    }
+    options = {k: v for k, v in options.items() if v}
+    for option, value in validate_profile(options).items():
+        os.environ[f"execution_{option}"] = str(value)
+
+
+def get_runner_kwargs(
+    host_group: str, extravars: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Return the keyword arguments for 'ansible_runner.run' that apply the
+    execution profile for a hostgroup.
+
+    Parameters
+    ----------
+    host_group : str
+        The inventory host group.
+    extravars : dict
+        The extra variables for the playbook.
+
+    Returns
+    -------
+    kwargs : dict
+        The 'extravars', 'envvars' and (if it is set) 'forks' arguments. The
+        extra variables are a copy of 'extravars'.
+    """
+    profile = get_profile(host_group)
+    extravars = dict(extravars)
+    envvars = dict()
+
+    if profile.get("command_timeout"):
+        timeout = profile["command_timeout"]
+        extravars.setdefault("ansible_timeout", str(timeout))
+        if "ansible_command_timeout" in extravars:
+            current = int(extravars["ansible_command_timeout"])
+            extravars["ansible_command_timeout"] = str(max(current, timeout))
+    if profile.get("strategy"):
+        envvars["ANSIBLE_STRATEGY"] = profile["strategy"]
+    if profile.get("connect_timeout"):
+        envvars["ANSIBLE_PERSISTENT_CONNECT_TIMEOUT"] = str(
+            profile["connect_timeout"]
+        )
+    if profile.get("connect_retry_timeout"):
+        envvars["ANSIBLE_PERSISTENT_CONNECT_RETRY_TIMEOUT"] = str(
+            profile["connect_retry_timeout"]
+        )
+
+    kwargs = {"extravars": extravars, "envvars": envvars}
+    if profile.get("forks"):
+        kwargs["forks"] = profile["forks"]
+    return kwargs
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+
+"""
+An iControl REST engine for the F5 collectors, as an alternative to running
+tmsh commands with Ansible.
+
+The Ansible collectors run the 'bigip_command' module on localhost, which
+starts an 'ansible-playbook' process for each collector. The output is text
+that has to be scraped. 'helpers.f5_create_authentication_token' creates a
+new token for every call, and then sleeps for 1.5 seconds because of F5 bug
+ID1108181 (https://cdn.f5.com/product/bugtracker/ID1108181.html).
+
+This engine queries the iControl REST API directly:
+
+- Each device has one 'F5Session', which is cached for the rest of the
+  process, so collectors that run one after the other reuse it. The session
+  creates a token the first time it is needed, and a new one shortly before
+  the token expires. The delay for the bug is only applied to new tokens,
+  and only for the time left since the token was created.
+- The session wraps a 'requests.Session', so the TCP and TLS connections are
+  kept alive and pooled between requests. Requests that fail with a
+  connection error or a 502, 503 or 504 status are retried.
+- The devices in a hostgroup are queried at the same time, in a thread pool.
+  The number of threads is the hostgroup's 'forks' setting (see
+  helpers/execution_profiles.py), or 50 if it is not set.
+
+The endpoints return structured data, such as
+'/mgmt/tm/ltm/pool?expandSubcollections=true', which includes the members of
+each pool. The responses are returned as (device, endpoint, data) records
+(see helpers/command_records.py), which the 'parse_rest_*' functions in
+parsers/f5_parsers.py convert to the same DataFrames as the Ansible
+collectors.
+
+The engine is used by the F5 collectors when 'f5_collection_engine' is set
+to 'rest' in the .env file.
+
+Examples
+--------
+>>> from netmanage.helpers import f5_rest as f5r
+>>> records = f5r.get_records('f5_ltms',
+...                           ['/mgmt/tm/ltm/pool/stats'],
+...                           username, password, private_data_dir)
+>>> df = f5p.parse_rest_pool_availability(records)
+"""
+
+import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from netmanage.helpers import command_records as cr
+from netmanage.helpers import execution_profiles as ep
+from netmanage.helpers import ssh_engine as se
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Tuple
+from urllib3.util.retry import Retry
+
+# The delay before a new token can be used (F5 bug ID1108181)
+TOKEN_DELAY = 1.5
+
+# Tokens are replaced when they are this close to expiring, in seconds
+TOKEN_MARGIN = 60
+
+# The number of devices to query at the same time, if the hostgroup's
+# execution profile does not set 'forks'
+DEFAULT_WORKERS = 50
+
+_SESSIONS: Dict[Tuple[str, int, str], "F5Session"] = dict()
+_SESSIONS_LOCK = threading.Lock()
+
+
+class F5Session:
+    """
+    A keep-alive HTTP session for the iControl REST API of one device, with
+    a token that is reused until it is about to expire.
+
+    Parameters
+    ----------
+    host : str
+        The address of the device.
+    username : str
+        The username to login to the device.
+    password : str
+        The password to login to the device.
+    port : int, optional
+        The HTTPS port. Defaults to 443.
+    verify : bool, optional
+        Whether to validate SSL certificates. Defaults to True.
+    login_provider : str, optional
+        The value to use for 'loginProviderName'. Defaults to 'tmos'.
+    timeout : int, optional
+        The timeout for each request, in seconds. Defaults to 60.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        port: int = 443,
+        verify: bool = True,
+        login_provider: str = "tmos",
+        timeout: int = 60,
+    ):
+        self.base_url = f"https://{host}:{port}"
+        self.username = username
+        self.password = password
+        self.verify = verify
+        self.login_provider = login_provider
+        self.timeout = timeout
+
+        retries = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST"]),
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(max_retries=retries))
+        self.session.verify = verify
+        if not verify:
+            requests.urllib3.disable_warnings()
+
+        self.token: Optional[str] = None
+        # The times (from time.monotonic) when the token can be used, and
+        # when it expires
+        self.ready = 0.0
+        self.expires = 0.0
+        self.lock = threading.Lock()
+
+    def login(self) -> None:
+        """
+        Create a new token, and add it to the session's headers.
+
+        Returns
+        -------
+        None
+        """
+        content = {
+            "username": self.username,
+            "password": self.password,
+            "loginProviderName": self.login_provider,
+        }
+        self.session.headers.pop("X-F5-Auth-Token", None)
+        response = self.session.post(
+            f"{self.base_url}/mgmt/shared/authn/login",
+            json=content,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        token = response.json()["token"]
+
+        now = time.monotonic()
+        self.token = token["token"]
+        self.ready = now + TOKEN_DELAY
+        self.expires = now + int(token.get("timeout", 1200))
+        self.session.headers["X-F5-Auth-Token"] = self.token
+
+    def authenticate(self) -> None:
+        """
+        Make sure the session has a token that can be used. A new token is
+        created if there is none, or if it expires within TOKEN_MARGIN
+        seconds.
+
+        Returns
+        -------
+        None
+        """
+        with self.lock:
+            if self.token is None or time.monotonic() >= self.expires - TOKEN_MARGIN:
+                self.login()
+            wait = self.ready - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def get(self, endpoint: str) -> dict:
+        """
+        Send a GET request to the API.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint, including any query parameters (E.g.,
+            '/mgmt/tm/ltm/pool?expandSubcollections=true').
+
+        Returns
+        -------
+        data : dict
+            The decoded response.
+        """
+        self.authenticate()
+        url = f"{self.base_url}{endpoint}"
+        response = self.session.get(url, timeout=self.timeout)
+        # The token can be revoked before it expires (E.g., if the device
+        # restarts), so create a new one and try again.
+        if response.status_code == 401:
+            with self.lock:
+                self.token = None
+            self.authenticate()
+            response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self) -> None:
+        """
+        Close the session's connections.
+
+        Returns
+        -------
+        None
+        """
+        self.session.close()
+
+
+def get_session(
+    host: str, username: str, password: str, port: int = 443, verify: bool = True
+) -> F5Session:
+    """
+    Get the cached session for a device, or create one.
+
+    Parameters
+    ----------
+    host : str
+        The address of the device.
+    username : str
+        The username to login to the device.
+    password : str
+        The password to login to the device.
+    port : int, optional
+        The HTTPS port. Defaults to 443.
+    verify : bool, optional
+        Whether to validate SSL certificates. Defaults to True.
+
+    Returns
+    -------
+    session : F5Session
+        The session. A new one is created if the cached session has a
+        different password or 'verify' setting.
+    """
+    key = (host, port, username)
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None or (session.password, session.verify) != (
+            password,
+            verify,
+        ):
+            if session is not None:
+                session.close()
+            session = F5Session(host, username, password, port=port, verify=verify)
+            _SESSIONS[key] = session
+    return session
+
+
+def close_sessions() -> None:
+    """
+    Close and remove every cached session.
+
+    Returns
+    -------
+    None
+    """
+    with _SESSIONS_LOCK:
+        for session in _SESSIONS.values():
+            session.close()
+        _SESSIONS.clear()
+
+
+def get_device_records(
+    device: str,
+    target: Dict[str, str],
+    endpoints: List[str],
+    username: str,
+    password: str,
+    verify: bool = True,
+) -> List[cr.CommandRecord]:
+    """
+    Query a list of endpoints on a device.
+
+    Parameters
+    ----------
+    device : str
+        The inventory hostname of the device.
+    target : dict
+        The device's 'host' and 'port' (see 'ssh_engine.get_hostgroup_targets').
+    endpoints : list
+        The endpoints to query.
+    username : str
+        The username to login to the device.
+    password : str
+        The password to login to the device.
+    verify : bool, optional
+        Whether to validate SSL certificates. Defaults to True.
+
+    Returns
+    -------
+    records : list
+        A CommandRecord for each endpoint. It is empty if the device could
+        not be queried, like a device that fails in an Ansible play.
+    """
+    session = get_session(
+        target["host"], username, password, port=target["port"], verify=verify
+    )
+    records = list()
+    for endpoint in endpoints:
+        try:
+            data = session.get(endpoint)
+        except (requests.RequestException, KeyError, ValueError) as e:
+            print(f"{device}: Failed to get '{endpoint}': {str(e)}")
+            return list()
+        records.append(cr.CommandRecord(device, endpoint, data))
+    return records
+
+
+def get_records(
+    host_group: str,
+    endpoints: List[str],
+    username: str,
+    password: str,
+    private_data_dir: str,
+    verify: bool = True,
+    max_workers: Optional[int] = None,
+) -> List[cr.CommandRecord]:
+    """
+    Query a list of endpoints on the devices in a hostgroup, concurrently.
+
+    Parameters
+    ----------
+    host_group : str
+        The inventory host group.
+    endpoints : list
+        The endpoints to query.
+    username : str
+        The username to login to the devices.
+    password : str
+        The password to login to the devices.
+    private_data_dir : str
+        The path to the Ansible private data directory.
+    verify : bool, optional
+        Whether to validate SSL certificates. Defaults to True.
+    max_workers : int, optional
+        The number of devices to query at the same time. Defaults to the
+        hostgroup's 'forks' setting, or DEFAULT_WORKERS.
+
+    Returns
+    -------
+    records : list
+        A CommandRecord for each endpoint on each device that was queried
+        successfully, in inventory order.
+    """
+    targets = se.get_hostgroup_targets(host_group, private_data_dir, default_port=443)
+    if not targets:
+        return list()
+    if not max_workers:
+        max_workers = ep.get_profile(host_group).get("forks", DEFAULT_WORKERS)
+    max_workers = min(max_workers, len(targets))
+
+    print(f"Querying {len(endpoints)} endpoints on {len(targets)} devices.")
+    with ThreadPoolExecutor(max_workers) as executor:
+        results = executor.map(
+            lambda item: get_device_records(
+                item[0], item[1], endpoints, username, password, verify=verify
+            ),
+            targets.items(),
+        )
+        records = [record for result in results for record in result]
+    return records
@@ -21,8 +21,9 @@ import json
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime as dt
 from getpass import getpass
+from netmanage.helpers import columnar as cb
 from tabulate import tabulate
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 
 def ansible_create_collectors_df(
@@ -98,26 +99,15 @@ def ansible_create_vars_df(
         group_vars = ansible_get_host_variables(g, private_data_dir)
         host_vars[g] = group_vars
 
-    # Create a dictionary to store the variable data for each group
-    df_data = dict()
-    df_data["host_group"] = list()
-
-    # Iterate through the keys for each group in 'host_vars', adding it as a
-    # key to 'df_data'
-    for key, value in host_vars.items():
-        for k in value:
-            if k != "ansible_user" and k != "ansible_password":
-                df_data[k] = list()
-
-    # Iterate through 'host_vars', populating 'df_data'
+    # Add the variables for each group to 'builder'. The credentials are left
+    # out.
+    builder = cb.ColumnBuilder(
+        ["host_group"], exclude=["ansible_user", "ansible_password"]
+    )
     for key, value in host_vars.items():
-        df_data["host_group"].append(key)
-        for item in df_data:
-            if item != "host_group":
-                result = value.get(item)
-                df_data[item].append(result)
+        builder.add(value, host_group=key)
 
-    df_vars = pd.DataFrame.from_dict(df_data)
+    df_vars = builder.to_frame()
 
     df_vars = df_vars.set_index("host_group")
 
@@ -710,19 +700,14 @@ def find_mac_vendors(macs: List[str], nm_path: str) -> pd.DataFrame:
     # Convert MAC addresses to base 16 by removing special characters.
     addresses = ["".join(filter(str.isalnum, _)).upper() for _ in macs]
 
-    # Create a list to store vendors
-    vendors = list()
-
     # Check if the list of OUIs exists and/or needs to be updated.
     df_ouis = update_ouis(nm_path)
 
-    # Search df_ouis for the vendor and add it to 'vendors'.
-    for address in addresses:
-        vendor = df_ouis.loc[df_ouis["base"] == address[:6]]["vendor"]
-        if len(vendor) >= 1:
-            vendors.append(vendor.squeeze())
-        else:
-            vendors.append("unknown")
+    # Look up the vendor for each address. A dictionary is used because
+    # filtering df_ouis for each address is very slow for large ARP and CAM
+    # tables.
+    ouis = dict(zip(df_ouis["base"], df_ouis["vendor"]))
+    vendors = [ouis.get(address[:6], "unknown") for address in addresses]
 
     # Create the dataframe.
     df = pd.DataFrame()
@@ -859,6 +844,39 @@ def connect_to_db(db: str) -> sl.Connection:
     return con
 
 
+def create_snapshot_catalog(con: sl.Connection) -> None:
+    """
+    Creates the '_snapshots' catalog table, if it does not exist.
+
+    The catalog contains one row for each table, timestamp and hostgroup,
+    with the number of rows that were written and how long the collector
+    took to run.
+
+    Parameters
+    ----------
+    con : sl.Connection
+        The connection to the database.
+
+    Returns
+    -------
+    None
+    """
+    cur = con.cursor()
+    cur.execute(
+        """create table if not exists _snapshots (
+                table_name TEXT,
+                timestamp TEXT,
+                hostgroup TEXT NOT NULL DEFAULT '',
+                row_count INTEGER,
+                duration REAL
+                )"""
+    )
+    cur.execute(
+        """create unique index if not exists idx__snapshots
+            on _snapshots (table_name, timestamp, hostgroup)"""
+    )
+
+
 def create_sqlite_regexp_function(conn: sl.Connection) -> None:
     """
     Creates a SQLite3 function that allows REGEXP queries. More details can be
@@ -944,55 +962,20 @@ def get_first_last_timestamp(db_path: str, table: str, col_name: str) -> pd.Data
         A DataFrame containing the first and last timestamp for each unique
         entry in the specified column.
     """
-    df_data = dict()
-    df_data[col_name] = list()
-    df_data["first_ts"] = list()
-    df_data["last_ts"] = list()
-
-    # Get the unique entries for col_name (usually a device name, MAC address,
-    # etc). This is necessary since the first timestamp in the table won't
-    # always have all the entries for that table (devices might be added or
-    # removed, ARP tables might change, and so on)
+    # A single grouped query replaces the previous approach, which queried
+    # every timestamp of the table for every unique entry in col_name. The
+    # timestamps are in YYYY-MM-DD_hhmm format, so MIN and MAX return the
+    # first and last of them.
     con = sl.connect(db_path)
-    query = f"select distinct {col_name} from {table}"
-    df_uniques = pd.read_sql(query, con)
-    uniques = df_uniques[col_name].to_list()
-
-    # Create a dictionary to store the first and last timestamps for col_name.
-    # This will be used to create df_stamps
-    # df_data = dict()
-
-    query = f"select distinct timestamp from {table}"
-    timestamps = pd.read_sql(query, con)["timestamp"].to_list()
-
-    for unique in uniques:
-        stamps = list()
-        for ts in timestamps:
-            query = f'''select timestamp from {table}
-                        where timestamp = "{ts}" and {col_name} = "{unique}"'''
-            for item in pd.read_sql(query, con)["timestamp"].to_list():
-                stamps.append(item)
-        df_data[col_name].append(unique)
-        df_data["first_ts"].append(stamps[0])
-        df_data["last_ts"].append(stamps[-1])
-
-    # This is an alternative way to collect the first and last timestamps for
-    # each col_name. It does not utilize an index (assuming the table has one),
-    # but the speed was about the same. I am leaving it here to do more
-    # testing with in the future.
-
-    # for unique in uniques:
-    #     query = f'''select distinct timestamp from {table}
-    #                 where {col_name} = "{unique}"'''
-    #     df_stamps = pd.read_sql(query, con)
-    #     stamps = df_stamps['timestamp'].to_list()
-    #     df_data[col_name].append(unique)
-    #     df_data['first_ts'].append(stamps[0])
-    #     df_data['last_ts'].append(stamps[-1])
+    query = f"""select "{col_name}",
+                       min(timestamp) as first_ts,
+                       max(timestamp) as last_ts
+                from {sql_snapshot_source(con, table)}
+                group by "{col_name}"
+                order by "{col_name}" """
+    df_stamps = pd.read_sql(query, con)
     con.close()
 
-    df_stamps = pd.DataFrame.from_dict(df_data)
-
     return df_stamps
 
 
@@ -1101,9 +1084,9 @@ def move_cols_to_end(df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
     return df
 
 
-def read_table(db_path: str, table: str) -> pd.DataFrame:
+def latest_snapshot(db_path: str, table: str) -> pd.DataFrame:
     """
-    Reads all columns for the latest timestamp from a database table.
+    Reads all columns for the latest snapshot of a database table.
 
     Parameters
     ----------
@@ -1115,16 +1098,37 @@ def read_table(db_path: str, table: str) -> pd.DataFrame:
     Returns
     -------
     df : pd.DataFrame
-        A Pandas dataframe containing the data.
+        A Pandas dataframe containing the data. It is empty if the table has
+        no snapshots.
     """
+    timestamps = get_snapshot_timestamps(db_path, table)
+    if not timestamps:
+        return pd.DataFrame()
     con = connect_to_db(db_path)
-    df_ts = pd.read_sql(f"select timestamp from {table} limit 1", con)
-    ts = df_ts["timestamp"].to_list()[-1]
-    df = pd.read_sql(f'select * from {table} where timestamp = "{ts}"', con)
+    df = sql_read_snapshots(con, table, timestamps[-1], timestamps[-1])
     con.close()
     return df
 
 
+def read_table(db_path: str, table: str) -> pd.DataFrame:
+    """
+    Reads all columns for the latest timestamp from a database table.
+
+    Parameters
+    ----------
+    db_path : str
+        The full path to the database.
+    table : str
+        The table name.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        A Pandas dataframe containing the data.
+    """
+    return latest_snapshot(db_path, table)
+
+
 def scan_targets(targets: list, max_threads: int = 10) -> dict:
     """
     Use nmap to perform a ping scan on a list of targets.
@@ -1176,6 +1180,61 @@ def scan_targets(targets: list, max_threads: int = 10) -> dict:
     return results
 
 
+def snapshot_at(db_path: str, table: str, timestamp: str) -> pd.DataFrame:
+    """
+    Reads the snapshot of a database table that was current at a timestamp.
+    That is the latest snapshot at or before the timestamp.
+
+    Parameters
+    ----------
+    db_path : str
+        The full path to the database.
+    table : str
+        The table name.
+    timestamp : str
+        The timestamp in YYYY-MM-DD_hhmm format.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        A Pandas dataframe containing the data. It is empty if there are no
+        snapshots at or before the timestamp.
+    """
+    timestamps = [t for t in get_snapshot_timestamps(db_path, table) if t <= timestamp]
+    if not timestamps:
+        return pd.DataFrame()
+    con = connect_to_db(db_path)
+    df = sql_read_snapshots(con, table, timestamps[-1], timestamps[-1])
+    con.close()
+    return df
+
+
+def snapshots_between(db_path: str, table: str, start: str, end: str) -> pd.DataFrame:
+    """
+    Reads all of the snapshots of a database table between two timestamps.
+
+    Parameters
+    ----------
+    db_path : str
+        The full path to the database.
+    table : str
+        The table name.
+    start : str
+        The first timestamp to include, in YYYY-MM-DD_hhmm format.
+    end : str
+        The last timestamp to include, in YYYY-MM-DD_hhmm format.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        A Pandas dataframe containing the data, ordered by timestamp.
+    """
+    con = connect_to_db(db_path)
+    df = sql_read_snapshots(con, table, start, end)
+    con.close()
+    return df
+
+
 def set_dependencies(selected: List[str]) -> List[str]:
     """
     Define collector dependencies.
@@ -1603,6 +1662,329 @@ def meraki_parse_organizations(
     return organizations
 
 
+def sql_snapshot_source(con: sl.Connection, table: str) -> str:
+    """
+    Returns the source to select the snapshots of a database table from.
+
+    For tables written with database_method='delta' (see
+    helpers/delta_store.py), the table only holds the latest snapshot of each
+    hostgroup, and the earlier snapshots are rebuilt from '<TABLE>_DELTA'.
+    For those tables, the source is a subquery with the same columns as the
+    table (except 'table_id'). For other tables, it is the table name.
+
+    Parameters
+    ----------
+    con : sl.Connection
+        The connection to the database.
+    table : str
+        The table name.
+
+    Returns
+    -------
+    source : str
+        The table name or subquery, to use in a 'from' clause.
+    """
+    name = table.upper()
+    delta_cols = [r[1] for r in con.execute(f'pragma table_info("{name}_DELTA")')]
+    if not delta_cols:
+        return table
+    table_cols = [r[1] for r in con.execute(f'pragma table_info("{name}")')]
+
+    meta = ["table_id", "timestamp", "valid_from", "valid_to", "_hostgroup"]
+    meta += ["_key_hash", "_row_hash"]
+    cols = [c for c in table_cols if c not in meta]
+    cols += [c for c in delta_cols if c not in meta and c not in cols]
+
+    def select(available: List[str], prefix: str = "") -> str:
+        return ", ".join(
+            [f'{prefix}"{c}"' if c in available else f'null as "{c}"' for c in cols]
+        )
+
+    # A row is part of the snapshot of its hostgroup at a timestamp if it
+    # was valid at that timestamp.
+    source = f"""(select s.timestamp, {select(delta_cols, "d.")}
+                  from _delta_snapshots s
+                  join "{name}_DELTA" d
+                    on d._hostgroup = s.hostgroup
+                   and d.valid_from <= s.timestamp
+                   and (d.valid_to is null or d.valid_to > s.timestamp)
+                  where s.table_name = '{name}'"""
+
+    # Snapshots that were written before the table was switched to delta
+    # mode are only in the table.
+    if table_cols:
+        source = f"""{source}
+                  union all
+                  select timestamp, {select(table_cols)}
+                  from "{name}"
+                  where timestamp not in (select timestamp from _delta_snapshots
+                                          where table_name = '{name}')"""
+
+    return f"{source})"
+
+
+def sql_read_snapshots(
+    con: sl.Connection, table: str, start: str, end: str
+) -> pd.DataFrame:
+    """
+    Reads the rows of a database table with timestamps between 'start' and
+    'end' (inclusive).
+
+    If snapshots were compacted (see helpers/retention.py), the rows that are
+    stored as references to earlier snapshots are included. Snapshots of
+    tables in delta mode are rebuilt from the delta table (see
+    'sql_snapshot_source').
+
+    Parameters
+    ----------
+    con : sl.Connection
+        The connection to the database.
+    table : str
+        The table name.
+    start : str
+        The first timestamp to include, in YYYY-MM-DD_hhmm format.
+    end : str
+        The last timestamp to include, in YYYY-MM-DD_hhmm format.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        A Pandas dataframe containing the data, ordered by timestamp.
+    """
+    source = sql_snapshot_source(con, table)
+    query = f"select * from {source} where timestamp >= ? and timestamp <= ?"
+    if source != table:
+        query = f"{query} order by timestamp"
+    df = pd.read_sql(query, con, params=(start, end))
+
+    # Only tables with a 'table_id' column can be compacted.
+    refs = con.execute(
+        "select name from sqlite_master where type = 'table' and name = '_row_refs'"
+    ).fetchone()
+    if refs and "table_id" in df.columns:
+        query = f"""select r.timestamp as _ref_timestamp, t.*
+                    from _row_refs r
+                    join {table} t on t.table_id = r.table_id
+                    where r.table_name = ?
+                      and r.timestamp >= ? and r.timestamp <= ?"""
+        df_refs = pd.read_sql(query, con, params=(table.upper(), start, end))
+        if len(df_refs) > 0:
+            df_refs["timestamp"] = df_refs.pop("_ref_timestamp")
+            df = pd.concat([df, df_refs[df.columns]])
+            df = df.sort_values("timestamp", kind="stable")
+
+    return df.reset_index(drop=True)
+
+
+def backfill_snapshot_catalog(
+    con: sl.Connection, table: str, exclude: Optional[str] = None
+) -> List[str]:
+    """
+    Adds the snapshots that are already in a table to the '_snapshots'
+    catalog, if the catalog does not have any entries for the table yet (for
+    example, tables in databases created before the catalog existed).
+
+    Parameters
+    ----------
+    con : sl.Connection
+        The connection to the database.
+    table : str
+        The table name.
+    exclude : str, optional
+        A timestamp to leave out, such as the snapshot that is being added
+        to the catalog. Defaults to None.
+
+    Returns
+    -------
+    timestamps : list
+        The timestamps that were added, from oldest to newest. It is empty if
+        the table was already in the catalog.
+    """
+    create_snapshot_catalog(con)
+    query = "select 1 from _snapshots where table_name = ? limit 1"
+    if con.execute(query, (table.upper(),)).fetchone():
+        return list()
+
+    # Count the rows in each snapshot, including rows that were compacted
+    # into '_row_refs' (see helpers/retention.py).
+    counts = dict()
+    queries = [
+        (f"select timestamp, count(*) from {table} group by timestamp", ()),
+        (
+            """select timestamp, count(*) from _row_refs
+               where table_name = ? group by timestamp""",
+            (table.upper(),),
+        ),
+    ]
+    for query, params in queries:
+        try:
+            rows = con.execute(query, params).fetchall()
+        except sl.OperationalError:
+            rows = list()
+        for ts, n in rows:
+            counts[ts] = counts.get(ts, 0) + n
+    counts.pop(exclude, None)
+
+    timestamps = sorted(counts)
+    con.executemany(
+        """insert into _snapshots (table_name, timestamp, row_count)
+           values (?, ?, ?)""",
+        [(table.upper(), ts, counts[ts]) for ts in timestamps],
+    )
+    return timestamps
+
+
+def update_snapshot_catalog(
+    con: sl.Connection,
+    table: str,
+    timestamp: str,
+    row_count: int,
+    duration: Optional[float] = None,
+    hostgroup: str = "",
+    replace: bool = False,
+) -> None:
+    """
+    Adds a snapshot to the '_snapshots' catalog.
+
+    The catalog contains one row for each snapshot of each table and
+    hostgroup, so the timestamps of a table can be found without scanning
+    it. If the same hostgroup is written to a table more than once with the
+    same timestamp, the row counts and durations are added together.
+
+    If the table is not in the catalog yet, its earlier snapshots are added
+    first (see 'backfill_snapshot_catalog'), so they are not hidden by the
+    new one.
+
+    Parameters
+    ----------
+    con : sl.Connection
+        The connection to the database.
+    table : str
+        The table name.
+    timestamp : str
+        The timestamp in YYYY-MM-DD_hhmm format.
+    row_count : int
+        The number of rows that were written.
+    duration : float, optional
+        How long the collector took to run, in seconds. Defaults to None.
+    hostgroup : str, optional
+        The hostgroup that the collector was run against. Defaults to ''.
+    replace : bool, optional
+        Whether the table was replaced, in which case its previous snapshots
+        are removed from the catalog. Defaults to False.
+
+    Returns
+    -------
+    None
+    """
+    create_snapshot_catalog(con)
+    cur = con.cursor()
+    if replace:
+        cur.execute("delete from _snapshots where table_name = ?", (table.upper(),))
+    else:
+        backfill_snapshot_catalog(con, table, exclude=timestamp)
+    cur.execute(
+        """insert into _snapshots
+               (table_name, timestamp, hostgroup, row_count, duration)
+           values (?, ?, ?, ?, ?)
+           on conflict (table_name, timestamp, hostgroup)
+           do update set row_count = row_count + excluded.row_count,
+                         duration = coalesce(duration + excluded.duration,
+                                            duration, excluded.duration)""",
+        (table.upper(), timestamp, hostgroup or "", row_count, duration),
+    )
+    con.commit()
+
+
+def get_snapshot_catalog(db_path: str, table: Optional[str] = None) -> pd.DataFrame:
+    """
+    Gets the entries in the '_snapshots' catalog.
+
+    Parameters
+    ----------
+    db_path : str
+        The full path to the database.
+    table : str, optional
+        The table name. Defaults to all tables.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        The table name, timestamp, hostgroup, row count and duration of each
+        snapshot, ordered by table name and timestamp.
+    """
+    con = connect_to_db(db_path)
+    create_snapshot_catalog(con)
+    query = """select table_name, timestamp, hostgroup, row_count, duration
+               from _snapshots"""
+    params = list()
+    if table:
+        query = f"{query} where table_name = ?"
+        params.append(table.upper())
+    query = f"{query} order by table_name, timestamp, hostgroup"
+    df = pd.read_sql(query, con, params=params)
+    con.close()
+    return df
+
+
+def get_snapshot_timestamps(db_path: str, table: str) -> List[str]:
+    """
+    Gets the timestamps of the snapshots in a database table from the
+    '_snapshots' catalog.
+
+    Tables that are not in the catalog yet (for example, tables in databases
+    created before the catalog existed) are scanned once, and their
+    timestamps are added to the catalog.
+
+    Parameters
+    ----------
+    db_path : str
+        The full path to the database.
+    table : str
+        The table name.
+
+    Returns
+    -------
+    timestamps : list
+        The timestamps, from oldest to newest.
+    """
+    con = connect_to_db(db_path)
+    create_snapshot_catalog(con)
+    query = """select distinct timestamp from _snapshots
+               where table_name = ? order by timestamp"""
+    timestamps = [r[0] for r in con.execute(query, (table.upper(),)).fetchall()]
+
+    if not timestamps:
+        timestamps = backfill_snapshot_catalog(con, table)
+
+    con.commit()
+    con.close()
+    return timestamps
+
+
+def get_latest_timestamp(db_path: str, table: str) -> Optional[str]:
+    """
+    Gets the timestamp of the most recent snapshot in a database table from
+    the '_snapshots' catalog.
+
+    Parameters
+    ----------
+    db_path : str
+        The full path to the database.
+    table : str
+        The table name.
+
+    Returns
+    -------
+    timestamp : str or None
+        The most recent timestamp, or None if the table has no snapshots.
+    """
+    timestamps = get_snapshot_timestamps(db_path, table)
+    if not timestamps:
+        return None
+    return timestamps[-1]
+
+
 def sql_get_table_schema(db_path: str, table: str) -> pd.DataFrame:
     """
     Gets the schema of a table.
@@ -1965,11 +2347,8 @@ def validate_table(table: str, db_path: str, diff_col: List[str]) -> None:
             - item1: The column to diff (e.g., 'status').
             - item2: The expected state (e.g., 'online').
     """
-    # Get the first and last timestamps from the table
-    con = sl.connect(db_path)
-    query = f"select distinct timestamp from {table}"
-    df_stamps = pd.read_sql(query, con)
-    stamps = df_stamps["timestamp"].to_list()
+    # Get the first and last timestamps from the '_snapshots' catalog
+    stamps = get_snapshot_timestamps(db_path, table)
     first_ts = stamps[0]
     last_ts = stamps[-1]
 
@@ -1984,7 +2363,9 @@ def validate_table(table: str, db_path: str, diff_col: List[str]) -> None:
                 from {table}
                 where {query2}
                 """
+    con = sl.connect(db_path)
     df_diff = pd.read_sql(query, con)
+    con.close()
     return df_diff
 
 
@@ -45,35 +45,112 @@ def get_num_nodes_edges(uri: str = "bolt://0.0.0.0:7687",
     return total_nodes, total_edges
 
 
+def _chunks(rows: list, batch_size: int):
+    """
+    Yield successive chunks of 'batch_size' rows from a list.
+    """
+    for i in range(0, len(rows), batch_size):
+        yield rows[i:i + batch_size]
+
+
 def networkx_to_neo4j(G: nx.Graph, uri: str = "bolt://0.0.0.0:7687",
                       user: str = "neo4j", password: str = "neo4j",
-                      clear_db: bool = False):
+                      clear_db: bool = False, batch_size: int = 10000,
+                      quiet: bool = False):
     """
     Transfer a NetworkX graph to a Neo4j database.
-    """
-    driver = GraphDatabase.driver(uri, auth=(user, password))
 
-    with driver.session() as session:
-        # Optionally clear the existing data in the database
+    Nodes and edges are sent in batches of 'batch_size' rows. Each batch is
+    written with a single 'UNWIND $rows' query inside an explicit transaction,
+    rather than one query per node or edge.
+
+    Parameters
+    ----------
+    G : nx.Graph
+        The graph to transfer.
+    uri : str, optional
+        The URI of the Neo4j database, by default "bolt://0.0.0.0:7687".
+    user : str, optional
+        The username for the database, by default "neo4j".
+    password : str, optional
+        The password for the user, by default "neo4j".
+    clear_db : bool, optional
+        Whether to delete all existing nodes and relationships before the
+        transfer, by default False.
+    batch_size : int, optional
+        The number of nodes or edges to write per transaction, by default
+        10000.
+    quiet : bool, optional
+        Whether to suppress progress output, by default False.
+
+    Notes
+    -----
+    A uniqueness constraint is created on ':Node(id)' before any data is
+    written. Besides preventing duplicate nodes, it creates the index that
+    the MERGE and MATCH statements rely on. Without it, every edge lookup is
+    a label scan.
+    """
+    nodes = [{"id": node, "props": dict(data)}
+             for node, data in G.nodes(data=True)]
+    # Parallel edges in a MultiGraph (e.g., the links in a topology graph)
+    # are kept apart by their keys.
+    if G.is_multigraph():
+        edges = [{"u": u, "v": v, "key": str(k), "props": dict(data)}
+                 for u, v, k, data in G.edges(keys=True, data=True)]
+        merge = "MERGE (a)-[r:CONNECTED {key: row.key}]->(b)"
+    else:
+        edges = [{"u": u, "v": v, "props": dict(data)}
+                 for u, v, data in G.edges(data=True)]
+        merge = "MERGE (a)-[r:CONNECTED]->(b)"
+
+    # The driver is closed when the block exits, even if a query fails.
+    with GraphDatabase.driver(uri, auth=(user, password)) as driver, \
+            driver.session() as session:
+        # Optionally clear the existing data in the database. This is done in
+        # batches so that large graphs do not exhaust the transaction memory.
         if clear_db:
-            session.run("MATCH (n) DETACH DELETE n")
+            deleted = None
+            while deleted != 0:
+                result = session.run("""
+                MATCH (n) WITH n LIMIT $limit
+                DETACH DELETE n
+                RETURN COUNT(*)
+                """, limit=batch_size)
+                deleted = result.single()[0]
+
+        session.run("""
+        CREATE CONSTRAINT node_id IF NOT EXISTS
+        FOR (n:Node) REQUIRE n.id IS UNIQUE
+        """)
 
         # Add or update nodes with properties
-        for node, data in G.nodes(data=True):
-            props = {k: v for k, v in data.items()}
-            session.run("""
-            MERGE (n:Node {id: $node})
-            SET n += {props}
-            """, node=node, props=props)
+        done = 0
+        for rows in _chunks(nodes, batch_size):
+            with session.begin_transaction() as tx:
+                tx.run("""
+                UNWIND $rows AS row
+                MERGE (n:Node {id: row.id})
+                SET n += row.props
+                """, rows=rows)
+                tx.commit()
+            done += len(rows)
+            if not quiet:
+                print(f"Exported {done}/{len(nodes)} nodes")
 
         # Add or update edges with properties
-        for u, v, data in G.edges(data=True):
-            props = {k: v for k, v in data.items()}
-            session.run("""
-            MATCH (a:Node {id: $u}), (b:Node {id: $v})
-            MERGE (a)-[r:CONNECTED]->(b)
-            SET r += {props}
-            """, u=u, v=v, props=props)
+        done = 0
+        for rows in _chunks(edges, batch_size):
+            with session.begin_transaction() as tx:
+                tx.run(f"""
+                UNWIND $rows AS row
+                MATCH (a:Node {{id: row.u}}), (b:Node {{id: row.v}})
+                {merge}
+                SET r += row.props
+                """, rows=rows)
+                tx.commit()
+            done += len(rows)
+            if not quiet:
+                print(f"Exported {done}/{len(edges)} edges")
 
 
 def test_connectivity(uri: str = "bolt://0.0.0.0:7687",
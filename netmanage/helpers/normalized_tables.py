@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+
+"""
+Materializes the cross-vendor normalized tables.
+
+Each normalized table (for example, NORMALIZED_ARP_TABLE) combines the vendor
+tables that are defined in 'transformation.get_mapping_schema' into a single,
+indexed table with common column names. Unlike a view, the UNION is not
+re-run on every query. Instead, 'add_to_db' refreshes the normalized tables
+after each collector write, and only the rows for the source table and
+timestamp that were written are replaced.
+
+The normalized tables use the same timestamp format as the rest of the
+database (YYYY-MM-DD_hhmm). The 'source' column contains the name of the
+vendor table that each row came from.
+
+Examples
+--------
+>>> from netmanage.helpers import normalized_tables as nt
+>>> # Backfill the normalized tables in an existing database
+>>> nt.rebuild_normalized_tables(db_path)
+>>> # Refresh them after a collector adds data to IOS_ARP_TABLE
+>>> nt.refresh_normalized_tables(db_path, 'IOS_ARP_TABLE', timestamp)
+"""
+
+import ipaddress
+import pandas as pd
+from netmanage.helpers import helpers as hp
+from netmanage.helpers import transformation as tf
+from typing import Dict, List, Optional
+
+
+def define_normalized_tables() -> Dict[str, Dict]:
+    """
+    Return the definitions of the normalized tables.
+
+    Returns
+    -------
+    tables : dict
+        A dictionary where each key is the name of a normalized table. Each
+        value contains the vendor tables it is built from ('sources'), the
+        columns it contains ('columns'), and the columns to index
+        ('indexes'). Every table also has a 'source' and 'timestamp' column,
+        and an index on (timestamp, device).
+
+    Notes
+    -----
+    The vendor tables are transformed with the mapping schema, so the
+    columns listed here are the names after transformation. Columns that a
+    vendor table does not have are left empty.
+    """
+    interface_sources = [
+        "ASA_INTERFACE_IP_ADDRESSES",
+        "IOS_INTERFACE_IP_ADDRESSES",
+        "IOS_INTERFACE_IPV6_ADDRESSES",
+        "NXOS_INTERFACE_IP_ADDRESSES",
+        "PANOS_INTERFACE_IP_ADDRESSES",
+    ]
+    tables = {
+        "NORMALIZED_ARP_TABLE": {
+            "sources": [
+                "BIGIP_ARP_TABLE",
+                "IOS_ARP_TABLE",
+                "NXOS_ARP_TABLE",
+                "PANOS_ARP_TABLE",
+            ],
+            "columns": [
+                "device",
+                "ip_address",
+                "mac_address",
+                "interface_name",
+                "vlan",
+                "age",
+                "arp_status",
+                "vendor",
+            ],
+            "indexes": [["ip_address"], ["mac_address"]],
+        },
+        "NORMALIZED_BGP_NEIGHBORS": {
+            "sources": ["IOS_BGP_NEIGHBORS", "PANOS_BGP_NEIGHBORS"],
+            "columns": [
+                "device",
+                "vrf",
+                "bgp_neighbor",
+                "neighbor",
+                "neighbor_id",
+                "local_address",
+                "local_address_port",
+                "remote_address",
+                "remote_address_port",
+                "local_as",
+                "remote_as",
+                "peer_group",
+                "bgp_state",
+                "status",
+            ],
+            "indexes": [["neighbor_id"], ["remote_address"]],
+        },
+        "NORMALIZED_HARDWARE_INVENTORY": {
+            "sources": [
+                "ASA_HARDWARE_INVENTORY",
+                "BIGIP_HARDWARE_INVENTORY",
+                "IOS_HARDWARE_INVENTORY",
+                "NXOS_HARDWARE_INVENTORY",
+                "PANOS_HARDWARE_INVENTORY",
+            ],
+            "columns": [
+                "device",
+                "name",
+                "description",
+                "product_id",
+                "model",
+                "vendor_id",
+                "serial",
+                "mac_address",
+            ],
+            "indexes": [["serial"]],
+        },
+        "NORMALIZED_INTERFACE_IPS": {
+            "sources": interface_sources,
+            "columns": [
+                "device",
+                "interface_name",
+                "vrf",
+                "ip_address",
+                "cidr",
+                "subnet",
+                "network_ip",
+                "broadcast_ip",
+            ],
+            "indexes": [["ip_address"]],
+        },
+        "NORMALIZED_PREFIXES": {
+            "sources": interface_sources,
+            "columns": ["device", "vrf", "prefix", "network_ip", "cidr", "subnet"],
+            "indexes": [["prefix"]],
+        },
+    }
+    return tables
+
+
+def get_normalized_tables(source: str) -> List[str]:
+    """
+    Return the normalized tables that are built from a vendor table.
+
+    Parameters
+    ----------
+    source : str
+        The name of the vendor table, such as 'IOS_ARP_TABLE'.
+
+    Returns
+    -------
+    names : list
+        The names of the normalized tables. The list is empty if the vendor
+        table is not a source for any of them.
+    """
+    tables = define_normalized_tables()
+    return [name for name, t in tables.items() if source.upper() in t["sources"]]
+
+
+def create_normalized_table(con, name: str) -> None:
+    """
+    Create a normalized table and its indexes, if they do not exist.
+
+    Parameters
+    ----------
+    con : sqlite3.Connection
+        The connection to the database.
+    name : str
+        The name of the normalized table.
+
+    Returns
+    -------
+    None
+    """
+    table = define_normalized_tables()[name]
+    cur = con.cursor()
+    fields = ",\n".join([f'"{c}"' for c in table["columns"]])
+    cur.execute(
+        f"""CREATE TABLE IF NOT EXISTS {name} (
+                table_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source,
+                timestamp,
+                {fields}
+                )"""
+    )
+    cur.execute(
+        f"""CREATE INDEX IF NOT EXISTS idx_{name.lower()}_source_timestamp
+            ON {name} (source, timestamp)"""
+    )
+    cur.execute(
+        f"""CREATE INDEX IF NOT EXISTS idx_{name.lower()}_timestamp_device
+            ON {name} (timestamp, device)"""
+    )
+    for idx_cols in table["indexes"]:
+        idx_name = f"idx_{name.lower()}_{'_'.join(idx_cols)}"
+        cur.execute(
+            f"""CREATE INDEX IF NOT EXISTS {idx_name}
+                ON {name} ({','.join(idx_cols)})"""
+        )
+
+
+def mask_to_cidr(mask) -> Optional[int]:
+    """
+    Convert a subnet mask to its prefix length.
+
+    Parameters
+    ----------
+    mask : str
+        The subnet mask (E.g., '255.255.255.0').
+
+    Returns
+    -------
+    cidr : int or None
+        The prefix length, or None if the mask is empty or invalid, so one
+        bad row does not prevent the rest of the table from being refreshed.
+    """
+    try:
+        return ipaddress.ip_network(f"0.0.0.0/{mask}").prefixlen
+    except ValueError:
+        return None
+
+
+def normalize_table(df: pd.DataFrame, source: str, name: str) -> pd.DataFrame:
+    """
+    Convert rows from a vendor table to the columns of a normalized table.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Rows from the vendor table, including the 'timestamp' column.
+    source : str
+        The name of the vendor table.
+    name : str
+        The name of the normalized table.
+
+    Returns
+    -------
+    df_norm : pd.DataFrame
+        A DataFrame with the 'source', 'timestamp' and normalized columns.
+    """
+    columns = define_normalized_tables()[name]["columns"]
+
+    df_norm = tf.transform_dataframe(
+        df, source, tf.get_mapping_schema(), tf.get_function_mapping()
+    )
+
+    # Keep the timestamps in the database format. (The mapping schema
+    # standardizes them, and some tables drop them when the columns are
+    # reordered.)
+    df_norm["timestamp"] = df["timestamp"].to_numpy()
+
+    # Not every vendor table has the CIDR notation, so derive it from the
+    # subnet mask where it is missing.
+    if "cidr" in columns and "cidr" not in df_norm.columns \
+            and "subnet" in df_norm.columns:
+        df_norm["cidr"] = pd.Series(
+            [mask_to_cidr(_) for _ in df_norm["subnet"].to_list()],
+            index=df_norm.index,
+            dtype=object,
+        )
+
+    if name == "NORMALIZED_PREFIXES":
+        df_norm = df_norm[df_norm["network_ip"].notna()].copy()
+        df_norm["prefix"] = (
+            df_norm["network_ip"].astype(str) + "/" + df_norm["cidr"].astype(str)
+        ).where(df_norm["cidr"].notna(), None)
+        df_norm = df_norm.drop_duplicates(
+            subset=["timestamp", "device", "vrf", "prefix"]
+            if "vrf" in df_norm.columns
+            else ["timestamp", "device", "prefix"]
+        )
+
+    df_norm = df_norm.reindex(columns=["timestamp"] + columns)
+    df_norm.insert(0, "source", source.upper())
+
+    return df_norm
+
+
+def refresh_normalized_tables(
+    db_path: str, source: str, timestamp: Optional[str] = None
+) -> None:
+    """
+    Refresh the normalized tables that are built from a vendor table.
+
+    Parameters
+    ----------
+    db_path : str
+        The full path to the database.
+    source : str
+        The name of the vendor table that was written to.
+    timestamp : str, optional
+        The timestamp that was written, in YYYY-MM-DD_hhmm format. Only the
+        rows for this timestamp are replaced. If it is not provided, then
+        all of the rows from the vendor table are replaced.
+
+    Returns
+    -------
+    None
+    """
+    names = get_normalized_tables(source)
+    if not names:
+        return
+    source = source.upper()
+
+    con = hp.connect_to_db(db_path)
+    cur = con.cursor()
+
+    if not cur.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (source,),
+    ).fetchone():
+        con.close()
+        return
+
+    if timestamp:
+        df = pd.read_sql(
+            f"SELECT * FROM {source} WHERE timestamp = ?", con, params=(timestamp,)
+        )
+    else:
+        df = pd.read_sql(f"SELECT * FROM {source}", con)
+    if "table_id" in df.columns:
+        del df["table_id"]
+
+    for name in names:
+        create_normalized_table(con, name)
+        if timestamp:
+            cur.execute(
+                f"DELETE FROM {name} WHERE source = ? AND timestamp = ?",
+                (source, timestamp),
+            )
+        else:
+            cur.execute(f"DELETE FROM {name} WHERE source = ?", (source,))
+
+        if len(df) == 0:
+            continue
+
+        df_norm = normalize_table(df, source, name)
+        df_norm = df_norm.astype(object).where(df_norm.notna(), None)
+        columns = ", ".join([f'"{c}"' for c in df_norm.columns])
+        placeholders = ", ".join(["?"] * len(df_norm.columns))
+        cur.executemany(
+            f"INSERT INTO {name} ({columns}) VALUES ({placeholders})",
+            df_norm.itertuples(index=False, name=None),
+        )
+
+    con.commit()
+    con.close()
+
+
+def rebuild_normalized_tables(db_path: str) -> None:
+    """
+    Rebuild all of the normalized tables from the vendor tables.
+
+    This is used to backfill the normalized tables in a database that was
+    created before they existed.
+
+    Parameters
+    ----------
+    db_path : str
+        The full path to the database.
+
+    Returns
+    -------
+    None
+    """
+    sources = list()
+    for table in define_normalized_tables().values():
+        sources.extend([s for s in table["sources"] if s not in sources])
+
+    existing = hp.get_database_tables(db_path)
+    for source in sources:
+        if source in existing:
+            refresh_normalized_tables(db_path, source)
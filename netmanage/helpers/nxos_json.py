@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+
+"""
+Parse the JSON output of NXOS commands (E.g., 'show ip arp vrf all | json').
+
+NXOS returns structured output for most show commands when they end with
+'| json'. Each table in the output is a 'TABLE_<name>' key, whose
+'ROW_<name>' key contains the rows. Tables can be nested, such as the ARP
+table, which has a 'TABLE_adj' inside each row of 'TABLE_vrf':
+
+{"TABLE_vrf": {"ROW_vrf": [{"vrf-name-out": "default",
+                            "TABLE_adj": {"ROW_adj": [{"ip-addr-out": ...},
+                                                      ...]}}]}}
+
+If a table has one row, 'ROW_<name>' is a dictionary instead of a list.
+
+A 'JsonTable' describes which tables to flatten and which keys to use as
+columns. It has the same 'columns' and 'parse' interface as the templates in
+'text_templates', so a parser can use a JsonTable for devices that return
+JSON, and a text template for older NXOS versions that do not support
+'| json' for the command (see 'parse_output'). The output does not need to
+be split into lines, and the columns are read from the rows with one list
+comprehension each.
+
+Some values are formatted differently in the JSON output. For example, the
+text output of 'show interface status' abbreviates 'Ethernet1/1' to
+'Eth1/1'. A JsonTable's 'converters' change those values to the text format
+(see 'abbreviate_interface' and 'format_port_list'), so a column has the
+same values whichever format a device returned.
+
+Examples
+--------
+>>> from netmanage.helpers import nxos_json as nxj
+>>> table = nxj.JsonTable(['vrf', 'adj'], {'ip-addr-out': 'ip_address',
+...                                        'mac': 'mac_address'})
+>>> df = nxj.parse_output(runner, table, NXOS_ARP_TABLE)
+"""
+
+import pandas as pd
+import re
+from netmanage.helpers import command_records as cr
+from typing import Callable, Dict, List, Optional, Tuple
+
+# The interface types that the text output of NXOS commands abbreviates
+INTERFACE_ABBREVIATIONS = {
+    "Ethernet": "Eth",
+    "port-channel": "Po",
+    "loopback": "Lo",
+}
+
+_INTERFACE_TYPE = re.compile(r"^([A-Za-z-]+)(?=\d)")
+
+
+def abbreviate_interface(name: str) -> str:
+    """
+    Abbreviate an interface name the way the text output of NXOS commands
+    does (E.g., 'Ethernet1/1' to 'Eth1/1', and 'port-channel10' to 'Po10').
+
+    Parameters
+    ----------
+    name : str
+        The interface name.
+
+    Returns
+    -------
+    name : str
+        The abbreviated name. Names that are not abbreviated (E.g., 'mgmt0'
+        and 'Vlan10') are returned as they are.
+    """
+    if not isinstance(name, str):
+        return name
+    match = _INTERFACE_TYPE.match(name)
+    if not match or match.group(1) not in INTERFACE_ABBREVIATIONS:
+        return name
+    return INTERFACE_ABBREVIATIONS[match.group(1)] + name[match.end():]
+
+
+def format_port_list(ports: str) -> str:
+    """
+    Format a comma-separated list of interfaces from the JSON output the way
+    the text output does (E.g., 'port-channel10,Ethernet1/2' to
+    'Po10, Eth1/2').
+
+    Parameters
+    ----------
+    ports : str
+        The list of interfaces.
+
+    Returns
+    -------
+    ports : str
+        The formatted list.
+    """
+    if not isinstance(ports, str):
+        return ports
+    ports = [port.strip() for port in ports.split(",")]
+    return ", ".join(abbreviate_interface(port) for port in ports if port)
+
+
+def get_rows(data: dict, name: str) -> List[dict]:
+    """
+    Get the rows of a table.
+
+    Parameters
+    ----------
+    data : dict
+        The output, or a row that contains the table.
+    name : str
+        The name of the table, without the 'TABLE_' prefix.
+
+    Returns
+    -------
+    rows : list
+        The rows. It is empty if the table does not exist.
+    """
+    table = data.get(f"TABLE_{name}")
+    if not isinstance(table, dict):
+        return list()
+    rows = table.get(f"ROW_{name}")
+    if isinstance(rows, dict):
+        return [rows]
+    return rows or list()
+
+
+def flatten_tables(
+    data: dict, tables: List[str], keys: Optional[List[str]] = None
+) -> List[dict]:
+    """
+    Flatten nested tables into a list of rows.
+
+    Parameters
+    ----------
+    data : dict
+        The decoded output of the command.
+    tables : list
+        The names of the tables, from the outermost to the innermost, without
+        the 'TABLE_' prefix. If it is empty, the output is one row.
+    keys : list, optional
+        The keys to copy from the outer rows. Defaults to all of them, except
+        for the tables.
+
+    Returns
+    -------
+    rows : list
+        The rows of the innermost table. The values in the outer rows (E.g.,
+        'vrf-name-out') are added to each inner row, unless the inner row has
+        the same key. If there are no values to add, the inner rows are
+        returned as they are, without being copied.
+    """
+    rows = [data]
+    for name in tables:
+        nested = list()
+        for row in rows:
+            if keys is None:
+                outer = {k: v for k, v in row.items() if not k.startswith("TABLE_")}
+            else:
+                outer = {k: row[k] for k in keys if k in row}
+            if outer:
+                nested.extend({**outer, **item} for item in get_rows(row, name))
+            else:
+                nested.extend(get_rows(row, name))
+        rows = nested
+    return rows
+
+
+class JsonTable:
+    """
+    A table in the JSON output of an NXOS command.
+
+    Parameters
+    ----------
+    tables : list
+        The names of the nested tables, without the 'TABLE_' prefix (see
+        'flatten_tables').
+    columns : dict
+        A dictionary where each key is a key in the rows, and each value is
+        the name of the column in the output.
+    lists : dict, optional
+        A dictionary where each key is a column prefix, and each value is a
+        tuple of the name of a table inside each row, the key to use from its
+        rows, and the maximum number of values. The values are stored in the
+        '<prefix>_1' to '<prefix>_<maximum>' columns (like the 'lists' of a
+        'text_templates.RecordTemplate').
+    default : any, optional
+        The value for keys that a row does not have. Defaults to an empty
+        string, which is what the text templates return for missing values.
+    converters : dict, optional
+        A dictionary where each key is a column, and each value is a function
+        that converts the values in it to the format of the text output (E.g.,
+        'abbreviate_interface'). Missing values are not converted.
+    """
+
+    def __init__(
+        self,
+        tables: List[str],
+        columns: Dict[str, str],
+        lists: Optional[Dict[str, Tuple[str, str, int]]] = None,
+        default="",
+        converters: Optional[Dict[str, Callable]] = None,
+    ):
+        self.tables = tables
+        self.keys = columns
+        self.lists = lists or dict()
+        self.default = default
+        self.converters = converters or dict()
+
+        self.columns = list(columns.values())
+        for prefix, (_, _, maximum) in self.lists.items():
+            self.columns.extend(f"{prefix}_{n}" for n in range(1, maximum + 1))
+
+    def parse(self, text) -> Dict[str, list]:
+        """
+        Parse the output of a command.
+
+        Parameters
+        ----------
+        text : str or dict
+            The output of the command.
+
+        Returns
+        -------
+        data : dict
+            A dictionary where each key is a column, and each value is the
+            list of values in that column.
+        """
+        data = cr.load_json(text) or dict()
+        rows = flatten_tables(data, self.tables, list(self.keys))
+        default = self.default
+
+        columns = {
+            column: [row.get(key, default) for row in rows]
+            for key, column in self.keys.items()
+        }
+        for prefix, (name, key, maximum) in self.lists.items():
+            values = [[item.get(key) for item in get_rows(row, name)] for row in rows]
+            for n in range(maximum):
+                columns[f"{prefix}_{n + 1}"] = [
+                    v[n] if n < len(v) else default for v in values
+                ]
+        for column, func in self.converters.items():
+            columns[column] = [
+                v if v == default else func(v) for v in columns[column]
+            ]
+        return columns
+
+
+def parse_output(
+    source,
+    table: JsonTable,
+    template,
+    command: Optional[str] = None,
+    device_col: str = "device",
+) -> pd.DataFrame:
+    """
+    Parse the output of a command on each device. JSON output is parsed with
+    a JsonTable, and text output is parsed with a text template.
+
+    Parameters
+    ----------
+    source : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
+    table : JsonTable
+        The table for JSON output.
+    template : LineTemplate, HeaderTemplate or RecordTemplate
+        The template for text output (see helpers/text_templates.py). It must
+        have the same columns as the table, but they can be in any order.
+    command : str, optional
+        Only use the records for this command (see
+        'command_records.iter_command_output').
+    device_col : str, optional
+        The name of the device column. Defaults to 'device'.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        A DataFrame with the device column, followed by the table's columns.
+        The columns have the 'object' dtype, even if there are no rows.
+    """
+    columns = [device_col] + table.columns
+    data = {c: list() for c in columns}
+    for device, text in cr.iter_command_output(source, command):
+        if cr.is_json(text):
+            parsed = table.parse(text)
+        else:
+            parsed = template.parse(text)
+        rows = len(parsed[table.columns[0]]) if table.columns else 0
+        data[device_col].extend([device] * rows)
+        for col in table.columns:
+            data[col].extend(parsed[col])
+    return pd.DataFrame(data, columns=columns, dtype=object)
+
+
+def needs_fallback(text) -> bool:
+    """
+    Check whether the output of a '| json' command is text, which means the
+    device does not support JSON output for the command (E.g., an error
+    message from an older NXOS version).
+
+    Parameters
+    ----------
+    text : str or dict
+        The output of the command.
+
+    Returns
+    -------
+    bool
+        True if the output is text that is not JSON. Empty output is not
+        included, since some commands return nothing when the table is empty.
+    """
+    if not isinstance(text, str):
+        return False
+    return bool(text.strip()) and not cr.is_json(text)
@@ -15,6 +15,8 @@ Functions:
     - reverse_transform_ip: Reverses the transformation of an IP address.
     - transform_subnet: Transforms a subnet (CIDR or IP + Subnet mask).
     - reverse_transform_subnet: Reverses the transformation of a subnet.
+    - transform_ips: Transforms every IPv4 and IPv6 address in a column.
+    - reverse_transform_ips: Reverses the transformation of a column.
     - test_module: Tests the functionality of the module using examples.
 
 Example:
@@ -30,6 +32,25 @@ Example:
 
 import argparse
 import ipaddress
+import numpy as np
+import pandas as pd
+import re
+
+# IPv4 addresses whose first octet is 255 are subnet masks, so they are not
+# matched. Suffixes like '/24' and ':443' are not part of the match, so they
+# are kept as they are.
+_V4 = (r'(?<![\d.])(?:25[0-4]|2[0-4][0-9]|1[0-9]{2}|[1-9][0-9]?|0)'
+       r'(?:\.(?:25[0-5]|2[0-4][0-9]|1[0-9]{2}|[1-9][0-9]?|0)){3}'
+       r'(?![\d]|\.\d)')
+_H = r'[0-9A-Fa-f]{1,4}'
+_V6 = (rf'(?<![0-9A-Fa-f:.])(?:(?:{_H}:){{7}}{_H}'
+       rf'|(?:{_H}(?::{_H})*)?::(?:{_H}(?::{_H})*)?)(?![0-9A-Fa-f:.])')
+IP_TOKEN_PATTERN = re.compile(f'({_V4})|({_V6})')
+
+# The transformed IPv4 addresses wrap within the addresses that can be
+# matched (first octet 0-254), so the transformation is exactly reversible.
+V4_MODULUS = 255 << 24
+_U64 = 2**64 - 1
 
 
 def parse_args():
@@ -194,6 +215,182 @@ def reverse_transform_subnet(transformed_subnet: str, offset: int) -> str:
         return original_mask
 
 
+def _shift_v4(tokens: list, offset: int) -> list:
+    """
+    Shift a list of IPv4 addresses by an offset using integer arithmetic.
+
+    Parameters
+    ----------
+    tokens : list
+        The IPv4 addresses.
+    offset : int
+        The offset to add. Use a negative offset to reverse a shift.
+
+    Returns
+    -------
+    list
+        The shifted IPv4 addresses.
+    """
+    octets = pd.Series(tokens).str.split('.', expand=True).astype(np.int64)
+    ints = octets.to_numpy() @ np.array([1 << 24, 1 << 16, 1 << 8, 1],
+                                        dtype=np.int64)
+    ints = (ints + offset % V4_MODULUS) % V4_MODULUS
+    out = pd.Series((ints >> 24) & 255).astype(str)
+    for shift in (16, 8, 0):
+        out = out + '.' + pd.Series((ints >> shift) & 255).astype(str)
+    return out.to_list()
+
+
+def _shift_v6(tokens: list, offset: int) -> list:
+    """
+    Shift a list of IPv6 addresses by an offset, modulo 2**128.
+
+    Each address is held as two uint64 halves, and the carry (or borrow)
+    between them is applied with NumPy.
+
+    Parameters
+    ----------
+    tokens : list
+        The IPv6 addresses. Tokens that are not valid addresses, or that have
+        fewer than two groups, are returned unchanged.
+    offset : int
+        The offset to add. Use a negative offset to reverse a shift.
+
+    Returns
+    -------
+    list
+        The shifted IPv6 addresses, in compressed form.
+    """
+    out = list(tokens)
+    valid = list()
+    packed = list()
+    for i, token in enumerate(tokens):
+        if len(re.findall(_H, token)) < 2:
+            continue
+        try:
+            packed.append(ipaddress.IPv6Address(token).packed)
+        except ValueError:
+            continue
+        valid.append(i)
+    if not valid:
+        return out
+
+    halves = np.frombuffer(b''.join(packed), dtype='>u8').reshape(-1, 2)
+    hi = halves[:, 0].astype(np.uint64)
+    lo = halves[:, 1].astype(np.uint64)
+    offset = offset % 2**128
+    off_hi = np.uint64(offset >> 64)
+    off_lo = np.uint64(offset & _U64)
+    new_lo = lo + off_lo
+    carry = (new_lo < lo).astype(np.uint64)
+    new_hi = hi + off_hi + carry
+
+    data = np.stack([new_hi, new_lo], axis=1).astype('>u8').tobytes()
+    for n, i in enumerate(valid):
+        out[i] = str(ipaddress.IPv6Address(data[n * 16:(n + 1) * 16]))
+    return out
+
+
+def _shift_ips(values: pd.Series, offset: int) -> pd.Series:
+    """
+    Shift every IPv4 and IPv6 address in a Series by an offset.
+
+    The unique string values are joined and split on IP_TOKEN_PATTERN in a
+    single pass. All of the addresses are then shifted at once and the
+    strings are reassembled around them.
+
+    Parameters
+    ----------
+    values : pd.Series
+        The values to transform. Values that are not strings are returned
+        unchanged.
+    offset : int
+        The offset to add. Use a negative offset to reverse a shift.
+
+    Returns
+    -------
+    pd.Series
+        The transformed values.
+    """
+    is_str = values.map(lambda v: isinstance(v, str))
+    uniques = [v for v in pd.unique(values[is_str])
+               if ('.' in v or ':' in v) and '\x00' not in v]
+    if not uniques:
+        return values
+
+    parts = IP_TOKEN_PATTERN.split('\x00'.join(uniques))
+    v4 = [(i, t) for i, t in enumerate(parts[1::3]) if t is not None]
+    v6 = [(i, t) for i, t in enumerate(parts[2::3]) if t is not None]
+    tokens = [None] * (len(parts) // 3)
+    if v4:
+        shifted = _shift_v4([t for _, t in v4], offset)
+        for (i, _), new in zip(v4, shifted):
+            tokens[i] = new
+    if v6:
+        shifted = _shift_v6([t for _, t in v6], offset)
+        for (i, _), new in zip(v6, shifted):
+            tokens[i] = new
+
+    text = parts[0::3]
+    joined = [None] * (len(text) + len(tokens))
+    joined[0::2] = text
+    joined[1::2] = tokens
+    mapping = dict(zip(uniques, ''.join(joined).split('\x00')))
+
+    # 'Series.map' would replace None with NaN.
+    return pd.Series([mapping.get(v, v) if isinstance(v, str) else v
+                      for v in values], index=values.index, dtype=object)
+
+
+def transform_ips(values: pd.Series, offset: int) -> pd.Series:
+    """
+    Transform every IPv4 and IPv6 address in a column of values.
+
+    Cells can contain any number of addresses, mixed with other text. CIDR
+    and port suffixes are kept. IPv4 addresses are shifted modulo
+    V4_MODULUS (subnet masks, which start with 255, are left as they are)
+    and IPv6 addresses are shifted modulo 2**128.
+
+    Parameters
+    ----------
+    values : pd.Series
+        The values to transform.
+    offset : int
+        The offset used for transformation.
+
+    Returns
+    -------
+    pd.Series
+        The transformed values.
+
+    Examples
+    --------
+    >>> values = pd.Series(['10.1.1.1/24 via 10.1.1.254', '2001:db8::1'])
+    >>> transform_ips(values, 98765432).to_list()
+    ['15.228.11.121/24 via 15.228.12.118', '2001:db8::5e3:a79']
+    """
+    return _shift_ips(values, offset)
+
+
+def reverse_transform_ips(values: pd.Series, offset: int) -> pd.Series:
+    """
+    Reverse the transformation applied by transform_ips.
+
+    Parameters
+    ----------
+    values : pd.Series
+        The transformed values.
+    offset : int
+        The offset used for the original transformation.
+
+    Returns
+    -------
+    pd.Series
+        The original values. IPv6 addresses are returned in compressed form.
+    """
+    return _shift_ips(values, -offset)
+
+
 def test_module(ip_addresses=["66.119.107.6",
                               "10.10.100.10/25",
                               "172.21.243.18 255.255.255.0"],
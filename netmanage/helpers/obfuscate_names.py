@@ -16,20 +16,33 @@ Functions:
         database to another.
     - reverse_consistent_transform: Reverse the obfuscation based on
         predefined rules.
+    - obfuscate_ips_in_db: Obfuscate the IP addresses in an SQLite
+        database in place.
     - obfuscate_db_data: Obfuscate an SQLite database.
     - reverse_db_data: Reverse the obfuscation on an SQLite database.
 
+Tables are streamed in chunks of rows. Each chunk is transformed column by
+column, with the results for repeated values cached, and written to the
+destination with a single bulk insert. Chunks can optionally be transformed
+in a pool of worker processes.
+
 Example:
     >>> obfuscate_db_data("input.db", "output_obfuscated.db")
     >>> reverse_db_data("output_obfuscated.db", "output_reversed.db")
 """
 
+import pandas as pd
 import sqlite3
 import re
 import string
 import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from netmanage.helpers.obfuscate_addresses import transform_ip
+from netmanage.helpers.obfuscate_addresses import IP_TOKEN_PATTERN
+from netmanage.helpers.obfuscate_addresses import reverse_transform_ips
+from netmanage.helpers.obfuscate_addresses import transform_ips
 
 
 def get_columns_to_rename():
@@ -112,6 +125,9 @@ random.shuffle(shuffled_chars)
 FORWARD_MAP = {c: s for c, s in zip(chars, shuffled_chars)}
 REVERSE_MAP = {s: c for c, s in zip(chars, shuffled_chars)}
 
+# The maximum number of unique values to cache per transformation.
+CACHE_SIZE = 2**20
+
 
 def random_map_transform(s: str) -> str:
     """Transform a string using a random character mapping.
@@ -221,14 +237,208 @@ def reverse_consistent_transform(s: str, reverse_map, ignores: list = [],
     return ''.join(transformed_words)
 
 
-def obfuscate_ips_in_db(db_path: str, ip_offset: int = 98765432):
+def _init_worker(forward_map: dict):
+    """Set the character mapping in a worker process.
+
+    Worker processes import this module again, which creates a new random
+    mapping. This replaces it with the mapping used by the parent process.
+
+    Args:
+        forward_map (dict): The forward mapping dictionary.
+    """
+    global FORWARD_MAP
+    FORWARD_MAP = forward_map
+
+
+def _skip_ips(transform, s, *args):
+    """Apply a name transformation to the parts of a value that are not IP
+    addresses.
+
+    IP addresses are obfuscated separately, by shifting them. If the letters
+    in an IPv6 address were changed, the address would no longer be matched
+    (or would be shifted in lower-case), so the value could not be reversed.
+
+    Args:
+        transform (callable): The name transformation.
+        s (str): The value to transform.
+        *args: Additional arguments passed to the transformation.
+
+    Returns:
+        str: Transformed string.
+    """
+    if not isinstance(s, str) or '\x00' in s:
+        return transform(s, *args)
+
+    # Replace each address with a placeholder that the transformation does
+    # not change, then restore them.
+    ips = list()
+
+    def hold(match):
+        ips.append(match.group(0))
+        return f'\x00{len(ips) - 1}\x00'
+
+    masked = IP_TOKEN_PATTERN.sub(hold, s)
+    if not ips:
+        return transform(s, *args)
+    return re.sub(r'\x00(\d+)\x00', lambda m: ips[int(m.group(1))],
+                  transform(masked, *args))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _cached_transform(s, ignores: tuple, prefix: str):
+    """Cached version of consistent_transform."""
+    return _skip_ips(consistent_transform, s, list(ignores), prefix)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _cached_reverse_transform(s, reverse_map: tuple, ignores: tuple,
+                              prefix: str):
+    """Cached version of reverse_consistent_transform."""
+    return _skip_ips(reverse_consistent_transform, s, dict(reverse_map),
+                     list(ignores), prefix)
+
+
+def transform_rows(rows: list, plan: list, ip_offset: int = None,
+                   reverse_map: dict = None) -> list:
+    """Transform a chunk of rows column by column.
+
+    Args:
+        rows (list): The rows (tuples) to transform.
+        plan (list): A list of (column index, ignores, prefix) tuples for the
+            columns that should have their names transformed.
+        ip_offset (int, optional): The offset used for IP address
+            obfuscation. If it is None, IP addresses are not changed.
+            Defaults to None.
+        reverse_map (dict, optional): The reverse mapping dictionary. If it
+            is passed, the name and IP address transformations are reversed
+            instead of applied. Defaults to None.
+
+    Returns:
+        list: The transformed rows.
+
+    Notes:
+        Names are transformed before IP addresses are shifted, so the
+        reverse undoes the IP address shift first, then the names.
+    """
+    if not rows:
+        return rows
+    columns = [list(c) for c in zip(*rows)]
+
+    def transform_names():
+        for idx, ignores, prefix in plan:
+            if reverse_map is None:
+                columns[idx] = [_cached_transform(v, ignores, prefix)
+                                if v else v for v in columns[idx]]
+            else:
+                columns[idx] = [_cached_reverse_transform(v, reverse_items,
+                                                          ignores, prefix)
+                                if v else v for v in columns[idx]]
+
+    def shift_ips():
+        if ip_offset is None:
+            return
+        shift = transform_ips if reverse_map is None else reverse_transform_ips
+        for idx, column in enumerate(columns):
+            column = pd.Series(column, dtype=object)
+            columns[idx] = shift(column, ip_offset).to_list()
+
+    if reverse_map is None:
+        transform_names()
+        shift_ips()
+    else:
+        reverse_items = tuple(sorted(reverse_map.items()))
+        shift_ips()
+        transform_names()
+
+    return list(zip(*columns))
+
+
+def _create_plan(columns: list, table_name: str) -> list:
+    """Create the list of columns to transform for a table.
+
+    Args:
+        columns (list): The column names, in table order.
+        table_name (str): The name of the table.
+
+    Returns:
+        list: A list of (column index, ignores, prefix) tuples.
+    """
+    columns_to_rename = get_columns_to_rename()
+    skip_columns = get_columns_to_skip().get(table_name, [])
+    plan = list()
+    for idx, col in enumerate(columns):
+        if col in columns_to_rename and col not in skip_columns:
+            rules = columns_to_rename[col]
+            plan.append((idx, tuple(rules.get('ignores', [])),
+                         rules.get('prefix', '')))
+    return plan
+
+
+def _stream_table(source_conn, dest_conn, table_name: str, chunk_size: int,
+                  executor=None, **kwargs):
+    """Copy the rows of a table in chunks, transforming each chunk.
+
+    Args:
+        source_conn: SQLite connection object for the source database.
+        dest_conn: SQLite connection object for the destination database.
+        table_name (str): Name of the table to copy.
+        chunk_size (int): The number of rows to read per chunk.
+        executor (ProcessPoolExecutor, optional): If it is passed, chunks are
+            transformed in the worker processes. Defaults to None.
+        **kwargs: Keyword arguments passed to transform_rows.
+    """
+    source_cursor = source_conn.execute(f'SELECT * FROM "{table_name}";')
+    columns = [d[0] for d in source_cursor.description]
+    plan = _create_plan(columns, table_name)
+    placeholders = ", ".join(["?" for _ in columns])
+    query = f'INSERT INTO "{table_name}" VALUES ({placeholders})'
+
+    def chunks():
+        while True:
+            rows = source_cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+    if executor is None:
+        for rows in chunks():
+            dest_conn.executemany(query, transform_rows(rows, plan, **kwargs))
+    else:
+        # Limit the number of chunks in flight so that large tables are not
+        # read into memory all at once. Chunks are written in order.
+        pending = deque()
+        max_pending = executor._max_workers * 2
+        for rows in chunks():
+            pending.append(executor.submit(transform_rows, rows, plan,
+                                           **kwargs))
+            if len(pending) >= max_pending:
+                dest_conn.executemany(query, pending.popleft().result())
+        while pending:
+            dest_conn.executemany(query, pending.popleft().result())
+
+    dest_conn.commit()
+
+
+def obfuscate_ips_in_db(db_path: str, ip_offset: int = 98765432,
+                        chunk_size: int = 50000):
+    """Obfuscate the IP addresses in every table of a database in place.
+
+    Every IPv4 and IPv6 address in a value is transformed. CIDR and port
+    suffixes are kept. Only the rows that changed are updated, in bulk.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        ip_offset (int, optional): The offset used for IP address
+            obfuscation. Defaults to 98765432.
+        chunk_size (int, optional): The number of rows to read per chunk.
+            Defaults to 50000.
+    """
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
     # Get all tables in the database
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
     tables = cursor.fetchall()
-    pattern = r'\b(25[0-4]|2[0-4][0-9]|1[0-9]{2}|[1-9][0-9]?|0)(?:\.(25[0-5]|2[0-4][0-9]|1[0-9]{2}|[1-9][0-9]?|0)){3}(?:/\d{1,2})?(?::\d{1,5})?\b' # noqa
 
     for table in tables:
         table_name = table[0]
@@ -237,53 +447,38 @@ def obfuscate_ips_in_db(db_path: str, ip_offset: int = 98765432):
 
         print(f"Processing IP obfuscation in table: {table_name}")
 
-        cursor.execute(f"PRAGMA table_info({table_name});")
-        columns = [col[1] for col in cursor.fetchall()]
-
-        for col in columns:
-            cursor.execute(f'SELECT "{col}" FROM "{table_name}";')
-            values = cursor.fetchall()
-
-            for value in values:
-                value = value[0]
-                match = re.search(pattern, str(value))
-                if match:
-                    ip_with_extra = match.group(0)
-
-                    # Handle CIDR notation
-                    if '/' in ip_with_extra:
-                        ip_part, extra = ip_with_extra.split('/')
-                        if ":" in extra:  # CIDR + port
-                            mask, port = extra.split(":")
-                            transformed_ip = transform_ip(ip_part, ip_offset)
-                            transformed_value =\
-                                f"{transformed_ip}/{mask}:{port}"
-                        else:  # Just CIDR
-                            mask = extra
-                            transformed_ip = transform_ip(ip_part, ip_offset)
-                            transformed_value = f"{transformed_ip}/{mask}"
-                    elif ":" in ip_with_extra:  # Just port
-                        ip_part, port = ip_with_extra.split(":")
-                        transformed_ip = transform_ip(ip_part, ip_offset)
-                        transformed_value = f"{transformed_ip}:{port}"
-                    else:  # Just IP
-                        transformed_value = transform_ip(ip_with_extra,
-                                                         ip_offset)
-
-                    cursor.execute(
-                        f'UPDATE "{table_name}" SET "{col}"=? WHERE "{col}"=?',
-                        (transformed_value, value))
-
-            conn.commit()
+        read_cursor = conn.execute(f'SELECT rowid, * FROM "{table_name}";')
+        columns = [d[0] for d in read_cursor.description][1:]
+        assignments = ", ".join([f'"{c}"=?' for c in columns])
+        query = f'UPDATE "{table_name}" SET {assignments} WHERE rowid=?'
+
+        updates = list()
+        while True:
+            rows = read_cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            new_rows = transform_rows([r[1:] for r in rows], [],
+                                      ip_offset=ip_offset)
+            for row, new_row in zip(rows, new_rows):
+                if tuple(new_row) != row[1:]:
+                    updates.append((*new_row, row[0]))
+
+        cursor.executemany(query, updates)
+        conn.commit()
 
     conn.close()
 
 
 def obfuscate_db_data(source_db_path: str, dest_db_path: str = None,
-                      ip_offset: int = 98765432):
+                      ip_offset: int = 98765432, chunk_size: int = 50000,
+                      processes: int = None):
     """Obfuscate the database data from a source database to a destination
     database.
 
+    Each table is read in chunks. The names and IP addresses in each chunk
+    are transformed in a single pass and the chunk is bulk-inserted into the
+    destination database.
+
     Args:
         source_db_path (str): Path to the source SQLite database.
         dest_db_path (str, optional): Path to the destination SQLite database.
@@ -294,6 +489,11 @@ def obfuscate_db_data(source_db_path: str, dest_db_path: str = None,
         The offset value used for IP address obfuscation. This determines how
         much each octet in the IP address is adjusted during the obfuscation
         process. If not provided, it defaults to 98765432.
+    chunk_size : int, optional
+        The number of rows to read and write at a time. Defaults to 50000.
+    processes : int, optional
+        The number of worker processes to use for transforming chunks. If
+        not provided, the chunks are transformed in the current process.
     """
 
     if not dest_db_path:
@@ -307,82 +507,68 @@ def obfuscate_db_data(source_db_path: str, dest_db_path: str = None,
 
     dest_conn = sqlite3.connect(dest_db_path)
     dest_cursor = dest_conn.cursor()
-
-    columns_to_rename = get_columns_to_rename()
-    skip_columns_for_tables = get_columns_to_skip()
+    # The destination is a new file, so there is nothing to protect from a
+    # crash.
+    dest_cursor.execute("PRAGMA journal_mode=OFF;")
+    dest_cursor.execute("PRAGMA synchronous=OFF;")
 
     # Create and populate the mapping table
     dest_cursor.execute(
         "CREATE TABLE IF NOT EXISTS char_map (original TEXT, mapped TEXT);")
-    for original, mapped in FORWARD_MAP.items():
-        dest_cursor.execute(
-            "INSERT INTO char_map (original, mapped) VALUES (?, ?);",
-            (original, mapped))
+    dest_cursor.executemany(
+        "INSERT INTO char_map (original, mapped) VALUES (?, ?);",
+        list(FORWARD_MAP.items()))
     dest_conn.commit()
 
     source_cursor.execute("SELECT name,type FROM sqlite_master order by type;")
     tables = source_cursor.fetchall()
 
-    for table in tables:
-        table_name = table[0]
-        table_type = table[1]
-        print(f"Processing Name obfuscation in table: {table_name}")
-
-        if (
-            table_name == 'sqlite_sequence'
-            or table_type not in ['table', 'view']
-        ):
-            continue
-
-        copy_table_structure(source_cursor, dest_cursor, dest_conn,
-                             table_name, table_type)
-
-        if table_type == 'view':
-            continue
-
-        source_cursor.execute(f"SELECT * FROM {table_name};")
-        rows = source_cursor.fetchall()
+    executor = None
+    if processes:
+        executor = ProcessPoolExecutor(processes, initializer=_init_worker,
+                                       initargs=(FORWARD_MAP,))
 
-        for row in rows:
-            source_cursor.execute(f"PRAGMA table_info({table_name});")
-            columns = [col[1] for col in source_cursor.fetchall()]
+    try:
+        for table in tables:
+            table_name = table[0]
+            table_type = table[1]
+            print(f"Processing Name obfuscation in table: {table_name}")
 
-            # Skip columns for this table if specified
-            skip_columns = skip_columns_for_tables.get(table_name, [])
+            if (
+                table_name in ['sqlite_sequence', 'char_map']
+                or table_type not in ['table', 'view']
+            ):
+                continue
 
-            new_values = []
-            for col, original_value in zip(columns, row):
-                if col in skip_columns:
-                    new_values.append(original_value)
-                    continue
-                rules = columns_to_rename.get(col, {})
-                if col in columns_to_rename:
-                    new_value = consistent_transform(original_value, rules.get(
-                        "ignores", []), prefix=rules.get("prefix", ""))
-                else:
-                    new_value = original_value
-                new_values.append(new_value)
+            copy_table_structure(source_cursor, dest_cursor, dest_conn,
+                                 table_name, table_type)
 
-            placeholders = ", ".join(["?" for _ in new_values])
-            dest_cursor.execute(
-                f"INSERT INTO {table_name} VALUES ({placeholders})",
-                tuple(new_values))
+            if table_type == 'view':
+                continue
 
-        dest_conn.commit()
+            _stream_table(source_conn, dest_conn, table_name, chunk_size,
+                          executor=executor, ip_offset=ip_offset)
+    finally:
+        if executor:
+            executor.shutdown()
 
     source_conn.close()
     dest_conn.close()
-    # After the main logic is done, call the IP obfuscation function
-    obfuscate_ips_in_db(dest_db_path, ip_offset)
 
 
-def reverse_db_data(source_db_path: str, dest_db_path: str):
+def reverse_db_data(source_db_path: str, dest_db_path: str,
+                    chunk_size: int = 50000, ip_offset: int = None):
     """Reverse the obfuscation of database data from a source to a destination
     database.
 
     Args:
         source_db_path (str): Path to the source SQLite database.
         dest_db_path (str): Path to the destination SQLite database.
+        ip_offset (int, optional): The offset that was used for IP address
+            obfuscation. If it is None, IP addresses are not reversed.
+            Defaults to None.
+        chunk_size (int, optional): The number of rows to read and write at a
+            time. Defaults to 50000.
     """
     source_conn = sqlite3.connect(source_db_path)
     source_cursor = source_conn.cursor()
@@ -390,9 +576,6 @@ def reverse_db_data(source_db_path: str, dest_db_path: str):
     dest_conn = sqlite3.connect(dest_db_path)
     dest_cursor = dest_conn.cursor()
 
-    columns_to_rename = get_columns_to_rename()
-    skip_columns_for_tables = get_columns_to_skip()
-
     source_cursor.execute("SELECT original, mapped FROM char_map;")
     char_map_data = source_cursor.fetchall()
     reverse_map = {mapped: original for original, mapped in char_map_data}
@@ -406,42 +589,11 @@ def reverse_db_data(source_db_path: str, dest_db_path: str):
         if table_name == 'sqlite_sequence' or table_name == 'char_map':
             continue
 
-        copy_table_structure(source_cursor, dest_cursor, dest_conn, table_name)
-
-        source_cursor.execute(f"SELECT * FROM {table_name};")
-        rows = source_cursor.fetchall()
-
-        for row in rows:
-            source_cursor.execute(f"PRAGMA table_info({table_name});")
-            columns = [col[1] for col in source_cursor.fetchall()]
-
-            # Skip columns for this table if specified
-            skip_columns = skip_columns_for_tables.get(table_name, [])
-
-            new_values = []
-            for col, original_value in zip(columns, row):
-                if col in skip_columns:
-                    new_values.append(original_value)
-                    continue
-                rules = columns_to_rename.get(col, {})
-                if col in columns_to_rename:
-                    new_value = reverse_consistent_transform(original_value,
-                                                             reverse_map,
-                                                             rules.get(
-                                                                 "ignores",
-                                                                 []),
-                                                             prefix=rules.get(
-                                                                 "prefix", ""))
-                else:
-                    new_value = original_value
-                new_values.append(new_value)
-
-            placeholders = ", ".join(["?" for _ in new_values])
-            dest_cursor.execute(
-                f"INSERT INTO {table_name} VALUES ({placeholders})",
-                tuple(new_values))
-
-        dest_conn.commit()
+        copy_table_structure(source_cursor, dest_cursor, dest_conn,
+                             table_name, 'table')
+
+        _stream_table(source_conn, dest_conn, table_name, chunk_size,
+                      ip_offset=ip_offset, reverse_map=reverse_map)
 
     source_conn.close()
     dest_conn.close()
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+
+"""
+A columnar storage backend for collector results.
+
+Each collector snapshot is written as a typed, compressed Parquet file in a
+hive-partitioned dataset:
+
+    <dataset_path>/<TABLE_NAME>/timestamp=<YYYY-MM-DD_hhmm>/part-0.parquet
+
+The dataset lives next to the SQLite database, in a directory with the same
+name as the database plus '_parquet'. Reading the timestamps of a table only
+requires listing its partition directories, and analytical queries only read
+the columns and partitions that they need.
+
+The query layer uses DuckDB. Every table in the dataset is available as a
+view, so the same SQL that works against the SQLite database can be run
+against the dataset.
+
+The dataset only holds the collector results. When 'storage_backend' is
+'parquet', the snapshot catalog ('_snapshots'), the indexes, the normalized
+tables and snapshot retention are skipped, since they are all kept in the
+SQLite database. Use 'both' if they are needed.
+
+Schemas that change between snapshots are unified when the dataset is read,
+which requires pyarrow 14 or later. Columns whose types cannot be unified
+(for example, integers in one snapshot and strings in another) are read as
+strings.
+
+Examples
+--------
+>>> from netmanage.helpers import parquet_store as ps
+>>> from netmanage.helpers import report_helpers as rh
+>>> dataset_path = ps.get_dataset_path(database_full_path)
+>>> ps.get_table_timestamps(dataset_path, 'MERAKI_ORG_DEVICE_STATUSES')
+['2024-01-01_1000', '2024-01-01_1100']
+>>> df = ps.query(dataset_path,
+...               "select * from MERAKI_ORG_DEVICE_STATUSES "
+...               "where status != 'online'")
+>>> rh.export_dataframe_to_csv(df, out_dir, 'offline_devices')
+"""
+
+import duckdb
+import json
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as pds
+import pyarrow.parquet as pq
+import shutil
+from typing import List, Optional
+
+
+def get_dataset_path(database_full_path: str) -> str:
+    """
+    Return the path to the Parquet dataset for a database.
+
+    Parameters
+    ----------
+    database_full_path : str
+        The full path to the SQLite database.
+
+    Returns
+    -------
+    dataset_path : str
+        The path to the dataset directory.
+    """
+    return f"{os.path.splitext(database_full_path)[0]}_parquet"
+
+
+def get_dataset_tables(dataset_path: str) -> List[str]:
+    """
+    Get all of the tables in the dataset.
+
+    Parameters
+    ----------
+    dataset_path : str
+        The path to the dataset directory.
+
+    Returns
+    -------
+    tables : list
+        A list of table names.
+    """
+    if not os.path.isdir(dataset_path):
+        return list()
+    return sorted(
+        [
+            t
+            for t in os.listdir(dataset_path)
+            if os.path.isdir(os.path.join(dataset_path, t))
+        ]
+    )
+
+
+def get_table_timestamps(dataset_path: str, table: str) -> List[str]:
+    """
+    Get the timestamps of a table, from oldest to newest.
+
+    This only lists the partition directories, so no data is read.
+
+    Parameters
+    ----------
+    dataset_path : str
+        The path to the dataset directory.
+    table : str
+        The table name.
+
+    Returns
+    -------
+    timestamps : list
+        The timestamps in YYYY-MM-DD_hhmm format.
+    """
+    table_path = os.path.join(dataset_path, table.upper())
+    if not os.path.isdir(table_path):
+        return list()
+    return sorted(
+        [
+            d.split("=", 1)[1]
+            for d in os.listdir(table_path)
+            if d.startswith("timestamp=")
+        ]
+    )
+
+
+def prepare_arrow_table(df: pd.DataFrame) -> pa.Table:
+    """
+    Convert a collector result to a typed Arrow table.
+
+    Lists and dictionaries are converted to JSON strings. Columns that
+    contain more than one type (for example, integers and strings) are
+    converted to strings.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The output of a collector.
+
+    Returns
+    -------
+    table : pa.Table
+        The Arrow table.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        values = df[col].map(
+            lambda x: json.dumps(x) if isinstance(x, (list, dict)) else x
+        )
+        types = set(type(v) for v in values if v is not None and v == v)
+        if len(types) > 1:
+            values = values.map(lambda x: x if x is None or x != x else str(x))
+        df[col] = values
+
+    df = df.convert_dtypes()
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def write_snapshot(
+    dataset_path: str,
+    table_name: str,
+    result: pd.DataFrame,
+    timestamp: str,
+    method: str = "append",
+    compression: str = "zstd",
+) -> str:
+    """
+    Write the output of a collector to the dataset as a Parquet partition.
+
+    Parameters
+    ----------
+    dataset_path : str
+        The path to the dataset directory.
+    table_name : str
+        The name of the table.
+    result : pd.DataFrame
+        The output of a collector. If it contains a 'timestamp' column, the
+        column is dropped, since the timestamp is stored in the partition.
+    timestamp : str
+        The timestamp for the data in YYYY-MM-DD_hhmm format.
+    method : str, optional
+        What to do if the table already exists. Options are 'append', 'fail',
+        'replace'. Defaults to 'append'.
+    compression : str, optional
+        The Parquet compression codec. Defaults to 'zstd'.
+
+    Returns
+    -------
+    file_path : str
+        The path to the Parquet file that was written.
+    """
+    table_path = os.path.join(dataset_path, table_name.upper())
+
+    if os.path.isdir(table_path):
+        if method == "fail":
+            raise ValueError(f"Table '{table_name.upper()}' already exists.")
+        if method == "replace":
+            shutil.rmtree(table_path)
+
+    partition_path = os.path.join(table_path, f"timestamp={timestamp}")
+    os.makedirs(partition_path, exist_ok=True)
+
+    # Appending to an existing partition adds another file to it.
+    part = len([f for f in os.listdir(partition_path) if f.endswith(".parquet")])
+    file_path = os.path.join(partition_path, f"part-{part}.parquet")
+
+    result = result.drop(columns=["timestamp", "table_id"], errors="ignore")
+    pq.write_table(prepare_arrow_table(result), file_path, compression=compression)
+
+    return file_path
+
+
+def unify_schemas(schemas: List[pa.Schema]) -> pa.Schema:
+    """
+    Unify the schemas of the partitions of a table.
+
+    Types are promoted where possible (for example, int32 and int64 become
+    int64, and a column that is all nulls takes the type of the other
+    partitions). Columns whose types conflict are converted to strings.
+
+    Parameters
+    ----------
+    schemas : list
+        The schemas to unify.
+
+    Returns
+    -------
+    schema : pa.Schema
+        The unified schema. The columns are in the order they were first
+        seen.
+    """
+    try:
+        return pa.unify_schemas(schemas, promote_options="permissive")
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        pass
+
+    fields = dict()
+    for schema in schemas:
+        for field in schema:
+            fields.setdefault(field.name, list()).append(field)
+
+    unified = list()
+    for name, group in fields.items():
+        try:
+            field = pa.unify_schemas(
+                [pa.schema([f]) for f in group], promote_options="permissive"
+            ).field(name)
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            field = pa.field(name, pa.large_string())
+        unified.append(field)
+    return pa.schema(unified)
+
+
+def get_dataset(dataset_path: str, table: str) -> pds.Dataset:
+    """
+    Open a table in the dataset with pyarrow.
+
+    The schema is unified across all of the partitions, since collectors do
+    not always return the same columns or types (see unify_schemas).
+
+    Parameters
+    ----------
+    dataset_path : str
+        The path to the dataset directory.
+    table : str
+        The table name.
+
+    Returns
+    -------
+    dataset : pyarrow.dataset.Dataset
+        The dataset for the table.
+    """
+    table_path = os.path.join(dataset_path, table.upper())
+    partitioning = pds.partitioning(
+        pa.schema([("timestamp", pa.string())]), flavor="hive"
+    )
+    dataset = pds.dataset(table_path, format="parquet", partitioning=partitioning)
+    schemas = [f.physical_schema for f in dataset.get_fragments()]
+    schemas.append(pa.schema([("timestamp", pa.string())]))
+    schema = unify_schemas(schemas)
+    return pds.dataset(
+        table_path, schema=schema, format="parquet", partitioning=partitioning
+    )
+
+
+def read_table(
+    dataset_path: str,
+    table: str,
+    columns: Optional[List[str]] = None,
+    timestamps: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Read a table from the dataset.
+
+    Parameters
+    ----------
+    dataset_path : str
+        The path to the dataset directory.
+    table : str
+        The table name.
+    columns : list, optional
+        The columns to read. Defaults to all columns.
+    timestamps : list, optional
+        The timestamps to read. Only the matching partitions are read.
+        Defaults to all timestamps.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        The rows of the table, including the 'timestamp' column.
+    """
+    if not get_table_timestamps(dataset_path, table):
+        return pd.DataFrame()
+
+    dataset = get_dataset(dataset_path, table)
+    if columns is not None and "timestamp" not in columns:
+        columns = ["timestamp"] + list(columns)
+    expr = None
+    if timestamps is not None:
+        expr = pds.field("timestamp").isin(list(timestamps))
+    return dataset.to_table(columns=columns, filter=expr).to_pandas()
+
+
+def connect(dataset_path: str) -> duckdb.DuckDBPyConnection:
+    """
+    Open an in-memory DuckDB connection with a view for every table in the
+    dataset.
+
+    Parameters
+    ----------
+    dataset_path : str
+        The path to the dataset directory.
+
+    Returns
+    -------
+    con : duckdb.DuckDBPyConnection
+        The DuckDB connection.
+    """
+    con = duckdb.connect()
+    for table in get_dataset_tables(dataset_path):
+        files = os.path.join(dataset_path, table, "*", "*.parquet")
+        files = files.replace("'", "''")
+        con.execute(
+            f"""CREATE VIEW "{table}" AS
+                SELECT * FROM read_parquet('{files}',
+                                           hive_partitioning = true,
+                                           hive_types = {{'timestamp': VARCHAR}},
+                                           union_by_name = true)"""
+        )
+    return con
+
+
+def query(dataset_path: str, sql: str, params: Optional[list] = None) -> pd.DataFrame:
+    """
+    Run a SQL query against the dataset.
+
+    Parameters
+    ----------
+    dataset_path : str
+        The path to the dataset directory.
+    sql : str
+        The query. Tables are referenced by name, the same as in the SQLite
+        database.
+    params : list, optional
+        Parameters for the query.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        The result of the query.
+    """
+    con = connect(dataset_path)
+    try:
+        return con.execute(sql, params or []).fetchdf()
+    finally:
+        con.close()
+
+
+def get_first_last_timestamp(
+    dataset_path: str, table: str, col_name: str
+) -> pd.DataFrame:
+    """
+    Gets the first and last timestamp from a table for each unique entry in a
+    column.
+
+    Parameters
+    ----------
+    dataset_path : str
+        The path to the dataset directory.
+    table : str
+        The table name.
+    col_name : str
+        The column name to search by (e.g., 'device', 'networkId', etc).
+
+    Returns
+    -------
+    df_stamps : DataFrame
+        A DataFrame containing the first and last timestamp for each unique
+        entry in the specified column.
+    """
+    sql = f"""SELECT "{col_name}",
+                     MIN(timestamp) AS first_ts,
+                     MAX(timestamp) AS last_ts
+              FROM "{table.upper()}"
+              GROUP BY "{col_name}"
+              ORDER BY "{col_name}" """
+    return query(dataset_path, sql)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+
+"""
+A cache for collector results, stored in the database.
+
+Some collectors are built from the results of other collectors. For example,
+'find_uplink_by_ip' runs the IOS 'interface_ip_addresses' and
+'cdp_neighbors' collectors, and collectors with dependencies (see
+'hp.set_dependencies') cause their dependencies to be run again. Without a
+cache, each of them opens new sessions to the devices, even if the same
+results were collected a few seconds earlier.
+
+Each result is stored in the '_collector_cache' table, keyed by the Ansible
+OS, hostgroup, collector name and collector arguments. A result is reused if
+it is newer than the TTL (time-to-live), in seconds. Credentials are never
+part of the key or stored in the table. 'collect' also stores the timestamp
+of the snapshot that it wrote the result to, so a cache hit does not write
+the same result again under a new timestamp.
+
+Examples
+--------
+>>> from netmanage.helpers import result_cache as rch
+>>> df_ip = rch.cached_call(db_path, 300, 'cisco.ios.ios', hostgroup,
+...                         'interface_ip_addresses',
+...                         cic.ios_get_interface_ips,
+...                         username, password, hostgroup, play_path,
+...                         private_data_dir)
+"""
+
+import hashlib
+import json
+import pandas as pd
+import sqlite3 as sl
+import time
+from io import StringIO
+from netmanage.helpers import helpers as hp
+from typing import Any, Callable, Dict, Optional
+
+
+def create_cache_table(con: sl.Connection) -> None:
+    """
+    Create the '_collector_cache' table, if it does not exist.
+
+    Parameters
+    ----------
+    con : sl.Connection
+        The connection to the database.
+
+    Returns
+    -------
+    None
+    """
+    con.execute(
+        """CREATE TABLE IF NOT EXISTS _collector_cache (
+                ansible_os TEXT,
+                hostgroup TEXT,
+                collector TEXT,
+                args_key TEXT,
+                args TEXT,
+                created_at REAL,
+                timestamp TEXT,
+                result TEXT,
+                PRIMARY KEY (ansible_os, hostgroup, collector, args_key)
+                )"""
+    )
+
+
+def get_args_key(args: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Return the cache key for a collector's arguments.
+
+    Parameters
+    ----------
+    args : dict, optional
+        The arguments that affect the collector's result, such as a list of
+        networks or serial numbers. Do not include credentials.
+
+    Returns
+    -------
+    key : str
+        A hash of the arguments.
+    """
+    args = json.dumps(args or dict(), sort_keys=True, default=str)
+    return hashlib.sha1(args.encode()).hexdigest()
+
+
+def get_result(
+    db_path: str,
+    ansible_os: str,
+    hostgroup: str,
+    collector: str,
+    args: Optional[Dict[str, Any]] = None,
+    ttl: float = 0,
+) -> Optional[pd.DataFrame]:
+    """
+    Get a cached collector result, if it is newer than the TTL.
+
+    Parameters
+    ----------
+    db_path : str
+        The full path to the database.
+    ansible_os : str
+        The Ansible OS of the hostgroup.
+    hostgroup : str
+        The name of the Ansible hostgroup.
+    collector : str
+        The name of the collector.
+    args : dict, optional
+        The arguments that affect the collector's result.
+    ttl : float, optional
+        The maximum age of the result, in seconds. Defaults to 0, which
+        disables the cache.
+
+    Returns
+    -------
+    result : pd.DataFrame or None
+        The cached result, or None if there is not a fresh one.
+    """
+    if not db_path or ttl <= 0:
+        return None
+
+    con = hp.connect_to_db(db_path)
+    create_cache_table(con)
+    row = con.execute(
+        """SELECT created_at, result FROM _collector_cache
+           WHERE ansible_os = ? AND hostgroup = ? AND collector = ?
+             AND args_key = ?""",
+        (ansible_os, hostgroup, collector, get_args_key(args)),
+    ).fetchone()
+    con.close()
+
+    if not row or time.time() - row[0] > ttl:
+        return None
+    return pd.read_json(
+        StringIO(row[1]), orient="split", dtype=False, convert_dates=False
+    )
+
+
+def store_result(
+    db_path: str,
+    ansible_os: str,
+    hostgroup: str,
+    collector: str,
+    result: pd.DataFrame,
+    args: Optional[Dict[str, Any]] = None,
+    timestamp: Optional[str] = None,
+) -> None:
+    """
+    Store a collector result in the cache, replacing the previous result for
+    the same key.
+
+    Parameters
+    ----------
+    db_path : str
+        The full path to the database.
+    ansible_os : str
+        The Ansible OS of the hostgroup.
+    hostgroup : str
+        The name of the Ansible hostgroup.
+    collector : str
+        The name of the collector.
+    result : pd.DataFrame
+        The collector result.
+    args : dict, optional
+        The arguments that affect the collector's result.
+    timestamp : str, optional
+        The timestamp of the snapshot that the result is written to, if any.
+
+    Returns
+    -------
+    None
+    """
+    data = result.reset_index(drop=True).to_json(
+        orient="split", default_handler=str
+    )
+    con = hp.connect_to_db(db_path)
+    create_cache_table(con)
+    con.execute(
+        """INSERT OR REPLACE INTO _collector_cache
+           (ansible_os, hostgroup, collector, args_key, args, created_at,
+            timestamp, result)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        (
+            ansible_os,
+            hostgroup,
+            collector,
+            get_args_key(args),
+            json.dumps(args or dict(), sort_keys=True, default=str),
+            time.time(),
+            timestamp,
+            data,
+        ),
+    )
+    con.commit()
+    con.close()
+
+
+def get_result_timestamp(
+    db_path: str,
+    ansible_os: str,
+    hostgroup: str,
+    collector: str,
+    args: Optional[Dict[str, Any]] = None,
+) -> Optional[str]:
+    """
+    Get the timestamp of the snapshot that a cached result was written to.
+
+    Parameters
+    ----------
+    db_path : str
+        The full path to the database.
+    ansible_os : str
+        The Ansible OS of the hostgroup.
+    hostgroup : str
+        The name of the Ansible hostgroup.
+    collector : str
+        The name of the collector.
+    args : dict, optional
+        The arguments that affect the collector's result.
+
+    Returns
+    -------
+    timestamp : str or None
+        The timestamp, or None if the result is not cached or was not written
+        to a snapshot (for example, results cached by 'cached_call').
+    """
+    con = hp.connect_to_db(db_path)
+    create_cache_table(con)
+    row = con.execute(
+        """SELECT timestamp FROM _collector_cache
+           WHERE ansible_os = ? AND hostgroup = ? AND collector = ?
+             AND args_key = ?""",
+        (ansible_os, hostgroup, collector, get_args_key(args)),
+    ).fetchone()
+    con.close()
+    return row[0] if row else None
+
+
+def cached_call(
+    db_path: str,
+    ttl: float,
+    ansible_os: str,
+    hostgroup: str,
+    collector: str,
+    func: Callable[..., pd.DataFrame],
+    *args,
+    cache_args: Optional[Dict[str, Any]] = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Return a fresh cached result for a collector, or run the collector and
+    cache its result.
+
+    Parameters
+    ----------
+    db_path : str
+        The full path to the database. If it is None, the cache is not used.
+    ttl : float
+        The maximum age of a cached result, in seconds. If it is 0, the
+        collector is always run.
+    ansible_os : str
+        The Ansible OS of the hostgroup.
+    hostgroup : str
+        The name of the Ansible hostgroup.
+    collector : str
+        The name of the collector, as it is passed to 'collect'. Results that
+        'collect' cached for the same collector are reused.
+    func : callable
+        The collector function.
+    *args
+        The positional arguments for 'func'.
+    cache_args : dict, optional
+        The arguments that affect the collector's result.
+    **kwargs
+        The keyword arguments for 'func'.
+
+    Returns
+    -------
+    result : pd.DataFrame
+        The collector result.
+    """
+    result = get_result(db_path, ansible_os, hostgroup, collector, cache_args, ttl)
+    if result is not None:
+        print(f"Using the cached result for {collector} on {hostgroup}.")
+        return result
+
+    result = func(*args, **kwargs)
+    if db_path and ttl > 0 and isinstance(result, pd.DataFrame):
+        store_result(db_path, ansible_os, hostgroup, collector, result, cache_args)
+    return result
+
+
+def purge_cache(db_path: str, ttl: float = 0) -> int:
+    """
+    Delete cached results that are older than the TTL.
+
+    Parameters
+    ----------
+    db_path : str
+        The full path to the database.
+    ttl : float, optional
+        The maximum age of the results to keep, in seconds. Defaults to 0,
+        which deletes all of them.
+
+    Returns
+    -------
+    deleted : int
+        The number of results that were deleted.
+    """
+    con = hp.connect_to_db(db_path)
+    create_cache_table(con)
+    cur = con.execute(
+        "DELETE FROM _collector_cache WHERE created_at < ?", (time.time() - ttl,)
+    )
+    deleted = cur.rowcount
+    con.commit()
+    con.close()
+    return deleted
@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+
+"""
+Snapshot retention, compaction and database maintenance.
+
+Every time a collector runs, its output is added to the database under a new
+timestamp. Without retention, the database grows forever. This module:
+
+- Thins old snapshots according to a retention policy. A policy is a list of
+  tiers, such as 'all:1d,hourly:2d,daily:90d', which keeps every snapshot for
+  1 day, the last snapshot of each hour for 2 days, and the last snapshot of
+  each day for 90 days. Older snapshots are deleted. Host groups that write to
+  the same table are thinned separately (using the '_snapshots' catalog), and
+  the most recent snapshot of each host group is always kept.
+- Optionally compacts snapshots. Rows that are unchanged since the previous
+  snapshot are removed and stored as references (in the '_row_refs' table) to
+  the row in the previous snapshot. Compacted snapshots must be read with
+  'read_snapshot', since some of their rows are stored under an earlier
+  timestamp. The most recent snapshot of each host group is never compacted,
+  so readers that query the latest timestamp directly get every row.
+- Runs VACUUM and ANALYZE on a schedule. The standard table indexes (see
+  table_indexes.py) are backfilled at the same time.
+
+Valid intervals are 'all', 'hourly', 'daily', 'weekly' and 'monthly'. Ages
+are a number followed by 'h' (hours), 'd' (days) or 'w' (weeks).
+
+Examples
+--------
+>>> from netmanage.helpers import retention as rt
+>>> policy = rt.parse_retention_policy('all:1d,hourly:2d,daily:90d')
+>>> deleted = rt.apply_retention(db_path, 'NXOS_INTERFACE_STATUS', policy)
+>>> rt.run_maintenance(db_path, interval_hours=24)
+"""
+
+import datetime as dt
+import pandas as pd
+import sqlite3 as sl
+from netmanage.helpers import helpers as hp
+from netmanage.helpers import normalized_tables as nt
+from netmanage.helpers import table_indexes as ti
+from typing import List, Optional, Tuple
+
+TIMESTAMP_FORMAT = "%Y-%m-%d_%H%M"
+
+
+def parse_retention_policy(policy: str) -> List[Tuple[str, dt.timedelta]]:
+    """
+    Parse a retention policy string.
+
+    Parameters
+    ----------
+    policy : str
+        A comma-delimited list of <interval>:<age> tiers, such as
+        'hourly:2d,daily:90d'.
+
+    Returns
+    -------
+    tiers : list
+        A list of (interval, max_age) tuples, sorted by max_age. The list is
+        empty if the policy is empty.
+    """
+    units = {"h": "hours", "d": "days", "w": "weeks"}
+    intervals = ["all", "hourly", "daily", "weekly", "monthly"]
+
+    tiers = list()
+    for tier in filter(None, [t.strip() for t in policy.split(",")]):
+        try:
+            interval, age = [_.strip() for _ in tier.split(":")]
+            max_age = dt.timedelta(**{units[age[-1].lower()]: int(age[:-1])})
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid retention tier: '{tier}'")
+        if interval not in intervals:
+            raise ValueError(f"Invalid retention interval: '{interval}'")
+        tiers.append((interval, max_age))
+
+    return sorted(tiers, key=lambda t: t[1])
+
+
+def get_bucket(timestamp: dt.datetime, interval: str) -> str:
+    """
+    Return the retention bucket that a snapshot belongs to.
+
+    Parameters
+    ----------
+    timestamp : datetime.datetime
+        The timestamp of the snapshot.
+    interval : str
+        The retention interval ('all', 'hourly', 'daily', etc).
+
+    Returns
+    -------
+    bucket : str
+        The bucket. Only one snapshot is kept in each bucket.
+    """
+    if interval == "hourly":
+        return timestamp.strftime("%Y-%m-%d %H")
+    if interval == "daily":
+        return timestamp.strftime("%Y-%m-%d")
+    if interval == "weekly":
+        year, week, _ = timestamp.isocalendar()
+        return f"{year}-W{week}"
+    if interval == "monthly":
+        return timestamp.strftime("%Y-%m")
+    return timestamp.strftime(TIMESTAMP_FORMAT)
+
+
+def select_expired_snapshots(
+    timestamps: List[str],
+    policy: List[Tuple[str, dt.timedelta]],
+    now: Optional[dt.datetime] = None,
+    hostgroups: Optional[List[str]] = None,
+) -> List[str]:
+    """
+    Select the snapshots that a retention policy does not keep.
+
+    Parameters
+    ----------
+    timestamps : list
+        The timestamps of the snapshots, in YYYY-MM-DD_hhmm format.
+    policy : list
+        The retention policy, as returned by parse_retention_policy.
+    now : datetime.datetime, optional
+        The time to calculate the age of each snapshot from. Defaults to the
+        current time.
+    hostgroups : list, optional
+        The host group of each timestamp. The policy is applied to each host
+        group separately, so a host group that is collected less often does
+        not lose its snapshots to the buckets of another one. A timestamp
+        that more than one host group wrote to can be listed once for each.
+        Defaults to None, which treats all of the timestamps as one group.
+
+    Returns
+    -------
+    expired : list
+        The timestamps of the snapshots to delete, from oldest to newest. A
+        timestamp is only deleted if no host group keeps it.
+    """
+    if not policy or not timestamps:
+        return list()
+    now = now or dt.datetime.now()
+
+    groups = dict()
+    for ts, hostgroup in zip(timestamps, hostgroups or [None] * len(timestamps)):
+        groups.setdefault(hostgroup, set()).add(ts)
+
+    keep = set()
+    for group in groups.values():
+        group = sorted(group)
+        keep.add(group[-1])
+
+        # Keep the newest snapshot in each bucket of the tier that the
+        # snapshot falls into. Iterating from newest to oldest means the
+        # first snapshot seen in a bucket is the newest one.
+        seen = set()
+        for ts in reversed(group):
+            stamp = dt.datetime.strptime(ts, TIMESTAMP_FORMAT)
+            age = now - stamp
+            for interval, max_age in policy:
+                if age <= max_age:
+                    bucket = (interval, get_bucket(stamp, interval))
+                    if bucket not in seen:
+                        seen.add(bucket)
+                        keep.add(ts)
+                    break
+
+    return [ts for ts in sorted(set(timestamps)) if ts not in keep]
+
+
+def create_refs_table(con: sl.Connection) -> None:
+    """
+    Create the '_row_refs' table, if it does not exist.
+
+    Each row in '_row_refs' means that the snapshot of 'table_name' at
+    'timestamp' contains the row with 'table_id', which is stored under an
+    earlier timestamp.
+
+    Parameters
+    ----------
+    con : sl.Connection
+        The connection to the database.
+
+    Returns
+    -------
+    None
+    """
+    cur = con.cursor()
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS _row_refs (
+                table_name TEXT,
+                timestamp TEXT,
+                table_id INTEGER
+                )"""
+    )
+    cur.execute(
+        """CREATE INDEX IF NOT EXISTS idx__row_refs_table_timestamp
+            ON _row_refs (table_name, timestamp)"""
+    )
+    cur.execute(
+        """CREATE INDEX IF NOT EXISTS idx__row_refs_table_id
+            ON _row_refs (table_name, table_id)"""
+    )
+
+
+def get_snapshot_timestamps(con: sl.Connection, table: str) -> List[str]:
+    """
+    Get the timestamps of the snapshots in a table, including snapshots that
+    only contain references, and snapshots that are only in the delta table
+    (see helpers/delta_store.py).
+
+    Parameters
+    ----------
+    con : sl.Connection
+        The connection to the database.
+    table : str
+        The table name.
+
+    Returns
+    -------
+    timestamps : list
+        The timestamps, from oldest to newest.
+    """
+    create_refs_table(con)
+    query = f"""SELECT DISTINCT timestamp FROM {table}
+                UNION
+                SELECT DISTINCT timestamp FROM _row_refs WHERE table_name = ?"""
+    params = [table]
+    if con.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '_delta_snapshots'"
+    ).fetchone():
+        query = f"""{query}
+                UNION
+                SELECT timestamp FROM _delta_snapshots WHERE table_name = ?"""
+        params.append(table.upper())
+    query = f"{query} ORDER BY timestamp"
+    return [row[0] for row in con.execute(query, params).fetchall()]
+
+
+def read_snapshot(db_path: str, table: str, timestamp: str) -> pd.DataFrame:
+    """
+    Read a single snapshot of a table, including rows stored as references.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the database.
+    table : str
+        The table name.
+    timestamp : str
+        The timestamp of the snapshot.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        The rows of the snapshot.
+    """
+    con = hp.connect_to_db(db_path)
+    df = _read_snapshot(con, table, timestamp)
+    con.close()
+    return df
+
+
+def _read_snapshot(con: sl.Connection, table: str, timestamp: str) -> pd.DataFrame:
+    create_refs_table(con)
+    return hp.sql_read_snapshots(con, table, timestamp, timestamp)
+
+
+def compact_table(
+    db_path: str, table: str, timestamps: Optional[List[str]] = None
+) -> int:
+    """
+    Replace rows that are unchanged since the previous snapshot with
+    references to the previous snapshot.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the database.
+    table : str
+        The table name. The table must have a 'table_id' column.
+    timestamps : list, optional
+        The snapshots to compact. Defaults to all snapshots. (The first
+        snapshot in the table has nothing to reference, so it is not
+        changed.)
+
+    Returns
+    -------
+    compacted : int
+        The number of rows that were replaced with references.
+    """
+    con = hp.connect_to_db(db_path)
+    columns = hp.sql_get_table_schema(db_path, table)["name"].to_list()
+    if "table_id" not in columns:
+        con.close()
+        return 0
+    data_cols = [c for c in columns if c not in ["table_id", "timestamp"]]
+
+    all_stamps = get_snapshot_timestamps(con, table)
+    if timestamps is None:
+        timestamps = all_stamps
+
+    compacted = 0
+    for ts in sorted(timestamps):
+        idx = all_stamps.index(ts) if ts in all_stamps else 0
+        if idx == 0:
+            continue
+        df_prev = _read_snapshot(con, table, all_stamps[idx - 1])
+        df_cur = pd.read_sql(
+            f"SELECT * FROM {table} WHERE timestamp = ?", con, params=(ts,)
+        )
+        if df_prev.empty or df_cur.empty:
+            continue
+
+        # Pair identical rows by hashing their contents. Duplicate rows are
+        # paired in order, so a row is only referenced once per snapshot.
+        for df in [df_prev, df_cur]:
+            df["_hash"] = pd.util.hash_pandas_object(
+                df[data_cols].astype(str), index=False
+            )
+            df["_n"] = df.groupby("_hash").cumcount()
+        df_match = df_cur[["table_id", "_hash", "_n"]].merge(
+            df_prev[["table_id", "_hash", "_n"]],
+            on=["_hash", "_n"],
+            suffixes=("_cur", "_prev"),
+        )
+        if df_match.empty:
+            continue
+
+        cur = con.cursor()
+        cur.executemany(
+            "INSERT INTO _row_refs (table_name, timestamp, table_id) VALUES (?, ?, ?)",
+            [(table, ts, int(i)) for i in df_match["table_id_prev"]],
+        )
+        cur.executemany(
+            f"DELETE FROM {table} WHERE table_id = ?",
+            [(int(i),) for i in df_match["table_id_cur"]],
+        )
+        con.commit()
+        compacted += len(df_match)
+
+    con.close()
+    return compacted
+
+
+def delete_snapshots(db_path: str, table: str, timestamps: List[str]) -> None:
+    """
+    Delete snapshots from a table.
+
+    Rows that later snapshots reference are kept, and are moved to the
+    earliest snapshot that references them. The rows for the same snapshots
+    are also deleted from the normalized tables.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the database.
+    table : str
+        The table name.
+    timestamps : list
+        The timestamps of the snapshots to delete.
+
+    Returns
+    -------
+    None
+    """
+    if not timestamps:
+        return
+    con = hp.connect_to_db(db_path)
+    create_refs_table(con)
+    hp.create_snapshot_catalog(con)
+    cur = con.cursor()
+    has_ids = "table_id" in hp.sql_get_table_schema(db_path, table)["name"].to_list()
+    existing = hp.get_database_tables(db_path)
+
+    for ts in timestamps:
+        if has_ids:
+            # Move the rows that other snapshots reference to the earliest of
+            # those snapshots, and drop the references that were replaced.
+            cur.execute(
+                f"""UPDATE {table}
+                    SET timestamp = (SELECT MIN(r.timestamp) FROM _row_refs r
+                                     WHERE r.table_name = ?
+                                       AND r.timestamp != ?
+                                       AND r.table_id = {table}.table_id)
+                    WHERE timestamp = ?
+                      AND table_id IN (SELECT table_id FROM _row_refs
+                                       WHERE table_name = ? AND timestamp != ?)""",
+                (table, ts, ts, table, ts),
+            )
+            cur.execute(
+                f"""DELETE FROM _row_refs
+                    WHERE table_name = ?
+                      AND EXISTS (SELECT 1 FROM {table} t
+                                  WHERE t.table_id = _row_refs.table_id
+                                    AND t.timestamp = _row_refs.timestamp)""",
+                (table,),
+            )
+        cur.execute(f"DELETE FROM {table} WHERE timestamp = ?", (ts,))
+        cur.execute(
+            "DELETE FROM _row_refs WHERE table_name = ? AND timestamp = ?", (table, ts)
+        )
+        cur.execute(
+            "DELETE FROM _snapshots WHERE table_name = ? AND timestamp = ?",
+            (table.upper(), ts),
+        )
+        if "_delta_snapshots" in existing:
+            cur.execute(
+                "DELETE FROM _delta_snapshots WHERE table_name = ? AND timestamp = ?",
+                (table.upper(), ts),
+            )
+        for name in nt.get_normalized_tables(table):
+            if name in existing:
+                cur.execute(
+                    f"DELETE FROM {name} WHERE source = ? AND timestamp = ?",
+                    (table.upper(), ts),
+                )
+
+    con.commit()
+    con.close()
+
+
+def apply_retention(
+    db_path: str,
+    table: str,
+    policy: List[Tuple[str, dt.timedelta]],
+    compact: bool = False,
+    now: Optional[dt.datetime] = None,
+) -> List[str]:
+    """
+    Apply a retention policy to a table.
+
+    The policy is applied to the snapshots of each host group separately,
+    using the '_snapshots' catalog.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the database.
+    table : str
+        The table name.
+    policy : list
+        The retention policy, as returned by parse_retention_policy.
+    compact : bool, optional
+        Whether to replace unchanged rows in the newest snapshot that is not
+        the latest of a host group with references to the snapshot before
+        it. (The latest snapshot of a host group is not compacted until a
+        newer one is written, since collectors and validators read it
+        directly.) Defaults to False.
+    now : datetime.datetime, optional
+        The time to calculate the age of each snapshot from. Defaults to the
+        current time.
+
+    Returns
+    -------
+    expired : list
+        The timestamps of the snapshots that were deleted.
+    """
+    table = table.upper()
+    existing = hp.get_database_tables(db_path)
+    if table not in existing:
+        return list()
+
+    con = hp.connect_to_db(db_path)
+    timestamps = get_snapshot_timestamps(con, table)
+    con.close()
+
+    # Get the host groups that wrote each snapshot from the catalog.
+    # Snapshots that are not in it are treated as one more host group.
+    df_catalog = hp.get_snapshot_catalog(db_path, table)
+    catalog = df_catalog.groupby("timestamp")["hostgroup"].agg(list).to_dict()
+    pairs = [(ts, hg) for ts in timestamps for hg in catalog.get(ts, [None])]
+
+    expired = select_expired_snapshots(
+        [ts for ts, _ in pairs],
+        policy,
+        now=now,
+        hostgroups=[hg or "" for _, hg in pairs],
+    )
+    delete_snapshots(db_path, table, expired)
+
+    # Compact the newest snapshot that is not the latest of a host group.
+    latest = dict()
+    for ts, hg in pairs:
+        latest[hg] = max(ts, latest.get(hg, ts))
+    remaining = [
+        ts for ts in timestamps if ts not in expired and ts not in latest.values()
+    ]
+    # Tables in delta mode only hold the latest snapshots, so there is
+    # nothing to compact.
+    if compact and remaining and f"{table}_DELTA" not in existing:
+        compact_table(db_path, table, timestamps=[remaining[-1]])
+
+    return expired
+
+
+def run_maintenance(
+    db_path: str, interval_hours: float = 24, force: bool = False
+) -> bool:
+    """
+    Run VACUUM and ANALYZE on the database, if they have not been run within
+    the interval. VACUUM runs first. Then any missing table indexes are
+    created, and ANALYZE is run.
+
+    The time of the last run is stored in the '_maintenance' table.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the database.
+    interval_hours : float, optional
+        The minimum number of hours between runs. Defaults to 24.
+    force : bool, optional
+        Run even if the interval has not passed. Defaults to False.
+
+    Returns
+    -------
+    ran : bool
+        Whether VACUUM and ANALYZE were run.
+    """
+    now = dt.datetime.now()
+    con = hp.connect_to_db(db_path)
+    cur = con.cursor()
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS _maintenance (
+                task TEXT PRIMARY KEY,
+                last_run TEXT
+                )"""
+    )
+    row = cur.execute(
+        "SELECT last_run FROM _maintenance WHERE task = 'vacuum_analyze'"
+    ).fetchone()
+
+    if not force and row:
+        last_run = dt.datetime.strptime(row[0], TIMESTAMP_FORMAT)
+        if now - last_run < dt.timedelta(hours=interval_hours):
+            con.close()
+            return False
+
+    cur.execute(
+        "INSERT OR REPLACE INTO _maintenance VALUES ('vacuum_analyze', ?)",
+        (now.strftime(TIMESTAMP_FORMAT),),
+    )
+    con.commit()
+    cur.execute("VACUUM")
+    con.close()
+
+    # Create any missing indexes, then run ANALYZE.
+    ti.backfill_table_indexes(db_path)
+    return True
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+
+"""
+An in-process SSH engine for running show commands, as an alternative to
+ansible-runner.
+
+Each ansible-runner play starts an 'ansible-playbook' process, which parses
+the inventory, loads the plugins and writes every event as JSON before the
+output reaches the parsers. For show commands, that overhead is often larger
+than the time spent on the devices.
+
+This engine reads the hostgroup from the Ansible inventory (with
+'hp.ansible_get_hostgroup_devices'), opens the SSH sessions with asyncssh,
+and runs the commands over exec channels. Many devices are polled at the
+same time in one event loop. The number of concurrent sessions is limited by
+a Semaphore.
+
+The output is returned as an 'SSHRunner', which has the same events as an
+'ansible_runner.Runner' for the '<os>_command' module:
+
+- 'runner_on_ok' for devices that returned output, with the output of each
+  command in 'event_data["res"]["stdout"]'.
+- 'runner_on_unreachable' for devices that could not be connected to.
+- 'runner_on_failed' for devices where a command failed.
+
+That lets the existing parsers parse the output without any changes. The
+engine is used by 'command_batching.run_batch' when 'collection_engine' is
+set to 'asyncssh' in the .env file. It supports Cisco NXOS and IOS, which
+accept commands on exec channels.
+
+Host keys are verified against the known_hosts file that is set with
+'ssh_known_hosts' in the .env file. If it is not set, asyncssh's default
+known_hosts file (~/.ssh/known_hosts) is used. Verification is only turned
+off if 'ssh_host_key_checking' is set to False, which matches
+'host_key_checking = False' in Ansible.
+
+Devices that the engine cannot connect to, or where a command fails, are
+retried with ansible-runner by 'command_batching.execute_commands'.
+
+Examples
+--------
+>>> from netmanage.helpers import ssh_engine as se
+>>> runner = se.run_commands('nxos_group_1',
+...                          ['show vrf detail'],
+...                          username, password, private_data_dir)
+>>> df = cnp.nxos_parse_vrfs(runner)
+"""
+
+import ansible_runner
+import asyncio
+import asyncssh
+from asyncio import Semaphore
+from netmanage.helpers import helpers as hp
+from typing import Dict, List, Optional
+
+SUPPORTED_OS = ["cisco.ios.ios", "cisco.nxos.nxos"]
+
+
+class SSHRunner:
+    """
+    The result of running commands with the SSH engine.
+
+    It has the 'events', 'status' and 'rc' attributes of an
+    'ansible_runner.Runner', which are what the parsers and collectors use.
+
+    Parameters
+    ----------
+    events : list
+        The runner events. There is one event for each device.
+    """
+
+    def __init__(self, events: List[dict]):
+        self.events = events
+        failed = [e for e in events if e["event"] != "runner_on_ok"]
+        self.rc = 2 if failed else 0
+        self.status = "failed" if failed else "successful"
+
+
+def get_hostgroup_targets(
+    hostgroup: str, private_data_dir: str, default_port: int = 22
+) -> Dict[str, Dict[str, str]]:
+    """
+    Get the address and port for each device in a hostgroup.
+
+    Parameters
+    ----------
+    hostgroup : str
+        The Ansible hostgroup.
+    private_data_dir : str
+        The path to the Ansible private data directory (I.e., the directory
+        containing the 'inventory' folder).
+    default_port : int, optional
+        The port for devices that do not set 'ansible_port'. Defaults to 22.
+
+    Returns
+    -------
+    targets : dict
+        A dictionary where each key is a device's inventory hostname, and
+        each value contains its 'host' and 'port'. The 'ansible_host' and
+        'ansible_port' variables are used if they are set.
+    """
+    inventories = [f"{private_data_dir}/inventory"]
+    devices = hp.ansible_get_hostgroup_devices(hostgroup, inventories)
+
+    inventory, _ = ansible_runner.interface.get_inventory(
+        "list", inventories, response_format="json", quiet=True
+    )
+    hostvars = inventory.get("_meta", dict()).get("hostvars", dict())
+
+    targets = dict()
+    for device in devices:
+        host_vars = hostvars.get(device, dict())
+        targets[device] = {
+            "host": host_vars.get("ansible_host", device),
+            "port": int(host_vars.get("ansible_port", default_port)),
+        }
+    return targets
+
+
+async def run_device_commands(
+    device: str,
+    host: str,
+    port: int,
+    commands: List[str],
+    username: str,
+    password: str,
+    sem: Semaphore,
+    connect_timeout: int = 30,
+    command_timeout: int = 30,
+    known_hosts: Optional[str] = None,
+    host_key_checking: bool = True,
+) -> dict:
+    """
+    Run a list of commands on a device over one SSH connection.
+
+    Parameters
+    ----------
+    device : str
+        The inventory hostname of the device.
+    host : str
+        The address to connect to.
+    port : int
+        The SSH port.
+    commands : list
+        The commands to run.
+    username : str
+        The username to login to the device.
+    password : str
+        The password to login to the device.
+    sem : Semaphore
+        The Semaphore used to limit the number of concurrent sessions.
+    connect_timeout : int, optional
+        The connection timeout, in seconds. Defaults to 30.
+    command_timeout : int, optional
+        The timeout for each command, in seconds. Defaults to 30.
+    known_hosts : str, optional
+        The path to the known_hosts file to verify the host key against.
+        Defaults to None, which uses asyncssh's default (~/.ssh/known_hosts).
+    host_key_checking : bool, optional
+        Whether to verify the host key. Defaults to True. If it is False, the
+        host key is not verified, and 'known_hosts' is ignored.
+
+    Returns
+    -------
+    event : dict
+        A runner event for the device.
+    """
+    event_data = {"host": device, "remote_addr": device}
+
+    # asyncssh disables verification if 'known_hosts' is None, and uses its
+    # default known_hosts file if it is not passed
+    options = dict()
+    if not host_key_checking:
+        options["known_hosts"] = None
+    elif known_hosts:
+        options["known_hosts"] = known_hosts
+
+    async with sem:
+        try:
+            conn = await asyncssh.connect(
+                host,
+                port=port,
+                username=username,
+                password=password,
+                connect_timeout=connect_timeout,
+                **options,
+            )
+        except (OSError, asyncssh.Error, asyncio.TimeoutError) as e:
+            event_data["res"] = {"msg": str(e), "unreachable": True}
+            return {"event": "runner_on_unreachable", "event_data": event_data}
+
+        stdout = list()
+        try:
+            async with conn:
+                for cmd in commands:
+                    result = await conn.run(cmd, check=True, timeout=command_timeout)
+                    stdout.append(str(result.stdout).strip())
+        except (OSError, asyncssh.Error, asyncio.TimeoutError) as e:
+            msg = f"Failed to run '{commands[len(stdout)]}': {str(e)}"
+            event_data["res"] = {"msg": msg, "failed": True}
+            return {"event": "runner_on_failed", "event_data": event_data}
+
+    event_data["res"] = {
+        "changed": False,
+        "stdout": stdout,
+        "stdout_lines": [output.splitlines() for output in stdout],
+    }
+    return {"event": "runner_on_ok", "event_data": event_data}
+
+
+async def run_commands_async(
+    targets: Dict[str, Dict[str, str]],
+    commands: List[str],
+    username: str,
+    password: str,
+    max_sessions: int = 500,
+    connect_timeout: int = 30,
+    command_timeout: int = 30,
+    known_hosts: Optional[str] = None,
+    host_key_checking: bool = True,
+) -> SSHRunner:
+    """
+    Run a list of commands on a set of devices concurrently.
+
+    Parameters
+    ----------
+    targets : dict
+        The devices to run the commands on. See 'get_hostgroup_targets'.
+    commands : list
+        The commands to run.
+    username : str
+        The username to login to the devices.
+    password : str
+        The password to login to the devices.
+    max_sessions : int, optional
+        The maximum number of concurrent SSH sessions. Defaults to 500.
+    connect_timeout : int, optional
+        The connection timeout, in seconds. Defaults to 30.
+    command_timeout : int, optional
+        The timeout for each command, in seconds. Defaults to 30.
+    known_hosts : str, optional
+        The path to the known_hosts file. See 'run_device_commands'.
+    host_key_checking : bool, optional
+        Whether to verify host keys. See 'run_device_commands'.
+
+    Returns
+    -------
+    runner : SSHRunner
+        The runner events for the devices.
+    """
+    sem = asyncio.Semaphore(max_sessions)
+    events = await asyncio.gather(
+        *(
+            run_device_commands(
+                device,
+                target["host"],
+                target["port"],
+                commands,
+                username,
+                password,
+                sem,
+                connect_timeout=connect_timeout,
+                command_timeout=command_timeout,
+                known_hosts=known_hosts,
+                host_key_checking=host_key_checking,
+            )
+            for device, target in targets.items()
+        )
+    )
+    return SSHRunner(list(events))
+
+
+def run_commands(
+    host_group: str,
+    commands: List[str],
+    username: str,
+    password: str,
+    private_data_dir: str,
+    max_sessions: int = 500,
+    connect_timeout: int = 30,
+    command_timeout: Optional[int] = None,
+    devices: Optional[List[str]] = None,
+    known_hosts: Optional[str] = None,
+    host_key_checking: bool = True,
+) -> SSHRunner:
+    """
+    Run a list of commands on the devices in a hostgroup.
+
+    Parameters
+    ----------
+    host_group : str
+        The inventory host group.
+    commands : list
+        The commands to run.
+    username : str
+        The username to login to the devices.
+    password : str
+        The password to login to the devices.
+    private_data_dir : str
+        The path to the Ansible private data directory.
+    max_sessions : int, optional
+        The maximum number of concurrent SSH sessions. Defaults to 500.
+    connect_timeout : int, optional
+        The connection timeout, in seconds. Defaults to 30.
+    command_timeout : int, optional
+        The timeout for each command, in seconds. Defaults to 30.
+    devices : list, optional
+        Only run the commands on these devices in the hostgroup. Defaults to
+        all of the devices.
+    known_hosts : str, optional
+        The path to the known_hosts file. See 'run_device_commands'.
+    host_key_checking : bool, optional
+        Whether to verify host keys. See 'run_device_commands'.
+
+    Returns
+    -------
+    runner : SSHRunner
+        The runner events for the devices.
+    """
+    targets = get_hostgroup_targets(host_group, private_data_dir)
+    if devices is not None:
+        targets = {k: v for k, v in targets.items() if k in devices}
+    print(f"Running {len(commands)} commands on {len(targets)} devices.")
+    return asyncio.run(
+        run_commands_async(
+            targets,
+            commands,
+            username,
+            password,
+            max_sessions=max_sessions,
+            connect_timeout=connect_timeout,
+            command_timeout=command_timeout or 30,
+            known_hosts=known_hosts,
+            host_key_checking=host_key_checking,
+        )
+    )
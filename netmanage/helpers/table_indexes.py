@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+"""
+Declarative index management for collector tables.
+
+Nearly every query against a collector table filters by 'timestamp', and
+most of them also filter by 'device'. Every collector table gets an index on
+(timestamp, device), or on (timestamp) if it does not have a 'device' column.
+Tables that are queried by other columns have additional indexes in
+'define_table_indexes'.
+
+'add_to_db' applies the indexes each time it writes to a table, and
+'backfill_table_indexes' adds them to the tables in an existing database.
+
+Examples
+--------
+>>> from netmanage.helpers import table_indexes as ti
+>>> ti.backfill_table_indexes(db_path)
+"""
+
+import re
+import sqlite3 as sl
+from netmanage.helpers import helpers as hp
+from typing import Dict, List
+
+
+def define_table_indexes() -> Dict[str, List[List[str]]]:
+    """
+    Return the additional indexes for collector tables.
+
+    Returns
+    -------
+    indexes : dict
+        A dictionary where each key is a table name, and each value is a
+        list of indexes. Each index is a list of columns.
+
+    Notes
+    -----
+    The default index on (timestamp, device) does not need to be listed
+    here. Indexes on columns that a table does not have are skipped.
+    """
+    return {
+        "INFOBLOX_GET_NETWORK_CONTAINERS": [["timestamp", "network_view"]],
+        "MERAKI_ORG_DEVICE_STATUSES": [["networkId", "timestamp"]],
+        "MERAKI_ORG_DEVICES": [["productType", "networkId"]],
+        "MERAKI_ORG_NETWORKS": [["timestamp", "organizationId"]],
+        "MERAKI_SWITCH_PORT_STATUSES": [
+            ["timestamp", "networkId"],
+            ["timestamp", "serial"],
+        ],
+        "NXOS_CAM_TABLE": [["timestamp", "device", "interface"]],
+        "NXOS_INTERFACE_DESCRIPTION": [["timestamp", "device", "interface"]],
+    }
+
+
+def get_table_indexes(table: str, columns: List[str]) -> List[List[str]]:
+    """
+    Return the indexes that a collector table should have.
+
+    Parameters
+    ----------
+    table : str
+        The table name.
+    columns : list
+        The columns in the table.
+
+    Returns
+    -------
+    indexes : list
+        A list of indexes. Each index is a list of columns.
+    """
+    indexes = list()
+    if "timestamp" in columns:
+        if "device" in columns:
+            indexes.append(["timestamp", "device"])
+        else:
+            indexes.append(["timestamp"])
+
+    for idx_cols in define_table_indexes().get(table.upper(), list()):
+        if all(c in columns for c in idx_cols) and idx_cols not in indexes:
+            indexes.append(idx_cols)
+
+    return indexes
+
+
+def get_index_name(table: str, idx_cols: List[str]) -> str:
+    """
+    Return the name of an index.
+
+    Parameters
+    ----------
+    table : str
+        The table name.
+    idx_cols : list
+        The columns in the index.
+
+    Returns
+    -------
+    name : str
+        The index name, such as 'idx_nxos_cam_table_timestamp_device'.
+    """
+    name = f"idx_{table}_{'_'.join(idx_cols)}".lower()
+    return re.sub(r"[^a-z0-9_]", "_", name)
+
+
+def create_table_indexes(con: sl.Connection, table: str) -> List[str]:
+    """
+    Create the indexes for a collector table, if they do not exist. ANALYZE
+    is run on the table if any indexes were created.
+
+    Parameters
+    ----------
+    con : sl.Connection
+        The connection to the database.
+    table : str
+        The table name.
+
+    Returns
+    -------
+    created : list
+        The names of the indexes that were created.
+    """
+    cur = con.cursor()
+    columns = [r[1] for r in cur.execute(f'PRAGMA table_info("{table}")')]
+
+    # Get the columns of the existing indexes. (Pandas creates an index on
+    # 'timestamp' when it creates a table, for example.)
+    existing = list()
+    for row in cur.execute(f'PRAGMA index_list("{table}")').fetchall():
+        info = cur.execute(f'PRAGMA index_info("{row[1]}")').fetchall()
+        existing.append([r[2] for r in sorted(info)])
+
+    created = list()
+    for idx_cols in get_table_indexes(table, columns):
+        if idx_cols in existing:
+            continue
+        idx_name = get_index_name(table, idx_cols)
+        fields = ", ".join([f'"{c}"' for c in idx_cols])
+        cur.execute(f'CREATE INDEX IF NOT EXISTS {idx_name} ON "{table}" ({fields})')
+        created.append(idx_name)
+
+    if created:
+        cur.execute(f'ANALYZE "{table}"')
+    con.commit()
+
+    return created
+
+
+def backfill_table_indexes(db_path: str) -> List[str]:
+    """
+    Create the indexes for every collector table in a database, then run
+    ANALYZE.
+
+    Internal tables (whose names start with '_'), normalized tables and
+    delta tables manage their own indexes, so they are skipped.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the database.
+
+    Returns
+    -------
+    created : list
+        The names of the indexes that were created.
+    """
+    created = list()
+    con = hp.connect_to_db(db_path)
+    for table in hp.get_database_tables(db_path):
+        if (
+            table.startswith("_")
+            or table.startswith("NORMALIZED_")
+            or table.endswith("_DELTA")
+        ):
+            continue
+        created.extend(create_table_indexes(con, table))
+    con.execute("ANALYZE")
+    con.close()
+    return created
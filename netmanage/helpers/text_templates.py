@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+
+"""
+Declarative templates for parsing tables out of CLI output.
+
+Many parsers loop over each line of a command's output, split it, and pick
+fields by position. That is slow for large outputs (like ARP and CAM tables
+with 100,000 lines), and each parser handles headers, blank lines and
+repeated headers differently. A template describes the table once, and
+'parse_output' applies it to the output of every device:
+
+- 'LineTemplate': One row for each line that matches a regular expression.
+  The named groups are the columns. The regex is applied to the whole output
+  at once, so it must use '[ \\t]' rather than '\\s' between fields, to avoid
+  matching across lines.
+- 'HeaderTemplate': Fixed-width tables. Each line is sliced at the positions
+  of the column labels in the header, so values can contain spaces (like
+  interface descriptions).
+- 'RecordTemplate': Multi-line records, such as 'show port-channel
+  database'. A regex marks the first line of each record, and other regexes
+  extract the fields from the record (similar to TextFSM's 'Record' action).
+
+The regexes are compiled once, when the template is created. Templates
+return their output as columns (a dictionary of lists), so 'parse_output'
+can build the DataFrame without creating a list for each row.
+
+Examples
+--------
+>>> from netmanage.helpers import text_templates as tt
+>>> template = tt.LineTemplate(r'^(?P<vlan>\\d+)[ \\t]+(?P<name>\\S+)')
+>>> df = tt.parse_output(runner, template)
+"""
+
+import pandas as pd
+import re
+from netmanage.helpers import command_records as cr
+from operator import itemgetter
+from typing import Dict, List, Optional, Pattern, Tuple, Union
+
+
+class LineTemplate:
+    """
+    A table where each row is a line that matches a regular expression.
+
+    Parameters
+    ----------
+    pattern : str
+        The regex for a row. Each named group is a column. Unnamed groups
+        are ignored. Named groups that do not match are empty strings.
+    flags : int, optional
+        Additional regex flags. re.MULTILINE is always set.
+    """
+
+    def __init__(self, pattern: str, flags: int = 0):
+        self.regex = re.compile(pattern, re.MULTILINE | flags)
+        self.columns = list(self.regex.groupindex)
+        self._indexes = [self.regex.groupindex[c] - 1 for c in self.columns]
+
+    def parse(self, text: str) -> Dict[str, list]:
+        """
+        Parse the output of a command.
+
+        Parameters
+        ----------
+        text : str
+            The output of the command.
+
+        Returns
+        -------
+        data : dict
+            A dictionary where each key is a column, and each value is the
+            list of values in that column.
+        """
+        matches = self.regex.findall(text)
+        if not matches:
+            return {c: list() for c in self.columns}
+        if self.regex.groups == 1:
+            return {self.columns[0]: matches}
+        return {
+            c: list(map(itemgetter(i), matches))
+            for c, i in zip(self.columns, self._indexes)
+        }
+
+
+class HeaderTemplate:
+    """
+    A fixed-width table, where each column starts at the position of its
+    label in the header.
+
+    Parameters
+    ----------
+    columns : dict
+        A dictionary where each key is a column label in the header, and
+        each value is the name of the column in the output. Use None for
+        columns that should be left out. The labels must be in the same
+        order as the header.
+    skip : str, optional
+        A regex for lines to ignore (E.g., separator lines). Blank lines and
+        lines that repeat the header are always ignored.
+    """
+
+    def __init__(self, columns: Dict[str, Optional[str]], skip: Optional[str] = None):
+        self.labels = list(columns)
+        self.names = list(columns.values())
+        self.columns = [c for c in self.names if c is not None]
+        self.skip = re.compile(skip) if skip else None
+
+    def find_positions(self, line: str) -> Optional[List[int]]:
+        """
+        Find the position of each label in a line.
+
+        Parameters
+        ----------
+        line : str
+            A line of output.
+
+        Returns
+        -------
+        positions : list or None
+            The position of each label, or None if the line is not the header.
+        """
+        positions = list()
+        start = 0
+        for label in self.labels:
+            pos = line.find(label, start)
+            if pos == -1:
+                return None
+            positions.append(pos)
+            start = pos + len(label)
+        return positions
+
+    def parse(self, text: str) -> Dict[str, list]:
+        """
+        Parse the output of a command.
+
+        Parameters
+        ----------
+        text : str
+            The output of the command.
+
+        Returns
+        -------
+        data : dict
+            A dictionary where each key is a column, and each value is the
+            list of values in that column.
+        """
+        data = {c: list() for c in self.columns}
+        lines = text.split("\n")
+
+        # Find the header
+        for i, line in enumerate(lines):
+            positions = self.find_positions(line)
+            if positions:
+                header = line.strip()
+                break
+        else:
+            return data
+
+        # Create the slices for the columns
+        slices = list()
+        for j, name in enumerate(self.names):
+            if name is not None:
+                end = positions[j + 1] if j + 1 < len(positions) else None
+                slices.append((data[name], positions[j], end))
+
+        for line in lines[i + 1:]:
+            stripped = line.strip()
+            if not stripped or stripped == header:
+                continue
+            if self.skip and self.skip.search(line):
+                continue
+            for values, start, end in slices:
+                values.append(line[start:end].strip())
+
+        return data
+
+
+class RecordTemplate:
+    """
+    A table where each row is a record that spans several lines.
+
+    Parameters
+    ----------
+    start : str
+        The regex for the start of a record. Each record continues until the
+        start of the next one. Named groups in the regex are columns.
+        re.MULTILINE is always set.
+    fields : dict, optional
+        A dictionary where each key is a column, and each value is a regex
+        (a string or a compiled pattern) with one group. The first match in
+        the record is used.
+    lists : dict, optional
+        A dictionary where each key is a column prefix, and each value is a
+        tuple of a regex with one group and the maximum number of values.
+        Every match in the record is used, and the values are stored in the
+        '<prefix>_1' to '<prefix>_<maximum>' columns.
+    default : any, optional
+        The value for fields that are not found. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        start: str,
+        fields: Optional[Dict[str, Union[str, Pattern]]] = None,
+        lists: Optional[Dict[str, Tuple[Union[str, Pattern], int]]] = None,
+        default=None,
+    ):
+        self.start = re.compile(start, re.MULTILINE)
+        self.fields = {k: re.compile(v) for k, v in (fields or dict()).items()}
+        self.lists = {
+            k: (re.compile(v[0]), v[1]) for k, v in (lists or dict()).items()
+        }
+        self.default = default
+
+        self.columns = list(self.start.groupindex) + list(self.fields)
+        for prefix, (_, maximum) in self.lists.items():
+            self.columns.extend(f"{prefix}_{n}" for n in range(1, maximum + 1))
+
+    def parse(self, text: str) -> Dict[str, list]:
+        """
+        Parse the output of a command.
+
+        Parameters
+        ----------
+        text : str
+            The output of the command.
+
+        Returns
+        -------
+        data : dict
+            A dictionary where each key is a column, and each value is the
+            list of values in that column.
+        """
+        data = {c: list() for c in self.columns}
+        default = self.default
+        starts = list(self.start.finditer(text))
+        ends = [m.start() for m in starts[1:]] + [len(text)]
+
+        # Look up the columns once, rather than for each record
+        start_cols = [(data[k], k) for k in self.start.groupindex]
+        field_cols = [(data[k], regex.search) for k, regex in self.fields.items()]
+        list_cols = [
+            (
+                [data[f"{prefix}_{n}"] for n in range(1, maximum + 1)],
+                regex.findall,
+                maximum,
+            )
+            for prefix, (regex, maximum) in self.lists.items()
+        ]
+
+        for match, end in zip(starts, ends):
+            record = text[match.start(): end]
+            for values, key in start_cols:
+                value = match.group(key)
+                values.append(default if value is None else value)
+            for values, search in field_cols:
+                found = search(record)
+                values.append(found.group(1) if found else default)
+            for columns, findall, maximum in list_cols:
+                found = findall(record)
+                for n, values in enumerate(columns):
+                    values.append(found[n] if n < len(found) else default)
+
+        return data
+
+
+def parse_output(
+    source, template, command: Optional[str] = None, device_col: str = "device"
+) -> pd.DataFrame:
+    """
+    Parse the output of a command on each device with a template.
+
+    Parameters
+    ----------
+    source : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
+    template : LineTemplate, HeaderTemplate or RecordTemplate
+        The template for the output.
+    command : str, optional
+        Only use the records for this command (see
+        'command_records.iter_command_output').
+    device_col : str, optional
+        The name of the device column. Defaults to 'device'.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        A DataFrame with the device column, followed by the template's
+        columns. The columns have the 'object' dtype, even if there are no
+        rows.
+    """
+    columns = [device_col] + template.columns
+    data = {c: list() for c in columns}
+    for device, text in cr.iter_command_output(source, command):
+        parsed = template.parse(text)
+        rows = len(parsed[template.columns[0]]) if template.columns else 0
+        data[device_col].extend([device] * rows)
+        for col in template.columns:
+            data[col].extend(parsed[col])
+    return pd.DataFrame(data, columns=columns, dtype=object)
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+
+"""
+Builds a physical topology graph from the CDP and LLDP neighbor tables.
+
+The graph is a NetworkX MultiGraph. Nodes are normalized hostnames, and each
+edge is a single link, keyed by the pair of interfaces it connects. This
+allows devices with more than one link between them (port-channel members,
+for example) to be represented accurately.
+
+The graph can be exported with 'neo4j_helpers.networkx_to_neo4j'.
+
+Examples
+--------
+>>> from netmanage.helpers import neo4j_helpers as nh
+>>> from netmanage.helpers import topology
+>>> G = topology.build_topology_graph(db_path)
+>>> # Later, after the collectors have run again
+>>> df_added, df_removed = topology.update_topology_graph(G, db_path)
+>>> nh.networkx_to_neo4j(G)
+"""
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from netmanage.helpers import helpers as hp
+from typing import Dict, Optional, Tuple
+
+
+def define_neighbor_sources() -> Dict[str, Dict]:
+    """
+    Return the tables and views that contain neighbor data.
+
+    Returns
+    -------
+    sources : dict
+        A dictionary where each key is a table name. Each value contains the
+        protocol, and either the mapping of the table's columns to the
+        topology columns ('columns'), or a query that returns the topology
+        columns ('query').
+
+    Notes
+    -----
+    If several columns of a table map to the same topology column, the first
+    one that is not NULL is used. The IOS CDP table has two shapes, because
+    'parse_cdp_neighbors' and 'ios_parse_cdp_neighbors' use different column
+    names.
+
+    Each table is read at its latest snapshot. A query must do the same with
+    its '?' parameters, which are all set to the timestamp. The Meraki query
+    reads the neighbors from 'MERAKI_CDP_LLDP_NEIGHBORS' instead of the
+    'meraki_neighbors' view, because the view does not have a timestamp, so
+    links that were removed would stay in the graph.
+    """
+    sources = {
+        "NXOS_CDP_NEIGHBORS": {
+            "protocol": "cdp",
+            "columns": {
+                "device": "local_device",
+                "intf_id": "local_interface",
+                "neighbor_device_id": "remote_device",
+                "port_id": "remote_interface",
+            },
+        },
+        "NXOS_LLDP_NEIGHBORS": {
+            "protocol": "lldp",
+            "columns": {
+                "device": "local_device",
+                "l_port_id": "local_interface",
+                "chassis_id": "remote_device",
+                "port_id": "remote_interface",
+            },
+        },
+        "IOS_CDP_NEIGHBORS": {
+            "protocol": "cdp",
+            "columns": {
+                "Device": "local_device",
+                # 'ios_parse_cdp_neighbors'
+                "Local Inf": "local_interface",
+                "Neighbor": "remote_device",
+                "Remote Inf": "remote_interface",
+                # 'parse_cdp_neighbors'
+                "Interface": "local_interface",
+                "Device ID": "remote_device",
+                "Port ID (outgoing port)": "remote_interface",
+            },
+        },
+        "MERAKI_CDP_LLDP_NEIGHBORS": {
+            "protocol": "meraki",
+            "query": """
+                SELECT d.name AS local_device,
+                       COALESCE(n.lldp_sourcePort, n.cdp_sourcePort)
+                           AS local_interface,
+                       COALESCE(n.lldpSystemName, n.cdpDeviceId)
+                           AS remote_device,
+                       COALESCE(n.lldpPortId, n.cdpPortId) AS remote_interface
+                FROM MERAKI_CDP_LLDP_NEIGHBORS n
+                JOIN MERAKI_ORG_DEVICES d
+                  ON n.sourceMac = d.mac
+                 AND d.timestamp = (SELECT MAX(timestamp)
+                                    FROM MERAKI_ORG_DEVICES
+                                    WHERE timestamp <= ?)
+                WHERE n.timestamp = (SELECT MAX(timestamp)
+                                     FROM MERAKI_CDP_LLDP_NEIGHBORS
+                                     WHERE timestamp <= ?)""",
+            "requires": ["MERAKI_ORG_DEVICES"],
+        },
+    }
+    return sources
+
+
+def define_interface_aliases() -> Dict[str, str]:
+    """
+    Return the mapping of lower-case interface prefixes to their full names.
+
+    Returns
+    -------
+    aliases : dict
+        A dictionary where the keys are lower-case interface prefixes (for
+        example, 'gi') and the values are the full interface names (for
+        example, 'GigabitEthernet').
+    """
+    aliases = {
+        "eth": "Ethernet",
+        "et": "Ethernet",
+        "ethernet": "Ethernet",
+        "fa": "FastEthernet",
+        "fastethernet": "FastEthernet",
+        "gi": "GigabitEthernet",
+        "gig": "GigabitEthernet",
+        "gigabitethernet": "GigabitEthernet",
+        "te": "TenGigabitEthernet",
+        "ten": "TenGigabitEthernet",
+        "tengigabitethernet": "TenGigabitEthernet",
+        "twe": "TwentyFiveGigE",
+        "twentyfivegige": "TwentyFiveGigE",
+        "fo": "FortyGigabitEthernet",
+        "fortygigabitethernet": "FortyGigabitEthernet",
+        "hu": "HundredGigE",
+        "hundredgige": "HundredGigE",
+        "mgmt": "mgmt",
+        "po": "Port-channel",
+        "port-channel": "Port-channel",
+    }
+    return aliases
+
+
+def normalize_hostnames(names: pd.Series) -> pd.Series:
+    """
+    Normalize a Series of hostnames so that both ends of a link match.
+
+    Serial numbers (e.g., 'switch1(FOX1234)') and domain names are removed
+    and the names are converted to lower-case. IP addresses are left as-is.
+
+    Parameters
+    ----------
+    names : pd.Series
+        The hostnames to normalize.
+
+    Returns
+    -------
+    names : pd.Series
+        The normalized hostnames.
+
+    Examples
+    --------
+    >>> names = pd.Series(['Switch1.example.com(FOX1234)', '10.0.0.1'])
+    >>> normalize_hostnames(names).to_list()
+    ['switch1', '10.0.0.1']
+    """
+    names = names.fillna("").astype(str).str.strip()
+    names = names.str.replace(r"\(.*\)$", "", regex=True)
+    is_ip = names.str.fullmatch(r"[\d.]+|[0-9a-fA-F:]*:[0-9a-fA-F:.]*")
+    short = names.str.split(".", n=1).str[0].str.lower()
+    return names.where(is_ip, short)
+
+
+def normalize_interfaces(interfaces: pd.Series) -> pd.Series:
+    """
+    Normalize a Series of interface names to their full names.
+
+    Parameters
+    ----------
+    interfaces : pd.Series
+        The interface names to normalize (e.g., 'Gi1/0/1' or 'Eth1/1').
+
+    Returns
+    -------
+    interfaces : pd.Series
+        The normalized interface names (e.g., 'GigabitEthernet1/0/1' or
+        'Ethernet1/1'). Names that do not start with a known prefix, such as
+        Meraki port numbers, are returned unchanged.
+    """
+    interfaces = interfaces.fillna("").astype(str).str.strip()
+    parts = interfaces.str.extract(r"^([A-Za-z-]+)\s*(\d.*)$")
+    prefix = parts[0].str.lower().map(define_interface_aliases())
+    return (prefix + parts[1]).fillna(interfaces)
+
+
+def read_neighbor_tables(
+    db_path: str, timestamp: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Read the neighbors from every neighbor table in the database.
+
+    Each table is read at its latest snapshot. If 'timestamp' is passed, then
+    each table is read at its latest snapshot taken on or before that time.
+    Tables that have not been created yet are skipped.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the database.
+    timestamp : str, optional
+        The timestamp in YYYY-MM-DD_hhmm format. Defaults to None, which
+        reads the latest snapshot of each table.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        A DataFrame with the columns 'local_device', 'local_interface',
+        'remote_device', 'remote_interface', 'protocol' and 'source'.
+    """
+    existing = set(hp.get_database_tables(db_path))
+    cols = ["local_device", "local_interface", "remote_device", "remote_interface"]
+
+    con = hp.connect_to_db(db_path)
+    frames = list()
+    for source, params in define_neighbor_sources().items():
+        if source not in existing or not existing.issuperset(
+            params.get("requires", list())
+        ):
+            continue
+
+        if "query" in params:
+            query = params["query"]
+        else:
+            # Only select the columns that the table has. SQLite reads an
+            # unknown double-quoted column name as a string.
+            table_cols = set(
+                r[1] for r in con.execute(f'PRAGMA table_info("{source}")')
+            )
+            select = list()
+            for col in cols:
+                names = [
+                    f'"{k}"'
+                    for k, v in params["columns"].items()
+                    if v == col and k in table_cols
+                ]
+                if names:
+                    select.append(f"COALESCE({', '.join(names + ['NULL'])}) AS {col}")
+            if len(select) < len(cols):
+                print(f"Skipping {source}, which does not have neighbor columns.")
+                continue
+            query = f"""SELECT {', '.join(select)} FROM "{source}"
+                        WHERE timestamp = (SELECT MAX(timestamp) FROM "{source}"
+                                           WHERE timestamp <= ?)"""
+
+        args = [timestamp or "9999"] * query.count("?")
+        df = pd.read_sql(query, con, params=args)
+        df["protocol"] = params["protocol"]
+        df["source"] = source
+        frames.append(df)
+    con.close()
+
+    if not frames:
+        return pd.DataFrame(columns=cols + ["protocol", "source"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_edges(df_neighbors: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalize and de-duplicate the links in a DataFrame of neighbors.
+
+    A link is usually reported by both of the devices on it, and often by
+    both CDP and LLDP. The ends of each link are ordered so that 'device_a'
+    is the lower of the two hostnames, then the duplicates are dropped. The
+    protocols that reported the link are kept in the 'protocols' column.
+
+    Parameters
+    ----------
+    df_neighbors : pd.DataFrame
+        The output of 'read_neighbor_tables'.
+
+    Returns
+    -------
+    df_edges : pd.DataFrame
+        A DataFrame with the columns 'device_a', 'interface_a', 'device_b',
+        'interface_b', 'key' and 'protocols'.
+    """
+    local_dev = normalize_hostnames(df_neighbors["local_device"])
+    remote_dev = normalize_hostnames(df_neighbors["remote_device"])
+    local_inf = normalize_interfaces(df_neighbors["local_interface"])
+    remote_inf = normalize_interfaces(df_neighbors["remote_interface"])
+
+    # Order the ends of each link so that both directions produce the same
+    # row.
+    swap = (local_dev > remote_dev) | (
+        (local_dev == remote_dev) & (local_inf > remote_inf)
+    )
+    df_edges = pd.DataFrame(
+        {
+            "device_a": np.where(swap, remote_dev, local_dev),
+            "interface_a": np.where(swap, remote_inf, local_inf),
+            "device_b": np.where(swap, local_dev, remote_dev),
+            "interface_b": np.where(swap, local_inf, remote_inf),
+            "protocol": df_neighbors["protocol"].to_numpy(),
+        }
+    )
+    df_edges = df_edges[(df_edges["device_a"] != "") & (df_edges["device_b"] != "")]
+
+    df_edges = (
+        df_edges.drop_duplicates()
+        .groupby(["device_a", "interface_a", "device_b", "interface_b"], sort=False)[
+            "protocol"
+        ]
+        .agg(lambda x: ",".join(sorted(x)))
+        .reset_index()
+        .rename(columns={"protocol": "protocols"})
+    )
+    df_edges["key"] = df_edges["interface_a"] + "|" + df_edges["interface_b"]
+
+    return df_edges[
+        ["device_a", "interface_a", "device_b", "interface_b", "key", "protocols"]
+    ]
+
+
+def build_topology_graph(
+    db_path: str, timestamp: Optional[str] = None
+) -> nx.MultiGraph:
+    """
+    Build the physical topology graph from the neighbor tables.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the database.
+    timestamp : str, optional
+        The timestamp in YYYY-MM-DD_hhmm format. Defaults to None, which
+        uses the latest snapshot of each table.
+
+    Returns
+    -------
+    G : nx.MultiGraph
+        The topology graph. Each edge has the attributes 'interface_a',
+        'interface_b' and 'protocols', where 'interface_a' belongs to the
+        lower of the two hostnames.
+    """
+    G = nx.MultiGraph()
+    update_topology_graph(G, db_path, timestamp=timestamp)
+    return G
+
+
+def update_topology_graph(
+    G: nx.MultiGraph, db_path: str, timestamp: Optional[str] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Update a topology graph in place with the latest neighbor data.
+
+    Only the links that were added or removed since the last update are
+    changed, instead of rebuilding the graph. Nodes that no longer have any
+    links are removed.
+
+    Parameters
+    ----------
+    G : nx.MultiGraph
+        The graph to update (usually the output of 'build_topology_graph').
+    db_path : str
+        The path to the database.
+    timestamp : str, optional
+        The timestamp in YYYY-MM-DD_hhmm format. Defaults to None, which
+        uses the latest snapshot of each table.
+
+    Returns
+    -------
+    df_added : pd.DataFrame
+        The links that were added to the graph.
+    df_removed : pd.DataFrame
+        The links that were removed from the graph.
+    """
+    df_new = build_edges(read_neighbor_tables(db_path, timestamp=timestamp))
+
+    cols = ["device_a", "device_b", "key"]
+    df_old = pd.DataFrame(
+        [
+            (min(u, v), max(u, v), k, d.get("protocols"))
+            for u, v, k, d in G.edges(keys=True, data=True)
+        ],
+        columns=cols + ["protocols"],
+    )
+
+    df_merged = df_new.merge(
+        df_old, on=cols, how="outer", indicator=True, suffixes=("", "_old")
+    )
+    added = (df_merged["_merge"] == "left_only") | (
+        (df_merged["_merge"] == "both")
+        & (df_merged["protocols"] != df_merged["protocols_old"])
+    )
+    df_added = df_merged.loc[added, df_new.columns]
+    df_removed = df_merged.loc[df_merged["_merge"] == "right_only", cols]
+
+    G.remove_edges_from(df_removed.itertuples(index=False, name=None))
+    G.add_edges_from(
+        (a, b, k, {"interface_a": ia, "interface_b": ib, "protocols": p})
+        for a, ia, b, ib, k, p in df_added.itertuples(index=False, name=None)
+    )
+    G.remove_nodes_from([n for n in list(G.nodes) if G.degree(n) == 0])
+    G.graph["timestamp"] = timestamp or hp.set_db_timestamp()
+
+    return df_added.reset_index(drop=True), df_removed.reset_index(drop=True)
+
+
+def to_adjacency_arrays(G: nx.MultiGraph) -> Tuple[np.ndarray, np.ndarray, list]:
+    """
+    Convert a topology graph into compact CSR-style adjacency arrays.
+
+    Parameters
+    ----------
+    G : nx.MultiGraph
+        The topology graph.
+
+    Returns
+    -------
+    indptr : np.ndarray
+        The offsets into 'indices' for each node. The neighbors of node 'i'
+        are 'indices[indptr[i]:indptr[i + 1]]'.
+    indices : np.ndarray
+        The neighbor node positions.
+    nodes : list
+        The node names, in the order used by 'indptr' and 'indices'.
+    """
+    nodes = list(G.nodes)
+    pos = {n: i for i, n in enumerate(nodes)}
+    edges = np.array(
+        [(pos[u], pos[v]) for u, v in G.edges()], dtype=np.int64
+    ).reshape(-1, 2)
+    # Each link is stored in both directions.
+    src = np.concatenate([edges[:, 0], edges[:, 1]])
+    dst = np.concatenate([edges[:, 1], edges[:, 0]])
+    order = np.argsort(src, kind="stable")
+    indices = dst[order]
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=len(nodes)), out=indptr[1:])
+    return indptr, indices, nodes
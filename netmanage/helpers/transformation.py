@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import re
 from typing import Callable, Dict, List, Tuple, Union, Any
@@ -6,13 +7,18 @@ from typing import Callable, Dict, List, Tuple, Union, Any
 Provides utilities for transforming data based on a predefined schema.
 
 Functions:
+- compile_schema: Compiles a table's schema into column-level operations.
 - get_function_mapping: Returns a mapping between function names and functions.
 - get_mapping_schema: Provides the schema used for data transformation.
+- get_vectorized_function_mapping: Returns the column-level versions of the
+  schema functions.
 - seconds_to_ios_format: Converts seconds into an IOS-like BGP timer format.
+- seconds_to_ios_format_column: Column-level version of seconds_to_ios_format.
 - set_column_order: Sets the desired column order for DataFrames.
 - split_domain: Splits a device name into device and domain parts.
 - split_ip_port: Splits an IP address and its port.
 - standardize_timestamp: Standardizes the timestamp format.
+- standardize_timestamp_column: Column-level version of standardize_timestamp.
 - transform_dataframe: Transforms a DataFrame using the provided schema.
 - transform_dataframe_row: Transforms a DataFrame row based on the schema.
 - transform_row: Transforms a row of data based on the given schema.
@@ -41,6 +47,29 @@ def get_function_mapping() -> Dict[str, Callable]:
     }
 
 
+def get_vectorized_function_mapping() -> Dict[Callable, Callable]:
+    """
+    Return a dictionary mapping the schema functions to their column-level
+    versions.
+
+    Returns
+    -------
+    dict
+        A dictionary where keys are the functions returned by
+        get_function_mapping, and values are functions that accept and
+        return a pd.Series.
+
+    Notes
+    -----
+    Functions that are not in this mapping are applied to each value in the
+    column with pd.Series.map.
+    """
+    return {
+        standardize_timestamp: standardize_timestamp_column,
+        seconds_to_ios_format: seconds_to_ios_format_column
+    }
+
+
 def get_mapping_schema() -> Dict[str, Dict[str, Union[str, Dict[str, Any]]]]:
     """
     Return the mapping schema for data transformation.
@@ -317,6 +346,89 @@ def get_mapping_schema() -> Dict[str, Dict[str, Union[str, Dict[str, Any]]]]:
             'vm-mode': 'vm_mode',
             'global-protect-clientless-vpn-release-date':
                 'global_protect_clientless_vpn_release_date'
+        },
+        # INTERFACE IP ADDRESSES
+        'ASA_INTERFACE_IP_ADDRESSES': {
+            'timestamp': {
+                'function': {
+                    'name': 'standardize_timestamp',
+                    'args': []
+                }
+            },
+            'device': 'device',
+            'interface': 'interface_name',
+            'ip': 'ip_address',
+            'nameif': 'nameif',
+            'subnet': 'subnet',
+            'network_ip': 'network_ip',
+            'broadcast_ip': 'broadcast_ip'
+        },
+        'IOS_INTERFACE_IP_ADDRESSES': {
+            'timestamp': {
+                'function': {
+                    'name': 'standardize_timestamp',
+                    'args': []
+                }
+            },
+            'device': 'device',
+            'interface': 'interface_name',
+            'description': 'description',
+            'ip': 'ip_address',
+            'cidr': 'cidr',
+            'vrf': 'vrf',
+            'subnet': 'subnet',
+            'network_ip': 'network_ip',
+            'broadcast_ip': 'broadcast_ip'
+        },
+        'IOS_INTERFACE_IPV6_ADDRESSES': {
+            'timestamp': {
+                'function': {
+                    'name': 'standardize_timestamp',
+                    'args': []
+                }
+            },
+            'device': 'device',
+            'interface': 'interface_name',
+            'ip': 'ip_address',
+            'cidr': 'cidr',
+            'vrf': 'vrf',
+            'subnet': 'subnet',
+            'network_ip': 'network_ip',
+            'broadcast_ip': 'broadcast_ip'
+        },
+        'NXOS_INTERFACE_IP_ADDRESSES': {
+            'timestamp': {
+                'function': {
+                    'name': 'standardize_timestamp',
+                    'args': []
+                }
+            },
+            'device': 'device',
+            'interface': 'interface_name',
+            'ip': 'ip_address',
+            'cidr': 'cidr',
+            'vrf': 'vrf',
+            'subnet': 'subnet',
+            'network_ip': 'network_ip',
+            'broadcast_ip': 'broadcast_ip'
+        },
+        'PANOS_INTERFACE_IP_ADDRESSES': {
+            'timestamp': {
+                'function': {
+                    'name': 'standardize_timestamp',
+                    'args': []
+                }
+            },
+            'device': 'device',
+            'name': 'interface_name',
+            'zone': 'zone',
+            'fwd': 'vrf',
+            'vsys': 'vsys',
+            'ip': 'ip_address',
+            'cidr': 'cidr',
+            'subnet': 'subnet',
+            'network_ip': 'network_ip',
+            'broadcast_ip': 'broadcast_ip'
         }
     }
 
@@ -358,6 +470,47 @@ def seconds_to_ios_format(seconds: int) -> Union[str, None]:
         return f"up for {weeks}w{days}d{hours}h"
 
 
+def seconds_to_ios_format_column(seconds: pd.Series) -> pd.Series:
+    """
+    Convert a column of durations in seconds to an IOS-like BGP timer format.
+
+    Parameters
+    ----------
+    seconds : pd.Series
+        Durations in seconds.
+
+    Returns
+    -------
+    pd.Series
+        The formatted durations. See seconds_to_ios_format.
+    """
+    seconds = seconds.astype(int).to_numpy()
+    weeks, remainder = np.divmod(seconds, 7 * 24 * 60 * 60)
+    days, remainder = np.divmod(remainder, 24 * 60 * 60)
+    hours = remainder // (60 * 60)
+
+    w = pd.Series(weeks).astype(str)
+    d = pd.Series(days).astype(str)
+    h = pd.Series(hours).astype(str)
+    conditions = [
+        seconds == 0,
+        (weeks > 0) & (days > 0) & (hours == 0),
+        (weeks > 0) & (days == 0) & (hours == 0),
+        (weeks == 0) & (days > 0) & (hours > 0),
+        (weeks == 0) & (days > 0) & (hours == 0),
+    ]
+    choices = [
+        None,
+        "up for " + w + "w" + d + "d",
+        "up for " + w + "w",
+        "up for " + d + "d" + h + "h",
+        "up for " + d + "d",
+    ]
+    result = np.select(conditions, choices,
+                       default="up for " + w + "w" + d + "d" + h + "h")
+    return pd.Series(result, dtype=object)
+
+
 def set_column_order(table_name: str) -> List:
     """
     Defines the desired column order for DataFrames.
@@ -478,6 +631,79 @@ def standardize_timestamp(timestamp: str) -> str:
     return f"{date_part} {formatted_time}"
 
 
+def standardize_timestamp_column(timestamps: pd.Series) -> pd.Series:
+    """
+    Convert a column of timestamps from 'YYYY-MM-DD_HHMM' to
+    'YYYY-MM-DD HH:MM:SS'.
+
+    Parameters
+    ----------
+    timestamps : pd.Series
+        The input timestamps in the format 'YYYY-MM-DD_HHMM'.
+
+    Returns
+    -------
+    pd.Series
+        The standardized timestamps in the format 'YYYY-MM-DD HH:MM:SS'.
+    """
+    parts = timestamps.astype(str).str.split('_', n=1, expand=True)
+    time_part = parts[1]
+    return (parts[0] + ' ' + time_part.str[:2] + ':' + time_part.str[2:]
+            + ':00')
+
+
+def compile_schema(table_name: str,
+                   schema: Dict[str, Dict[str, Union[str, Dict[str, Any]]]],
+                   function_mapping: Dict[str, Callable]) \
+        -> List[Tuple[str, str, Any]]:
+    """
+    Compile the schema for a table into a list of column-level operations.
+
+    Parameters
+    ----------
+    table_name : str
+        The table name as defined in the mapping_schema.
+    schema : Dict[str, Dict[str, Union[str, Dict[str, Any]]]]
+        The mapping schema to be used for transformation.
+    function_mapping : Dict[str, Callable]
+        Dictionary mapping function names in the schema to actual functions.
+
+    Returns
+    -------
+    List[Tuple[str, str, Any]]
+        A list of (operation, source column, argument) tuples, in schema
+        order. The operations are 'ip_port' and 'rename' (the argument is the
+        new column name), 'function' (the argument is a function that accepts
+        and returns a pd.Series) and 'split' (the argument is the pair of new
+        column names).
+    """
+    vectorized = get_vectorized_function_mapping()
+    operations = list()
+
+    for key, value in schema[table_name].items():
+        if value in ["remote_address", "local_address"]:
+            operations.append(('ip_port', key, value))
+
+        elif type(value) is str:
+            operations.append(('rename', key, value))
+
+        elif 'function' in value:
+            function_name = value['function']['name']
+            if function_name in function_mapping:
+                func = function_mapping[function_name]
+                if func in vectorized:
+                    operations.append(('function', key, vectorized[func]))
+                else:
+                    operations.append(
+                        ('function', key,
+                         lambda col, func=func: col.map(func)))
+
+        elif 'split' in value:
+            operations.append(('split', key, tuple(value['split'])))
+
+    return operations
+
+
 def transform_dataframe(df: pd.DataFrame,
                         table_name: str,
                         schema: Dict[str,
@@ -486,6 +712,10 @@ def transform_dataframe(df: pd.DataFrame,
     """
     Transform an entire DataFrame based on the provided mapping schema.
 
+    The schema for the table is compiled into column-level operations, so the
+    transformation is applied to whole columns at once rather than row by
+    row.
+
     Parameters
     ----------
     df : pd.DataFrame
@@ -502,15 +732,45 @@ def transform_dataframe(df: pd.DataFrame,
     pd.DataFrame
         A DataFrame containing the transformed data.
     """
-    # Apply the row transformation to every row in the DataFrame
-    transformed_data = df.apply(lambda row: transform_row(table_name,
-                                                          row,
-                                                          schema,
-                                                          function_mapping),
-                                axis=1)
-
-    # Convert the Series of dictionaries to a DataFrame
-    transformed_df = pd.DataFrame(list(transformed_data))
+    operations = compile_schema(table_name, schema, function_mapping)
+
+    df = df.reset_index(drop=True)
+    columns: Dict[str, Any] = {}
+
+    for operation, key, arg in operations:
+        if key not in df.columns:
+            continue
+        col = df[key]
+
+        # Handle IP:port columns. Only values that contain ':' are split.
+        if operation == 'ip_port':
+            has_colon = col.astype(str).str.contains(':', regex=False)
+            parts = col[has_colon].astype(str).str.extract(
+                r'^(?P<ip>.*):(?P<port>\d+)$')
+            matched = parts['port'].notna()
+            ip = col.astype(object).copy()
+            ip[matched[matched].index] = parts.loc[matched, 'ip']
+            columns[arg] = ip
+            if matched.any():
+                port = pd.Series(np.nan, index=col.index, dtype=object)
+                port[matched[matched].index] = parts.loc[matched, 'port']
+                columns[arg + '_port'] = port
+
+        # Handle direct mapping
+        elif operation == 'rename':
+            columns[arg] = col
+
+        # Handle function transformation
+        elif operation == 'function':
+            columns[key] = pd.Series(arg(col).to_numpy(), index=col.index)
+
+        # Handle domain split
+        elif operation == 'split':
+            parts = col.str.split('.', n=1, expand=True)
+            columns[arg[0]] = parts[0]
+            columns[arg[1]] = parts[1].fillna('') if 1 in parts else ''
+
+    transformed_df = pd.DataFrame(columns, index=df.index)
 
     # Reorder the columns based on the desired order
     desired_order = set_column_order(table_name)
@@ -2,6 +2,8 @@
 
 import pandas as pd
 
+from netmanage.helpers import columnar as cb
+from netmanage.helpers import command_records as cr
 from netmanage.helpers import helpers as hp
 
 
@@ -11,8 +13,8 @@ def asa_parse_interface_ips(runner: dict) -> pd.DataFrame:
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner generator.
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
@@ -21,43 +23,38 @@ def asa_parse_interface_ips(runner: dict) -> pd.DataFrame:
     """
     # Parse the results
     df_data = list()
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-
-            device = event_data["remote_addr"]
-
-            output = event_data["res"]["stdout"][0].split("\n")
-
-            output = [_.strip("\t") for _ in output]
-
-            output = [
-                _
-                for _ in output
-                if _.split()[0] == "Interface"
-                or " ".join(_.split()[:2]) == "IP address"
-            ]
-
-            counter = 0
-            for line in output:
-                counter += 1
-                line = line.split(",")
-                if line[0].split()[0] == "Interface" and '"' in line[0].split()[-1]:
-                    inf = line[0].split()[1]
-                    nameif = line[0].split()[2].strip('"')
-
-                    _line = output[counter]
-                    if "unassigned" in _line:
-                        ip = "unassigned"
-                        netmask = "unassigned"
-                    else:
-                        ip = _line.split(",")[0].split()[-1]
-                        netmask = _line.split(",")[-1].split()[-1]
-                        cidr = hp.convert_mask_to_cidr(netmask)
-                        ip = f"{ip}/{cidr}"
-
-                    row = [device, inf, ip, nameif]
-                    df_data.append(row)
+    for device, text in cr.iter_command_output(runner):
+        output = text.split("\n")
+
+        output = [_.strip("\t") for _ in output]
+
+        output = [
+            _
+            for _ in output
+            if _.split()[0] == "Interface"
+            or " ".join(_.split()[:2]) == "IP address"
+        ]
+
+        counter = 0
+        for line in output:
+            counter += 1
+            line = line.split(",")
+            if line[0].split()[0] == "Interface" and '"' in line[0].split()[-1]:
+                inf = line[0].split()[1]
+                nameif = line[0].split()[2].strip('"')
+
+                _line = output[counter]
+                if "unassigned" in _line:
+                    ip = "unassigned"
+                    netmask = "unassigned"
+                else:
+                    ip = _line.split(",")[0].split()[-1]
+                    netmask = _line.split(",")[-1].split()[-1]
+                    cidr = hp.convert_mask_to_cidr(netmask)
+                    ip = f"{ip}/{cidr}"
+
+                row = [device, inf, ip, nameif]
+                df_data.append(row)
     # Create a dataframe from df_data and return it
     cols = ["device", "interface", "ip", "nameif"]
     df = pd.DataFrame(data=df_data, columns=cols)
@@ -81,17 +78,14 @@ def asa_parse_inventory(runner: dict) -> pd.DataFrame:
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner generator.
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
     df : pd.DataFrame
         A DataFrame containing the inventory data.
     """
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
     # Create a dictionary to store the inventory data.
     columns = ["device", "name", "description", "pid", "vid", "serial"]
     df_data = dict()
@@ -99,38 +93,33 @@ def asa_parse_inventory(runner: dict) -> pd.DataFrame:
         df_data[col] = list()
 
     # Parse the output and add it to 'df_data'
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-
-            device = event_data["remote_addr"]
-
-            data = event_data["res"]["stdout"][0].split("\n")
-
-            # Iterate through data (each hardware entry has 3 lines).
-            for i in range(0, len(data), 3):
-                df_data["device"].append(device)
-                # Split the first line to extract name and description
-                name_desc = data[i].split(", DESCR: ")
-                df_data["name"].append(
-                    name_desc[0]
-                    .replace('NAME: "', "")
-                    .replace("Name: ", "")
-                    .replace('"', "")
-                    .strip()
-                )
-                df_data["description"].append(name_desc[1].replace('"', "").strip())
-
-                # Split the second line to extract PID, VID and SN
-                pid_vid_sn = data[i + 1].split(", ")
-                df_data["pid"].append(pid_vid_sn[0].replace("PID: ", "").strip())
-                df_data["vid"].append(pid_vid_sn[1].replace("VID: ", "").strip())
-
-                # If SN value is "SN:", replace with an empty string.
-                sn_value = pid_vid_sn[2].replace("SN: ", "").strip()
-                if sn_value == "SN:":
-                    sn_value = ""
-                df_data["serial"].append(sn_value)
+    for device, text in cr.iter_command_output(runner):
+        data = text.split("\n")
+
+        # Iterate through data (each hardware entry has 3 lines).
+        for i in range(0, len(data), 3):
+            df_data["device"].append(device)
+            # Split the first line to extract name and description
+            name_desc = data[i].split(", DESCR: ")
+            df_data["name"].append(
+                name_desc[0]
+                .replace('NAME: "', "")
+                .replace("Name: ", "")
+                .replace('"', "")
+                .strip()
+            )
+            df_data["description"].append(name_desc[1].replace('"', "").strip())
+
+            # Split the second line to extract PID, VID and SN
+            pid_vid_sn = data[i + 1].split(", ")
+            df_data["pid"].append(pid_vid_sn[0].replace("PID: ", "").strip())
+            df_data["vid"].append(pid_vid_sn[1].replace("VID: ", "").strip())
+
+            # If SN value is "SN:", replace with an empty string.
+            sn_value = pid_vid_sn[2].replace("SN: ", "").strip()
+            if sn_value == "SN:":
+                sn_value = ""
+            df_data["serial"].append(sn_value)
 
     # Create the DataFrame and return it.
     df = pd.DataFrame(df_data)
@@ -153,25 +142,14 @@ def asa_parse_gather_basic_facts(results: dict) -> pd.DataFrame:
     df : pd.DataFrame
         A DataFrame containing the facts.
     """
-    # Create a dictionary to store the parsed data.
-    df_data = dict()
-    df_data["device"] = list()
-
-    # Create keys for df_data.
+    # Add the facts for each device. Devices that do not return a fact get
+    # None for it.
+    builder = cb.ColumnBuilder(["device"])
     for key, value in results.items():
-        for k in value:
-            if not df_data.get(k):
-                df_data[k] = list()
-
-    # Populate df_data.
-    for key, value in results.items():
-        df_data["device"].append(key)
-        for key in df_data:
-            if key != "device":
-                df_data[key].append(value.get(key))
+        builder.add(value, device=key)
 
     # Create the DataFrame and return it.
-    df = pd.DataFrame(df_data)
+    df = builder.to_frame()
     df = df.astype(str)
 
     return df
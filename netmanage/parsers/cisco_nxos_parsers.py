@@ -4,7 +4,11 @@ import ipaddress
 import pandas as pd
 import re
 
+from netmanage.helpers import columnar as cb
+from netmanage.helpers import command_records as cr
 from netmanage.helpers import helpers as hp
+from netmanage.helpers import nxos_json as nxj
+from netmanage.helpers import text_templates as tt
 
 
 def nxos_diff_running_config(runner: dict) -> pd.DataFrame:
@@ -13,8 +17,8 @@ def nxos_diff_running_config(runner: dict) -> pd.DataFrame:
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
@@ -22,21 +26,13 @@ def nxos_diff_running_config(runner: dict) -> pd.DataFrame:
         The diff.
     """
 
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
     df_data = list()
 
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-
-            device = event_data["remote_addr"]
+    for device, text in cr.iter_command_output(runner):
+        output = text.split("\n")[3:]
 
-            output = event_data["res"]["stdout"][0].split("\n")[3:]
-
-            for line in output:
-                df_data.append([device, line])
+        for line in output:
+            df_data.append([device, line])
 
     # Create the dataframe and return it
     cols = ["device", "diff"]
@@ -45,6 +41,22 @@ def nxos_diff_running_config(runner: dict) -> pd.DataFrame:
     return df_diff
 
 
+NXOS_ARP_TABLE = tt.LineTemplate(
+    r"^[ \t]*(?P<ip_address>\d{1,3}(?:\.\d{1,3}){3})[ \t]+(?P<age>\S+)"
+    r"[ \t]+(?P<mac_address>\S+)[ \t]+(?P<interface>\S+)"
+)
+
+NXOS_ARP_TABLE_JSON = nxj.JsonTable(
+    ["vrf", "adj"],
+    {
+        "ip-addr-out": "ip_address",
+        "time-stamp": "age",
+        "mac": "mac_address",
+        "intf-out": "interface",
+    },
+)
+
+
 def nxos_parse_arp_table(runner: dict, nm_path: str) -> pd.DataFrame:
     """
     Parse the ARP table for Cisco NXOS devices and retrieve the OUI (vendor)
@@ -53,8 +65,8 @@ def nxos_parse_arp_table(runner: dict, nm_path: str) -> pd.DataFrame:
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
     nm_path : str
         The path to the Net-Manage repository.
 
@@ -63,53 +75,18 @@ def nxos_parse_arp_table(runner: dict, nm_path: str) -> pd.DataFrame:
     df_arp : pd.DataFrame
         The ARP table as a pandas DataFrame.
     """
-
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
-    # Parse the output and add it to 'data'
-    df_data = list()
-
-    # Create a list of mac addresses (used for querying the vendor)
-    macs = list()
-
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-
-            device = event_data["remote_addr"]
-
-            output = event_data["res"]["stdout"][0].split("\n")
-
-            # Parse the output and add it to 'df_data'
-            for line in output[1:]:
-                line = line.split()
-                address = line[0]
-                age = line[1]
-                mac = line[2]
-                inf = line[3]
-                macs.append(mac)
-                row = [device, address, age, mac, inf]
-                # Perform a reverse DNS lookup if requested
-                # TODO: Convert this to a standalone function
-                # if reverse_dns:
-                #     try:
-                #         rdns = socket.getnameinfo((address, 0), 0)[0]
-                #     except Exception:
-                #         rdns = 'unknown'
-                #     row.append(rdns)
-                df_data.append(row)
-
-    cols = ["device", "ip_address", "age", "mac_address", "interface"]
+    # Parse the output of 'show ip arp vrf all | json'. For devices that do
+    # not support it, lines that do not start with an IP address (like the
+    # header) are ignored.
+    df_arp = nxj.parse_output(runner, NXOS_ARP_TABLE_JSON, NXOS_ARP_TABLE)
 
     # TODO: Convert this to a standalone function
     # if reverse_dns:
-    #     cols.append('reverse_dns')
-
-    df_arp = pd.DataFrame(data=df_data, columns=cols)
+    #     df_arp['reverse_dns'] = [socket.getnameinfo((_, 0), 0)[0]
+    #                              for _ in df_arp['ip_address']]
 
     # Find the vendrs and add them to the dataframe
-    df_vendors = hp.find_mac_vendors(macs, nm_path)
+    df_vendors = hp.find_mac_vendors(df_arp["mac_address"], nm_path)
     df_arp["vendor"] = df_vendors["vendor"]
 
     return df_arp
@@ -121,48 +98,30 @@ def nxos_parse_cdp_neighbors(runner: dict) -> pd.DataFrame:
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
     df : pd.DataFrame
         The CDP neighbors as a pandas DataFrame.
     """
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
     data = dict()
 
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-            device = event_data["remote_addr"]
-            output = event_data["res"]["stdout"][0]
-            data[device] = output["TABLE_cdp_neighbor_brief_info"][
-                "ROW_cdp_neighbor_brief_info"
-            ]
-
-    # Get a list of all possible keys. This accounts for devices that do not
-    # return the same keys.
-    df_data = {"device": list()}
-    for key, value in data.items():
-        for item in value:
-            for k in item:
-                if not df_data.get(k):
-                    df_data[k] = list()
+    for device, text in cr.iter_command_output(runner):
+        output = cr.load_json(text)
+        data[device] = output["TABLE_cdp_neighbor_brief_info"][
+            "ROW_cdp_neighbor_brief_info"
+        ]
 
-    # Iterate over 'data', populating 'df_data'.
-    keys = list(df_data.keys())
+    # Iterate over 'data', populating 'builder'. This accounts for devices
+    # that do not return the same keys.
+    builder = cb.ColumnBuilder(["device"])
     for key, value in data.items():
-        for item in value:
-            df_data["device"].append(key)
-            for k in keys:
-                if k != "device":
-                    df_data[k].append(item.get(k))
+        builder.add_many(value, device=key)
 
     # Create the dataframe, and rename the 'device_id' column
-    df = pd.DataFrame(df_data)
+    df = builder.to_frame()
     df.rename(columns={"device_id": "neighbor_device_id"}, inplace=True)
 
     # Add additional columns for parsed data in the 'neighbor_device_id' column
@@ -223,27 +182,9 @@ def nxos_parse_facts(runner: dict) -> dict:
     return facts
 
 
-def nxos_parse_fexes_table(runner: dict, nm_path: str) -> pd.DataFrame:
-    """
-    Parse the FEXes for Cisco 5Ks. This function is required for gathering
-    interface data on devices with a large number of FEXes, as it helps
-    prevent timeouts.
-
-    Parameters
-    ----------
-    runner : dict
-        An Ansible runner genrator
-    nm_path : str
-        The path to the Net-Manage repository.
-
-    Returns
-    -------
-    df : pd.DataFrame
-        The FEXes of the device. If there are no FEXes, an empty DataFrame
-        will be returned.
-    """
-    # Define regular expressions to match each line
-    regex_patterns = {
+NXOS_FEXES_TABLE = tt.RecordTemplate(
+    r"FEX:",
+    fields={
         "fex": r"FEX: (\d+)",
         "description": r"Description: ([\w-]+)",
         "state": r"state: (\w+)",
@@ -267,71 +208,40 @@ def nxos_parse_fexes_table(runner: dict, nm_path: str) -> pd.DataFrame:
             r"Fabric port for control traffic: (\w+/\d+)",
         "fcoe_oper": r"FCoE Oper: (\w+)",
         "fcoe_fex_aa_configured": r"FCoE FEX AA Configured: (\w+)",
-    }
-
-    # Updated regex pattern to handle multiple 'Fabric interface state' values
-    fabric_interface_pattern = r"Fabric interface state:(.+?)(?=Fex Port|Logs|$)"
-
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
-    # Create a dictionary to store FEX data from devices.
-    device_fexes = dict()
+        # A FEX can have multiple 'Fabric interface state' values
+        "fabric_interface_state": re.compile(
+            r"Fabric interface state:(.+?)(?=Fex Port|Logs|$)", re.DOTALL
+        ),
+    },
+)
 
-    df = pd.DataFrame()
-
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-
-            device = event_data["remote_addr"]
-            device_fexes[device] = list()
-
-            data = event_data["res"]["stdout"][0]
-
-            # Split the data into chunks for each FEX
-            fex_chunks = [
-                f"FEX:{chunk}"
-                for chunk in re.split(r"FEX:", data)
-                if chunk.strip() != ""
-            ]
-
-            all_parsed_data = []
-
-            for chunk in fex_chunks:
-                # Parse the main data of each FEX
-                parsed_data = {}
-                for key, pattern in regex_patterns.items():
-                    match = re.search(pattern, chunk)
-                    if match:
-                        parsed_data[key] = match.group(1)
-                    else:
-                        parsed_data[key] = None
-
-                # Extract fabric interface state
-                fabric_interface_state_match = re.search(
-                    fabric_interface_pattern, chunk, re.DOTALL
-                )
-                if fabric_interface_state_match:
-                    parsed_data["fabric_interface_state"] = (
-                        fabric_interface_state_match.group(1)
-                        .strip()
-                        .replace("\n", "; ")
-                    )
-                else:
-                    parsed_data["fabric_interface_state"] = None
 
-                all_parsed_data.append(parsed_data)
+def nxos_parse_fexes_table(runner: dict, nm_path: str) -> pd.DataFrame:
+    """
+    Parse the FEXes for Cisco 5Ks. This function is required for gathering
+    interface data on devices with a large number of FEXes, as it helps
+    prevent timeouts.
 
-            # Convert to dataframe
-            df_multi_fex = pd.DataFrame(all_parsed_data)
-            df_multi_fex["device"] = device
+    Parameters
+    ----------
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
+    nm_path : str
+        The path to the Net-Manage repository.
 
-            # Reorder the columns to make 'device' the first column
-            column_order = ["device"] + [col for col in df_multi_fex if col != "device"]
-            df_multi_fex = df_multi_fex[column_order]
+    Returns
+    -------
+    df : pd.DataFrame
+        The FEXes of the device. If there are no FEXes, an empty DataFrame
+        will be returned.
+    """
+    # Each record starts at 'FEX:' and ends at the start of the next FEX
+    df = tt.parse_output(runner, NXOS_FEXES_TABLE)
 
-            df = pd.concat([df_multi_fex, df], ignore_index=True)
+    # Put the fabric interface states on one line
+    df["fabric_interface_state"] = (
+        df["fabric_interface_state"].str.strip().str.replace("\n", "; ")
+    )
 
     return df
 
@@ -342,8 +252,8 @@ def nxos_parse_bgp_neighbors(runner: dict) -> pd.DataFrame:
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
@@ -351,9 +261,6 @@ def nxos_parse_bgp_neighbors(runner: dict) -> pd.DataFrame:
         The BGP neighbors as a pandas DataFrame.
     """
 
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
     # Necessary to keep from exceeding 80-character line length
     address = ipaddress.ip_address
 
@@ -362,41 +269,38 @@ def nxos_parse_bgp_neighbors(runner: dict) -> pd.DataFrame:
 
     df_data = list()
 
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-            device = event_data["remote_addr"]
-            output = event_data["res"]["stdout"][0].split("\n")
-            for line in output:
-                if phrase in line:
-                    vrf = line.split(",")[0].split()[-1]
-                    pos = output.index(line) + 1
-                    if pos < len(output):
-                        while phrase not in output[pos]:
-                            try:
-                                if address(output[pos].split()[0]):
-                                    row = output[pos].split()
-                                    df_data.append(
-                                        [
-                                            device,
-                                            vrf,
-                                            row[0],
-                                            row[1],
-                                            row[2],
-                                            row[3],
-                                            row[4],
-                                            row[5],
-                                            row[6],
-                                            row[7],
-                                            row[8],
-                                            row[9],
-                                        ]
-                                    )
-                            except Exception:
-                                pass
-                            pos += 1
-                            if pos == len(output):
-                                break
+    for device, text in cr.iter_command_output(runner):
+        output = text.split("\n")
+        for line in output:
+            if phrase in line:
+                vrf = line.split(",")[0].split()[-1]
+                pos = output.index(line) + 1
+                if pos < len(output):
+                    while phrase not in output[pos]:
+                        try:
+                            if address(output[pos].split()[0]):
+                                row = output[pos].split()
+                                df_data.append(
+                                    [
+                                        device,
+                                        vrf,
+                                        row[0],
+                                        row[1],
+                                        row[2],
+                                        row[3],
+                                        row[4],
+                                        row[5],
+                                        row[6],
+                                        row[7],
+                                        row[8],
+                                        row[9],
+                                    ]
+                                )
+                        except Exception:
+                            pass
+                        pos += 1
+                        if pos == len(output):
+                            break
 
     # Create dataframe and return it
     cols = [
@@ -417,14 +321,27 @@ def nxos_parse_bgp_neighbors(runner: dict) -> pd.DataFrame:
     return df_bgp
 
 
+NXOS_CAM_TABLE = tt.LineTemplate(
+    r"^[^\S\n]*\S*[ \t]+(?P<vlan>\S+)[ \t]+"
+    r"(?P<mac>[a-zA-Z0-9]{4}\.[a-zA-Z0-9]{4}\.[a-zA-Z0-9]{4})"
+    r"[^\n]*?(?P<interface>\S+)[ \t]*$"
+)
+
+NXOS_CAM_TABLE_JSON = nxj.JsonTable(
+    ["mac_address"],
+    {"disp_port": "interface", "disp_mac_addr": "mac", "disp_vlan": "vlan"},
+    converters={"interface": nxj.abbreviate_interface},
+)
+
+
 def nxos_parse_cam_table(runner: dict, nm_path: str) -> pd.DataFrame:
     """
     Parse the CAM table for NXOS devices and add the vendor OUI.
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
     nm_path : str
         The path to the Net-Manage repository.
 
@@ -433,42 +350,15 @@ def nxos_parse_cam_table(runner: dict, nm_path: str) -> pd.DataFrame:
     df_cam : pd.DataFrame
         The CAM table and vendor OUI as a pandas DataFrame.
     """
-
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
-    # Define the RegEx pattern for a valid MAC address
-    # pattern = '([0-9a-f]{4}\.[0-9a-f]{4}\.[0-9a-f]{4})'
-    pattern = ".*[a-zA-Z0-9]{4}\\.[a-zA-Z0-9]{4}\\.[a-zA-Z0-9]{4}.*"
-
-    # Create a list to store MAC addresses
-    addresses = list()
-
-    # Parse the output and add it to 'data'
-    df_data = list()
-
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-
-            device = event_data["remote_addr"]
-
-            output = event_data["res"]["stdout"][0]
-
-            output = re.findall(pattern, output)
-            for line in output:
-                mac = line.split()[2]
-                interface = line.split()[-1]
-                vlan = line.split()[1]
-                df_data.append([device, interface, mac, vlan])
-
-    # Create the dataframe and return it
-    cols = ["device", "interface", "mac", "vlan"]
-    df_cam = pd.DataFrame(data=df_data, columns=cols)
+    # Parse the output of 'show mac address-table | json'. For devices that do
+    # not support it, parse the lines that contain a MAC address. The first
+    # column is the entry's flag (E.g., '*'), and the last column is the
+    # interface.
+    df_cam = nxj.parse_output(runner, NXOS_CAM_TABLE_JSON, NXOS_CAM_TABLE)
+    df_cam = df_cam[["device", "interface", "mac", "vlan"]]
 
     # Get the OUIs and add them to df_cam
-    addresses = df_cam["mac"].to_list()
-    df_vendors = hp.find_mac_vendors(addresses, nm_path)
+    df_vendors = hp.find_mac_vendors(df_cam["mac"], nm_path)
     df_cam["vendor"] = df_vendors["vendor"]
 
     # Return df_cam
@@ -481,8 +371,8 @@ def nxos_parse_hostname(runner: dict) -> pd.DataFrame:
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
@@ -490,23 +380,15 @@ def nxos_parse_hostname(runner: dict) -> pd.DataFrame:
         The hostname as a pandas DataFrame.
     """
 
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
     df_data = dict()
     df_data["device"] = list()
     df_data["hostname"] = list()
 
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-
-            device = event_data["remote_addr"]
+    for device, text in cr.iter_command_output(runner):
+        output = text
 
-            output = event_data["res"]["stdout"][0]
-
-            df_data["device"].append(device)
-            df_data["hostname"].append(output)
+        df_data["device"].append(device)
+        df_data["hostname"].append(output)
 
     # Create the dataframe and return it
     df_name = pd.DataFrame.from_dict(df_data)
@@ -514,14 +396,21 @@ def nxos_parse_hostname(runner: dict) -> pd.DataFrame:
     return df_name
 
 
+NXOS_INTERFACE_DESCRIPTIONS_JSON = nxj.JsonTable(
+    ["interface"],
+    {"interface": "interface", "desc": "description"},
+    converters={"interface": nxj.abbreviate_interface},
+)
+
+
 def nxos_parse_interface_descriptions(runner: dict) -> pd.DataFrame:
     """
     Parse NXOS interface descriptions.
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
@@ -529,29 +418,32 @@ def nxos_parse_interface_descriptions(runner: dict) -> pd.DataFrame:
         The interface descriptions as a pandas DataFrame.
     """
 
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
     # Create a list to store the rows for the dataframe
     df_data = list()
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-
-            device = event_data["remote_addr"]
-
-            output = event_data["res"]["stdout"][0].split("\n")
-            output = list(filter(None, output))
-            # NXOS does not have consistent column widths. Therefore, we must
-            # re-index the position of the 'Description' column every time it
-            # occurs.
-            for _ in output:
-                if ("Port" in _ or "Interface" in _) and "Description" in _:
-                    pos = _.index("Description")
-                else:
-                    inf = _.split()[0]
-                    desc = _[pos:].strip()
-                    df_data.append([device, inf, desc])
+    for device, text in cr.iter_command_output(runner):
+        # Parse the output of 'show interface description | json'
+        if cr.is_json(text):
+            parsed = NXOS_INTERFACE_DESCRIPTIONS_JSON.parse(text)
+            df_data.extend(
+                [device, inf, desc]
+                for inf, desc in zip(
+                    parsed["interface"], parsed["description"]
+                )
+            )
+            continue
+
+        output = text.split("\n")
+        output = list(filter(None, output))
+        # NXOS does not have consistent column widths. Therefore, we must
+        # re-index the position of the 'Description' column every time it
+        # occurs.
+        for _ in output:
+            if ("Port" in _ or "Interface" in _) and "Description" in _:
+                pos = _.index("Description")
+            else:
+                inf = _.split()[0]
+                desc = _[pos:].strip()
+                df_data.append([device, inf, desc])
 
     # Create the dataframe and return it
     cols = ["device", "interface", "description"]
@@ -565,8 +457,8 @@ def nxos_parse_interface_ips(runner: dict) -> pd.DataFrame:
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
@@ -575,34 +467,26 @@ def nxos_parse_interface_ips(runner: dict) -> pd.DataFrame:
         addresses.
     """
 
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
     # Parse the results
     df_data = list()
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-
-            device = event_data["remote_addr"]
-
-            output = event_data["res"]["stdout"][0].split("\n")
-
-            counter = 0
-            for line in output:
-                if "IP Interface Status for VRF" in line:
-                    vrf = line.split()[-1].strip('"')
-
-                if "IP address:" in line:
-                    pos = counter
-                    inf = output[pos - 1].split(",")[0]
-                    ip = line.split(",")[0].split()[-1]
-                    subnet = line.split(",")[1].split()[2].split("/")[-1]
-                    ip = f"{ip}/{subnet}"
-                    row = [device, inf, ip, vrf]
-                    df_data.append(row)
+    for device, text in cr.iter_command_output(runner):
+        output = text.split("\n")
+
+        counter = 0
+        for line in output:
+            if "IP Interface Status for VRF" in line:
+                vrf = line.split()[-1].strip('"')
+
+            if "IP address:" in line:
+                pos = counter
+                inf = output[pos - 1].split(",")[0]
+                ip = line.split(",")[0].split()[-1]
+                subnet = line.split(",")[1].split()[2].split("/")[-1]
+                ip = f"{ip}/{subnet}"
+                row = [device, inf, ip, vrf]
+                df_data.append(row)
 
-                counter += 1
+            counter += 1
 
     # Create a dataframe from df_data and return it
     cols = ["device", "interface", "ip", "vrf"]
@@ -637,63 +521,53 @@ def nxos_parse_interface_ips(runner: dict) -> pd.DataFrame:
     return df
 
 
+NXOS_INTERFACE_STATUS = tt.HeaderTemplate(
+    {
+        "Port": "interface",
+        "Name": None,
+        "Status": "status",
+        "Vlan": "vlan",
+        "Duplex": "duplex",
+        "Speed": "speed",
+        "Type": "type",
+    }
+)
+
+NXOS_INTERFACE_STATUS_JSON = nxj.JsonTable(
+    ["interface"],
+    {
+        "interface": "interface",
+        "state": "status",
+        "vlan": "vlan",
+        "duplex": "duplex",
+        "speed": "speed",
+        "type": "type",
+    },
+    converters={"interface": nxj.abbreviate_interface},
+)
+
+
 def nxos_parse_interface_status(runner: dict) -> pd.DataFrame:
     """
     Parse the interface status for NXOS devices.
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
     df_inf_status : pd.DataFrame
         The interface statuses as a pandas DataFrame.
     """
-
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
-    # Parse the output and add it to 'data'
-    df_data = list()
-
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-
-            device = event_data["remote_addr"]
-
-            output = event_data["res"]["stdout"][0].split("\n")
-            output = list(filter(None, output))
-
-            # Get the positions of the header columns (except Port and Name)
-            header = output[0]
-            pos_status = header.index("Status")
-            pos_vlan = header.index("Vlan")
-            pos_duplex = header.index("Duplex")
-            pos_speed = header.index("Speed")
-            pos_type = header.index("Type")
-
-            # Remove lines that repeat the header
-            output = [_ for _ in output if "Port" not in _ and "type" not in _]
-
-            # Parse the output and add it to 'df_data'
-            for line in output[1:]:
-                inf = line.split()[0]
-                status = line[pos_status:pos_vlan]
-                vlan = line[pos_vlan:pos_duplex]
-                duplex = line[pos_duplex:pos_speed]
-                speed = line[pos_speed:pos_type]
-                inf_type = line[pos_type:]
-                row = [device, inf, status, vlan, duplex, speed, inf_type]
-                row = [_.strip() for _ in row]
-                df_data.append(row)
-
-    # Create the dataframe and return it
-    cols = ["device", "interface", "status", "vlan", "duplex", "speed", "type"]
-
-    df_inf_status = pd.DataFrame(data=df_data, columns=cols)
+    # Parse the output of 'show interface status | json'. For devices that do
+    # not support it, the columns are sliced at the positions of the labels in
+    # the header, since the 'Name' column can contain spaces. Lines that
+    # repeat the header are ignored.
+    df_inf_status = nxj.parse_output(
+        runner, NXOS_INTERFACE_STATUS_JSON, NXOS_INTERFACE_STATUS
+    )
 
     return df_inf_status
 
@@ -807,8 +681,8 @@ def nxos_parse_inventory(runner: dict) -> pd.DataFrame:
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
@@ -817,40 +691,17 @@ def nxos_parse_inventory(runner: dict) -> pd.DataFrame:
         command.
     """
 
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
-    # Create a list for holding the inventory items
-    data = list()
-
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-            device = event_data["remote_addr"]
+    # Create a builder for holding the inventory items
+    builder = cb.ColumnBuilder()
 
-            output = event_data["res"]["stdout"][0]["TABLE_inv"]["ROW_inv"]
+    for device, text in cr.iter_command_output(runner):
+        output = cr.load_json(text)["TABLE_inv"]["ROW_inv"]
 
-            # Add the inventory items to the 'data' list
-            for item in output:
-                item["device"] = device
-                data.append(item)
-
-    # Create a dictionary for storing the output
-    df_data = dict()
-
-    # Create the dictionary keys
-    for item in data:
-        for key in item:
-            if not df_data.get(key):
-                df_data[key] = list()
-
-    # Add the inventory items to 'df_data'
-    for item in data:
-        for key in df_data:
-            df_data[key].append(item.get(key))
+        # Add the inventory items to the builder
+        builder.add_many(output, device=device)
 
     # Create and return the dataframe
-    df_inventory = pd.DataFrame.from_dict(df_data)
+    df_inventory = builder.to_frame()
 
     return df_inventory
 
@@ -861,45 +712,27 @@ def nxos_parse_lldp_neighbors(runner: dict) -> pd.DataFrame:
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
     df : pd.DataFrame
         The LLDP neighbors as a pandas DataFrame.
     """
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
     data = dict()
 
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-            device = event_data["remote_addr"]
-            output = event_data["res"]["stdout"][0]
-            data[device] = output["TABLE_nbor"]["ROW_nbor"]
-
-    # Get a list of all possible keys. This accounts for devices that do not
-    # return the same keys.
-    df_data = {"device": list()}
-    for key, value in data.items():
-        for item in value:
-            for k in item:
-                if not df_data.get(k):
-                    df_data[k] = list()
+    for device, text in cr.iter_command_output(runner):
+        output = cr.load_json(text)
+        data[device] = output["TABLE_nbor"]["ROW_nbor"]
 
-    # Iterate over 'data', populating 'df_data'.
-    keys = list(df_data.keys())
+    # Iterate over 'data', populating 'builder'. This accounts for devices
+    # that do not return the same keys.
+    builder = cb.ColumnBuilder(["device"])
     for key, value in data.items():
-        for item in value:
-            df_data["device"].append(key)
-            for k in keys:
-                if k != "device":
-                    df_data[k].append(item.get(k))
+        builder.add_many(value, device=key)
 
-    return pd.DataFrame(df_data).astype(str)
+    return builder.to_frame().astype(str)
 
 
 def nxos_parse_logs(runner: dict) -> pd.DataFrame:
@@ -908,8 +741,8 @@ def nxos_parse_logs(runner: dict) -> pd.DataFrame:
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
@@ -917,24 +750,16 @@ def nxos_parse_logs(runner: dict) -> pd.DataFrame:
         The latest log messages as a pandas DataFrame.
     """
 
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
     # Parse the output and add it to 'data'
     df_data = list()
 
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
+    for device, text in cr.iter_command_output(runner):
+        output = text.split("\n")
 
-            device = event_data["remote_addr"]
-
-            output = event_data["res"]["stdout"][0].split("\n")
-
-            for line in output:
-                _time = line[:21].strip()
-                _msg = line[21:].strip()
-                df_data.append([device, _time, _msg])
+        for line in output:
+            _time = line[:21].strip()
+            _msg = line[21:].strip()
+            df_data.append([device, _time, _msg])
 
     # Create the dataframe and return it
     cols = ["device", "time", "message"]
@@ -959,30 +784,56 @@ def nxos_parse_gather_basic_facts(results: dict) -> pd.DataFrame:
     df : pd.DataFrame
         A DataFrame containing the facts.
     """
-    # Create a dictionary to store the parsed data.
-    df_data = dict()
-    df_data["device"] = list()
-
-    # Create keys for df_data.
-    for key, value in results.items():
-        for k in value:
-            if not df_data.get(k):
-                df_data[k] = list()
-
-    # Populate df_data.
+    # Add the facts for each device. Devices that do not return a fact get
+    # None for it.
+    builder = cb.ColumnBuilder(["device"])
     for key, value in results.items():
-        df_data["device"].append(key)
-        for key in df_data:
-            if key != "device":
-                df_data[key].append(value.get(key))
+        builder.add(value, device=key)
 
     # Create the DataFrame and return it.
-    df = pd.DataFrame(df_data)
+    df = builder.to_frame()
     df = df.astype(str)
 
     return df
 
 
+NXOS_PORT_CHANNEL_DATA = tt.RecordTemplate(
+    r"^(?P<interface>port-channel\S*)",
+    fields={
+        "total_ports": r"(\d+) ports? in total",
+        "up_ports": r"(\d+) ports? up",
+        "age": r"Age of the port-channel is (\S+)",
+        "first_operational_port": r"First operational port is (\S+)",
+        "last_bundled_member": r"Last bundled member is (\S+)",
+        "last_unbundled_member": r"Last unbundled member is (\S+)",
+    },
+    # Member ports are the lines that contain the port's flags (E.g., '[on]')
+    lists={
+        "port": (
+            re.compile(
+                r"^(?:[ \t]*Ports:)?[ \t]*(\S[^\n]*\][^\n]*?)[ \t]*$", re.M
+            ),
+            8,
+        ),
+    },
+    default=str(),
+)
+
+NXOS_PORT_CHANNEL_DATA_JSON = nxj.JsonTable(
+    ["interface"],
+    {
+        "interface": "interface",
+        "total-ports": "total_ports",
+        "up-ports": "up_ports",
+        "port-channel-age": "age",
+        "first-oper-port": "first_operational_port",
+        "last-bundled-member": "last_bundled_member",
+        "last-unbundled-member": "last_unbundled_member",
+    },
+    lists={"port": ("member", "port", 8)},
+)
+
+
 def nxos_parse_port_channel_data(runner: dict) -> pd.DataFrame:
     """
     Parse port-channel data (output from 'show port-channel database')
@@ -990,18 +841,16 @@ def nxos_parse_port_channel_data(runner: dict) -> pd.DataFrame:
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
     df_po_data : pd.DataFrame
-        The port-channel data as a pandas DataFrame.
+        The port-channel data as a pandas DataFrame. Only the first 8 member
+        ports are included.
     """
 
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
     # Define the dataframe columns
     cols = [
         "device",
@@ -1022,109 +871,43 @@ def nxos_parse_port_channel_data(runner: dict) -> pd.DataFrame:
         "last_unbundled_member",
     ]
 
-    # Create a dictionary to store the data for creating the dataframe
-    df_data = dict()
-    for c in cols:
-        df_data[c] = list()
-
-    # Parse the output and add it to 'data'
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-
-            device = event_data["remote_addr"]
-
-            output = event_data["res"]["stdout"][0].split("\n")
+    # Parse the output of 'show port-channel database | json'. For devices
+    # that do not support it, each record starts with the 'port-channel' line,
+    # and ends at the start of the next one
+    df_po_data = nxj.parse_output(
+        runner, NXOS_PORT_CHANNEL_DATA_JSON, NXOS_PORT_CHANNEL_DATA
+    )
 
-            # output.append(str())  # For finding the end of database entries
-            output = [_ for _ in output if _ != "Legend:"]
-            output = [_ for _ in output if '"*":' not in _]
-
-            # TODO: Re-write this using regex to 1) make it more concise, and
-            # 2) avoid iterating over 'output' twice
-
-            # Create a list to store database entries
-            entries = list()
-
-            pos = 0
-            for line in output:
-                if line[:12] == "port-channel":
-                    interface = line
-                    entry = [interface, device]
-                    counter = pos + 1
-                    while output[counter][:4] == "    ":
-                        entry.append(output[counter])
-                        counter += 1
-                        if counter == len(output):
-                            break
-                    entries.append(entry)
-                pos += 1
-
-            for entry in entries:
-                entry = [_.strip() for _ in entry]
-                interface = entry[0]
-                device = entry[1]
-                # Create a counter for tracking port numbers
-                counter = 0
-                # Create an 8-element list of empty strings for ports
-                ports = list()
-                for i in range(1, 9):
-                    ports.append(str())
-                # Define empty strings for vars that might not exist
-                total_ports = str()
-                up_ports = str()
-                first_op_port = str()
-                last_bundled = str()
-                last_unbundled = str()
-                age = str()
-                for line in entry[2:]:
-                    if "ports in total" in line:
-                        total_ports = line.split()[0]
-                        up_ports = line.split(",")[-1].split()[0]
-                    if "First operational" in line:
-                        first_op_port = line.split()[-1]
-                    if "Last bundled" in line:
-                        last_bundled = line.split()[-1]
-                    if "Last unbundled" in line:
-                        last_unbundled = line.split()[-1]
-                    if "Age of the" in line:
-                        age = line.split()[-1]
-                    if "]" in line:
-                        port = line.split("Ports:")[-1].strip()
-                        ports[counter] = port
-                        counter += 1
-
-                # Fill in ports list with ports that exist
-                port_num = 1
-                for p in ports:
-                    key = f"port_{str(port_num)}"
-                    df_data[key].append(p)
-                    port_num += 1
-                # Add remaining variables to df_data
-                df_data["interface"].append(interface)
-                df_data["device"].append(device)
-                df_data["total_ports"].append(total_ports)
-                df_data["up_ports"].append(up_ports)
-                df_data["age"].append(age)
-                df_data["first_operational_port"].append(first_op_port)
-                df_data["last_bundled_member"].append(last_bundled)
-                df_data["last_unbundled_member"].append(last_unbundled)
-
-    df_po_data = pd.DataFrame.from_dict(df_data)
     # Set dataframe columns to desired order (from 'cols' list)
     df_po_data = df_po_data[cols]
 
     return df_po_data
 
 
+NXOS_VLAN_DB = tt.HeaderTemplate(
+    {"VLAN": "id", "Name": "name", "Status": "status", "Ports": "ports"}
+)
+
+NXOS_VLAN_DB_JSON = nxj.JsonTable(
+    ["vlanbriefxbrief"],
+    {
+        "vlanshowbr-vlanid-utf": "id",
+        "vlanshowbr-vlanname": "name",
+        "vlanshowbr-vlanstate": "status",
+        "vlanshowplist-ifidx": "ports",
+    },
+    converters={"ports": nxj.format_port_list},
+)
+
+
 def nxos_parse_vlan_db(runner: dict) -> pd.DataFrame:
     """
     Parse the VLAN database for NXOS devices.
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
@@ -1132,36 +915,63 @@ def nxos_parse_vlan_db(runner: dict) -> pd.DataFrame:
         The VLAN database as a pandas DataFrame.
     """
 
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
-    # Parse the output and add it to 'data'
-    df_data = list()
-
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-
-            device = event_data["remote_addr"]
-
-            output = event_data["res"]["stdout"][0].split("\n")
-
-            # Get the position of "Ports" column
-            pos = output[0].index("Ports")
-
-            for line in output[1:]:
-                v_id = line.split()[0]
-                name = line.split()[1]
-                status = line.split()[2]
-                ports = line[pos:].strip()
-                df_data.append([device, v_id, name, status, ports])
+    # Parse the output of 'show vlan brief | json'. For devices that do not
+    # support it, the columns are sliced at the positions of the labels in the
+    # header.
+    df_vlans = nxj.parse_output(runner, NXOS_VLAN_DB_JSON, NXOS_VLAN_DB)
 
-    # Create the dataframe and return it
-    cols = ["device", "id", "name", "status", "ports"]
+    return df_vlans
 
-    df_vlans = pd.DataFrame(data=df_data, columns=cols)
 
-    return df_vlans
+# The keys in the output of 'show vpc brief | json', and the labels that are
+# used for them in the text output.
+NXOS_VPC_STATE_KEYS = {
+    "vpc-domain-id": "vPC domain id",
+    "vpc-peer-status": "Peer status",
+    "vpc-peer-keepalive-status": "vPC keep-alive status",
+    "vpc-peer-consistency-status": "Configuration consistency status",
+    "vpc-per-vlan-peer-consistency": "Per-vlan consistency status",
+    "vpc-type-2-consistency-status": "Type-2 consistency status",
+    "vpc-role": "vPC role",
+    "num-of-vpcs": "Number of vPCs configured",
+    "peer-gateway": "Peer Gateway",
+    "dual-active-excluded-vlans": "Dual-active excluded VLANs",
+    "vpc-graceful-consistency-check-status": "Graceful Consistency Check",
+    "vpc-auto-recovery-status": "Auto-recovery status",
+    "vpc-delay-restore-status": "Delay-restore status",
+    "vpc-delay-restore-svi-status": "Delay-restore SVI status",
+    "operational-l3-peer-router": "Operational Layer3 Peer-router",
+}
+
+# The values in the output of 'show vpc brief | json' that are worded
+# differently in the text output. Other values are the same in both.
+NXOS_VPC_STATE_VALUES = {
+    "vpc-peer-status": {
+        "peer-ok": "peer adjacency formed ok",
+        "peer-not-ok": "peer adjacency not formed yet",
+    },
+    "vpc-peer-keepalive-status": {
+        "peer-alive": "peer is alive",
+        "peer-not-alive": "peer is not reachable through peer-keepalive",
+    },
+    "vpc-peer-consistency-status": {
+        "SUCCESS": "success",
+        "FAILED": "failed",
+    },
+    "vpc-per-vlan-peer-consistency": {
+        "consistent": "success",
+        "inconsistent": "failed",
+    },
+    "vpc-type-2-consistency-status": {
+        "SUCCESS": "success",
+        "FAILED": "failed",
+    },
+    "peer-gateway": {"1": "Enabled", "0": "Disabled"},
+    "vpc-graceful-consistency-check-status": {
+        "enabled": "Enabled",
+        "disabled": "Disabled",
+    },
+}
 
 
 def nxos_parse_vpc_state(runner: dict) -> pd.DataFrame:
@@ -1170,8 +980,8 @@ def nxos_parse_vpc_state(runner: dict) -> pd.DataFrame:
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
@@ -1179,40 +989,38 @@ def nxos_parse_vpc_state(runner: dict) -> pd.DataFrame:
         The VPC state information as a pandas DataFrame.
     """
 
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
-    # Parse the output and add it to 'data'
-    data = dict()
-
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-            device = event_data["remote_addr"]
-            output = event_data["res"]["stdout"][0].split("\n")
-
-            # Remove empty lines
-            output = list(filter(None, output))
-            # Remove 'vPC Peer-link status'
-            output = [_ for _ in output if _ != "vPC Peer-link status"]
+    # Parse the output and add it to 'builder'
+    builder = cb.ColumnBuilder(["device"])
+
+    for device, text in cr.iter_command_output(runner):
+        # Parse the output of 'show vpc brief | json', using the same column
+        # names and values as the text output
+        if cr.is_json(text):
+            output = cr.load_json(text)
+            state = {
+                label: NXOS_VPC_STATE_VALUES.get(key, dict()).get(
+                    str(output[key]), output[key]
+                )
+                for key, label in NXOS_VPC_STATE_KEYS.items()
+                if key in output
+            }
+            builder.add(state, device=device)
+            continue
 
-            data[device] = dict()
-            data[device]["device"] = device
-            for line in output:
-                col_name = line.split(":")[0].strip()
-                data[device][col_name] = line.split(":")[1].strip()
+        output = text.split("\n")
 
-    df_data = dict()
-    df_data["device"] = list()
-    for key in data:
-        for k in data[key]:
-            df_data[k] = list()
+        # Remove empty lines
+        output = list(filter(None, output))
+        # Remove 'vPC Peer-link status'
+        output = [_ for _ in output if _ != "vPC Peer-link status"]
 
-    for device in data:
-        for key in df_data:
-            df_data[key].append(data[device].get(key))
+        state = dict()
+        for line in output:
+            col_name = line.split(":")[0].strip()
+            state[col_name] = line.split(":")[1].strip()
+        builder.add(state, device=device)
 
-    df_vpc_state = pd.DataFrame.from_dict(df_data)
+    df_vpc_state = builder.to_frame()
 
     return df_vpc_state
 
@@ -1223,8 +1031,8 @@ def nxos_parse_vrfs(runner: dict) -> pd.DataFrame:
 
     Parameters
     ----------
-    runner : dict
-        An Ansible runner genrator
+    runner : ansible_runner.Runner or iterable
+        An Ansible runner, or an iterable of (device, command, text) records.
 
     Returns
     -------
@@ -1232,62 +1040,54 @@ def nxos_parse_vrfs(runner: dict) -> pd.DataFrame:
         A DataFrame containing the VRFs.
     """
 
-    if runner is None or runner.events is None:
-        raise ValueError("The input is None or empty")
-
     # Parse the output and add it to 'data'
     df_data = list()
 
-    for event in runner.events:
-        if event["event"] == "runner_on_ok":
-            event_data = event["event_data"]
-
-            device = event_data["remote_addr"]
-
-            output = event_data["res"]["stdout"][0].split("\n")
-
-            # Pre-define variables, since not all VRFs contain all parameters
-            name = str()
-            vrf_id = str()
-            state = str()
-            description = str()
-            vpn_id = str()
-            route_domain = str()
-            max_routes = str()
-
-            pos = 0
-            for line in output:
-                if "VRF-Name" in line:
-                    pos = output.index(line) + 1
-                    line = line.split(",")
-                    line = [_.split(":")[-1].strip() for _ in line]
-                    name = line[0]
-                    vrf_id = line[1]
-                    state = line[2]
-                    while "Table-ID" not in output[pos]:
-                        if "Description:" in output[pos]:
-                            description = output[pos + 1].strip()
-                        if "VPNID" in output[pos]:
-                            vpn_id = output[pos].split(": ")[-1]
-                        if "RD:" in output[pos]:
-                            route_domain = output[pos].split()[-1]
-                        if "Max Routes" in output[pos]:
-                            _ = output[pos].split(": ")
-                            max_routes = _[1].split()[0].strip()
-                            min_threshold = _[-1]
-                        pos += 1
-                    row = [
-                        device,
-                        name,
-                        vrf_id,
-                        state,
-                        description,
-                        vpn_id,
-                        route_domain,
-                        max_routes,
-                        min_threshold,
-                    ]
-                    df_data.append(row)
+    for device, text in cr.iter_command_output(runner):
+        output = text.split("\n")
+
+        # Pre-define variables, since not all VRFs contain all parameters
+        name = str()
+        vrf_id = str()
+        state = str()
+        description = str()
+        vpn_id = str()
+        route_domain = str()
+        max_routes = str()
+
+        pos = 0
+        for line in output:
+            if "VRF-Name" in line:
+                pos = output.index(line) + 1
+                line = line.split(",")
+                line = [_.split(":")[-1].strip() for _ in line]
+                name = line[0]
+                vrf_id = line[1]
+                state = line[2]
+                while "Table-ID" not in output[pos]:
+                    if "Description:" in output[pos]:
+                        description = output[pos + 1].strip()
+                    if "VPNID" in output[pos]:
+                        vpn_id = output[pos].split(": ")[-1]
+                    if "RD:" in output[pos]:
+                        route_domain = output[pos].split()[-1]
+                    if "Max Routes" in output[pos]:
+                        _ = output[pos].split(": ")
+                        max_routes = _[1].split()[0].strip()
+                        min_threshold = _[-1]
+                    pos += 1
+                row = [
+                    device,
+                    name,
+                    vrf_id,
+                    state,
+                    description,
+                    vpn_id,
+                    route_domain,
+                    max_routes,
+                    min_threshold,
+                ]
+                df_data.append(row)
 
     # Create the DataFrame columns
     cols = [
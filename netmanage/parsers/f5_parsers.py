@@ -1,7 +1,14 @@
 #!/usr/bin/env python3
 
 import re
-from typing import Dict
+from netmanage.helpers import command_records as cr
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, \
+    Union
+
+
+# A token in 'tmsh list' output is a quoted string, a brace, or a word.
+TMSH_TOKENS = re.compile(r'"((?:[^"\\]|\\.)*)"|([{}])|([^\s{}"]+)')
 
 
 def tokenize_f5_log(log_message: str) -> Dict[str, str]:
@@ -58,3 +65,784 @@ def tokenize_f5_log(log_message: str) -> Dict[str, str]:
         "service[pid]": service_pid.rstrip(':'),
         "message text": message_text
     }
+
+
+def _build_tmsh_block(entries: List[Union[str, Tuple[str, Any]]]) -> Any:
+    """
+    Build the list or dictionary for a block of 'tmsh list' output.
+
+    Parameters
+    ----------
+    entries : list
+        The statements in the block. Each statement is a single word, or a
+        (key, value) tuple.
+
+    Returns
+    -------
+    list or dict
+        A list if every statement is a single word (or the block is empty).
+        Otherwise, a dictionary. Single words in a dictionary are flags (E.g.,
+        'disabled'), so their value is None.
+    """
+    if all(isinstance(entry, str) for entry in entries):
+        return entries
+    block = dict()
+    for entry in entries:
+        if isinstance(entry, str):
+            block[entry] = None
+        else:
+            block[entry[0]] = entry[1]
+    return block
+
+
+def _tmsh_statement(words: List[str]) -> Union[str, Tuple[str, str]]:
+    """
+    Create the entry for a statement that is not a block.
+
+    Parameters
+    ----------
+    words : list
+        The words in the statement. Quoted strings are one word.
+
+    Returns
+    -------
+    str or tuple
+        The word, if there is only one. Otherwise, a tuple of the first word
+        and the rest of the words.
+    """
+    if len(words) == 1:
+        return words[0]
+    return words[0], ' '.join(words[1:])
+
+
+def iter_tmsh_objects(output: Union[str, Iterable[str]]) -> \
+        Iterator[Tuple[str, Any]]:
+    """
+    Parse F5 'tmsh list' output, one top-level object at a time.
+
+    The output is read in a single pass. Each line is split into tokens, and
+    a stack holds the blocks that are open. Each object is yielded as soon as
+    its closing brace is read, so large configurations can be parsed without
+    holding the whole result in memory.
+
+    The output follows these rules:
+
+    - 'key {' opens a block, which ends at the matching '}'. The key can have
+      several words (E.g., 'net self /Common/SELF1').
+    - 'key value' is a key and a value. Quoted values can contain spaces
+      (E.g., 'vendor "F5 NETWORKS INC."'), and the quotes are removed.
+    - A block where every line is a single word is a list (E.g.,
+      'allow-service { default }'). 'key { }' is an empty list.
+    - A single word in a block that is not a list is a flag. Its value is
+      None.
+
+    Parameters
+    ----------
+    output : str or iterable
+        The output of the command, or its lines (E.g., 'stdout_lines').
+
+    Yields
+    ------
+    key : str
+        The key of the object (E.g., 'net self /Common/SELF1').
+    value : dict, list, str or None
+        The object. Values are strings.
+
+    Examples
+    --------
+    >>> output = '''net self /Common/SELF1 {
+    ...     address 10.0.0.1/24
+    ...     allow-service {
+    ...         tcp:ssh
+    ...     }
+    ...     vlan /Common/VLAN1
+    ... }'''
+    >>> key, value = next(iter_tmsh_objects(output))
+    >>> key
+    'net self /Common/SELF1'
+    >>> value
+    {'address': '10.0.0.1/24', 'allow-service': ['tcp:ssh'], \
+'vlan': '/Common/VLAN1'}
+    """
+    if isinstance(output, str):
+        output = output.split('\n')
+
+    findall = TMSH_TOKENS.findall
+    # Each item in `stack` is the key of an open block, the entries of its
+    # parent, and the line number where it was opened. `entries` is None at
+    # the top level.
+    stack = list()
+    entries = None
+
+    for number, line in enumerate(output):
+        # Most lines are a key and a value, so only tokenize lines that have
+        # quotes or braces.
+        if '"' not in line and '{' not in line and '}' not in line:
+            words = line.split()
+            tokens = ()
+        else:
+            words = list()
+            tokens = findall(line)
+
+        for quoted, brace, word in tokens:
+            if word:
+                words.append(word)
+            elif brace == '{':
+                stack.append((' '.join(words), entries, number))
+                entries = list()
+                words = list()
+            elif brace == '}':
+                if not stack:
+                    continue
+                key, parent, opened = stack.pop()
+                if words:
+                    # The words in a block that is opened and closed on the
+                    # same line are a list (E.g., 'vlans { VLAN1 VLAN2 }').
+                    if opened == number:
+                        entries.extend(words)
+                    else:
+                        entries.append(_tmsh_statement(words))
+                    words = list()
+                item = (key, _build_tmsh_block(entries))
+                entries = parent
+                if entries is None:
+                    yield item
+                else:
+                    entries.append(item)
+            else:
+                words.append(quoted.replace('\\"', '"'))
+
+        if words:
+            statement = _tmsh_statement(words)
+            if entries is not None:
+                entries.append(statement)
+            elif isinstance(statement, str):
+                yield statement, None
+            else:
+                yield statement
+
+    # Close any blocks that are still open (E.g., truncated output).
+    while stack:
+        key, parent, _ = stack.pop()
+        item = (key, _build_tmsh_block(entries))
+        entries = parent
+        if entries is None:
+            yield item
+        else:
+            entries.append(item)
+
+
+def parse_tmsh_list(output: Union[str, Iterable[str]]) -> Dict[str, Any]:
+    """
+    Convert F5 'tmsh list' output to a dictionary.
+
+    Parameters
+    ----------
+    output : str or iterable
+        The output of the command, or its lines.
+
+    Returns
+    -------
+    dict
+        A dictionary where each key is the key of a top-level object (E.g.,
+        'net vlan /Common/VLAN1'), and each value is the object. See
+        'iter_tmsh_objects'.
+    """
+    return dict(iter_tmsh_objects(output))
+
+
+def split_tmsh_name(path: str) -> Tuple[str, str]:
+    """
+    Split the full path of an F5 object into its partition and name.
+
+    Parameters
+    ----------
+    path : str
+        The path (E.g., '/Common/POOL1' or '/Common/app.app/POOL1').
+
+    Returns
+    -------
+    partition : str
+        The partition (E.g., 'Common'). Defaults to 'Common' if the path does
+        not have one.
+    name : str
+        The name of the object, without its partition or folder.
+    """
+    if '/' not in path:
+        return 'Common', path
+    parts = path.split('/')
+    return parts[1], parts[-1]
+
+
+class TmshRecords:
+    """
+    A single-pass parser for F5 output where each object starts with a
+    header line, followed by its fields and, optionally, its members. For
+    example, 'show ltm pool':
+
+    Ltm::Pool: /Common/POOL1
+      Availability : available
+      ...
+      | Ltm::Pool Member: 10.0.0.1:80
+      |   Availability : available
+
+    Each line is read once, by a state machine. A line is either a field of
+    the object or member that was opened last, the header of an object, or
+    the header of a member. Since most lines are fields, each line is split
+    at the separator and its label is looked up first. The header regexes
+    are only matched against lines that do not have a field label. Lines that
+    start with '|' belong to a member, so they are ignored if the parser
+    does not have a member header.
+
+    It has the same 'columns' and 'parse' interface as the templates in
+    helpers/text_templates.py, so it can be used with
+    'text_templates.parse_output'.
+
+    Parameters
+    ----------
+    header : str
+        A regex for the header of an object, with one group for the object's
+        path. The path is split into the 'partition' column and the name
+        column.
+    fields : dict
+        A dictionary where each key is a field label in the object, and each
+        value is the name of the column. Other fields are ignored.
+    name : str, optional
+        The name of the column for the object's name. Defaults to 'name'.
+    member : str, optional
+        A regex for the header of a member, with one group for the member's
+        name. If it is set, there is one row for each member, which includes
+        the object's columns.
+    member_fields : dict, optional
+        Like 'fields', for the members.
+    member_name : str, optional
+        The name of the column for the member's name. Defaults to 'member'.
+    separator : str, optional
+        The separator between the label and the value of a field. Defaults to
+        ':'. Use None for whitespace (E.g., for 'tmsh list' output).
+    empty_objects : bool, optional
+        Whether to add a row for objects that do not have members. Defaults
+        to True.
+    default : any, optional
+        The value for fields that are not found. Defaults to None.
+    """
+
+    def __init__(self,
+                 header: str,
+                 fields: Dict[str, str],
+                 name: str = 'name',
+                 member: Optional[str] = None,
+                 member_fields: Optional[Dict[str, str]] = None,
+                 member_name: str = 'member',
+                 separator: Optional[str] = ':',
+                 empty_objects: bool = True,
+                 default=None):
+        member_fields = member_fields or dict()
+        for pattern in (header, member):
+            if pattern and re.compile(pattern).groups != 1:
+                raise ValueError(f'{pattern} must have one group')
+
+        # The headers can be indented, and member headers can start with '|'.
+        self.header = re.compile(rf'[ \t|]*(?:{header})')
+        self.member = re.compile(rf'[ \t|]*(?:{member})') if member else None
+        self.separator = separator
+        self.has_members = member is not None
+        self.empty_objects = empty_objects
+        self.default = default
+
+        # Each row is a list. The object's values come first, followed by the
+        # member's name and values. The fields are mapped to their positions.
+        self.fields = {k: i + 2 for i, k in enumerate(fields)}
+        start = len(fields) + 3
+        self.member_fields = {
+            k: i + start for i, k in enumerate(member_fields)
+        }
+        self.labels = set(fields) | set(member_fields)
+
+        self.columns = ['partition', name] + list(fields.values())
+        if self.has_members:
+            self.columns += [member_name] + list(member_fields.values())
+
+    def parse(self, text: Union[str, Iterable[str]]) -> Dict[str, list]:
+        """
+        Parse the output of a command.
+
+        Parameters
+        ----------
+        text : str or iterable
+            The output of the command, or its lines (E.g., 'stdout_lines').
+
+        Returns
+        -------
+        data : dict
+            A dictionary where each key is a column, and each value is the
+            list of values in that column.
+        """
+        if isinstance(text, str):
+            text = text.split('\n')
+
+        header = self.header.match
+        member = self.member.match if self.member else None
+        separator = self.separator
+        has_members = self.has_members
+        fields = self.fields
+        member_fields = self.member_fields
+        labels = self.labels
+        default = self.default
+        blank = [default] * len(fields)
+        blank_member = [default] * (len(member_fields) + 1)
+        empty_objects = self.empty_objects
+
+        # Each row is a list, which is added to `rows` when its header is
+        # read, and filled in by the fields that follow it.
+        rows = list()
+        record = None
+        item = None
+        # The number of members in the current object
+        members = 0
+
+        for line in text:
+            # Most lines are fields, so they are checked before the headers.
+            if separator is None:
+                parts = line.split(None, 1)
+                sep = len(parts) == 2
+                if sep:
+                    label, value = parts
+            else:
+                label, sep, value = line.partition(separator)
+            if sep:
+                if not has_members and '|' in label:
+                    continue
+                label = label.strip(' \t|')
+                if item is not None:
+                    pos = member_fields.get(label)
+                    if pos is not None:
+                        item[pos] = value.strip()
+                        continue
+                elif record is not None:
+                    pos = fields.get(label)
+                    if pos is not None:
+                        record[pos] = value.strip()
+                        continue
+                if label in labels:
+                    continue
+
+            # Objects usually have several members, so the member header is
+            # checked first.
+            if has_members and record is not None:
+                match = member(line)
+                if match:
+                    item = record + blank_member
+                    item[len(record)] = match.group(1)
+                    rows.append(item)
+                    members += 1
+                    continue
+            match = header(line)
+            if match:
+                if has_members and record is not None and not members \
+                        and empty_objects:
+                    rows.append(record + blank_member)
+                record = list(split_tmsh_name(match.group(1))) + blank
+                if not has_members:
+                    rows.append(record)
+                item = None
+                members = 0
+
+        if has_members and record is not None and not members \
+                and empty_objects:
+            rows.append(record + blank_member)
+
+        return {
+            c: list(map(itemgetter(i), rows))
+            for i, c in enumerate(self.columns)
+        }
+
+
+# 'show ltm pool recursive /*/*'
+LTM_POOL_AVAILABILITY = TmshRecords(
+    r'Ltm::Pool: +(\S+)',
+    {'Availability': 'availability',
+     'State': 'state',
+     'Total Members': 'total',
+     'Available Members': 'avail',
+     'Current Active Members': 'cur',
+     'Minimum Active Members': 'min',
+     'Reason': 'reason'},
+    name='pool')
+
+# 'show ltm pool recursive /*/* members detail'
+LTM_POOL_MEMBER_AVAILABILITY = TmshRecords(
+    r'Ltm::Pool: +(\S+)',
+    dict(),
+    name='pool_name',
+    member=r'Ltm::Pool Member: +(\S+)',
+    member_fields={'Availability': 'pool_member_state'},
+    member_name='pool_member',
+    empty_objects=False)
+
+# 'list ltm pool recursive /*/* members | grep "{\|address"'
+LTM_POOL_MEMBERS = TmshRecords(
+    r'ltm pool +(\S+)',
+    dict(),
+    name='pool',
+    member=r'(\S+:\S+) +{',
+    member_fields={'address': 'address'},
+    separator=None,
+    default=str())
+
+# 'show ltm virtual recursive /*/*'
+LTM_VIRTUAL_AVAILABILITY = TmshRecords(
+    r'Ltm::Virtual Server: +(\S+)',
+    {'Destination': 'destination',
+     'Availability': 'availability',
+     'State': 'state',
+     'Reason': 'reason'},
+    name='vip')
+
+
+# iControl REST (see helpers/f5_rest.py)
+
+# Metadata that every object in an iControl REST collection has
+REST_METADATA = {'kind', 'name', 'partition', 'fullPath', 'generation',
+                 'selfLink'}
+
+REST_KEY = re.compile(r'(?<=[a-z0-9])([A-Z])')
+
+
+def _rest_key(key: str) -> str:
+    """
+    Convert an iControl REST property to its tmsh name (E.g., 'allowService'
+    to 'allow-service').
+
+    Parameters
+    ----------
+    key : str
+        The property.
+
+    Returns
+    -------
+    key : str
+        The tmsh name.
+    """
+    return REST_KEY.sub(r'-\1', key).lower()
+
+
+def _rest_value(value: Any) -> Any:
+    """
+    Convert the value of an iControl REST property to the structure that
+    'iter_tmsh_objects' returns for the same property.
+
+    Parameters
+    ----------
+    value : any
+        The value.
+
+    Returns
+    -------
+    value : any
+        The value. The keys of dictionaries are converted to their tmsh
+        names. Expanded subcollections (E.g., the 'interfacesReference' of a
+        VLAN) are converted to a dictionary of their items, where each value
+        is a list of the item's flags (E.g., {'1.1': ['tagged']}), or a
+        dictionary of its other properties.
+    """
+    if not isinstance(value, dict):
+        return value
+    if 'items' in value:
+        items = dict()
+        for item in value['items']:
+            name = item.get('name')
+            item = {k: v for k, v in item.items() if k not in REST_METADATA}
+            if all(v is True for v in item.values()):
+                items[name] = [_rest_key(k) for k in item]
+            else:
+                items[name] = _rest_value(item)
+        return items
+    return {_rest_key(k): _rest_value(v) for k, v in value.items()}
+
+
+def iter_rest_objects(data: Union[str, dict]) -> Iterator[Tuple[str, Any]]:
+    """
+    Iterate over the objects in an iControl REST collection (E.g.,
+    '/mgmt/tm/net/self'), in the same format as 'iter_tmsh_objects', so the
+    collectors can build the same tables from either engine.
+
+    Parameters
+    ----------
+    data : str or dict
+        The response.
+
+    Yields
+    ------
+    path : str
+        The object's full path (E.g., '/Common/SELF1').
+    value : dict
+        The object's properties, with their tmsh names. The metadata is
+        removed, as are the links to other objects, unless they were expanded
+        with 'expandSubcollections=true' (E.g., the 'interfacesReference' of
+        a VLAN becomes 'interfaces').
+    """
+    data = cr.load_json(data) or dict()
+    for item in data.get('items', list()):
+        value = dict()
+        for key, prop in item.items():
+            if key in REST_METADATA:
+                continue
+            if key.endswith('Reference'):
+                if 'items' not in prop:
+                    continue
+                key = key[:-9]
+            value[_rest_key(key)] = _rest_value(prop)
+        yield item.get('fullPath', item.get('name')), value
+
+
+def iter_rest_stats(data: Union[str, dict]) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the entries of an iControl REST stats response (E.g.,
+    '/mgmt/tm/ltm/pool/stats').
+
+    Each entry is keyed by its URL, and its stats are in 'nestedStats'. Each
+    stat is a dictionary with a 'description' (for text) or a 'value' (for
+    numbers). Older versions of TMOS nest the entries one more level, so
+    entries whose stats are keyed by URLs are read recursively.
+
+    Parameters
+    ----------
+    data : str or dict
+        The response.
+
+    Yields
+    ------
+    stats : dict
+        A dictionary where each key is the name of a stat (E.g.,
+        'status.availabilityState'), and each value is its description or
+        value.
+    """
+    data = cr.load_json(data) or dict()
+    for entry in data.get('entries', dict()).values():
+        nested = entry.get('nestedStats', dict())
+        entries = nested.get('entries', dict())
+        if any('://' in key for key in entries):
+            yield from iter_rest_stats(nested)
+            continue
+        yield {
+            key: stat.get('description', stat.get('value'))
+            for key, stat in entries.items() if isinstance(stat, dict)
+        }
+
+
+def get_member_name(stats: Dict[str, Any]) -> str:
+    """
+    Build the name that tmsh shows for a pool member from its stats.
+
+    Parameters
+    ----------
+    stats : dict
+        The stats of the member (see 'iter_rest_stats').
+
+    Returns
+    -------
+    name : str
+        The node's name, without its partition, and the port (E.g.,
+        '10.0.0.1:80'). IPv6 addresses are separated from the port with a
+        '.', like in tmsh (E.g., '2001:db8::1.80').
+    """
+    node = split_tmsh_name(str(stats.get('nodeName', '')))[1]
+    separator = '.' if ':' in node else ':'
+    return f"{node}{separator}{stats.get('port', '')}"
+
+
+class RestStats:
+    """
+    A parser for iControl REST stats responses, with the same 'columns' and
+    'parse' interface as 'TmshRecords'. There is one row for each entry.
+
+    Parameters
+    ----------
+    fields : dict
+        A dictionary where each key is the name of a stat, and each value is
+        the name of the column.
+    name : str, optional
+        The name of the column for the object's name. If it is set, the
+        'name_stat' stat is split into the 'partition' column and this
+        column, like the header of a 'TmshRecords' object. Defaults to None.
+    name_stat : str, optional
+        The stat with the object's full path. Defaults to 'tmName'.
+    member_name : str, optional
+        The name of the column for the name of a pool member, for
+        '/mgmt/tm/ltm/pool/members/stats'. If it is set, the name is built
+        from the 'nodeName' and 'port' stats, like the name that tmsh shows
+        (E.g., '10.0.0.1:80'). Defaults to None.
+    default : any, optional
+        The value for stats that an entry does not have. Defaults to None.
+        The other values are converted to strings, since the values in tmsh
+        output are strings.
+    """
+
+    def __init__(self,
+                 fields: Dict[str, str],
+                 name: Optional[str] = None,
+                 name_stat: str = 'tmName',
+                 member_name: Optional[str] = None,
+                 default=None):
+        self.fields = fields
+        self.name = name
+        self.name_stat = name_stat
+        self.member_name = member_name
+        self.default = default
+
+        self.columns = list(fields.values())
+        if member_name:
+            self.columns = [member_name] + self.columns
+        if name:
+            self.columns = ['partition', name] + self.columns
+
+    def parse(self, text: Union[str, dict]) -> Dict[str, list]:
+        """
+        Parse a response.
+
+        Parameters
+        ----------
+        text : str or dict
+            The response.
+
+        Returns
+        -------
+        data : dict
+            A dictionary where each key is a column, and each value is the
+            list of values in that column.
+        """
+        default = self.default
+        rows = list()
+        for stats in iter_rest_stats(text):
+            row = [default if stats.get(k) is None else str(stats[k])
+                   for k in self.fields]
+            if self.member_name:
+                row = [get_member_name(stats)] + row
+            if self.name:
+                path = stats.get(self.name_stat, '')
+                row = list(split_tmsh_name(path)) + row
+            rows.append(row)
+
+        return {
+            c: list(map(itemgetter(i), rows))
+            for i, c in enumerate(self.columns)
+        }
+
+
+class RestPoolMembers:
+    """
+    A parser for the members of the pools in
+    '/mgmt/tm/ltm/pool?expandSubcollections=true', with the same 'columns'
+    and 'parse' interface as 'TmshRecords'. There is one row for each member.
+
+    Parameters
+    ----------
+    member_fields : dict
+        A dictionary where each key is a property of the members, and each
+        value is the name of the column.
+    name : str, optional
+        The name of the column for the pool's name. Defaults to 'pool'.
+    member_name : str, optional
+        The name of the column for the member's name. Defaults to 'member'.
+    empty_objects : bool, optional
+        Whether to add a row for pools that do not have members. Defaults to
+        True.
+    default : any, optional
+        The value for properties that are not found. Defaults to None.
+    """
+
+    def __init__(self,
+                 member_fields: Dict[str, str],
+                 name: str = 'pool',
+                 member_name: str = 'member',
+                 empty_objects: bool = True,
+                 default=None):
+        self.member_fields = member_fields
+        self.empty_objects = empty_objects
+        self.default = default
+
+        self.columns = ['partition', name, member_name] + \
+            list(member_fields.values())
+
+    def parse(self, text: Union[str, dict]) -> Dict[str, list]:
+        """
+        Parse a response.
+
+        Parameters
+        ----------
+        text : str or dict
+            The response.
+
+        Returns
+        -------
+        data : dict
+            A dictionary where each key is a column, and each value is the
+            list of values in that column.
+        """
+        data = cr.load_json(text) or dict()
+        default = self.default
+        blank = [default] * (len(self.member_fields) + 1)
+
+        rows = list()
+        for pool in data.get('items', list()):
+            record = list(split_tmsh_name(pool.get('fullPath', pool['name'])))
+            members = pool.get('membersReference', dict()).get('items')
+            if not members:
+                if self.empty_objects:
+                    rows.append(record + blank)
+                continue
+            for member in members:
+                row = record + [member.get('name', default)]
+                for key in self.member_fields:
+                    value = member.get(key)
+                    row.append(default if value is None else str(value))
+                rows.append(row)
+
+        return {
+            c: list(map(itemgetter(i), rows))
+            for i, c in enumerate(self.columns)
+        }
+
+
+# '/mgmt/tm/ltm/pool/stats'
+REST_POOL_AVAILABILITY = RestStats(
+    {'status.availabilityState': 'availability',
+     'status.enabledState': 'state',
+     'memberCnt': 'total',
+     'availableMemberCnt': 'avail',
+     'activeMemberCnt': 'cur',
+     'minActiveMembers': 'min',
+     'status.statusReason': 'reason'},
+    name='pool')
+
+# '/mgmt/tm/ltm/pool/members/stats'
+REST_POOL_MEMBER_AVAILABILITY = RestStats(
+    {'status.availabilityState': 'pool_member_state'},
+    name='pool_name',
+    name_stat='poolName',
+    member_name='pool_member')
+
+# '/mgmt/tm/ltm/pool?expandSubcollections=true'
+REST_POOL_MEMBERS = RestPoolMembers(
+    {'address': 'address'},
+    default=str())
+
+# '/mgmt/tm/ltm/virtual/stats'
+REST_VIRTUAL_AVAILABILITY = RestStats(
+    {'destination': 'destination',
+     'status.availabilityState': 'availability',
+     'status.enabledState': 'state',
+     'status.statusReason': 'reason'},
+    name='vip')
+
+# '/mgmt/tm/net/arp/stats'. The columns are the same as the headers of
+# 'show net arp'.
+REST_ARP_TABLE = RestStats(
+    {'name': 'Name',
+     'ipAddress': 'Address',
+     'macAddress': 'HWaddress',
+     'vlan': 'Vlan',
+     'expireInSec': 'Expire-in-sec',
+     'status': 'Status'},
+    default=str())
@@ -4,6 +4,7 @@ import ansible_runner
 import json
 import pandas as pd
 import sqlite3 as sl
+from netmanage.helpers import columnar as cb
 from netmanage.helpers import helpers as hp
 from netmanage.helpers import palo_alto_helpers as pah
 
@@ -45,40 +46,19 @@ def parse_all_interfaces(response: dict) -> pd.DataFrame:
         except Exception:
             result[device] = dict()
 
-    # Use the data in 'result' to create keys for 'df_data', which will be used to
+    # Use the data in 'result' to populate 'builder', which will be used to
     # create the dataframe.
-    df_data = dict()
-    df_data["device"] = list()
+    builder = cb.ColumnBuilder(["device"])
     for device in result:
         for item in result[device]:
-            try:  # Get keys from firewalls
-                for key, value in item.items():
-                    if not df_data.get(key):
-                        df_data[key] = list()
-            except AttributeError:  # Get keys from Panoramas
-                for key, value in result[device][item].items():
-                    if not df_data.get(key):
-                        df_data[key] = list()
-            except Exception:
-                pass
-
-    # Use the data in 'result' to populate 'df_data', which will be used to
-    # create the dataframe.
-    keys_to_collect = [k for k in df_data if k != 'device']
-    for device in result:
-        for item in result[device]:
-            df_data["device"].append(device)
             try:  # Parse firewall output
-                for key in keys_to_collect:
-                    df_data[key].append(item.get(key))
+                builder.add(item, device=device)
             except AttributeError:  # Parse Panorama output
-                for key in keys_to_collect:
-                    df_data[key].append(result[device][item].get(key))
-            except Exception:
-                pass
+                builder.add(result[device][item], device=device)
 
-    # Create the dataframe.
-    df = pd.DataFrame.from_dict(df_data).astype(str)
+    # Create the dataframe. The columns are converted to their declared types
+    # when they are added to the database (see helpers/column_schemas.py).
+    df = builder.to_frame()
 
     return df
 
@@ -110,11 +90,10 @@ def parse_arp_table(response: dict, nm_path: str) -> pd.DataFrame:
     if response is None:
         raise ValueError("The input is None or empty")
 
-    # Create a dictionary to store the data for 'df'
-    df_data = dict()
-    df_data["device"] = list()
+    # Create the columns for 'df'
+    builder = cb.ColumnBuilder(["device"])
 
-    # Populate 'df_data' from 'result'
+    # Populate 'builder' from 'result'
     for device in response:
         output = json.loads(response[device]["event_data"]["res"]["stdout"])
         # An 'error' key indicates the interface does not exist.
@@ -123,19 +102,15 @@ def parse_arp_table(response: dict, nm_path: str) -> pd.DataFrame:
                 arp_table = output["response"]["result"]["entries"]["entry"]
                 if isinstance(arp_table, dict):
                     arp_table = [arp_table]
-                for item in arp_table:
-                    df_data["device"].append(device)
-                    for key, value in item.items():
-                        if not df_data.get(key):
-                            df_data[key] = list()
-                        df_data[key].append(value)
-
-    # Get the vendors for the MAC addresses
-    df_vendors = hp.find_mac_vendors(df_data["mac"], nm_path)
-    df_data["vendor"] = df_vendors["vendor"].to_list()
+                builder.add_many(arp_table, device=device)
 
     # Create the dataframe
-    df = pd.DataFrame.from_dict(df_data)
+    df = builder.to_frame()
+
+    # Get the vendors for the MAC addresses
+    if not df.empty:
+        df_vendors = hp.find_mac_vendors(df["mac"], nm_path)
+        df["vendor"] = df_vendors["vendor"]
 
     return df
 
@@ -174,31 +149,21 @@ def parse_bgp_neighbors(response: dict) -> pd.DataFrame:
             else:
                 print(f"{device}: {str(e)}")
 
-    # Use the data in 'result' to populate 'df_data', which will be used to
+    # Use the data in 'result' to populate 'builder', which will be used to
     # create the dataframe.
-    df_data = dict()
-    df_data["device"] = list()
+    builder = cb.ColumnBuilder(["device"])
     for device in result:
         # If there is only one neighbor, then the Palo Alto API returns a
         # dictionary.
         if isinstance(result[device], dict):
-            df_data["device"].append(device)
-            for key, value in result[device].items():
-                if not df_data.get(key):
-                    df_data[key] = list()
-                df_data[key].append(value)
+            builder.add(result[device], device=device)
         # If there is more than one neighbor, then the Palo Alto API returns a
         # list.
         else:
-            for item in result[device]:
-                df_data["device"].append(device)
-                for key, value in item.items():
-                    if not df_data.get(key):
-                        df_data[key] = list()
-                    df_data[key].append(value)
+            builder.add_many(result[device], device=device)
 
     # Create the dataframe.
-    df = pd.DataFrame.from_dict(df_data).astype(str)
+    df = builder.to_frame().astype(str)
 
     return df
 
@@ -245,31 +210,18 @@ def parse_gather_basic_facts(results: list, db_path) -> pd.DataFrame:
     df : pd.DataFrame
         A DataFrame containing the basic facts.
     """
-    # Create a dictionary to store the facts.
-    df_data = dict()
-    df_data["device"] = list()
-    df_data["ansible_net_model"] = list()
-    df_data["ansible_net_serial"] = list()
+    # Create the columns for the facts.
+    builder = cb.ColumnBuilder(
+        ["device", "ansible_net_model", "ansible_net_serial"]
+    )
 
-    # Create the dictionary keys.
+    # Add the facts for each device.
     for item in results:
         for device, facts in item.items():
-            for k in facts:
-                if not df_data.get(k):
-                    df_data[k] = list()
-
-    # Populate the dictionary with the facts.
-    for item in results:
-        for device, facts in item.items():
-            if facts["ansible_net_model"] == "Panorama":
-                facts["device"] = device
-            else:
-                facts["device"] = device
-            for key in df_data:
-                df_data[key].append(facts.get(key))
+            builder.add(facts, device=device)
 
     # Create the dataframe.
-    df = pd.DataFrame(df_data)
+    df = builder.to_frame()
     df = df.astype(str)
 
     # For some reason, the gather_facts module returns some serial numbers as
@@ -349,13 +301,7 @@ def parse_inventory(response: dict) -> pd.DataFrame:
     if response is None:
         raise ValueError("The input is None or empty")
 
-    # Create a list to store columns. This method accounts for the fact that
-    # not all devices return the same data.
-    columns = ["device"]
-
-    # Create a dictionary to store the output. This will allow us to iterate
-    # over all the output and collect the column headers before populating the
-    # dataframe.
+    # Create a dictionary to store the output for each device.
     data = dict()
 
     # Parse 'response', adding the cmd output for each device to 'result'.
@@ -365,26 +311,14 @@ def parse_inventory(response: dict) -> pd.DataFrame:
             output = output["response"]["result"].get("system")
             data[device] = output
 
-    # Iterate over the output, adding all column names to 'columns'.
+    # Iterate over the output, adding all data to 'builder'. Not all devices
+    # return the same data, so missing values are filled with None.
+    builder = cb.ColumnBuilder(["device"])
     for key, value in data.items():
-        for k in value:
-            if k not in columns:
-                columns.append(k)
-
-    # Create a dictionary to store the formatted data for the dataframe.
-    df_data = dict()
-    df_data["device"] = list()
-    for col in columns:
-        df_data[col] = list()
-
-    # Iterate over the output, adding all data to 'df_data'.
-    for key, value in data.items():
-        df_data["device"].append(key)
-        for col in columns[1:]:  # Skip the 'device' column.
-            df_data[col].append(value.get(col))
+        builder.add(value, device=key)
 
     # Create the dataframe and return it.
-    df = pd.DataFrame(df_data)
+    df = builder.to_frame()
 
     return df.astype(str)
 
@@ -421,20 +355,14 @@ def parse_logical_interfaces(response: pd.DataFrame) -> pd.DataFrame:
         else:
             result[device] = dict()
 
-    # Use the data in 'result' to populate 'df_data', which will be used to
+    # Use the data in 'result' to populate 'builder', which will be used to
     # create the dataframe.
-    df_data = dict()
-    df_data["device"] = list()
+    builder = cb.ColumnBuilder(["device"])
     for device in result:
-        for item in result[device]:
-            df_data["device"].append(device)
-            for key, value in item.items():
-                if not df_data.get(key):
-                    df_data[key] = list()
-                df_data[key].append(value)
+        builder.add_many(result[device], device=device)
 
     # Create the dataframe.
-    df = pd.DataFrame.from_dict(df_data).astype(str)
+    df = builder.to_frame().astype(str)
 
     return df
 
@@ -467,31 +395,21 @@ def parse_ospf_neighbors(response: dict) -> pd.DataFrame:
             output = output["response"]["result"]["entry"]
             result[device] = output
 
-    # Use the data in 'result' to populate 'df_data', which will be used to
+    # Use the data in 'result' to populate 'builder', which will be used to
     # create the dataframe.
-    df_data = dict()
-    df_data["device"] = list()
+    builder = cb.ColumnBuilder(["device"])
     for device in result:
         # If there is only one neighbor, then the Palo Alto API returns a
         # dictionary.
         if isinstance(result[device], dict):
-            df_data["device"].append(device)
-            for key, value in result[device].items():
-                if not df_data.get(key):
-                    df_data[key] = list()
-                df_data[key].append(value)
+            builder.add(result[device], device=device)
         # If there is more than one neighbor, then the Palo Alto API returns a
         # list.
         else:
-            for item in result[device]:
-                df_data["device"].append(device)
-                for key, value in item.items():
-                    if not df_data.get(key):
-                        df_data[key] = list()
-                    df_data[key].append(value)
+            builder.add_many(result[device], device=device)
 
     # Create the dataframe.
-    df = pd.DataFrame.from_dict(df_data).astype(str)
+    df = builder.to_frame().astype(str)
 
     return df
 
@@ -531,22 +449,14 @@ def parse_physical_interfaces(response: dict) -> pd.DataFrame:
         else:  # Just in case no results are returned for some reason.
             result[device] = dict()
 
-    # Use the data in 'result' to populate 'df_data', which will be used to
-    # create the dataframe.
-    df_data = dict()
-    df_data["device"] = list()
+    # Use the data in 'result' to populate 'builder', which will be used to
+    # create the dataframe. Aggregation groups are excluded.
+    builder = cb.ColumnBuilder(["device"], exclude=["ae_member"])
     for device in result:
-        interfaces = result[device]
-        for item in interfaces:
-            df_data["device"].append(device)
-            for key, value in item.items():
-                if key != "ae_member":  # Exclude aggregation groups.
-                    if not df_data.get(key):
-                        df_data[key] = list()
-                    df_data[key].append(value)
+        builder.add_many(result[device], device=device)
 
     # Create the dataframe.
-    df = pd.DataFrame.from_dict(df_data)
+    df = builder.to_frame()
 
     return df
 
@@ -569,12 +479,9 @@ def parse_security_rules(runner: dict) -> pd.DataFrame:
     if runner is None or runner.events is None:
         raise ValueError("The input is None or empty")
 
-    # Create the 'df_data' dictionary. It will be used to create the dataframe
-    df_data = dict()
-    df_data["device"] = list()
-
-    # Create a list to store the unformatted details for each rule
-    rules = list()
+    # Create the builder. It will be used to create the dataframe. Rules that
+    # do not have a key get the string 'None', like the other values.
+    builder = cb.ColumnBuilder(["device"], fill=str(None))
 
     for event in runner.events:
         if event["event"] == "runner_on_ok":
@@ -583,39 +490,33 @@ def parse_security_rules(runner: dict) -> pd.DataFrame:
             output = event_data["res"]["gathered"]
 
             for item in output:
-                item["device"] = device
-                rules.append(item)
-                for key in item:
-                    if not df_data.get(key):
-                        df_data[key] = list()
-
-    # Iterate over the rule details, using the keys in dict_keys to create the
-    # 'df_data' dictionary, which will be used to create the dataframe
-    for item in rules:
-        for key in df_data:
-            # If a key in a rule has a value that is a list, then convert it to
-            # a string by joining it with '|' as a delimiter. We do not want to
-            # use commas a delimiter, since that can cause issues when
-            # exporting the data to CSV files.
-            if isinstance(item.get(key), list):
-                # Some keys have a value that is a list, with commas inside the
-                # list items. For example, source_user might look like this:
-                # ['cn=name,ou=firewall,ou=groups,dc=dcname,dc=local']. That
-                # creates an issue when exporting to a CSV file. Therefore,
-                # the commas inside list items will be replaced with a space
-                # before joining the list.
-                _list = item.get(key)
-                _list = [_.replace(",", " ") for _ in _list]
-
-                # Join the list using '|' as a delimiter
-                df_data[key].append("|".join(_list))
-            # If the key's value is not a list, then convert it to a string
-            # and append it to the key in 'df_data'
-            else:
-                df_data[key].append(str(item.get(key)))
+                rule = dict()
+                for key, value in item.items():
+                    # If a key in a rule has a value that is a list, then
+                    # convert it to a string by joining it with '|' as a
+                    # delimiter. We do not want to use commas a delimiter,
+                    # since that can cause issues when exporting the data to
+                    # CSV files.
+                    if isinstance(value, list):
+                        # Some keys have a value that is a list, with commas
+                        # inside the list items. For example, source_user
+                        # might look like this:
+                        # ['cn=name,ou=firewall,ou=groups,dc=dcname,dc=local'].
+                        # That creates an issue when exporting to a CSV file.
+                        # Therefore, the commas inside list items will be
+                        # replaced with a space before joining the list.
+                        _list = [_.replace(",", " ") for _ in value]
+
+                        # Join the list using '|' as a delimiter
+                        rule[key] = "|".join(_list)
+                    # If the key's value is not a list, then convert it to a
+                    # string
+                    else:
+                        rule[key] = str(value)
+                builder.add(rule, device=device)
 
     # Create the dataframe and return it
-    df_rules = pd.DataFrame.from_dict(df_data)
+    df_rules = builder.to_frame()
 
     # Rename the 'destintaion_zone' column to 'destination_zone'
     df_rules.rename({"destintaion_zone": "destination_zone"}, axis=1, inplace=True)
@@ -637,51 +538,27 @@ def panorama_get_managed_devices(response: dict) -> pd.DataFrame:
     df : Pandas Dataframe
         A dataframe containing the managed devices.
     """
-    # Create the DataFrame columns
-    columns = set()
-
-    # Create a dictionary to store the output from each Panorama.
-    data = dict()
-
-    # Get raw output and create dataframe columns.
+    # Create the DataFrame columns. These columns are placed at the front.
+    builder = cb.ColumnBuilder(
+        [
+            "device",
+            "hostname",
+            "@name",
+            "serial",
+            "ip-address",
+            "ipv6-address",
+            "mac-addr",
+        ]
+    )
+
+    # Parse the raw output and add it to the builder.
     for device in response:
         if response[device]["event_data"].get("res"):
             output = json.loads(response[device]["event_data"].get("res")["stdout"])
             output = output["response"]["result"]["devices"]["entry"]
-            # Store the raw command output for parsing.
-            data[device] = output
-
-            # Store the unique keys in the 'columns' list.
-            for item in output:
-                columns.update(item.keys())
-
-    # Parse the raw output and store it in df_data
-    df_data = {key: [] for key in columns}
-    df_data["device"] = list()
-
-    for device in data:
-        output = data[device]
-        for item in output:
-            df_data["device"].append(device)
-            for key in df_data:
-                if key != "device":
-                    df_data[key].append(item.get(key))
+            builder.add_many(output, device=device)
 
     # Create the DataFrame
-    df = pd.DataFrame(df_data)
-
-    # Re-order the columns.
-    columns_to_front = [
-        "device",
-        "hostname",
-        "@name",
-        "serial",
-        "ip-address",
-        "ipv6-address",
-        "mac-addr",
-    ]
-    other_columns = [col for col in df.columns if col not in columns_to_front]
-    new_column_order = columns_to_front + other_columns
-    df = df[new_column_order]
+    df = builder.to_frame()
 
     return df
@@ -23,8 +23,18 @@ from netmanage.collectors import palo_alto_collectors as pac
 from netmanage.collectors import solarwinds_collectors as swc
 from dotenv import load_dotenv
 from netmanage.helpers import helpers as hp
+from netmanage.helpers import column_schemas as cs
+from netmanage.helpers import command_batching as cbt
 from netmanage.helpers import create_db_views as cdv
-from typing import List
+from netmanage.helpers import delta_store as ds
+from netmanage.helpers import execution_profiles as ep
+from netmanage.helpers import normalized_tables as nt
+from netmanage.helpers import parquet_store as ps
+from netmanage.helpers import result_cache as rch
+from netmanage.helpers import retention as rt
+from netmanage.helpers import ssh_engine as se
+from netmanage.helpers import table_indexes as ti
+from typing import Dict, List, Optional
 
 # Load environment variables.
 load_dotenv()
@@ -34,7 +44,12 @@ readline.write_history_file = lambda *args: None
 
 
 def collect(
-    ansible_os: str, collector: str, hostgroup: str, timestamp: str
+    ansible_os: str,
+    collector: str,
+    hostgroup: str,
+    timestamp: str,
+    batch_result: Optional[pd.DataFrame] = None,
+    batch_duration: Optional[float] = None,
 ) -> pd.DataFrame:
     """
     This function calls the test that the user requested.
@@ -49,6 +64,12 @@ def collect(
         The name of the Ansible hostgroup.
     timestamp : str
         The timestamp is YYYY-MM-DD_hhmm format.
+    batch_result : pd.DataFrame, optional
+        The result of the collector from a batched play (see
+        'collect_batch'). If it is provided, the collector is not run, and
+        the result is written to the database.
+    batch_duration : float, optional
+        The duration of the collector in the batched play, in seconds.
 
     Returns
     -------
@@ -62,6 +83,18 @@ def collect(
     private_data_dir = os.path.expanduser(os.environ["private_data_directory"])
     validate_certs = ast.literal_eval(os.environ["validate_certs"])
     database_method = os.environ["database_method"]
+    storage_backend = os.environ.get("storage_backend", "sqlite")
+    retention_policy = rt.parse_retention_policy(
+        os.environ.get("retention_policy", "")
+    )
+    retention_compact = ast.literal_eval(os.environ.get("retention_compact", "False"))
+    maintenance_interval = float(os.environ.get("maintenance_interval_hours", 0))
+    cache_ttl = float(os.environ.get("collector_cache_ttl", 0))
+    collection_engine = os.environ.get("collection_engine", "ansible")
+    ssh_known_hosts = os.path.expanduser(os.environ.get("ssh_known_hosts", ""))
+    ssh_host_key_checking = ast.literal_eval(
+        os.environ.get("ssh_host_key_checking", "True")
+    )
 
     # Read Cisco ASA variables
     asa_devices_username = os.environ["asa_devices_username"]
@@ -84,6 +117,7 @@ def collect(
     # Read F5 LTM variables
     f5_ltm_username = os.environ["f5_ltm_username"]
     f5_ltm_password = os.environ["f5_ltm_password"]
+    f5_collection_engine = os.environ.get("f5_collection_engine", "ansible")
     # f5_log_range = os.environ['f5_log_range']
     # f5_log_type = os.environ['f5_log_type']
     # f5_num_lines = os.environ['f5_num_lines']
@@ -143,7 +177,157 @@ def collect(
     # Create an empty DataFrame for when collectors return no results.
     result = pd.DataFrame()
 
-    # Call collector and return results.
+    def write_result(result: pd.DataFrame, duration: float) -> None:
+        """
+        Writes the result to the database, then applies the retention policy
+        and runs maintenance.
+        """
+        table_name = f'{ansible_os.split(".")[-1]}_{collector}'
+        add_to_db(
+            table_name,
+            result,
+            timestamp,
+            database_full_path,
+            method=database_method,
+            idx_cols=idx_cols,
+            storage_backend=storage_backend,
+            hostgroup=hostgroup,
+            duration=duration,
+        )
+
+        # Thin old snapshots, and run VACUUM and ANALYZE if they are due
+        if storage_backend != "parquet":
+            if retention_policy or retention_compact:
+                expired = rt.apply_retention(
+                    database_full_path,
+                    table_name,
+                    retention_policy,
+                    compact=retention_compact,
+                )
+                if expired:
+                    print(f"Deleted {len(expired)} expired snapshots.")
+            if maintenance_interval > 0:
+                rt.run_maintenance(database_full_path, maintenance_interval)
+
+    # The .env settings that change the result of the collector. They are
+    # part of the cache key (see helpers/result_cache.py), so a cached result
+    # is not reused after they are changed. Collectors that only use
+    # credentials have none, so they share results with 'rch.cached_call'.
+    cache_args = None
+    if ansible_os == "meraki":
+        cache_args = {
+            "networks": meraki_networks,
+            "organizations": meraki_organizations,
+            "serials": meraki_serials,
+            "total_pages": meraki_tp,
+            "macs": meraki_macs,
+            "lookback": meraki_lookback,
+            "per_page": meraki_per_page,
+        }
+    elif ansible_os == "cisco.dnac":
+        cache_args = {"url": dnac_url, "platform_ids": dnac_platform_ids}
+    elif ansible_os == "paloaltonetworks.panos":
+        cache_args = {"serials": palo_alto_serials}
+    elif collector.startswith("infoblox_"):
+        cache_args = {"url": infoblox_url, "paging": infoblox_paging}
+    elif collector.startswith("netbox_"):
+        cache_args = {"url": netbox_url}
+    elif collector.startswith(("npm_", "ncm_")):
+        cache_args = {"server": npm_server, "group_name": npm_group_name}
+
+    # Write the result of a batched play (see helpers/command_batching.py)
+    if batch_result is not None:
+        if cache_ttl > 0 and len(batch_result.columns.to_list()) > 0:
+            rch.store_result(
+                database_full_path,
+                ansible_os,
+                hostgroup,
+                collector,
+                batch_result,
+                cache_args,
+                timestamp,
+            )
+        if len(batch_result.columns.to_list()) > 0:
+            write_result(batch_result, batch_duration)
+        return batch_result
+
+    # Reuse the result of the collector if it was run within the cache TTL
+    # (see helpers/result_cache.py). The result is written with the current
+    # timestamp, so collectors that read the latest snapshots of their
+    # dependencies see a complete set, unless the snapshot it was written to
+    # is still the latest one in the table.
+    cached = rch.get_result(
+        database_full_path,
+        ansible_os,
+        hostgroup,
+        collector,
+        args=cache_args,
+        ttl=cache_ttl,
+    )
+    if cached is not None:
+        print(f"Using the cached result for {collector} on {hostgroup}.")
+        if len(cached.columns.to_list()) > 0:
+            table_name = f'{ansible_os.split(".")[-1]}_{collector}'
+            cached_timestamp = rch.get_result_timestamp(
+                database_full_path,
+                ansible_os,
+                hostgroup,
+                collector,
+                args=cache_args,
+            )
+            if (
+                storage_backend != "parquet"
+                and cached_timestamp
+                and cached_timestamp
+                == hp.get_latest_timestamp(database_full_path, table_name)
+            ):
+                print(f"The latest snapshot of {table_name} is up to date.")
+            else:
+                write_result(cached, 0)
+        return cached
+
+    # Run the collector with the asyncio SSH engine, if it is enabled and
+    # supports the collector (see helpers/ssh_engine.py). asyncio.run does not
+    # work inside Jupyter, so ansible-runner is used there. If the output
+    # cannot be parsed, the collector is run with ansible-runner.
+    if (
+        collection_engine == "asyncssh"
+        and ansible_os in se.SUPPORTED_OS
+        and cbt.get_batch_collectors(ansible_os, [collector])
+        and not hp.is_jupyter()
+    ):
+        username, password = {
+            "cisco.ios.ios": (ios_devices_username, ios_devices_password),
+            "cisco.nxos.nxos": (nxos_devices_username, nxos_devices_password),
+        }[ansible_os]
+        start = dt.datetime.now()
+        results = cbt.run_batch(
+            ansible_os,
+            [collector],
+            username,
+            password,
+            hostgroup,
+            netmanage_path,
+            play_path,
+            private_data_dir,
+            engine=collection_engine,
+            known_hosts=ssh_known_hosts,
+            host_key_checking=ssh_host_key_checking,
+        )
+        duration = (dt.datetime.now() - start).total_seconds()
+        if collector in results:
+            return collect(
+                ansible_os,
+                collector,
+                hostgroup,
+                timestamp,
+                batch_result=results[collector],
+                batch_duration=duration,
+            )
+
+    # Call collector and return results. The duration is stored in the
+    # '_snapshots' catalog.
+    start = dt.datetime.now()
     if ansible_os == "bigip":
         if collector == "arp_table":
             result = f5c.get_arp_table(
@@ -154,6 +338,7 @@ def collect(
                 play_path,
                 private_data_dir,
                 validate_certs=validate_certs,
+                engine=f5_collection_engine,
             )
 
         if collector == "interface_description":
@@ -212,6 +397,7 @@ def collect(
                 play_path,
                 private_data_dir,
                 validate_certs=validate_certs,
+                engine=f5_collection_engine,
             )
 
         if collector == "pool_summary":
@@ -222,6 +408,7 @@ def collect(
                 play_path,
                 private_data_dir,
                 validate_certs=validate_certs,
+                engine=f5_collection_engine,
             )
 
         if collector == "pool_member_availability":
@@ -232,6 +419,7 @@ def collect(
                 play_path,
                 private_data_dir,
                 validate_certs=validate_certs,
+                engine=f5_collection_engine,
             )
 
         if collector == "self_ips":
@@ -242,6 +430,7 @@ def collect(
                 play_path,
                 private_data_dir,
                 validate_certs=validate_certs,
+                engine=f5_collection_engine,
             )
 
         if collector == "vip_availability":
@@ -252,6 +441,7 @@ def collect(
                 play_path,
                 private_data_dir,
                 validate_certs=validate_certs,
+                engine=f5_collection_engine,
             )
 
         if collector == "vip_destinations":
@@ -265,6 +455,7 @@ def collect(
                 play_path,
                 private_data_dir,
                 validate_certs=validate_certs,
+                engine=f5_collection_engine,
             )
 
         if collector == "vlan_database":
@@ -655,6 +846,8 @@ def collect(
                 hostgroup,
                 play_path,
                 private_data_dir,
+                db_path=database_full_path,
+                cache_ttl=cache_ttl,
             )
 
     if collector == "lldp_neighbors":
@@ -944,21 +1137,117 @@ def collect(
                 private_data_dir,
             )
 
-    # Write the result to the database
-    if len(result.columns.to_list()) > 0:
-        table_name = f'{ansible_os.split(".")[-1]}_{collector}'
-        add_to_db(
-            table_name,
+    duration = (dt.datetime.now() - start).total_seconds()
+
+    # Cache the result, so composite collectors can reuse it
+    if cache_ttl > 0 and len(result.columns.to_list()) > 0:
+        rch.store_result(
+            database_full_path,
+            ansible_os,
+            hostgroup,
+            collector,
             result,
+            cache_args,
             timestamp,
-            database_full_path,
-            method=database_method,
-            idx_cols=idx_cols,
         )
 
+    # Write the result to the database
+    if len(result.columns.to_list()) > 0:
+        write_result(result, duration)
+
     return result
 
 
+def collect_batch(
+    ansible_os: str, collectors: List[str], hostgroup: str, timestamp: str
+) -> Dict[str, pd.DataFrame]:
+    """
+    Run the commands for several collectors in a single play, instead of one
+    play per collector, then write each result to the database. This is
+    enabled by the 'batch_commands' variable in the .env file.
+
+    Only the Cisco NXOS, IOS and ASA collectors in
+    'cbt.define_batch_commands' can be batched. The other collectors must
+    still be run with 'collect'. Collectors whose output could not be parsed
+    are not in the returned dictionary, so they can be run again with
+    'collect'.
+
+    Parameters
+    ----------
+    ansible_os : str
+        The Ansible OS of the hostgroup.
+    collectors : list
+        The names of the collectors that the user requested.
+    hostgroup : str
+        The name of the Ansible hostgroup.
+    timestamp : str
+        The timestamp is YYYY-MM-DD_hhmm format.
+
+    Returns
+    -------
+    results : dict
+        A dictionary where each key is a batched collector, and each value is
+        its result. It is empty if batching is disabled, or if fewer than two
+        of the collectors can be batched.
+    """
+    batch_commands = ast.literal_eval(os.environ.get("batch_commands", "False"))
+    collection_engine = os.environ.get("collection_engine", "ansible")
+    if hp.is_jupyter():
+        collection_engine = "ansible"
+    batched = cbt.get_batch_collectors(ansible_os, collectors)
+    if not batch_commands or len(batched) < 2:
+        return dict()
+
+    # Read global variables
+    netmanage_path = os.path.expanduser(os.environ["netmanage_path"].rstrip("/"))
+    private_data_dir = os.path.expanduser(os.environ["private_data_directory"])
+    play_path = netmanage_path + "/playbooks"
+    ssh_known_hosts = os.path.expanduser(os.environ.get("ssh_known_hosts", ""))
+    ssh_host_key_checking = ast.literal_eval(
+        os.environ.get("ssh_host_key_checking", "True")
+    )
+
+    # Read the credentials for the Ansible OS
+    prefix = {
+        "cisco.asa.asa": "asa",
+        "cisco.ios.ios": "ios",
+        "cisco.nxos.nxos": "nxos",
+    }[ansible_os]
+    username = os.environ[f"{prefix}_devices_username"]
+    password = os.environ[f"{prefix}_devices_password"]
+
+    # Run the batched play. The duration of the play is divided evenly
+    # between the collectors.
+    start = dt.datetime.now()
+    results = cbt.run_batch(
+        ansible_os,
+        batched,
+        username,
+        password,
+        hostgroup,
+        netmanage_path,
+        play_path,
+        private_data_dir,
+        engine=collection_engine,
+        known_hosts=ssh_known_hosts,
+        host_key_checking=ssh_host_key_checking,
+    )
+    duration = (dt.datetime.now() - start).total_seconds() / len(batched)
+
+    # Write each result to the database
+    for collector, result in results.items():
+        collect(
+            ansible_os,
+            collector,
+            hostgroup,
+            timestamp,
+            batch_result=result,
+            batch_duration=duration,
+        )
+
+    return results
+
+
 def add_to_db(
     table_name: str,
     result: pd.DataFrame,
@@ -966,6 +1255,9 @@ def add_to_db(
     database_path: str,
     method: str = "append",
     idx_cols: List[str] = list(),
+    storage_backend: str = "sqlite",
+    hostgroup: str = "",
+    duration: Optional[float] = None,
 ) -> None:
     """
     Adds the output of a collector to the database.
@@ -982,16 +1274,68 @@ def add_to_db(
         The path to the database where the data will be stored.
     method : str, optional
         What to do if the table already exists in the database. Options are
-        'append', 'fail', 'replace'. Defaults to 'append'.
+        'append', 'fail', 'replace' and 'delta'. 'delta' stores the rows that
+        changed since the hostgroup's previous snapshot (see
+        helpers/delta_store.py), and replaces that snapshot in the table with
+        the new one. Defaults to 'append'.
     idx_cols : List[str], optional
         The list of columns to use for indexing the table in the database.
         Note that this is NOT related to the dataframe index; it is for
         indexing the SQLite database table.
+    storage_backend : str, optional
+        Where to store the data. Options are 'sqlite', 'parquet' (a Parquet
+        dataset next to the database; see helpers/parquet_store.py) and
+        'both'. Defaults to 'sqlite'.
+    hostgroup : str, optional
+        The hostgroup that the collector was run against. It is stored in
+        the '_snapshots' catalog. Defaults to ''.
+    duration : float, optional
+        How long the collector took to run, in seconds. It is stored in the
+        '_snapshots' catalog. Defaults to None.
 
     Returns
     -------
     None
     """
+    if storage_backend not in ["sqlite", "parquet", "both"]:
+        raise ValueError(f"Invalid storage backend: '{storage_backend}'")
+
+    # Convert the columns to their declared types (see
+    # helpers/column_schemas.py)
+    result = cs.apply_column_schema(result, table_name)
+
+    # Write the snapshot to the Parquet dataset, if applicable
+    if storage_backend in ["parquet", "both"]:
+        ps.write_snapshot(
+            ps.get_dataset_path(database_path),
+            table_name,
+            result,
+            timestamp,
+            method="append" if method == "delta" else method,
+        )
+        if storage_backend == "parquet":
+            return
+
+    # Record the changes since the hostgroup's previous snapshot, if
+    # applicable. The snapshot is then appended to the table like any other,
+    # so the readers of the latest data, the catalog, the indexes and the
+    # normalized tables are the same in either mode. The hostgroup's previous
+    # snapshot is deleted from the table afterward, since it can be rebuilt
+    # from the delta table.
+    delta = method == "delta"
+    if delta:
+        exists = hp.check_dir_existence("/".join(database_path.split("/")[:-1]))
+        if not exists:
+            hp.create_dir("/".join(database_path.split("/")[:-1]))
+        counts = ds.write_delta(
+            database_path, table_name, result, timestamp, hostgroup=hostgroup
+        )
+        print(
+            f"{table_name.upper()}: {counts['inserted']} inserted, "
+            f"{counts['changed']} changed, {counts['deleted']} deleted"
+        )
+        method = "append"
+
     # Set the timestamp as the index of the dataframe (this is unrelated to
     # the 'idx_cols' arg)
     new_idx = list()
@@ -1034,7 +1378,9 @@ def add_to_db(
     if "table_id" in column_list:
         column_list.remove("table_id")
         del result["table_id"]
-    columns = [f'"{c}"' for c in column_list]
+    columns = [
+        f'"{c}" {cs.get_sqlite_type(table_name, c)}'.rstrip() for c in column_list
+    ]
     if len(schema) == 0 and len(result) > 0:
         fields = ",\n".join(columns)
         cur.execute(
@@ -1059,7 +1405,10 @@ def add_to_db(
     if len(schema) >= 1:
         for col in column_list:
             if col not in schema["name"].to_list():
-                cur.execute(f'ALTER TABLE {table_name} ADD COLUMN "{col}"')
+                col_type = cs.get_sqlite_type(table_name, col)
+                cur.execute(
+                    f'ALTER TABLE {table_name} ADD COLUMN "{col}" {col_type}'.rstrip()
+                )
 
     # from tabulate import tabulate
     # print(tabulate(result, headers='keys', tablefmt='psql'))
@@ -1080,9 +1429,37 @@ def add_to_db(
         except Exception as e:
             print(f"Caught Exception: {str(e)}")
 
+    # Add the snapshot to the '_snapshots' catalog
+    hp.update_snapshot_catalog(
+        con,
+        table,
+        timestamp,
+        len(result),
+        duration=duration,
+        hostgroup=hostgroup,
+        replace=(method == "replace"),
+    )
+
+    # Create the standard indexes for the table (see helpers/table_indexes.py).
+    # This is done after every write, since 'replace' drops the indexes.
+    ti.create_table_indexes(con, table)
+
     con.commit()
     con.close()
 
+    if delta:
+        ds.prune_table(database_path, table, timestamp, hostgroup=hostgroup)
+
+    # Refresh the normalized tables (NORMALIZED_ARP_TABLE, etc) that are built
+    # from this table. When the table is appended to, only the rows for this
+    # timestamp are refreshed.
+    try:
+        nt.refresh_normalized_tables(
+            database_path, table, timestamp if method == "append" else None
+        )
+    except Exception as e:
+        print(f"Caught Exception: {str(e)}")
+
 
 def create_parser() -> argparse.Namespace:
     """
@@ -1166,6 +1543,35 @@ def create_parser() -> argparse.Namespace:
         required=True,
         action="store",
     )
+    parser.add_argument(
+        "-f",
+        "--forks",
+        help="""The number of devices to run each play on in
+                                parallel. Overrides 'execution_forks' in the
+                                .env file.""",
+        type=int,
+        default=None,
+        action="store",
+    )
+    parser.add_argument(
+        "-s",
+        "--strategy",
+        help="""The Ansible strategy (E.g., 'linear' or 'free').
+                                Overrides 'execution_strategy' in the .env
+                                file.""",
+        default=None,
+        action="store",
+    )
+    parser.add_argument(
+        "-t",
+        "--command_timeout",
+        help="""The command timeout, in seconds. Overrides
+                                'execution_command_timeout' in the .env
+                                file.""",
+        type=int,
+        default=None,
+        action="store",
+    )
     args = parser.parse_args()
     return args
 
@@ -1215,6 +1621,14 @@ def arg_parser(args: argparse.Namespace) -> tuple:
     else:
         password = hp.get_password()
 
+    # Set the default Ansible execution profile. Profiles for individual
+    # hostgroups are set with 'execution_profiles' in the .env file.
+    ep.set_default_profile(
+        forks=args.forks,
+        strategy=args.strategy,
+        command_timeout=args.command_timeout,
+    )
+
     # Set the database path
     db = f"{out_dir}/{args.database}"
 
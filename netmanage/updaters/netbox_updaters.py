@@ -3,6 +3,7 @@ from netmanage import netbox_helpers as nbh
 from typing import Optional, Any, List, Dict
 from pynetbox import RequestError
 import logging
+import pandas as pd
 import json
 import re
 
@@ -868,44 +869,87 @@ def import_devices_to_netbox(url, token, devices_json):
     return responses
 
 
-def cleanup_duplicate_devs_by_serials(url=None, token=None, cleanup=False):
+def cleanup_duplicate_devs_by_serials(
+    url=None, token=None, cleanup=False, chunk_size=500, page_size=1000
+):
     """
     Checks for duplicate device serial numbers in NetBox and optionally deletes them.
+
+    Only the fields needed to find duplicates (id, name, serial and created)
+    are requested from the API, and the devices are grouped by serial number
+    in a single pass. For each serial number, the device that was created
+    first is kept. The others are deleted with bulk DELETE requests of up to
+    'chunk_size' devices each, instead of one request per device.
+
     :param url: (str): URL of the Netbox instance.
     :param token: (str): API token for authentication.
     :param cleanup: (bool, optional): If True, deletes duplicate devices.
-                                      Defaults to False.
-    :return: None.
+                                      Defaults to False, which only reports
+                                      the devices that would be deleted.
+    :param chunk_size: (int, optional): The maximum number of devices to
+                                        delete per API call. Defaults to 500.
+    :param page_size: (int, optional): The number of devices to request per
+                                       page. Defaults to 1000.
+    :return: (pd.DataFrame): A report containing one row per duplicate device,
+             the device that was kept for that serial number, and whether the
+             duplicate was deleted.
     """
 
     nb = nbh.create_netbox_handler(url, token)
 
     print("Checking for duplicate serial numbers...")
 
-    # Retrieve all devices and group them by serial number
-    devices = nb.dcim.devices.all()
+    # Retrieve the devices and group them by serial number. NetBox versions
+    # that do not support the 'fields' parameter ignore it and return the full
+    # records, so the result is the same either way.
+    devices = nb.dcim.devices.filter(
+        fields="id,name,serial,created", limit=page_size
+    )
     devices_by_serial = {}
     for device in devices:
         serial = device.serial
         if serial:
-            devices_by_serial.setdefault(serial, []).append(device)
-
-    # Identify and handle duplicates
-    duplicate_serials = []
-    for serial, devices in devices_by_serial.items():
-        if len(devices) > 1:
-            duplicate_serials.append((serial, devices))
-
-    for serial, devices in duplicate_serials:
-        print(f"Found duplicate serial number: {serial}")
-
-        # Delete the other devices, handling potential errors
-        for device in devices[1:]:
-            try:
-                if cleanup:
-                    print(f"Deleting duplicate device: {device.name}")
-                    nb.dcim.devices.delete([device.id])
-            # except Record.DoesNotExist:
-            #    logging.warning(f"Device {device.name} already deleted.")
-            except Exception as e:
-                logging.error(f"Error deleting device {device.name}: {e}")
+            devices_by_serial.setdefault(serial, []).append(
+                (getattr(device, "created", None) or "", device.id, device.name)
+            )
+
+    # Identify the duplicates, keeping the device that was created first.
+    df_data = list()
+    for serial, records in devices_by_serial.items():
+        if len(records) > 1:
+            records.sort()
+            keep = records[0]
+            print(f"Found duplicate serial number: {serial}")
+            for created, _id, name in records[1:]:
+                df_data.append(
+                    [serial, _id, name, created, keep[1], keep[2], False]
+                )
+
+    df_report = pd.DataFrame(
+        data=df_data,
+        columns=[
+            "serial",
+            "id",
+            "device",
+            "created",
+            "kept_id",
+            "kept_device",
+            "deleted",
+        ],
+    )
+
+    if not cleanup or df_report.empty:
+        return df_report
+
+    # Delete the duplicates in chunks, handling potential errors
+    ids = df_report["id"].to_list()
+    for i in range(0, len(ids), chunk_size):
+        chunk = ids[i:i + chunk_size]
+        print(f"Deleting {len(chunk)} duplicate devices...")
+        try:
+            nb.dcim.devices.delete(chunk)
+            df_report.loc[df_report["id"].isin(chunk), "deleted"] = True
+        except Exception as e:
+            logging.error(f"Error deleting devices {chunk}: {e}")
+
+    return df_report
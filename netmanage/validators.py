@@ -4,9 +4,11 @@
 Runs data collectors and stores them in a sqlite database.
 '''
 
+import os
 import pandas as pd
 import sqlite3 as sl
 from netmanage.helpers import helpers as hp
+from netmanage.helpers import parquet_store as ps
 
 
 def f5_node_availability(db_path: str, table: str) -> pd.DataFrame:
@@ -204,7 +206,8 @@ def validator_single_col(columns: list,
         A list of columns to return. One of the columns must be the one that
         is being used for validation.
     db_path : str
-        The path to the database.
+        The path to the database. This can also be the path to a Parquet
+        dataset (see helpers/parquet_store.py).
     expected : str
         The expected value of 'validation_col' (see below).
     identifier_col : str
@@ -224,15 +227,28 @@ def validator_single_col(columns: list,
     columns = [f'"{_}"' for _ in columns]
     return_cols = ',\n'.join(columns)
 
-    # Get the first and last timestamp for each unique device in the table
-    df_stamps = hp.get_first_last_timestamp(db_path, table, identifier_col)
+    # Get the first and last timestamp for each unique device in the table,
+    # and create the database connection. Parquet datasets are queried with
+    # DuckDB. Tables in delta mode only hold the latest snapshot, so their
+    # earlier snapshots are rebuilt from the delta table (see
+    # helpers/delta_store.py).
+    if os.path.isdir(db_path):
+        df_stamps = ps.get_first_last_timestamp(db_path, table, identifier_col)
+        con = ps.connect(db_path)
+        source = table
+    else:
+        df_stamps = hp.get_first_last_timestamp(db_path, table, identifier_col)
+        con = sl.connect(db_path)
+        source = hp.sql_snapshot_source(con, table)
+
+    def read_sql(query: str) -> pd.DataFrame:
+        if isinstance(con, sl.Connection):
+            return pd.read_sql(query, con)
+        return con.execute(query).fetchdf()
 
     # Create an empty dataframe to store the devices that have changed status
     df_diff = pd.DataFrame(data=list(), columns=columns)
 
-    # Create the database connection
-    con = sl.connect(db_path)
-
     # For each device, compare the most recent status to the original status.
     # This method deserves some explanation.
     #
@@ -257,19 +273,19 @@ def validator_single_col(columns: list,
         # This query compares the status of the device in the first timestamp
         # to the status in the second timestamp, and stores the results in a
         # dataframe.
-        query = f'''select {return_cols} from {table}
-                    where ("{validation_col}" = "{expected}"
-                        or "{validation_col}" != "{expected}")
-                      and timestamp = "{first_ts}"
-                      and {identifier_col} = "{unique}"
+        query = f'''select {return_cols} from {source}
+                    where ("{validation_col}" = '{expected}'
+                        or "{validation_col}" != '{expected}')
+                      and timestamp = '{first_ts}'
+                      and "{identifier_col}" = '{unique}'
                     except
-                    select {return_cols} from {table}
-                    where ("{validation_col}" = "{expected}"
-                        or "{validation_col}" != "{expected}")
-                      and timestamp = "{last_ts}"
-                      and {identifier_col} = "{unique}"
+                    select {return_cols} from {source}
+                    where ("{validation_col}" = '{expected}'
+                        or "{validation_col}" != '{expected}')
+                      and timestamp = '{last_ts}'
+                      and "{identifier_col}" = '{unique}'
                 '''
-        df_left = pd.read_sql(query, con)
+        df_left = read_sql(query)
 
         # If any results were returned, then we know that data in one of the
         # 'return_cols' has changed.
@@ -277,19 +293,19 @@ def validator_single_col(columns: list,
             # This query compares the status of the device in the last
             # timestamp to the status in the first timestamp, then stores the
             # result in a dataframe.
-            query = f'''select {return_cols} from {table}
-                        where ("{validation_col}" = "{expected}"
-                            or "{validation_col}" != "{expected}")
-                        and timestamp = "{last_ts}"
-                        and {identifier_col} = "{unique}"
+            query = f'''select {return_cols} from {source}
+                        where ("{validation_col}" = '{expected}'
+                            or "{validation_col}" != '{expected}')
+                        and timestamp = '{last_ts}'
+                        and "{identifier_col}" = '{unique}'
                         except
-                        select {return_cols} from {table}
-                        where ("{validation_col}" = "{expected}"
-                            or "{validation_col}" != "{expected}")
-                        and timestamp = "{first_ts}"
-                        and {identifier_col} = "{unique}"
+                        select {return_cols} from {source}
+                        where ("{validation_col}" = '{expected}'
+                            or "{validation_col}" != '{expected}')
+                        and timestamp = '{first_ts}'
+                        and "{identifier_col}" = '{unique}'
                     '''
-            df_right = pd.read_sql(query, con)
+            df_right = read_sql(query)
 
             # 'except' will return results if the data in any of the columns
             # changed, so it is necessary to compare the two statuses.
@@ -303,6 +319,8 @@ def validator_single_col(columns: list,
                 df_left[f'new_{validation_col}'] = new
                 df_diff = pd.concat([df_diff, df_left])
 
+    con.close()
+
     # Rename the validation column to 'original_{validation_col}'
     df_diff.rename(columns={validation_col: f'original_{validation_col}'},
                    inplace=True)
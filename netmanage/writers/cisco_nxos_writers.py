@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import ansible_runner
+from netmanage.helpers import execution_profiles as ep
 
 
 def nxos_create_vlan(vlan_id: str,
@@ -58,8 +59,8 @@ def nxos_create_vlan(vlan_id: str,
 
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
+                                suppress_env_files=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
     summary = dict()
     for host_event in runner.events:
@@ -117,8 +118,8 @@ def nxos_create_vrf(vrf_name: str,
 
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
+                                suppress_env_files=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
     summary = dict()
     for host_event in runner.events:
@@ -172,8 +173,8 @@ def nxos_delete_vlan(vlan_id: str,
 
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
+                                suppress_env_files=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
     summary = dict()
     for host_event in runner.events:
@@ -227,8 +228,8 @@ def nxos_delete_vrf(vrf_name: str,
 
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
+                                suppress_env_files=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
     summary = dict()
     for host_event in runner.events:
@@ -287,8 +288,8 @@ def nxos_toggle_feature(feature_name: str,
 
     runner = ansible_runner.run(private_data_dir=private_data_dir,
                                 playbook=playbook,
-                                extravars=extravars,
-                                suppress_env_files=True)
+                                suppress_env_files=True,
+                                **ep.get_runner_kwargs(host_group, extravars))
 
     summary = dict()
     for host_event in runner.events:
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+
+import sys
+
+sys.path.append(".")
+from netmanage.parsers import cisco_ios_parsers as cip  # noqa
+from netmanage.parsers import cisco_nxos_parsers as cnp  # noqa
+
+# The expected values are the output of the parsers before they were ported to
+# 'text_templates', for the same output. Differences are noted in the tests.
+
+OUIS = (
+    "00-50-56   (hex)\t\tVMware, Inc.\n"
+    "005056     (base 16)\t\tVMware, Inc.\n"
+    "\t\t\t\t3401 Hillview Avenue\n"
+    "\n"
+    "A0-F8-49   (hex)\t\tCisco Systems, Inc\n"
+    "A0F849     (base 16)\t\tCisco Systems, Inc\n"
+)
+
+NXOS_ARP = """Address         Age       MAC Address     Interface       Flags
+10.1.10.1       00:00:12  0050.56a1.0001  Vlan10
+10.1.10.25      00:12:41  0050.56a1.00b2  Vlan10          +
+10.1.20.5       00:03:09  a0f8.4910.7c3e  Vlan20          *
+192.168.255.2   00:00:38  00de.fb12.3c01  Ethernet1/49"""
+
+NXOS_CAM = """Legend:
+        * - primary entry, G - Gateway MAC, (R) - Routed MAC, O - Overlay MAC
+        age - seconds since last seen,+ - primary entry using vPC Peer-Link
+        (T) - True, (F) - False, C - ControlPlane MAC, ~ - vsan
+   VLAN     MAC Address      Type      age     Secure NTFY Ports
+---------+-----------------+--------+---------+------+----+-----------
+*   10     0050.56a1.0001   dynamic  0         F      F    Eth1/1
+*   10     0050.56a1.00b2   dynamic  0         F      F    Po10
++   20     a0f8.4910.7c3e   dynamic  0         F      F    vPC Peer-Link
+G    -     00de.fb12.3c01   static   -         F      F    sup-eth1(R)"""
+
+NXOS_INTERFACE_STATUS = """\
+Port          Name               Status    Vlan      Duplex  Speed   Type
+
+mgmt0         --                 connected routed    full    1000    --
+Eth1/1        web server 01      connected 10        full    10G     10Gbase-SR
+Eth1/2        --                 notconnec 1         auto    auto    10Gbase-SR
+Port          Name               Status    Vlan      Duplex  Speed   Type
+Po10          vpc peer link      connected trunk     full    10G     --"""
+
+NXOS_PORT_CHANNEL = """port-channel10
+    Last membership update is successful
+    2 ports in total, 2 ports up
+    First operational port is Ethernet1/49
+    Age of the port-channel is 12d:03h:44m:19s
+    Time since last bundle is 12d:03h:43m:58s
+    Last bundled member is Ethernet1/50
+    Ports:   Ethernet1/49    [active ] [up] *
+             Ethernet1/50    [active ] [up]"""
+
+NXOS_PORT_CHANNEL_NEW = """port-channel20
+    Last membership update is successful
+    1 port in total, 0 ports up
+    Age of the port-channel is 0d:00h:05m:12s
+    Time since last bundle is 0d:00h:05m:12s
+    Last unbundled member is Ethernet1/3
+    Ports:   Ethernet1/3     [on] [down]
+port-channel30
+    Last membership update is successful
+    10 ports in total, 10 ports up
+    First operational port is Ethernet1/11
+    Age of the port-channel is 1d:00h:00m:00s
+    Time since last bundle is 1d:00h:00m:00s
+    Last bundled member is Ethernet1/20
+    Ports:   Ethernet1/11    [active ] [up] *
+""" + "\n".join(
+    f"             Ethernet1/{n}    [active ] [up]" for n in range(12, 21)
+)
+
+NXOS_FEX = """FEX: 101 Description: FEX0101   state: Online
+  FEX version: 7.0(3)I7(8) [Switch version: 7.0(3)I7(8)]
+  Extender Serial: FOC1234X0AB
+  Extender Model: N2K-C2248TP-E-1GE,  Part No: 73-13671-02
+  Card Id: 149, Mac Addr: 00:2a:6a:11:22:02, Num Macs: 64
+  Module Sw Gen: 21  [Switch Sw Gen: 21]
+  pinning-mode: static    Max-links: 1
+  Fabric port for control traffic: Eth1/47
+  FCoE Admin: false
+  FCoE Oper: true
+  FCoE FEX AA Configured: false
+  Fabric interface state:
+    Po101 - Interface Up. State: Active
+    Eth1/47 - Interface Up. State: Active
+  Fex Port        State  Fabric Port
+       Eth101/1/1    Up       Po101
+Logs:
+FEX: 102 Description: FEX0102   state: Offline
+  Extender Serial: FOC1234X0CD
+  Fabric interface state:
+    Po102 - Interface Down. State: Configured
+Logs:"""
+
+IOS_ARP = """Protocol  Address          Age (min)  Hardware Addr   Type   Interface
+Internet  10.1.10.1               -   0050.56a1.0001  ARPA   Vlan10
+Internet  10.1.10.25             12   0050.56a1.00b2  ARPA   Vlan10
+Internet  10.1.20.5               3   a0f8.4910.7c3e  ARPA   GigabitEthernet0/1"""
+
+IOS_CAM = """Vlan    Mac Address       Type        Ports
+----    -----------       --------    -----
+   1    0050.56a1.0001    DYNAMIC     Gi1/0/1
+  10    0050.56a1.00b2    DYNAMIC     Gi1/0/2
+ All    0100.0ccc.cccc    STATIC      CPU
+Total Mac Addresses for this criterion: 3"""
+
+IOS_DESCRIPTIONS = """Interface                      Status         Protocol Description
+Gi1/0/1                        up             up       Uplink to core-01
+Gi1/0/2                        admin down     down
+Vl10                           up             up       Users VLAN"""
+
+
+def write_ouis(tmp_path):
+    """Write an 'ouis.txt' file, so the vendors are not downloaded."""
+    (tmp_path / "ouis.txt").write_text(OUIS)
+    return str(tmp_path)
+
+
+def test_nxos_arp_table(tmp_path):
+    """Test parsing the text output of 'show ip arp vrf all'."""
+    records = [("sw1", "show ip arp vrf all", NXOS_ARP)]
+    df = cnp.nxos_parse_arp_table(records, write_ouis(tmp_path))
+
+    assert df.columns.to_list() == [
+        "device",
+        "ip_address",
+        "age",
+        "mac_address",
+        "interface",
+        "vendor",
+    ]
+    assert df.drop(columns="vendor").values.tolist() == [
+        ["sw1", "10.1.10.1", "00:00:12", "0050.56a1.0001", "Vlan10"],
+        ["sw1", "10.1.10.25", "00:12:41", "0050.56a1.00b2", "Vlan10"],
+        ["sw1", "10.1.20.5", "00:03:09", "a0f8.4910.7c3e", "Vlan20"],
+        ["sw1", "192.168.255.2", "00:00:38", "00de.fb12.3c01", "Ethernet1/49"],
+    ]
+    assert df["vendor"].to_list() == [
+        "VMware, Inc.",
+        "VMware, Inc.",
+        "Cisco Systems, Inc",
+        "unknown",
+    ]
+
+
+def test_nxos_cam_table(tmp_path):
+    """Test parsing the text output of 'show mac address-table'."""
+    records = [("sw1", "show mac address-table", NXOS_CAM)]
+    df = cnp.nxos_parse_cam_table(records, write_ouis(tmp_path))
+
+    assert df.columns.to_list() == ["device", "interface", "mac", "vlan", "vendor"]
+    assert df.values.tolist() == [
+        ["sw1", "Eth1/1", "0050.56a1.0001", "10", "VMware, Inc."],
+        ["sw1", "Po10", "0050.56a1.00b2", "10", "VMware, Inc."],
+        ["sw1", "Peer-Link", "a0f8.4910.7c3e", "20", "Cisco Systems, Inc"],
+        ["sw1", "sup-eth1(R)", "00de.fb12.3c01", "-", "unknown"],
+    ]
+
+
+def test_nxos_interface_status():
+    """Test parsing the text output of 'show interface status'."""
+    records = [("sw1", "show interface status", NXOS_INTERFACE_STATUS)]
+    df = cnp.nxos_parse_interface_status(records)
+
+    assert df.columns.to_list() == [
+        "device",
+        "interface",
+        "status",
+        "vlan",
+        "duplex",
+        "speed",
+        "type",
+    ]
+    assert df.values.tolist() == [
+        # The old parser dropped the first interface
+        ["sw1", "mgmt0", "connected", "routed", "full", "1000", "--"],
+        ["sw1", "Eth1/1", "connected", "10", "full", "10G", "10Gbase-SR"],
+        ["sw1", "Eth1/2", "notconnec", "1", "auto", "auto", "10Gbase-SR"],
+        # The repeated header is skipped
+        ["sw1", "Po10", "connected", "trunk", "full", "10G", "--"],
+    ]
+
+
+def test_nxos_port_channel_data():
+    """Test parsing the text output of 'show port-channel database'."""
+    records = [("sw1", "show port-channel database", NXOS_PORT_CHANNEL)]
+    df = cnp.nxos_parse_port_channel_data(records)
+
+    assert df.to_dict("records") == [
+        {
+            "device": "sw1",
+            "interface": "port-channel10",
+            "total_ports": "2",
+            "up_ports": "2",
+            "age": "12d:03h:44m:19s",
+            "port_1": "Ethernet1/49    [active ] [up] *",
+            "port_2": "Ethernet1/50    [active ] [up]",
+            "port_3": "",
+            "port_4": "",
+            "port_5": "",
+            "port_6": "",
+            "port_7": "",
+            "port_8": "",
+            "first_operational_port": "Ethernet1/49",
+            "last_bundled_member": "Ethernet1/50",
+            "last_unbundled_member": "",
+        }
+    ]
+
+
+def test_nxos_port_channel_data_changes():
+    """Test the port-channels that the old parser did not handle."""
+    records = [("sw1", "show port-channel database", NXOS_PORT_CHANNEL_NEW)]
+    df = cnp.nxos_parse_port_channel_data(records).set_index("interface")
+
+    # The old parser left the counts empty for '1 port in total'
+    assert df.loc["port-channel20", "total_ports"] == "1"
+    assert df.loc["port-channel20", "up_ports"] == "0"
+    assert df.loc["port-channel20", "port_1"] == "Ethernet1/3     [on] [down]"
+    assert df.loc["port-channel20", "last_unbundled_member"] == "Ethernet1/3"
+
+    # The old parser raised an IndexError for more than 8 members. Now the
+    # first 8 members are kept.
+    ports = df.loc["port-channel30", [f"port_{n}" for n in range(1, 9)]]
+    assert [p.split()[0] for p in ports] == [f"Ethernet1/{n}" for n in range(11, 19)]
+    assert df.loc["port-channel30", "total_ports"] == "10"
+
+
+def test_nxos_fexes_table(tmp_path):
+    """Test parsing the output of 'show fex detail'."""
+    records = [
+        ("sw1", "show fex detail", NXOS_FEX),
+        ("sw2", "show fex detail", NXOS_FEX),
+    ]
+    df = cnp.nxos_parse_fexes_table(records, str(tmp_path))
+
+    # The rows are in device order. The old parser reversed the devices.
+    assert df[["device", "fex"]].values.tolist() == [
+        ["sw1", "101"],
+        ["sw1", "102"],
+        ["sw2", "101"],
+        ["sw2", "102"],
+    ]
+    assert df.loc[0].to_dict() == {
+        "device": "sw1",
+        "fex": "101",
+        "description": "FEX0101",
+        "state": "Online",
+        "fex_version": "7.0(3)",
+        "switch_version": "7.0(3)",
+        "fex_interim_version": None,
+        "switch_interim_version": None,
+        "extender_serial": "FOC1234X0AB",
+        "extender_model": "N2K-C2248TP-E-1GE",
+        "part_no": "73-13671-02",
+        "card_id": "149",
+        "mac_addr": "00:2a:6a:11:22:02",
+        "num_macs": "64",
+        "module_sw_gen": "21",
+        "switch_sw_gen": "21",
+        "post_level": None,
+        "pinning_mode": None,
+        "max_links": "1",
+        "fcoe_admin": "false",
+        "fabric_port_for_control_traffic": "Eth1/47",
+        "fcoe_oper": "true",
+        "fcoe_fex_aa_configured": "false",
+        "fabric_interface_state": "Po101 - Interface Up. State: Active;     "
+        "Eth1/47 - Interface Up. State: Active",
+    }
+    # Fields that a FEX does not have are None
+    assert df.loc[1, "extender_model"] is None
+    assert df.loc[1, "fabric_interface_state"] == (
+        "Po102 - Interface Down. State: Configured"
+    )
+
+
+def test_ios_arp_table(tmp_path):
+    """Test parsing the output of 'show ip arp'."""
+    incomplete = "\nInternet  10.1.20.9               0   Incomplete      ARPA"
+    records = [("sw1", "show ip arp", IOS_ARP + incomplete)]
+    df = cip.ios_parse_arp_table(records, write_ouis(tmp_path))
+
+    assert df.columns.to_list() == [
+        "device",
+        "protocol",
+        "address",
+        "age",
+        "mac",
+        "inf_type",
+        "interface",
+        "vendor",
+    ]
+    assert df.drop(columns=["device", "protocol", "vendor"]).values.tolist() == [
+        ["10.1.10.1", "-", "0050.56a1.0001", "ARPA", "Vlan10"],
+        ["10.1.10.25", "12", "0050.56a1.00b2", "ARPA", "Vlan10"],
+        ["10.1.20.5", "3", "a0f8.4910.7c3e", "ARPA", "GigabitEthernet0/1"],
+        # The old parser set the interface of incomplete entries to NaN
+        ["10.1.20.9", "0", "Incomplete", "ARPA", ""],
+    ]
+    assert df["device"].to_list() == ["sw1"] * 4
+    assert df["protocol"].to_list() == ["Internet"] * 4
+    assert df["vendor"].to_list() == [
+        "VMware, Inc.",
+        "VMware, Inc.",
+        "Cisco Systems, Inc",
+        "unknown",
+    ]
+
+
+def test_ios_cam_table(tmp_path):
+    """Test parsing the output of 'show mac address-table | begin Vlan'."""
+    records = [("sw1", "show mac address-table | begin Vlan", IOS_CAM)]
+    df = cip.ios_parse_cam_table(records, write_ouis(tmp_path))
+
+    assert df.columns.to_list() == [
+        "device",
+        "vlan",
+        "mac",
+        "inf_type",
+        "ports",
+        "vendor",
+    ]
+    assert df.values.tolist() == [
+        ["sw1", "1", "0050.56a1.0001", "DYNAMIC", "Gi1/0/1", "VMware, Inc."],
+        ["sw1", "10", "0050.56a1.00b2", "DYNAMIC", "Gi1/0/2", "VMware, Inc."],
+        ["sw1", "All", "0100.0ccc.cccc", "STATIC", "CPU", "unknown"],
+    ]
+
+
+def test_ios_interface_descriptions():
+    """Test parsing the output of 'show interface description'."""
+    records = [("sw1", "show interface description", IOS_DESCRIPTIONS)]
+    df = cip.ios_parse_interface_descriptions(records)
+
+    assert df.columns.to_list() == ["device", "interface", "description"]
+    assert df.values.tolist() == [
+        ["sw1", "Gi1/0/1", "Uplink to core-01"],
+        ["sw1", "Gi1/0/2", ""],
+        ["sw1", "Vl10", "Users VLAN"],
+    ]
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import sys
+
+sys.path.append(".")
+from netmanage.helpers import columnar as cb  # noqa
+
+# Records whose keys vary, like Meraki devices of different types
+RECORDS = [
+    {"name": "sw1", "model": "MS250"},
+    {"name": "ap1", "model": "MR46", "lanIp": "10.0.0.2"},
+    {"name": "fw1"},
+    {"model": "MX85", "wan1Ip": "192.0.2.1", "name": "fw2"},
+    {"name": "ap2", "lanIp": "10.0.0.3"},
+]
+
+
+def test_sparse_keys():
+    """Test that keys missing from some records are filled with None."""
+    builder = cb.ColumnBuilder(["device"])
+    builder.add_many(RECORDS, device="org1")
+
+    columns = builder.to_dict()
+    assert list(columns) == ["device", "name", "model", "lanIp", "wan1Ip"]
+    assert columns["device"] == ["org1"] * 5
+    assert columns["lanIp"] == [None, "10.0.0.2", None, None, "10.0.0.3"]
+    assert columns["wan1Ip"] == [None, None, None, "192.0.2.1", None]
+
+    # The result is the same as creating the DataFrame from the records
+    df = builder.to_frame()
+    assert len(df) == len(builder) == 5
+    pd.testing.assert_frame_equal(df.drop(columns="device"), pd.DataFrame(RECORDS))
+
+
+def test_fill_and_exclude():
+    """Test the 'fill' and 'exclude' options, and empty records."""
+    builder = cb.ColumnBuilder(["device"], fill="", exclude=["lanIp"])
+    builder.add(RECORDS[0], device="org1")
+    builder.add(None, device="org2")
+    builder.add(RECORDS[3], device="org1")
+
+    assert builder.to_dict() == {
+        "device": ["org1", "org2", "org1"],
+        "name": ["sw1", "", "fw2"],
+        "model": ["MS250", "", "MX85"],
+        "wan1Ip": ["", "", "192.0.2.1"],
+    }
+
+
+def test_fields_override_record():
+    """Test that the additional fields override the record's keys."""
+    builder = cb.ColumnBuilder()
+    builder.add({"device": "old", "name": "sw1"}, device="new")
+    assert builder.to_dict() == {"device": ["new"], "name": ["sw1"]}
+
+
+def test_no_records():
+    """Test that the initial columns are created without any records."""
+    df = cb.ColumnBuilder(["device", "name"]).to_frame()
+    assert df.columns.to_list() == ["device", "name"]
+    assert df.empty
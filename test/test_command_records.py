@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import pytest
+import sys
+
+sys.path.append(".")
+from netmanage.helpers import command_records as cr  # noqa
+from netmanage.parsers import cisco_ios_parsers as cip  # noqa
+from netmanage.parsers import cisco_nxos_parsers as cnp  # noqa
+
+SHOW_VRF = """\
+  Name                             Default RD            Protocols   Interfaces
+  MGMT                             <not set>             ipv4        Gi0/0
+  RED                              65000:1               ipv4,ipv6   Vl10
+                                                                     Vl20"""
+
+SHOW_ARP = """Protocol  Address          Age (min)  Hardware Addr   Type   Interface
+Internet  10.0.0.1                -   0011.2233.4455  ARPA   Vlan10"""
+
+SHOW_VPC_JSON = {
+    "vpc-domain-id": "1",
+    "vpc-peer-status": "peer-ok",
+    "vpc-peer-keepalive-status": "peer-alive",
+    "vpc-peer-consistency-status": "SUCCESS",
+    "vpc-role": "primary",
+    "peer-gateway": "1",
+}
+
+SHOW_VPC_TEXT = """vPC domain id                     : 1
+Peer status                       : peer adjacency formed ok
+vPC keep-alive status             : peer is alive
+Configuration consistency status  : success
+vPC role                          : primary
+Peer Gateway                      : Enabled"""
+
+
+def test_replay_mixed_records(tmp_path):
+    """Test replaying a file with the output of more than one command."""
+    path = str(tmp_path / "records.jsonl")
+    records = [
+        cr.CommandRecord("rtr1", "show vrf", SHOW_VRF),
+        cr.CommandRecord("rtr1", "show ip arp", SHOW_ARP),
+        cr.CommandRecord("rtr2", "show vrf", SHOW_VRF),
+    ]
+    cr.write_records(records, path)
+    assert cr.read_records(path) == records
+
+    # The parser cannot tell which records are its own
+    with pytest.raises(ValueError, match="more than one command"):
+        cip.parse_vrfs(cr.read_records(path))
+
+    df = cip.parse_vrfs(cr.read_records(path, "show vrf"))
+    assert sorted(df["device"]) == ["rtr1", "rtr1", "rtr2", "rtr2"]
+    assert sorted(set(df["Name"])) == ["MGMT", "RED"]
+
+    records = cr.read_records(path, "show ip arp")
+    assert list(cr.iter_command_output(records)) == [("rtr1", SHOW_ARP)]
+
+
+def test_json_and_fallback_records():
+    """Test that a '| json' command and its text fallback can be mixed."""
+    records = [
+        ("sw1", "show vpc brief | json", SHOW_VPC_JSON),
+        (
+            "sw2",
+            'show vpc brief | begin "vPC domain id" | end "vPC Peer-link status"',
+            SHOW_VPC_TEXT,
+        ),
+    ]
+    df = cnp.nxos_parse_vpc_state(records)
+    assert df["device"].to_list() == ["sw1", "sw2"]
+
+    # Only the records for the command are used
+    records.append(("sw3", "show vrf", ""))
+    assert list(cr.iter_command_output(records, "show vpc brief")) == [
+        ("sw1", SHOW_VPC_JSON),
+        ("sw2", SHOW_VPC_TEXT),
+    ]
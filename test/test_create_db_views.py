@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import sys
+
+sys.path.append(".")
+from netmanage import run_collectors as rc  # noqa
+from netmanage.helpers import helpers as hp  # noqa
+
+TIMESTAMP = "2026-01-01_1000"
+
+
+def test_combined_bgp_neighbors(tmp_path):
+    """Test that the combined views are built from the normalized tables."""
+    db_path = str(tmp_path / "test.db")
+    rc.add_to_db(
+        "IOS_INTERFACE_IP_ADDRESSES",
+        pd.DataFrame(
+            {
+                "device": ["rtr1", "rtr2", "rtr1"],
+                "interface": ["Gi0/0", "Gi0/1", "Gi0/2"],
+                "ip": ["10.0.0.1", "10.0.0.2", "2001:db8::1"],
+                "cidr": ["30", "30", "64"],
+                "vrf": ["None", "RED", "None"],
+                "subnet": ["255.255.255.252", "255.255.255.252", ""],
+                "network_ip": ["10.0.0.0", "10.0.0.0", "2001:db8::"],
+                "broadcast_ip": ["10.0.0.3", "10.0.0.3", ""],
+            }
+        ),
+        TIMESTAMP,
+        db_path,
+    )
+    rc.add_to_db(
+        "IOS_BGP_NEIGHBORS",
+        pd.DataFrame(
+            {
+                "device": ["rtr1", "rtr1"],
+                "bgp_neighbor": ["10.0.0.2", "2001:db8::2"],
+                "vrf": ["default", "default"],
+                "neighbor_id": ["2.2.2.2", "2.2.2.2"],
+                "remote_as": ["65002", "65002"],
+                "bgp_state": ["Established", "Established"],
+                "local_host": ["10.0.0.1:179", "2001:db8::1"],
+            }
+        ),
+        TIMESTAMP,
+        db_path,
+    )
+    rc.add_to_db(
+        "PANOS_BGP_NEIGHBORS",
+        pd.DataFrame(
+            {
+                "device": ["fw1"],
+                "@peer": ["peer1"],
+                "@vr": ["vr:default"],
+                "peer-router-id": ["3.3.3.3"],
+                "remote-as": ["65003"],
+                "status": ["Established"],
+                "peer-address": ["10.0.0.1:179"],
+                "local-address": ["10.0.0.9:33000"],
+            }
+        ),
+        TIMESTAMP,
+        db_path,
+    )
+
+    con = hp.connect_to_db(db_path)
+    df = pd.read_sql(
+        "SELECT * FROM combined_bgp_neighbors ORDER BY device, local_host", con
+    )
+    df_prefixes = pd.read_sql("SELECT * FROM combined_prefixes ORDER BY device", con)
+    con.close()
+    df = df.astype(object).where(df.notna(), None)
+
+    assert df.to_dict("records") == [
+        {
+            "device": "fw1",
+            "local_host": "10.0.0.9",
+            "bgp_neighbor": "rtr1",
+            "vrf": "vr:default",
+            "neighbor_id": "3.3.3.3",
+            "remote_as": "65003",
+            "bgp_state": "Established",
+            "local_interface": None,
+            "remote_interface": "Gi0/0",
+            "remote_vrf": "",
+        },
+        {
+            "device": "rtr1",
+            # The port is removed, so the local interface is found
+            "local_host": "10.0.0.1",
+            "bgp_neighbor": "rtr2",
+            "vrf": "default",
+            "neighbor_id": "2.2.2.2",
+            "remote_as": "65002",
+            "bgp_state": "Established",
+            "local_interface": "Gi0/0",
+            "remote_interface": "Gi0/1",
+            "remote_vrf": "RED",
+        },
+        {
+            "device": "rtr1",
+            # IPv6 addresses are not split at their last colon
+            "local_host": "2001:db8::1",
+            "bgp_neighbor": None,
+            "vrf": "default",
+            "neighbor_id": "2.2.2.2",
+            "remote_as": "65002",
+            "bgp_state": "Established",
+            "local_interface": "Gi0/2",
+            "remote_interface": None,
+            "remote_vrf": None,
+        },
+    ]
+
+    assert df_prefixes[["device", "vrf", "prefix"]].values.tolist() == [
+        ["rtr1", "", "10.0.0.0/30"],
+        ["rtr1", "", "2001:db8::/64"],
+        ["rtr2", "RED", "10.0.0.0/30"],
+    ]
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import sys
+
+sys.path.append(".")
+from netmanage import run_collectors as rc  # noqa
+from netmanage.helpers import delta_store as ds  # noqa
+from netmanage import validators as vl  # noqa
+from netmanage.helpers import helpers as hp  # noqa
+
+
+def make_vlans(rows):
+    """Create an 'NXOS_VLANS' result from (device, id, name) tuples."""
+    return pd.DataFrame(rows, columns=["device", "id", "name"])
+
+
+def test_write_delta_hostgroups(tmp_path):
+    """Test that writing one hostgroup does not close the rows of another."""
+    db_path = str(tmp_path / "test.db")
+
+    counts = ds.write_delta(
+        db_path,
+        "NXOS_VLANS",
+        make_vlans([("a1", "10", "users"), ("a2", "10", "users")]),
+        "2026-01-01_1000",
+        hostgroup="group_a",
+    )
+    assert counts == {"inserted": 2, "changed": 0, "deleted": 0}
+
+    counts = ds.write_delta(
+        db_path,
+        "NXOS_VLANS",
+        make_vlans([("b1", "20", "servers")]),
+        "2026-01-01_1000",
+        hostgroup="group_b",
+    )
+    assert counts == {"inserted": 1, "changed": 0, "deleted": 0}
+
+    df = ds.read_snapshot(db_path, "NXOS_VLANS", "2026-01-01_1000")
+    assert sorted(df["device"].to_list()) == ["a1", "a2", "b1"]
+
+    df = ds.read_snapshot(db_path, "NXOS_VLANS", "2026-01-01_1000", "group_a")
+    assert sorted(df["device"].to_list()) == ["a1", "a2"]
+
+
+def test_write_delta_changes(tmp_path):
+    """Test that changes and deletions are only applied to one hostgroup."""
+    db_path = str(tmp_path / "test.db")
+
+    ds.write_delta(
+        db_path,
+        "NXOS_VLANS",
+        make_vlans([("a1", "10", "users"), ("a2", "10", "users")]),
+        "2026-01-01_1000",
+        hostgroup="group_a",
+    )
+    ds.write_delta(
+        db_path,
+        "NXOS_VLANS",
+        make_vlans([("b1", "20", "servers")]),
+        "2026-01-01_1000",
+        hostgroup="group_b",
+    )
+
+    # Rename the VLAN on 'a1' and remove 'a2'.
+    counts = ds.write_delta(
+        db_path,
+        "NXOS_VLANS",
+        make_vlans([("a1", "10", "staff")]),
+        "2026-01-02_1000",
+        hostgroup="group_a",
+    )
+    assert counts == {"inserted": 0, "changed": 1, "deleted": 1}
+
+    df = ds.read_snapshot(db_path, "NXOS_VLANS", "2026-01-02_1000")
+    assert sorted(zip(df["device"], df["name"])) == [
+        ("a1", "staff"),
+        ("b1", "servers"),
+    ]
+    assert df["timestamp"].unique().tolist() == ["2026-01-02_1000"]
+
+    # The earlier snapshot can still be reconstructed.
+    df = ds.read_snapshot(db_path, "NXOS_VLANS", "2026-01-01_1000")
+    assert len(df) == 3
+
+    df = ds.get_changes(db_path, "NXOS_VLANS", "2026-01-01_1000", "2026-01-02_1000")
+    changes = sorted(zip(df["change"], df["device"], df["name"]))
+    assert changes == [
+        ("added", "a1", "staff"),
+        ("removed", "a1", "users"),
+        ("removed", "a2", "users"),
+    ]
+    assert set(df["hostgroup"]) == {"group_a"}
+
+    df = ds.get_changes(
+        db_path, "NXOS_VLANS", "2026-01-01_1000", "2026-01-02_1000", "group_b"
+    )
+    assert df.empty
+
+    assert ds.get_delta_timestamps(db_path, "NXOS_VLANS") == [
+        "2026-01-01_1000",
+        "2026-01-02_1000",
+    ]
+
+
+def test_add_to_db_delta(tmp_path):
+    """Test that delta mode only keeps the latest snapshot of each hostgroup in
+    the main table, and that earlier snapshots are rebuilt from the deltas."""
+    db_path = str(tmp_path / "test.db")
+
+    writes = [
+        ("2026-01-01_1000", "group_a", [("a1", "10", "users"), ("a2", "10", "users")]),
+        ("2026-01-01_1100", "group_b", [("b1", "20", "servers")]),
+        ("2026-01-02_1000", "group_a", [("a1", "10", "staff"), ("a2", "10", "users")]),
+    ]
+    for timestamp, hostgroup, rows in writes:
+        rc.add_to_db(
+            "NXOS_VLANS",
+            make_vlans(rows),
+            timestamp,
+            db_path,
+            method="delta",
+            hostgroup=hostgroup,
+        )
+
+    # Only the latest snapshot of each hostgroup is stored in full
+    con = hp.connect_to_db(db_path)
+    df = pd.read_sql("SELECT * FROM NXOS_VLANS", con)
+    con.close()
+    assert sorted(zip(df["timestamp"], df["device"], df["name"])) == [
+        ("2026-01-01_1100", "b1", "servers"),
+        ("2026-01-02_1000", "a1", "staff"),
+        ("2026-01-02_1000", "a2", "users"),
+    ]
+
+    # The readers rebuild the earlier snapshots
+    assert hp.get_snapshot_timestamps(db_path, "NXOS_VLANS") == [
+        "2026-01-01_1000",
+        "2026-01-01_1100",
+        "2026-01-02_1000",
+    ]
+    df = hp.snapshot_at(db_path, "NXOS_VLANS", "2026-01-01_1059")
+    assert sorted(zip(df["device"], df["name"])) == [
+        ("a1", "users"),
+        ("a2", "users"),
+    ]
+    df = hp.snapshots_between(
+        db_path, "NXOS_VLANS", "2026-01-01_0000", "2026-01-02_0000"
+    )
+    assert df["timestamp"].to_list() == ["2026-01-01_1000"] * 2 + ["2026-01-01_1100"]
+    assert df.columns.to_list() == ["timestamp", "device", "id", "name"]
+
+    df = hp.get_first_last_timestamp(db_path, "NXOS_VLANS", "device")
+    assert df.values.tolist() == [
+        ["a1", "2026-01-01_1000", "2026-01-02_1000"],
+        ["a2", "2026-01-01_1000", "2026-01-02_1000"],
+        ["b1", "2026-01-01_1100", "2026-01-01_1100"],
+    ]
+
+    # The validators compare the first and last snapshots
+    df = vl.validator_single_col(
+        ["device", "id", "name"], db_path, "users", "device", "NXOS_VLANS", "name"
+    )
+    assert df[["device", "original_name", "new_name"]].values.tolist() == [
+        ["a1", "users", "staff"]
+    ]
+
+
+def test_add_to_db_delta_after_append(tmp_path):
+    """Test that snapshots written before switching to delta mode are kept."""
+    db_path = str(tmp_path / "test.db")
+
+    rc.add_to_db(
+        "NXOS_VLANS",
+        make_vlans([("a1", "10", "users")]),
+        "2026-01-01_1000",
+        db_path,
+        hostgroup="group_a",
+    )
+    for timestamp in ["2026-01-02_1000", "2026-01-03_1000"]:
+        rc.add_to_db(
+            "NXOS_VLANS",
+            make_vlans([("a1", "10", timestamp)]),
+            timestamp,
+            db_path,
+            method="delta",
+            hostgroup="group_a",
+        )
+
+    df = hp.snapshots_between(
+        db_path, "NXOS_VLANS", "2026-01-01_0000", "2026-12-31_0000"
+    )
+    assert df[["timestamp", "name"]].values.tolist() == [
+        ["2026-01-01_1000", "users"],
+        ["2026-01-02_1000", "2026-01-02_1000"],
+        ["2026-01-03_1000", "2026-01-03_1000"],
+    ]
+    assert hp.latest_snapshot(db_path, "NXOS_VLANS")["name"].to_list() == [
+        "2026-01-03_1000"
+    ]
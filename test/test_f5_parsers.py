@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+
+import sys
+
+sys.path.append(".")
+from netmanage.helpers import text_templates as tt  # noqa
+from netmanage.parsers import f5_parsers as f5p  # noqa
+
+SELF_IPS = """net self /Common/SELF1 {
+    address 10.0.0.1/24
+    allow-service {
+        default
+    }
+    traffic-group /Common/traffic-group-local-only
+    vlan /Common/VLAN1
+}
+net self /Common/SELF2 {
+    address 10.0.1.1/24
+    allow-service {
+        tcp:ssh
+        tcp:443
+    }
+    traffic-group /Common/traffic-group-1
+    vlan /Common/VLAN2
+}"""
+
+VLANS = """net vlan /Common/VLAN1 {
+    if-index 96
+    interfaces {
+        1.1 {
+            tagged
+        }
+        1.2 { }
+    }
+    tag 100
+}
+net interface 1.0 {
+    media-active 1000SX-FD
+    module-description "F5 Qualified Optic"
+    vendor "F5 NETWORKS INC."
+}"""
+
+# The output of the 'ast.literal_eval'-based converter that parse_tmsh_list
+# replaced, for the output above
+SELF_IPS_EXPECTED = {
+    "net self /Common/SELF1": {
+        "address": "10.0.0.1/24",
+        "allow-service": ["default"],
+        "traffic-group": "/Common/traffic-group-local-only",
+        "vlan": "/Common/VLAN1",
+    },
+    "net self /Common/SELF2": {
+        "address": "10.0.1.1/24",
+        "allow-service": ["tcp:ssh", "tcp:443"],
+        "traffic-group": "/Common/traffic-group-1",
+        "vlan": "/Common/VLAN2",
+    },
+}
+
+VLANS_EXPECTED = {
+    "net vlan /Common/VLAN1": {
+        "if-index": "96",
+        "interfaces": {"1.1": ["tagged"], "1.2": []},
+        "tag": "100",
+    },
+    "net interface 1.0": {
+        "media-active": "1000SX-FD",
+        "module-description": "F5 Qualified Optic",
+        "vendor": "F5 NETWORKS INC.",
+    },
+}
+
+
+def test_parse_tmsh_list():
+    """Test that the parser returns the same result as the old converter."""
+    assert f5p.parse_tmsh_list(SELF_IPS) == SELF_IPS_EXPECTED
+    assert f5p.parse_tmsh_list(VLANS) == VLANS_EXPECTED
+
+
+def test_iter_tmsh_objects():
+    """Test that the objects are yielded in order, from text or lines."""
+    objects = list(f5p.iter_tmsh_objects(SELF_IPS.splitlines()))
+    assert objects == list(SELF_IPS_EXPECTED.items())
+
+
+def test_parse_tmsh_list_extensions():
+    """Test the syntax that the old converter rejected."""
+    output = """ltm virtual /Common/VS1 {
+    description "say \\"hi\\""
+    disabled
+    vlans { /Common/VLAN1 /Common/VLAN2 }
+    profiles {
+        /Common/http { }
+        /Common/tcp {
+            context all
+        }
+    }
+}
+net interface 2.0 { }"""
+    assert f5p.parse_tmsh_list(output) == {
+        "ltm virtual /Common/VS1": {
+            "description": 'say "hi"',
+            "disabled": None,
+            "vlans": ["/Common/VLAN1", "/Common/VLAN2"],
+            "profiles": {"/Common/http": [], "/Common/tcp": {"context": "all"}},
+        },
+        "net interface 2.0": [],
+    }
+
+
+SHOW_LTM_POOL = """
+---------------------------------------------------------------------
+Ltm::Pool: /Common/POOL1
+---------------------------------------------------------------------
+Status
+  Availability : available
+  State        : enabled
+  Reason       : The pool is available
+  Monitor      : /Common/http
+
+  Minimum Active Members : 0
+  Current Active Members : 2
+  Available Members      : 2
+  Total Members          : 2
+
+Traffic                            ServerSide
+  Bits In                                   0
+---------------------------------------------------------------------
+Ltm::Pool: /Common/app.app/POOL2
+---------------------------------------------------------------------
+Status
+  Availability : offline
+  State        : enabled
+  Reason       : The children pool member(s) are down
+  Monitor      : /Common/tcp
+
+  Minimum Active Members : 0
+  Current Active Members : 0
+  Available Members      : 0
+  Total Members          : 1
+"""
+
+SHOW_LTM_POOL_MEMBERS = """
+---------------------------------------------------------------------
+Ltm::Pool: /Common/POOL1
+---------------------------------------------------------------------
+Status
+  Availability : available
+  State        : enabled
+  | Ltm::Pool Member: 10.0.0.1:80
+  | -----------------------------------------------------------------
+  | Status
+  |   Availability : available
+  |   State        : enabled
+  |   Reason       : Pool member is available
+  |
+  | Ltm::Pool Member: 10.0.0.2:80
+  | -----------------------------------------------------------------
+  | Status
+  |   Availability : offline
+  |   State        : enabled
+---------------------------------------------------------------------
+Ltm::Pool: /Common/EMPTY
+---------------------------------------------------------------------
+Status
+  Availability : unknown
+"""
+
+
+def test_tmsh_records_pools():
+    """Test parsing the pools in 'show ltm pool' output."""
+    records = [("ltm1", "show ltm pool recursive /*/*", SHOW_LTM_POOL)]
+    df = tt.parse_output(records, f5p.LTM_POOL_AVAILABILITY)
+
+    assert df.columns.to_list() == [
+        "device",
+        "partition",
+        "pool",
+        "availability",
+        "state",
+        "total",
+        "avail",
+        "cur",
+        "min",
+        "reason",
+    ]
+    assert df.to_dict("records") == [
+        {
+            "device": "ltm1",
+            "partition": "Common",
+            "pool": "POOL1",
+            "availability": "available",
+            "state": "enabled",
+            "total": "2",
+            "avail": "2",
+            "cur": "2",
+            "min": "0",
+            "reason": "The pool is available",
+        },
+        {
+            "device": "ltm1",
+            "partition": "Common",
+            # The folder is not part of the name
+            "pool": "POOL2",
+            "availability": "offline",
+            "state": "enabled",
+            "total": "1",
+            "avail": "0",
+            "cur": "0",
+            "min": "0",
+            "reason": "The children pool member(s) are down",
+        },
+    ]
+
+
+def test_tmsh_records_members():
+    """Test that there is one row per member, and pools without members are
+    left out."""
+    data = f5p.LTM_POOL_MEMBER_AVAILABILITY.parse(SHOW_LTM_POOL_MEMBERS)
+
+    assert data == {
+        "partition": ["Common", "Common"],
+        "pool_name": ["POOL1", "POOL1"],
+        "pool_member": ["10.0.0.1:80", "10.0.0.2:80"],
+        "pool_member_state": ["available", "offline"],
+    }
+
+
+# The responses of the iControl REST API for the objects above
+
+REST_SELF_IPS = {
+    "kind": "tm:net:self:selfcollectionstate",
+    "selfLink": "https://localhost/mgmt/tm/net/self?ver=15.1.8",
+    "items": [
+        {
+            "kind": "tm:net:self:selfstate",
+            "name": "SELF1",
+            "partition": "Common",
+            "fullPath": "/Common/SELF1",
+            "generation": 1,
+            "selfLink": "https://localhost/mgmt/tm/net/self/~Common~SELF1",
+            "address": "10.0.0.1/24",
+            "allowService": ["default"],
+            "trafficGroup": "/Common/traffic-group-local-only",
+            "trafficGroupReference": {
+                "link": "https://localhost/mgmt/tm/cm/traffic-group/"
+                "~Common~traffic-group-local-only"
+            },
+            "vlan": "/Common/VLAN1",
+            "vlanReference": {
+                "link": "https://localhost/mgmt/tm/net/vlan/~Common~VLAN1"
+            },
+        },
+        {
+            "kind": "tm:net:self:selfstate",
+            "name": "SELF2",
+            "partition": "Common",
+            "fullPath": "/Common/SELF2",
+            "generation": 1,
+            "selfLink": "https://localhost/mgmt/tm/net/self/~Common~SELF2",
+            "address": "10.0.1.1/24",
+            "allowService": ["tcp:ssh", "tcp:443"],
+            "trafficGroup": "/Common/traffic-group-1",
+            "vlan": "/Common/VLAN2",
+        },
+    ],
+}
+
+REST_VLANS = {
+    "items": [
+        {
+            "kind": "tm:net:vlan:vlanstate",
+            "name": "VLAN1",
+            "partition": "Common",
+            "fullPath": "/Common/VLAN1",
+            "ifIndex": 96,
+            "tag": 100,
+            "interfacesReference": {
+                "link": "https://localhost/mgmt/tm/net/vlan/~Common~VLAN1/interfaces",
+                "isSubcollection": True,
+                "items": [
+                    {
+                        "kind": "tm:net:vlan:interfaces:interfacesstate",
+                        "name": "1.1",
+                        "fullPath": "1.1",
+                        "generation": 1,
+                        "selfLink": "https://localhost/mgmt/tm/net/vlan/"
+                        "~Common~VLAN1/interfaces/1.1",
+                        "tagged": True,
+                    },
+                    {"name": "1.2", "fullPath": "1.2", "untagged": True},
+                ],
+            },
+        }
+    ]
+}
+
+
+def test_iter_rest_objects():
+    """Test that the REST objects have the same properties as in tmsh."""
+    objects = dict(f5p.iter_rest_objects(REST_SELF_IPS))
+    assert list(objects) == ["/Common/SELF1", "/Common/SELF2"]
+    for path, value in objects.items():
+        assert value == SELF_IPS_EXPECTED[f"net self {path}"]
+
+    # Expanded subcollections are converted to the flags of each item.
+    # Numbers are not converted to strings.
+    assert list(f5p.iter_rest_objects(REST_VLANS)) == [
+        (
+            "/Common/VLAN1",
+            {
+                "if-index": 96,
+                "tag": 100,
+                "interfaces": {"1.1": ["tagged"], "1.2": ["untagged"]},
+            },
+        )
+    ]
+
+
+def rest_stats(url, stats):
+    """Create an entry of an iControl REST stats response."""
+    entries = dict()
+    for key, value in stats.items():
+        if isinstance(value, int):
+            entries[key] = {"value": value}
+        else:
+            entries[key] = {"description": value}
+    return {url: {"nestedStats": {"entries": entries}}}
+
+
+POOL_URL = "https://localhost/mgmt/tm/ltm/pool/{}/stats"
+
+REST_POOL_STATS = {
+    "kind": "tm:ltm:pool:poolcollectionstats",
+    "entries": {
+        **rest_stats(
+            POOL_URL.format("~Common~POOL1"),
+            {
+                "tmName": "/Common/POOL1",
+                "status.availabilityState": "available",
+                "status.enabledState": "enabled",
+                "status.statusReason": "The pool is available",
+                "memberCnt": 2,
+                "availableMemberCnt": 2,
+                "activeMemberCnt": 2,
+                "minActiveMembers": 0,
+                "serverside.bitsIn": 0,
+            },
+        ),
+        **rest_stats(
+            POOL_URL.format("~Common~app.app~POOL2"),
+            {
+                "tmName": "/Common/app.app/POOL2",
+                "status.availabilityState": "offline",
+                "status.enabledState": "enabled",
+                "status.statusReason": "The children pool member(s) are down",
+                "memberCnt": 1,
+                "availableMemberCnt": 0,
+                "activeMemberCnt": 0,
+                "minActiveMembers": 0,
+            },
+        ),
+    },
+}
+
+MEMBER_URL = "https://localhost/mgmt/tm/ltm/pool/~Common~POOL1/members/{}/stats"
+
+REST_POOL_MEMBER_STATS = {
+    "entries": {
+        **rest_stats(
+            MEMBER_URL.format("~Common~10.0.0.1:80"),
+            {
+                "addr": "10.0.0.1",
+                "nodeName": "/Common/10.0.0.1",
+                "poolName": "/Common/POOL1",
+                "port": 80,
+                "status.availabilityState": "available",
+                "status.enabledState": "enabled",
+                "status.statusReason": "Pool member is available",
+            },
+        ),
+        **rest_stats(
+            MEMBER_URL.format("~Common~10.0.0.2:80"),
+            {
+                "addr": "10.0.0.2",
+                "nodeName": "/Common/10.0.0.2",
+                "poolName": "/Common/POOL1",
+                "port": 80,
+                # A member that is enabled, but whose monitor is down
+                "status.availabilityState": "offline",
+                "status.enabledState": "enabled",
+            },
+        ),
+    }
+}
+
+
+def test_rest_stats_pools():
+    """Test that the pool stats have the same columns and values as tmsh."""
+    records = [("ltm1", "show ltm pool recursive /*/*", SHOW_LTM_POOL)]
+    df_tmsh = tt.parse_output(records, f5p.LTM_POOL_AVAILABILITY)
+    records = [("ltm1", "/mgmt/tm/ltm/pool/stats", REST_POOL_STATS)]
+    df_rest = tt.parse_output(records, f5p.REST_POOL_AVAILABILITY)
+
+    assert df_rest.to_dict("records") == df_tmsh.to_dict("records")
+
+
+def test_rest_stats_members():
+    """Test that the member availability is the same as in tmsh."""
+    data = f5p.REST_POOL_MEMBER_AVAILABILITY.parse(REST_POOL_MEMBER_STATS)
+    assert data == f5p.LTM_POOL_MEMBER_AVAILABILITY.parse(SHOW_LTM_POOL_MEMBERS)
+
+
+def test_rest_stats_nested():
+    """Test the stats of older TMOS versions, which are nested one more
+    level, and IPv6 pool members."""
+    stats = rest_stats(
+        MEMBER_URL.format("~Common~2001:db8::1.443"),
+        {
+            "nodeName": "/Common/2001:db8::1",
+            "poolName": "/Common/POOL1",
+            "port": 443,
+            "status.availabilityState": "unknown",
+        },
+    )
+    data = {
+        "entries": {
+            "https://localhost/mgmt/tm/ltm/pool/~Common~POOL1/members/stats": {
+                "nestedStats": {"entries": stats}
+            }
+        }
+    }
+    assert f5p.REST_POOL_MEMBER_AVAILABILITY.parse(data) == {
+        "partition": ["Common"],
+        "pool_name": ["POOL1"],
+        "pool_member": ["2001:db8::1.443"],
+        "pool_member_state": ["unknown"],
+    }
+
+    # Stats that an entry does not have are the default
+    template = f5p.RestStats({"tmName": "name", "missing": "missing"}, default="")
+    assert template.parse(REST_POOL_STATS) == {
+        "name": ["/Common/POOL1", "/Common/app.app/POOL2"],
+        "missing": ["", ""],
+    }
+
+
+LIST_LTM_POOL_MEMBERS = """ltm pool /Common/POOL1 {
+    members {
+        /Common/10.0.0.1:80 {
+            address 10.0.0.1
+        }
+        /Common/10.0.0.2:80 {
+            address 10.0.0.2
+        }
+    }
+}
+ltm pool /Common/EMPTY {
+}"""
+
+REST_POOLS = {
+    "items": [
+        {
+            "name": "POOL1",
+            "partition": "Common",
+            "fullPath": "/Common/POOL1",
+            "monitor": "/Common/http",
+            "membersReference": {
+                "link": "https://localhost/mgmt/tm/ltm/pool/~Common~POOL1/members",
+                "isSubcollection": True,
+                "items": [
+                    {
+                        "name": "/Common/10.0.0.1:80",
+                        "partition": "Common",
+                        "fullPath": "/Common/10.0.0.1:80",
+                        "address": "10.0.0.1",
+                        "state": "up",
+                    },
+                    {
+                        "name": "/Common/10.0.0.2:80",
+                        "partition": "Common",
+                        "fullPath": "/Common/10.0.0.2:80",
+                        "address": "10.0.0.2",
+                        "state": "down",
+                    },
+                ],
+            },
+        },
+        {
+            "name": "EMPTY",
+            "partition": "Common",
+            "fullPath": "/Common/EMPTY",
+            "membersReference": {
+                "link": "https://localhost/mgmt/tm/ltm/pool/~Common~EMPTY/members",
+                "isSubcollection": True,
+            },
+        },
+    ]
+}
+
+
+def test_rest_pool_members():
+    """Test that the pool members have the same columns and values as tmsh,
+    including pools without members."""
+    records = [("ltm1", "list ltm pool", LIST_LTM_POOL_MEMBERS)]
+    df_tmsh = tt.parse_output(records, f5p.LTM_POOL_MEMBERS)
+    records = [("ltm1", "/mgmt/tm/ltm/pool", REST_POOLS)]
+    df_rest = tt.parse_output(records, f5p.REST_POOL_MEMBERS)
+
+    assert df_rest.columns.to_list() == [
+        "device",
+        "partition",
+        "pool",
+        "member",
+        "address",
+    ]
+    assert df_rest.to_dict("records") == df_tmsh.to_dict("records")
+    assert df_rest["address"].to_list() == ["10.0.0.1", "10.0.0.2", ""]
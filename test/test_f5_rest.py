@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import json
+import requests
+import sys
+from requests.adapters import BaseAdapter
+
+sys.path.append(".")
+from netmanage.helpers import f5_rest as f5r  # noqa
+
+
+class FakeAdapter(BaseAdapter):
+    """A transport adapter that answers requests without a network."""
+
+    def __init__(self, revoke=0):
+        super().__init__()
+        self.requests = list()
+        self.logins = 0
+        # The number of requests to reject with a 401 status
+        self.revoke = revoke
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        if request.url.endswith("/mgmt/shared/authn/login"):
+            self.logins += 1
+            body = {"token": {"token": f"token{self.logins}", "timeout": 1200}}
+            return self.respond(request, 200, body)
+        if self.revoke:
+            self.revoke -= 1
+            return self.respond(request, 401, {"code": 401})
+        token = request.headers.get("X-F5-Auth-Token")
+        return self.respond(request, 200, {"token": token})
+
+    def respond(self, request, status, body):
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def create_session(monkeypatch, revoke=0):
+    """Create a session that uses FakeAdapter, and record the delays. The
+    delays move a fake clock forward instead of sleeping."""
+    clock = [1000.0]
+    sleeps = list()
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr(f5r.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(f5r.time, "sleep", sleep)
+    session = f5r.F5Session("192.0.2.1", "user", "password")
+    adapter = FakeAdapter(revoke=revoke)
+    session.session.mount("https://", adapter)
+    return session, adapter, sleeps
+
+
+def test_token_reuse(monkeypatch):
+    """Test that the token is reused, and the delay is only for new tokens."""
+    session, adapter, sleeps = create_session(monkeypatch)
+
+    assert session.get("/mgmt/tm/ltm/pool/stats") == {"token": "token1"}
+    assert session.get("/mgmt/tm/ltm/virtual/stats") == {"token": "token1"}
+    assert adapter.logins == 1
+    assert sleeps == [f5r.TOKEN_DELAY]
+    assert adapter.requests[1].url == (
+        "https://192.0.2.1:443/mgmt/tm/ltm/pool/stats"
+    )
+
+    # A token that is about to expire is replaced
+    session.expires = session.ready + f5r.TOKEN_MARGIN / 2
+    assert session.get("/mgmt/tm/ltm/pool/stats") == {"token": "token2"}
+    assert adapter.logins == 2
+    assert sleeps == [f5r.TOKEN_DELAY] * 2
+
+
+def test_revoked_token(monkeypatch):
+    """Test that a request that is rejected creates a new token once."""
+    session, adapter, _ = create_session(monkeypatch, revoke=1)
+    assert session.get("/mgmt/tm/ltm/pool/stats") == {"token": "token2"}
+    assert adapter.logins == 2
+
+    # The request fails if the new token is also rejected
+    session, adapter, _ = create_session(monkeypatch, revoke=2)
+    try:
+        session.get("/mgmt/tm/ltm/pool/stats")
+    except requests.HTTPError as e:
+        assert e.response.status_code == 401
+    else:
+        raise AssertionError("The request did not fail")
+
+
+def test_get_session():
+    """Test that sessions are cached, unless their settings change."""
+    session = f5r.get_session("192.0.2.1", "user", "password")
+    assert f5r.get_session("192.0.2.1", "user", "password") is session
+    assert f5r.get_session("192.0.2.1", "user", "new") is not session
+    assert f5r.get_session("192.0.2.1", "user", "new", port=8443) is not session
+    f5r.close_sessions()
+    assert f5r._SESSIONS == dict()
+
+
+def test_get_records(monkeypatch):
+    """Test that devices that fail are left out of the records."""
+    targets = {
+        "ltm1": {"host": "192.0.2.1", "port": 443},
+        "ltm2": {"host": "192.0.2.2", "port": 443},
+        "ltm3": {"host": "192.0.2.3", "port": 8443},
+    }
+    monkeypatch.setattr(
+        f5r.se, "get_hostgroup_targets", lambda *args, **kwargs: targets
+    )
+
+    def get(self, endpoint):
+        if self.base_url == "https://192.0.2.2:443":
+            raise requests.ConnectionError("Connection refused")
+        return {"url": f"{self.base_url}{endpoint}"}
+
+    monkeypatch.setattr(f5r.F5Session, "get", get)
+    endpoints = ["/mgmt/tm/ltm/pool/stats", "/mgmt/tm/ltm/virtual/stats"]
+    records = f5r.get_records("f5", endpoints, "user", "password", "/tmp")
+    f5r.close_sessions()
+
+    assert [tuple(r) for r in records] == [
+        ("ltm1", endpoints[0], {"url": "https://192.0.2.1:443" + endpoints[0]}),
+        ("ltm1", endpoints[1], {"url": "https://192.0.2.1:443" + endpoints[1]}),
+        ("ltm3", endpoints[0], {"url": "https://192.0.2.3:8443" + endpoints[0]}),
+        ("ltm3", endpoints[1], {"url": "https://192.0.2.3:8443" + endpoints[1]}),
+    ]
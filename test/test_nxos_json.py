@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+import json
+import sys
+
+sys.path.append(".")
+from netmanage.helpers import nxos_json as nxj  # noqa
+from netmanage.parsers import cisco_nxos_parsers as cnp  # noqa
+
+INTERFACE_STATUS_JSON = json.dumps(
+    {
+        "TABLE_interface": {
+            "ROW_interface": [
+                {
+                    "interface": "Ethernet1/1",
+                    "name": "server1",
+                    "state": "connected",
+                    "vlan": "10",
+                    "duplex": "full",
+                    "speed": "10G",
+                    "type": "10Gbase-SR",
+                },
+                {
+                    "interface": "port-channel10",
+                    "state": "connected",
+                    "vlan": "trunk",
+                    "duplex": "full",
+                    "speed": "10G",
+                },
+            ]
+        }
+    }
+)
+
+INTERFACE_STATUS_TEXT = """
+Port          Name               Status    Vlan      Duplex  Speed   Type
+Eth1/1        server2            connected 10        full    10G     10Gbase-SR
+Po10          --                 connected trunk     full    10G     --
+"""
+
+VLAN_DB_JSON = json.dumps(
+    {
+        "TABLE_vlanbriefxbrief": {
+            "ROW_vlanbriefxbrief": {
+                "vlanshowbr-vlanid-utf": "10",
+                "vlanshowbr-vlanname": "users",
+                "vlanshowbr-vlanstate": "active",
+                "vlanshowplist-ifidx": "port-channel10,Ethernet1/2",
+            }
+        }
+    }
+)
+
+VLAN_DB_TEXT = """
+VLAN Name                             Status    Ports
+10   users                            active    Po10, Eth1/2
+"""
+
+VPC_STATE_JSON = json.dumps(
+    {
+        "vpc-domain-id": "1",
+        "vpc-peer-status": "peer-ok",
+        "vpc-peer-keepalive-status": "peer-alive",
+        "vpc-peer-consistency-status": "SUCCESS",
+        "vpc-role": "primary",
+        "peer-gateway": "1",
+    }
+)
+
+VPC_STATE_TEXT = """
+vPC domain id                     : 1
+Peer status                       : peer adjacency formed ok
+vPC keep-alive status             : peer is alive
+Configuration consistency status  : success
+vPC role                          : primary
+Peer Gateway                      : Enabled
+"""
+
+
+def test_abbreviate_interface():
+    """Test that interface names are abbreviated like the text output."""
+    assert nxj.abbreviate_interface("Ethernet1/1") == "Eth1/1"
+    assert nxj.abbreviate_interface("Ethernet101/1/1") == "Eth101/1/1"
+    assert nxj.abbreviate_interface("port-channel10") == "Po10"
+    assert nxj.abbreviate_interface("loopback0") == "Lo0"
+    assert nxj.abbreviate_interface("mgmt0") == "mgmt0"
+    assert nxj.abbreviate_interface("Vlan10") == "Vlan10"
+    assert nxj.format_port_list("port-channel10,Ethernet1/2") == "Po10, Eth1/2"
+
+
+def test_interface_status_mixed():
+    """Test that JSON and text output have the same interface names."""
+    records = [
+        ("sw1", "show interface status | json", INTERFACE_STATUS_JSON),
+        ("sw2", "show interface status", INTERFACE_STATUS_TEXT),
+    ]
+    df = cnp.nxos_parse_interface_status(records)
+
+    assert df["device"].to_list() == ["sw1", "sw1", "sw2", "sw2"]
+    assert df["interface"].to_list() == ["Eth1/1", "Po10", "Eth1/1", "Po10"]
+    assert df["vlan"].to_list() == ["10", "trunk", "10", "trunk"]
+    # Keys that a JSON row does not have are empty, like in the text output
+    assert df.loc[1, "type"] == ""
+
+
+def test_vlan_db_mixed():
+    """Test that the VLAN ports from JSON output are formatted like text."""
+    records = [
+        ("sw1", "show vlan brief | json", VLAN_DB_JSON),
+        ("sw2", "show vlan brief", VLAN_DB_TEXT),
+    ]
+    df = cnp.nxos_parse_vlan_db(records)
+
+    assert df["id"].to_list() == ["10", "10"]
+    assert df["ports"].to_list() == ["Po10, Eth1/2", "Po10, Eth1/2"]
+
+
+def test_vpc_state_mixed():
+    """Test that the vPC state from JSON output uses the text values."""
+    records = [
+        ("sw1", "show vpc brief | json", VPC_STATE_JSON),
+        ("sw2", "show vpc brief", VPC_STATE_TEXT),
+    ]
+    df = cnp.nxos_parse_vpc_state(records).set_index("device")
+
+    assert df.loc["sw1"].to_dict() == df.loc["sw2"].to_dict()
+    assert df.loc["sw1", "Peer status"] == "peer adjacency formed ok"
+    assert df.loc["sw1", "Peer Gateway"] == "Enabled"
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import sqlite3
+import sys
+
+sys.path.append(".")
+from netmanage.helpers import obfuscate_names as on  # noqa
+
+# 'device' and 'nameif' are renamed columns, so their values have both their
+# names and their IP addresses transformed.
+ROWS = [
+    ("sw1-10.1.1.1", "inside", "10.1.1.1/24"),
+    ("2001:db8::1", "outside 2001:DB8:0:0:abcd::1/64", "2001:db8::1"),
+    ("core-fd00::a:b", "dmz", "192.0.2.10 255.255.255.0"),
+    (None, "", "text"),
+]
+
+
+def test_round_trip(tmp_path):
+    """Test that reversing an obfuscated database returns the original rows."""
+    source = str(tmp_path / "source.db")
+    obfuscated = str(tmp_path / "obfuscated.db")
+    reversed_db = str(tmp_path / "reversed.db")
+
+    con = sqlite3.connect(source)
+    con.execute("CREATE TABLE TEST (device TEXT, nameif TEXT, address TEXT)")
+    con.executemany("INSERT INTO TEST VALUES (?, ?, ?)", ROWS)
+    con.commit()
+    con.close()
+
+    on.obfuscate_db_data(source, obfuscated, ip_offset=98765432)
+    on.reverse_db_data(obfuscated, reversed_db, ip_offset=98765432)
+
+    con = sqlite3.connect(obfuscated)
+    obfuscated_rows = con.execute("SELECT * FROM TEST").fetchall()
+    con.close()
+    con = sqlite3.connect(reversed_db)
+    reversed_rows = con.execute("SELECT * FROM TEST").fetchall()
+    con.close()
+
+    # The names and addresses were changed
+    assert obfuscated_rows[0][0].startswith("dev-")
+    assert "10.1.1.1" not in obfuscated_rows[0][0]
+    assert obfuscated_rows[1][0] == "dev-2001:db8::5e3:a79"
+
+    # Reversed IPv6 addresses are in compressed, lower-case form
+    expected = [
+        ("sw1-10.1.1.1", "inside", "10.1.1.1/24"),
+        ("2001:db8::1", "outside 2001:db8::abcd:0:0:1/64", "2001:db8::1"),
+        ("core-fd00::a:b", "dmz", "192.0.2.10 255.255.255.0"),
+        (None, "", "text"),
+    ]
+    assert reversed_rows == expected
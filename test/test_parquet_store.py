@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import sys
+
+sys.path.append(".")
+from netmanage.helpers import parquet_store as ps  # noqa
+
+
+def test_conflicting_types(tmp_path):
+    """Test reading a table whose column types change between snapshots."""
+    dataset_path = str(tmp_path / "test_parquet")
+    snapshots = {
+        "2024-01-01_0000": pd.DataFrame({"vlan": [10, 20], "name": ["a", "b"]}),
+        "2024-01-02_0000": pd.DataFrame({"vlan": ["trunk"], "mtu": [1500]}),
+        "2024-01-03_0000": pd.DataFrame({"vlan": [30], "mtu": [9216.0]}),
+    }
+    for timestamp, df in snapshots.items():
+        ps.write_snapshot(dataset_path, "NXOS_INTERFACES", df, timestamp)
+
+    df = ps.read_table(dataset_path, "NXOS_INTERFACES")
+
+    # Integers and strings are read as strings, and integers and floats are
+    # promoted to floats
+    assert df["vlan"].to_list() == ["10", "20", "trunk", "30"]
+    assert df["mtu"].dropna().to_list() == [1500.0, 9216.0]
+    assert df["timestamp"].to_list() == [
+        "2024-01-01_0000",
+        "2024-01-01_0000",
+        "2024-01-02_0000",
+        "2024-01-03_0000",
+    ]
+
+    # Only the requested partitions and columns are read
+    df = ps.read_table(
+        dataset_path,
+        "NXOS_INTERFACES",
+        columns=["vlan"],
+        timestamps=["2024-01-02_0000"],
+    )
+    assert df.to_dict("records") == [{"timestamp": "2024-01-02_0000", "vlan": "trunk"}]
+
+    # The DuckDB query layer reads the same values
+    df = ps.query(dataset_path, "select vlan from NXOS_INTERFACES order by timestamp")
+    assert df["vlan"].to_list() == ["10", "20", "trunk", "30"]
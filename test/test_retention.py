@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+import datetime as dt
+import pandas as pd
+import sys
+
+sys.path.append(".")
+from netmanage import run_collectors as rc  # noqa
+from netmanage.helpers import helpers as hp  # noqa
+from netmanage.helpers import retention as rt  # noqa
+
+NOW = dt.datetime(2026, 10, 18, 12, 0)
+
+
+def test_two_hostgroups(tmp_path):
+    """Test that each host group keeps its own snapshots.
+
+    'nxos_core' is collected hourly and 'nxos_access' once a day, both into
+    the same table. With one bucket per day, the hourly snapshots of the core
+    switches would otherwise expire every snapshot of the access switches.
+    """
+    db_path = str(tmp_path / "test.db")
+    writes = [
+        ("2026-10-16_1000", "nxos_access", "acc1"),
+        ("2026-10-16_2300", "nxos_core", "core1"),
+        ("2026-10-17_0900", "nxos_core", "core1"),
+        ("2026-10-17_1000", "nxos_access", "acc1"),
+        ("2026-10-17_2200", "nxos_core", "core1"),
+        ("2026-10-17_2300", "nxos_core", "core1"),
+    ]
+    for timestamp, hostgroup, device in writes:
+        rc.add_to_db(
+            "NXOS_VLANS",
+            pd.DataFrame({"device": [device], "name": ["users"]}),
+            timestamp,
+            db_path,
+            hostgroup=hostgroup,
+        )
+
+    policy = rt.parse_retention_policy("daily:30d")
+    expired = rt.apply_retention(db_path, "NXOS_VLANS", policy, now=NOW)
+
+    # Only the older core snapshots on 2026-10-17 are deleted
+    assert expired == ["2026-10-17_0900", "2026-10-17_2200"]
+    df = hp.get_snapshot_catalog(db_path, "NXOS_VLANS")
+    assert df[["timestamp", "hostgroup"]].values.tolist() == [
+        ["2026-10-16_1000", "nxos_access"],
+        ["2026-10-16_2300", "nxos_core"],
+        ["2026-10-17_1000", "nxos_access"],
+        ["2026-10-17_2300", "nxos_core"],
+    ]
+
+
+def test_latest_of_each_hostgroup():
+    """Test that the latest snapshot of each host group is always kept."""
+    policy = rt.parse_retention_policy("daily:1d")
+    expired = rt.select_expired_snapshots(
+        ["2026-01-01_1200", "2026-02-01_1200", "2026-03-01_1200"],
+        policy,
+        now=NOW,
+        hostgroups=["ios", "nxos", "nxos"],
+    )
+    assert expired == ["2026-02-01_1200"]
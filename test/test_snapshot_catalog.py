@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import sys
+
+sys.path.append(".")
+from netmanage import run_collectors as rc  # noqa
+from netmanage.helpers import helpers as hp  # noqa
+
+
+def create_history(db_path):
+    """Create a table with two snapshots, like a database that was created
+    before the '_snapshots' catalog existed."""
+    con = hp.connect_to_db(db_path)
+    df = pd.DataFrame(
+        {
+            "timestamp": ["2026-01-01_1200", "2026-01-01_1200", "2026-02-01_1200"],
+            "device": ["sw1", "sw2", "sw1"],
+            "name": ["users", "users", "staff"],
+        }
+    )
+    df.to_sql("NXOS_VLANS", con, index=False)
+    con.close()
+
+
+def test_backfill_on_first_write(tmp_path):
+    """Test that the first write after upgrading keeps the older snapshots."""
+    db_path = str(tmp_path / "test.db")
+    create_history(db_path)
+
+    rc.add_to_db(
+        "NXOS_VLANS",
+        pd.DataFrame({"device": ["sw1"], "name": ["servers"]}),
+        "2026-10-18_1200",
+        db_path,
+        hostgroup="nxos",
+    )
+
+    assert hp.get_snapshot_timestamps(db_path, "NXOS_VLANS") == [
+        "2026-01-01_1200",
+        "2026-02-01_1200",
+        "2026-10-18_1200",
+    ]
+    assert hp.get_latest_timestamp(db_path, "NXOS_VLANS") == "2026-10-18_1200"
+
+    df = hp.snapshot_at(db_path, "NXOS_VLANS", "2026-02-15_0000")
+    assert df["name"].to_list() == ["staff"]
+
+    df_catalog = hp.get_snapshot_catalog(db_path, "NXOS_VLANS")
+    assert df_catalog["row_count"].to_list() == [2, 1, 1]
+    assert df_catalog["hostgroup"].to_list() == ["", "", "nxos"]
+
+
+def test_backfill_on_first_read(tmp_path):
+    """Test that reading a table that is not in the catalog backfills it."""
+    db_path = str(tmp_path / "test.db")
+    create_history(db_path)
+
+    assert hp.get_snapshot_timestamps(db_path, "NXOS_VLANS") == [
+        "2026-01-01_1200",
+        "2026-02-01_1200",
+    ]
+    assert len(hp.get_snapshot_catalog(db_path, "NXOS_VLANS")) == 2
+
+    # The catalog is only backfilled once.
+    rc.add_to_db(
+        "NXOS_VLANS",
+        pd.DataFrame({"device": ["sw1"], "name": ["servers"]}),
+        "2026-10-18_1200",
+        db_path,
+    )
+    assert len(hp.get_snapshot_catalog(db_path, "NXOS_VLANS")) == 3
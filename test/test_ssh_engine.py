@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import asyncio
+import sys
+
+sys.path.append(".")
+from netmanage.helpers import ssh_engine as se  # noqa
+
+
+def connect_options(monkeypatch, **kwargs):
+    """Return the options that 'run_device_commands' passes to asyncssh."""
+    options = dict()
+
+    async def connect(host, **connect_kwargs):
+        options.update(connect_kwargs)
+        raise OSError("Connection refused")
+
+    monkeypatch.setattr(se.asyncssh, "connect", connect)
+    event = asyncio.run(
+        se.run_device_commands(
+            "rtr1",
+            "192.0.2.1",
+            22,
+            ["show version"],
+            "user",
+            "password",
+            asyncio.Semaphore(1),
+            **kwargs,
+        )
+    )
+    assert event["event"] == "runner_on_unreachable"
+    return options
+
+
+def test_known_hosts(monkeypatch):
+    """Test that host keys are verified unless checking is turned off."""
+    # asyncssh uses ~/.ssh/known_hosts if 'known_hosts' is not passed
+    assert "known_hosts" not in connect_options(monkeypatch)
+    assert "known_hosts" not in connect_options(monkeypatch, known_hosts="")
+
+    options = connect_options(monkeypatch, known_hosts="/tmp/known_hosts")
+    assert options["known_hosts"] == "/tmp/known_hosts"
+
+    options = connect_options(
+        monkeypatch, known_hosts="/tmp/known_hosts", host_key_checking=False
+    )
+    assert options["known_hosts"] is None
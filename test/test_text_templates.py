@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+import re
+import sys
+
+sys.path.append(".")
+from netmanage.helpers import text_templates as tt  # noqa
+
+
+def test_line_template():
+    """Test that each matching line is a row, and other lines are ignored."""
+    template = tt.LineTemplate(
+        r"^(?P<vlan>\d+)[ \t]+(?P<name>\S+)(?:[ \t]+(?P<state>\S+))?[ \t]*$"
+    )
+    text = "VLAN Name     State\n10   users    active\n\n20   servers\n30\n"
+
+    assert template.columns == ["vlan", "name", "state"]
+    # Optional groups that do not match are empty strings, and the fields
+    # are not matched across lines
+    assert template.parse(text) == {
+        "vlan": ["10", "20"],
+        "name": ["users", "servers"],
+        "state": ["active", ""],
+    }
+    assert template.parse("no rows") == {"vlan": [], "name": [], "state": []}
+
+
+def test_line_template_one_group():
+    """Test a template with one named group, and unnamed groups."""
+    assert tt.LineTemplate(r"^(?P<vlan>\d+)").parse("10\n20 x\ny") == {
+        "vlan": ["10", "20"]
+    }
+    template = tt.LineTemplate(r"^(Eth|Po)(?P<port>\S+)")
+    assert template.columns == ["port"]
+    assert template.parse("Eth1/1\nPo10") == {"port": ["1/1", "10"]}
+
+
+def test_header_template():
+    """Test slicing the columns at the positions of the header labels."""
+    template = tt.HeaderTemplate(
+        {"Port": "interface", "Name": "name", "Status": None, "Vlan": "vlan"},
+        skip=r"^-+",
+    )
+    text = "\n".join(
+        [
+            "",
+            "Port      Name           Status    Vlan",
+            "--------  -------------  --------  ----",
+            "Eth1/1    web server 01  connected 10",
+            "",
+            "Port      Name           Status    Vlan",
+            "Eth1/2                   disabled  1",
+        ]
+    )
+
+    assert template.columns == ["interface", "name", "vlan"]
+    # Blank lines, separators and repeated headers are skipped, and values
+    # can contain spaces
+    assert template.parse(text) == {
+        "interface": ["Eth1/1", "Eth1/2"],
+        "name": ["web server 01", ""],
+        "vlan": ["10", "1"],
+    }
+    # Output without the header has no rows
+    assert template.parse("Eth1/1  up  10") == {
+        "interface": [],
+        "name": [],
+        "vlan": [],
+    }
+    # The labels must be in the same order as the header
+    assert template.find_positions("Name Port Status Vlan") is None
+
+
+def test_record_template():
+    """Test records with fields, lists and the maximum number of values."""
+    template = tt.RecordTemplate(
+        r"^(?P<interface>port-channel\d+)",
+        fields={"total": r"(\d+) ports? in total", "age": re.compile(r"Age (\S+)")},
+        lists={"port": (r"(Eth\S+) \[", 2)},
+        default="",
+    )
+    text = "\n".join(
+        [
+            "header",
+            "port-channel1",
+            "  1 port in total",
+            "  Eth1/1 [up]",
+            "port-channel2",
+            "  Age 1d",
+            "  Eth1/2 [up]",
+            "  Eth1/3 [up]",
+            "  Eth1/4 [up]",
+        ]
+    )
+
+    assert template.columns == ["interface", "total", "age", "port_1", "port_2"]
+    # The text before the first record is ignored, and a record only uses
+    # its own lines
+    assert template.parse(text) == {
+        "interface": ["port-channel1", "port-channel2"],
+        "total": ["1", ""],
+        "age": ["", "1d"],
+        "port_1": ["Eth1/1", "Eth1/2"],
+        "port_2": ["", "Eth1/3"],
+    }
+
+
+def test_record_template_default():
+    """Test that fields that are not found are None by default."""
+    template = tt.RecordTemplate(
+        r"FEX: (?P<fex>\d+)(?: (?P<state>\w+))?", fields={"model": r"Model: (\S+)"}
+    )
+    assert template.parse("FEX: 101\nModel: N2K\nFEX: 102 Online") == {
+        "fex": ["101", "102"],
+        "state": [None, "Online"],
+        "model": ["N2K", None],
+    }
+
+
+def test_parse_output():
+    """Test that the device column is first, and the dtype is 'object'."""
+    template = tt.LineTemplate(r"^(?P<vlan>\d+)[ \t]+(?P<name>\S+)")
+    records = [
+        ("sw1", "show vlan", "10 users\n20 servers"),
+        ("sw2", "show vlan", "no vlans"),
+        ("sw3", "show vlan", "30 voice"),
+    ]
+
+    df = tt.parse_output(records, template, device_col="hostname")
+    assert df.columns.to_list() == ["hostname", "vlan", "name"]
+    assert df.values.tolist() == [
+        ["sw1", "10", "users"],
+        ["sw1", "20", "servers"],
+        ["sw3", "30", "voice"],
+    ]
+
+    df = tt.parse_output(records[1:2], template)
+    assert df.columns.to_list() == ["device", "vlan", "name"]
+    assert df.empty
+    assert (df.dtypes == object).all()
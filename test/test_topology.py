@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import sqlite3
+import sys
+
+sys.path.append(".")
+from netmanage.helpers import topology  # noqa
+
+
+def write_tables(db_path, tables):
+    """Write a dictionary of DataFrames to the database."""
+    con = sqlite3.connect(db_path)
+    for table, df in tables.items():
+        df.to_sql(table, con, index=False, if_exists="append")
+    con.close()
+
+
+def test_ios_cdp_columns(tmp_path):
+    """Test building the graph from the 'ios_parse_cdp_neighbors' columns."""
+    db_path = str(tmp_path / "test.db")
+    df = pd.DataFrame(
+        {
+            "timestamp": ["2024-01-01_0000"] * 2,
+            "Device": ["sw1", "sw1"],
+            "Local Inf": ["Gi1/0/1", "Gi1/0/2"],
+            "Neighbor": ["sw2.example.com", "sw3"],
+            "Remote Inf": ["Gi1/0/48", "Te1/1/1"],
+        }
+    )
+    write_tables(db_path, {"IOS_CDP_NEIGHBORS": df})
+
+    G = topology.build_topology_graph(db_path)
+
+    assert sorted((*sorted((u, v)), k) for u, v, k in G.edges(keys=True)) == [
+        ("sw1", "sw2", "GigabitEthernet1/0/1|GigabitEthernet1/0/48"),
+        ("sw1", "sw3", "GigabitEthernet1/0/2|TenGigabitEthernet1/1/1"),
+    ]
+
+
+def test_ios_cdp_unknown_columns(tmp_path):
+    """Test that a table without the neighbor columns is skipped instead of
+    producing an edge between the column names."""
+    db_path = str(tmp_path / "test.db")
+    df = pd.DataFrame(
+        {"timestamp": ["2024-01-01_0000"], "Device": ["sw1"], "Platform": ["C9300"]}
+    )
+    write_tables(db_path, {"IOS_CDP_NEIGHBORS": df})
+
+    assert topology.read_neighbor_tables(db_path).empty
+    assert topology.build_topology_graph(db_path).number_of_edges() == 0
+
+
+def test_meraki_latest_snapshot(tmp_path):
+    """Test that Meraki links that were removed leave the graph."""
+    db_path = str(tmp_path / "test.db")
+    devices = pd.DataFrame(
+        {
+            "timestamp": ["2024-01-01_0000", "2024-01-02_0000"],
+            "name": ["ms1", "ms1"],
+            "mac": ["aa:bb", "aa:bb"],
+        }
+    )
+    neighbors = pd.DataFrame(
+        {
+            "timestamp": ["2024-01-01_0000", "2024-01-01_0000", "2024-01-02_0000"],
+            "sourceMac": ["aa:bb"] * 3,
+            "lldp_sourcePort": ["1", "2", "1"],
+            "cdp_sourcePort": [None] * 3,
+            "lldpSystemName": ["core1", "core2", "core1"],
+            "cdpDeviceId": [None] * 3,
+            "lldpPortId": ["Gi1/0/1", "Gi1/0/2", "Gi1/0/1"],
+            "cdpPortId": [None] * 3,
+        }
+    )
+    write_tables(
+        db_path,
+        {"MERAKI_ORG_DEVICES": devices, "MERAKI_CDP_LLDP_NEIGHBORS": neighbors},
+    )
+
+    G = topology.build_topology_graph(db_path, timestamp="2024-01-01_0000")
+    assert sorted(map(sorted, G.edges())) == [["core1", "ms1"], ["core2", "ms1"]]
+
+    df_added, df_removed = topology.update_topology_graph(G, db_path)
+    assert df_added.empty
+    assert df_removed[["device_a", "device_b"]].values.tolist() == [["core2", "ms1"]]
+    assert sorted(map(sorted, G.edges())) == [["core1", "ms1"]]